@@ -1,4 +1,4 @@
-from .password import hash_password, verify_password
-from .jwt import create_access_token, decode_access_token
+from .password import hash_password, verify_password, hash_password_async, verify_password_async, needs_rehash
+from .jwt import create_access_token, decode_access_token, create_stream_ticket, decode_stream_ticket
 
-__all__ = ['hash_password', 'verify_password', 'create_access_token', 'decode_access_token']
+__all__ = ['hash_password', 'verify_password', 'hash_password_async', 'verify_password_async', 'needs_rehash', 'create_access_token', 'decode_access_token', 'create_stream_ticket', 'decode_stream_ticket']
@@ -1,6 +1,7 @@
 from fastapi import HTTPException, Header, status
 from typing import Optional
-from .jwt import decode_access_token
+from .jwt import STREAM_TICKET_TYPE, decode_access_token, decode_stream_ticket
+from .principal_cache import principal_cache, ADMIN
 from database import admins_collection
 
 async def get_current_admin(authorization: Optional[str] = Header(None)):
@@ -25,16 +26,24 @@ async def get_current_admin(authorization: Optional[str] = Header(None)):
             detail="Invalid authorization header format"
         )
     
-    # Decode token
+    # Decode token (stream tickets only open their event stream)
     payload = decode_access_token(token)
-    if not payload:
+    if not payload or payload.get("type") == STREAM_TICKET_TYPE:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid or expired token"
         )
     
+    return await _load_admin(payload.get("id"))
+
+async def _load_admin(admin_id: Optional[str]) -> dict:
+    # Serve recently resolved admins from the principal cache
+    cached = principal_cache.get(ADMIN, admin_id)
+    if cached:
+        return cached
+    
     # Get admin from database
-    admin = await admins_collection.find_one({"id": payload.get("id")})
+    admin = await admins_collection.find_one({"id": admin_id})
     if not admin:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -47,13 +56,25 @@ async def get_current_admin(authorization: Optional[str] = Header(None)):
         # Fallback to is_super_admin field
         role = "super_admin" if admin.get("is_super_admin", False) else "admin"
     
-    return {
+    principal = {
         "id": admin["id"],
         "username": admin.get("username", admin.get("email", "")),
         "email": admin.get("email", ""),
         "role": role,
         "permissions": admin.get("permissions", {})
     }
+    principal_cache.set(ADMIN, admin["id"], principal)
+    return principal
+
+async def get_admin_from_stream_ticket(ticket: Optional[str], channel: str) -> dict:
+    """Resolve the admin a stream ticket (create_stream_ticket) was issued to for `channel`"""
+    payload = decode_stream_ticket(ticket, ADMIN, channel) if ticket else None
+    if not payload:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired stream ticket"
+        )
+    return await _load_admin(payload.get("id"))
 
 async def require_super_admin(authorization: Optional[str] = Header(None)):
     """Require super admin role"""
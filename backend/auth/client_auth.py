@@ -1,6 +1,7 @@
 from fastapi import HTTPException, Header, status
 from typing import Optional
-from .jwt import decode_access_token
+from .jwt import decode_access_token, decode_stream_ticket
+from .principal_cache import principal_cache, CLIENT
 from database import clients_collection
 
 async def get_current_client(authorization: Optional[str] = Header(None)):
@@ -40,8 +41,16 @@ async def get_current_client(authorization: Optional[str] = Header(None)):
             detail="Invalid token type"
         )
     
+    return await _load_client(payload.get("id"))
+
+async def _load_client(client_id: Optional[str]) -> dict:
+    # Serve recently resolved clients from the principal cache (active clients only)
+    cached = principal_cache.get(CLIENT, client_id)
+    if cached:
+        return cached
+    
     # Get client from database
-    client = await clients_collection.find_one({"id": payload.get("id")})
+    client = await clients_collection.find_one({"id": client_id})
     if not client:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -55,10 +64,22 @@ async def get_current_client(authorization: Optional[str] = Header(None)):
             detail="Client account is deactivated"
         )
     
-    return {
+    principal = {
         "id": client["id"],
         "name": client["name"],
         "email": client["email"],
         "company": client.get("company"),
         "phone": client.get("phone")
     }
+    principal_cache.set(CLIENT, client["id"], principal)
+    return principal
+
+async def get_client_from_stream_ticket(ticket: Optional[str], channel: str) -> dict:
+    """Resolve the client a stream ticket (create_stream_ticket) was issued to for `channel`"""
+    payload = decode_stream_ticket(ticket, CLIENT, channel) if ticket else None
+    if not payload:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired stream ticket"
+        )
+    return await _load_client(payload.get("id"))
@@ -7,6 +7,12 @@ SECRET_KEY = os.environ.get('JWT_SECRET_KEY', 'your-secret-key-change-in-product
 ALGORITHM = 'HS256'
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7  # 7 days
 
+# Event stream tickets: EventSource cannot send headers, so the stream URL
+# carries one of these instead of the access token. Short-lived and bound to
+# one channel, so a logged URL is useless elsewhere and soon expires.
+STREAM_TICKET_TYPE = "stream"
+STREAM_TICKET_SECONDS = int(os.environ.get("STREAM_TICKET_SECONDS", "60"))
+
 def create_access_token(data: Dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token"""
     to_encode = data.copy()
@@ -20,6 +26,25 @@ def create_access_token(data: Dict, expires_delta: Optional[timedelta] = None) -
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def create_stream_ticket(principal: str, principal_id: str, channel: str) -> str:
+    """A ticket letting an authenticated admin/client open one channel's event stream"""
+    return create_access_token(
+        {"type": STREAM_TICKET_TYPE, "principal": principal, "id": principal_id, "channel": channel},
+        expires_delta=timedelta(seconds=STREAM_TICKET_SECONDS)
+    )
+
+def decode_stream_ticket(ticket: str, principal: str, channel: str) -> Optional[Dict]:
+    """The ticket's payload if it was issued to `principal` for `channel` and has not expired"""
+    payload = decode_access_token(ticket)
+    if (
+        not payload
+        or payload.get("type") != STREAM_TICKET_TYPE
+        or payload.get("principal") != principal
+        or payload.get("channel") != channel
+    ):
+        return None
+    return payload
+
 def decode_access_token(token: str) -> Optional[Dict]:
     """Decode and verify a JWT token"""
     try:
@@ -1,8 +1,36 @@
+"""
+Password hashing with bcrypt.
+
+hash_password / verify_password are synchronous and meant for scripts.
+Request handlers use hash_password_async / verify_password_async, which run
+bcrypt in a small dedicated thread pool (bcrypt releases the GIL) so a login
+never stalls the event loop. At most PASSWORD_HASH_QUEUE_LIMIT operations may
+be running or waiting; beyond that callers get 429 immediately instead of
+queueing behind a login burst.
+
+New hashes use BCRYPT_ROUNDS. Hashes made with a different cost are upgraded
+on the next successful login (see needs_rehash).
+"""
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 import bcrypt
+from fastapi import HTTPException, status
+
+BCRYPT_ROUNDS = int(os.environ.get("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_QUEUE_LIMIT = int(os.environ.get("PASSWORD_HASH_QUEUE_LIMIT", "32"))
+
+_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+_pending = 0
+_pending_lock = threading.Lock()
+_rejected = 0
 
 def hash_password(password: str) -> str:
     """Hash a password using bcrypt"""
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
     return hashed.decode('utf-8')
 
@@ -12,3 +40,44 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         plain_password.encode('utf-8'),
         hashed_password.encode('utf-8')
     )
+
+def needs_rehash(hashed_password: str) -> bool:
+    """True if the hash was made with a cost other than BCRYPT_ROUNDS"""
+    try:
+        return int(hashed_password.split("$")[2]) != BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return False
+
+async def _run_in_pool(func, *args):
+    global _pending, _rejected
+    with _pending_lock:
+        if _pending >= PASSWORD_HASH_QUEUE_LIMIT:
+            _rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many login attempts in progress, please retry shortly",
+                headers={"Retry-After": "1"}
+            )
+        _pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_executor, func, *args)
+    finally:
+        with _pending_lock:
+            _pending -= 1
+
+async def hash_password_async(password: str) -> str:
+    """hash_password on the bcrypt pool"""
+    return await _run_in_pool(hash_password, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password on the bcrypt pool"""
+    return await _run_in_pool(verify_password, plain_password, hashed_password)
+
+def pool_stats() -> dict:
+    return {
+        "workers": PASSWORD_HASH_WORKERS,
+        "queue_limit": PASSWORD_HASH_QUEUE_LIMIT,
+        "pending": _pending,
+        "rejected": _rejected,
+        "bcrypt_rounds": BCRYPT_ROUNDS,
+    }
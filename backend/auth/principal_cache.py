@@ -0,0 +1,104 @@
+"""
+Short-lived in-process cache of authenticated principals.
+
+get_current_admin / get_current_client resolve the JWT subject to a database
+record on every protected request. This cache keeps the resolved principal for
+a few seconds so dashboard polling does not hit Mongo on every call.
+
+Entries are keyed by (kind, subject id), bounded in size with LRU eviction and
+expire after PRINCIPAL_CACHE_TTL_SECONDS. Routes that change or remove an admin
+or client must call invalidate() so permission edits and deactivations take
+effect immediately on this worker; other workers pick them up within the TTL.
+"""
+import copy
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.environ.get("PRINCIPAL_CACHE_TTL_SECONDS", "30"))
+PRINCIPAL_CACHE_MAX_SIZE = int(os.environ.get("PRINCIPAL_CACHE_MAX_SIZE", "1024"))
+
+
+class PrincipalCache:
+    """Bounded LRU cache with per-entry TTL and hit/miss counters"""
+
+    def __init__(self, max_size: int = PRINCIPAL_CACHE_MAX_SIZE, ttl: float = PRINCIPAL_CACHE_TTL_SECONDS):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_size > 0
+
+    def get(self, kind: str, subject_id: str) -> Optional[Dict]:
+        """Return a copy of the cached principal, or None on a miss"""
+        if not self.enabled:
+            return None
+        key = (kind, subject_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return copy.deepcopy(entry[1])
+
+    def set(self, kind: str, subject_id: str, principal: Dict):
+        if not self.enabled:
+            return
+        key = (kind, subject_id)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, copy.deepcopy(principal))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, kind: str, subject_id: str):
+        """Drop a principal so the next request reloads it from the database"""
+        with self._lock:
+            if self._entries.pop((kind, subject_id), None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+principal_cache = PrincipalCache()
+
+ADMIN = "admin"
+CLIENT = "client"
+
+
+def invalidate_admin(admin_id: str):
+    principal_cache.invalidate(ADMIN, admin_id)
+
+
+def invalidate_client(client_id: str):
+    principal_cache.invalidate(CLIENT, client_id)
@@ -66,12 +66,14 @@ async def auto_initialize_database():
     """
     try:
         from database import projects_collection, services_collection
+        from utils.response_cache import bump_shared
 
         # Seed projects
         projects_count = await projects_collection.count_documents({})
         if projects_count == 0:
             print("📦 No projects found. Seeding portfolio projects...")
             await projects_collection.insert_many(PORTFOLIO_PROJECTS)
+            await bump_shared("projects")
             print(f"✅ Seeded {len(PORTFOLIO_PROJECTS)} projects")
         else:
             print(f"✅ Projects already exist ({projects_count})")
@@ -81,6 +83,7 @@ async def auto_initialize_database():
         if services_count == 0:
             print("📦 No services found. Seeding services...")
             await services_collection.insert_many(SERVICES_DATA)
+            await bump_shared("services")
             print(f"✅ Seeded {len(SERVICES_DATA)} services")
         else:
             print(f"✅ Services already exist ({services_count})")
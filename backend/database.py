@@ -5,6 +5,8 @@ import logging
 from pathlib import Path
 from urllib.parse import quote_plus
 
+from utils.metrics import command_timer
+
 # ---------------- LOGGING ----------------
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -52,6 +54,8 @@ try:
         SAFE_MONGODB_URI,
         serverSelectionTimeoutMS=5000,
         connectTimeoutMS=10000,
+        # Per-command timing, attributed to the current request (utils/metrics.py)
+        event_listeners=[command_timer],
     )
     db = client[DB_NAME]
     logger.info(f"✅ MongoDB connected | DB: {DB_NAME}")
@@ -78,14 +82,32 @@ testimonials_collection = db["testimonials"]
 newsletter_collection = db["newsletter"]
 pricing_collection = db["pricing"]
 analytics_collection = db["analytics"]
+analytics_rollups_collection = db["analytics_rollups"]
 clients_collection = db["clients"]
 client_projects_collection = db["client_projects"]
 bookings_collection = db["bookings"]
 booking_settings_collection = db["booking_settings"]
+booking_slots_collection = db["booking_slots"]
 feelings_services_collection = db["feelings_services"]
 service_requests_collection = db["service_requests"]
 service_contacts_collection = db["service_contacts"]
 generated_links_collection = db["generated_links"]
+email_outbox_collection = db["email_outbox"]
+blobs_collection = db["blobs"]
+blob_refs_collection = db["blob_refs"]
+image_derivatives_collection = db["image_derivatives"]
+cache_versions_collection = db["cache_versions"]
+response_cache_collection = db["response_cache"]
+realtime_events_collection = db["realtime_events"]
+counters_collection = db["counters"]
+
+# Client project sub-entities (used when CLIENT_PROJECT_STORAGE=split)
+project_milestones_collection = db["project_milestones"]
+project_tasks_collection = db["project_tasks"]
+project_files_collection = db["project_files"]
+project_comments_collection = db["project_comments"]
+project_chat_messages_collection = db["project_chat_messages"]
+project_activity_collection = db["project_activity"]
 
 # ---------------- CLEAN SHUTDOWN ----------------
 async def close_db_connection():
@@ -0,0 +1,226 @@
+"""
+Index registry for every MongoDB collection the backend uses.
+
+INDEXES declares, per collection, the indexes the routes rely on. Unique
+indexes are declared only where a route already assumes a single match (e.g.
+one client per email). ensure_indexes() applies the registry idempotently at
+startup and returns a drift report:
+
+- created:    declared indexes that were missing and have been built
+- mismatched: an index with the declared name exists with different keys/options
+- undeclared: indexes present in the database but not in the registry
+- failed:     declared indexes that could not be built (e.g. duplicate data
+              blocking a unique index)
+
+Nothing is ever dropped automatically; drift is only reported. To apply or
+check the registry by hand use scripts/maintenance/ensure_indexes.py.
+"""
+import logging
+import os
+from typing import Dict, List, Optional
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+from database import db
+
+logger = logging.getLogger(__name__)
+
+ENSURE_INDEXES_ON_STARTUP = os.environ.get("ENSURE_INDEXES_ON_STARTUP", "true").lower() == "true"
+
+
+def _index(
+    keys,
+    name: str,
+    unique: bool = False,
+    partial: Optional[Dict] = None,
+    expire_after: Optional[int] = None,
+) -> IndexModel:
+    options = {"name": name}
+    if unique:
+        options["unique"] = True
+    if partial:
+        options["partialFilterExpression"] = partial
+    if expire_after is not None:
+        options["expireAfterSeconds"] = expire_after
+    return IndexModel(keys, **options)
+
+
+def _unique_id() -> IndexModel:
+    """Every collection addressed by the custom string 'id' field"""
+    return _index([("id", ASCENDING)], "id_unique", unique=True, partial={"id": {"$type": "string"}})
+
+
+def _unique_string(field: str) -> IndexModel:
+    """Unique on a string field, ignoring documents where it is missing"""
+    return _index([(field, ASCENDING)], f"{field}_unique", unique=True, partial={field: {"$type": "string"}})
+
+
+INDEXES: Dict[str, List[IndexModel]] = {
+    "users": [_unique_id()],
+    "page_content": [_unique_id(), _index([("page", ASCENDING)], "page")],
+    "services": [_unique_id(), _index([("order", ASCENDING)], "order")],
+    "projects": [
+        _unique_id(),
+        _index([("is_private", ASCENDING), ("created_at", DESCENDING)], "is_private_created_at"),
+        _index([("created_at", DESCENDING)], "created_at_desc"),
+    ],
+    "contacts": [_unique_id(), _index([("created_at", DESCENDING)], "created_at_desc")],
+    "settings": [_unique_id()],
+    "admins": [_unique_id(), _unique_string("username"), _index([("email", ASCENDING)], "email"), _index([("role", ASCENDING)], "role")],
+    "storage": [_unique_id(), _index([("created_by", ASCENDING)], "created_by")],
+    "skills": [_unique_id()],
+    "content": [_unique_id()],
+    "notes": [_unique_id(), _index([("updated_at", DESCENDING)], "updated_at_desc")],
+    "contact_page": [_unique_id()],
+    "conversations": [
+        _unique_id(),
+        # One conversation per customer email; chat intake upserts on it
+        _unique_string("customer_email"),
+        # Inbox keyset pagination; also serves plain last_message_at sorts
+        _index([("last_message_at", DESCENDING), ("id", DESCENDING)], "last_message_at_id"),
+    ],
+    "blogs": [
+        _unique_id(),
+        _unique_string("slug"),
+        _index([("status", ASCENDING), ("created_at", DESCENDING)], "status_created_at"),
+    ],
+    "testimonials": [
+        _unique_id(),
+        _index([("status", ASCENDING), ("created_at", DESCENDING)], "status_created_at"),
+        _index([("client_id", ASCENDING), ("project_id", ASCENDING)], "client_project"),
+    ],
+    "newsletter": [_unique_id(), _unique_string("email"), _index([("created_at", DESCENDING)], "created_at_desc")],
+    "pricing": [_unique_id()],
+    "analytics": [
+        _index([("event_type", ASCENDING), ("timestamp", DESCENDING)], "event_type_timestamp"),
+        _index([("timestamp", DESCENDING)], "timestamp_desc"),
+    ],
+    "analytics_rollups": [
+        _index([("granularity", ASCENDING), ("bucket", ASCENDING), ("event_type", ASCENDING)], "granularity_bucket_event_type"),
+    ],
+    "clients": [_unique_id(), _unique_string("email")],
+    "client_projects": [
+        _unique_id(),
+        _index([("client_id", ASCENDING)], "client_id"),
+        # Summary list keyset pagination, one per project_store.SUMMARY_SORT_FIELDS entry
+        *[
+            _index([(field, ASCENDING), ("id", ASCENDING)], f"{field}_id")
+            for field in ("last_activity_at", "created_at", "updated_at", "expected_delivery",
+                          "name", "status", "priority", "progress")
+        ],
+    ],
+    "bookings": [
+        _unique_id(),
+        _index([("preferred_date", ASCENDING), ("preferred_time_slot", ASCENDING), ("status", ASCENDING)], "slot_status"),
+        _index([("status", ASCENDING), ("preferred_date", ASCENDING)], "status_date"),
+        _index([("created_at", DESCENDING)], "created_at_desc"),
+    ],
+    "booking_slots": [_index([("date", ASCENDING)], "date")],
+    "booking_settings": [_unique_id(), _index([("is_active", ASCENDING)], "is_active")],
+    "feelings_services": [_unique_id(), _index([("display_order", ASCENDING)], "display_order")],
+    "service_requests": [_unique_id()],
+    "service_contacts": [_unique_id(), _index([("status", ASCENDING), ("created_at", DESCENDING)], "status_created_at")],
+    "generated_links": [_unique_id(), _unique_string("short_code")],
+    "email_outbox": [
+        _index([("status", ASCENDING), ("next_attempt_at", ASCENDING)], "status_next_attempt"),
+        _index([("status", ASCENDING), ("lease_until", ASCENDING)], "status_lease"),
+    ],
+    "blobs": [_index([("refcount", ASCENDING), ("unreferenced_at", ASCENDING)], "refcount_unreferenced_at")],
+    "blob_refs": [_index([("sha256", ASCENDING)], "sha256")],
+    "image_derivatives": [_index([("status", ASCENDING), ("next_attempt_at", ASCENDING)], "status_next_attempt")],
+    "response_cache": [_index([("expires_at", ASCENDING)], "expires_at_ttl", expire_after=0)],
+    "credentials": [_unique_id(), _index([("key", ASCENDING)], "key")],
+}
+
+# Client project sub-entity collections (CLIENT_PROJECT_STORAGE=split)
+for _name in ("project_milestones", "project_tasks", "project_files",
+              "project_comments", "project_chat_messages", "project_activity"):
+    INDEXES[_name] = [
+        _index([("project_id", ASCENDING), ("_id", ASCENDING)], "project_order"),
+        _index([("project_id", ASCENDING), ("id", ASCENDING)], "project_entry_unique", unique=True),
+    ]
+
+
+def _plain(value):
+    """SON/nested mappings -> plain dicts so server and local specs compare equal"""
+    if isinstance(value, dict):
+        return {k: _plain(v) for k, v in value.items()}
+    return value
+
+
+def _normalize(spec: Dict) -> Dict:
+    """Reduce an index description to the options we compare"""
+    return {
+        "key": [(k, int(v) if isinstance(v, (int, float)) else v) for k, v in dict(spec["key"]).items()],
+        "unique": bool(spec.get("unique", False)),
+        "partialFilterExpression": _plain(spec.get("partialFilterExpression")),
+        "expireAfterSeconds": spec.get("expireAfterSeconds"),
+    }
+
+
+async def ensure_indexes(
+    collections: Optional[List[str]] = None,
+    create: bool = True,
+    database=None,
+) -> Dict[str, Dict[str, List[str]]]:
+    """
+    Apply the registry (or part of it) and return the drift report, keyed by collection.
+    With create=False nothing is built; missing indexes are reported under "missing".
+    """
+    database = db if database is None else database
+    report: Dict[str, Dict[str, List[str]]] = {}
+
+    for collection_name, models in INDEXES.items():
+        if collections and collection_name not in collections:
+            continue
+
+        collection = database[collection_name]
+        existing = {}
+        try:
+            async for spec in collection.list_indexes():
+                existing[spec["name"]] = spec
+        except OperationFailure:
+            existing = {}  # Collection does not exist yet
+
+        entry = {"created": [], "missing": [], "mismatched": [], "undeclared": [], "failed": []}
+        to_create = []
+
+        for model in models:
+            declared = model.document
+            name = declared["name"]
+            if name in existing:
+                if _normalize(existing[name]) != _normalize(declared):
+                    entry["mismatched"].append(name)
+            else:
+                to_create.append(model)
+
+        declared_names = {model.document["name"] for model in models}
+        entry["undeclared"] = [name for name in existing if name != "_id_" and name not in declared_names]
+
+        for model in to_create:
+            name = model.document["name"]
+            if not create:
+                entry["missing"].append(name)
+                continue
+            try:
+                await collection.create_indexes([model])
+                entry["created"].append(name)
+            except OperationFailure as e:
+                entry["failed"].append(f"{name}: {e.details.get('errmsg', str(e)) if e.details else str(e)}")
+
+        report[collection_name] = {k: v for k, v in entry.items() if v}
+
+    return {name: entry for name, entry in report.items() if entry}
+
+
+def log_report(report: Dict[str, Dict[str, List[str]]]):
+    """Log the drift report from ensure_indexes()"""
+    if not report:
+        logger.info("✅ Indexes match the registry")
+        return
+    for collection_name, entry in report.items():
+        for kind, names in entry.items():
+            level = logging.INFO if kind == "created" else logging.WARNING
+            logger.log(level, f"Index {kind} on {collection_name}: {', '.join(names)}")
+
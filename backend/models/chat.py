@@ -17,6 +17,9 @@ class Conversation(BaseModel):
     customer_phone: Optional[str] = None
     messages: List[ChatMessage] = Field(default_factory=list)
     unread_count: int = 0
+    # Maintained on every message so the inbox never reads `messages`
+    last_message_preview: str = ""
+    last_message_sender: Optional[str] = None
     last_message_at: datetime = Field(default_factory=datetime.utcnow)
     created_at: datetime = Field(default_factory=datetime.utcnow)
     
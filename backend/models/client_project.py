@@ -12,6 +12,8 @@ class ProjectFile(BaseModel):
     uploaded_by: str  # Admin ID
     file_size: Optional[int] = 0  # Size in bytes
     file_type: Optional[str] = None  # MIME type
+    sha256: Optional[str] = None  # Content checksum, computed during upload
+    blob_key: Optional[str] = None  # Ref key in the blob store (utils/blob_store.py); None for older files
 
 class ProjectMilestone(BaseModel):
     """Milestone for a project"""
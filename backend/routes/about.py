@@ -6,6 +6,7 @@ from auth.admin_auth import get_current_admin
 from models.about import AboutContent
 from datetime import datetime
 import uuid
+from utils import response_cache
 
 router = APIRouter(prefix="/about", tags=["about"])
 
@@ -70,10 +71,12 @@ async def update_about_content(
                 {"id": existing['id']},
                 content_dict
             )
+            await response_cache.bump("about")
         else:
             # Create new content
             content_dict['id'] = str(uuid.uuid4())
             await about_collection.insert_one(content_dict)
+            await response_cache.bump("about")
         
         # Return updated content
         content_dict.pop('_id', None)
@@ -102,6 +105,7 @@ async def initialize_about_content(current_admin: dict = Depends(get_current_adm
     content_dict['updated_by'] = current_admin['username']
     
     await about_collection.insert_one(content_dict)
+    await response_cache.bump("about")
     
     content_dict.pop('_id', None)
     return AboutContentResponse(**content_dict)
@@ -1,23 +1,29 @@
-from fastapi import APIRouter, HTTPException, status, Depends, UploadFile, File
-from typing import List
+from fastapi import APIRouter, HTTPException, status, Depends, UploadFile, File, Query, Header
+from typing import List, Optional, Union
 from schemas.client_project import (
     ClientProjectCreate, ClientProjectUpdate, ClientProjectResponse, 
     FileUploadResponse, ProjectFileResponse, MilestoneCreate, MilestoneUpdate,
     MilestoneResponse, TaskCreate, TaskUpdate, TaskResponse, CommentCreate,
     CommentResponse, TeamMemberAdd, TeamMemberResponse, BudgetUpdate,
-    BudgetResponse, ActivityResponse, ChatMessageCreate, ChatMessageResponse
+    BudgetResponse, ActivityResponse, ChatMessageCreate, ChatMessageResponse,
+    MilestonePage, TaskPage, ProjectFilePage, CommentPage, ChatMessagePage, ActivityPage,
+    ClientProjectSummary, ClientProjectSummaryPage
 )
 from database import client_projects_collection, clients_collection, admins_collection
-from auth.admin_auth import get_current_admin
+from auth import create_stream_ticket
+from auth.admin_auth import get_current_admin, get_admin_from_stream_ticket
+from auth.jwt import STREAM_TICKET_SECONDS
+from auth.principal_cache import ADMIN
 from models.client_project import (
     ClientProject, ProjectFile, ProjectMilestone, ProjectTask,
     ProjectComment, ProjectActivity, TeamMember, Budget, ChatMessage
 )
+from utils import blob_store, project_store, realtime
+from utils.uploads import PROJECT_FILE_POLICY, save_upload
 from utils.currency_converter import get_all_currencies, convert_currency, format_currency, get_currency_info
 from datetime import datetime
 import os
-import uuid
-import shutil
+import re
 
 router = APIRouter(prefix="/admin/client-projects", tags=["admin-client-projects"])
 
@@ -140,18 +146,85 @@ def convert_project_to_response(project_doc) -> ClientProjectResponse:
         last_activity_at=project_doc.get('last_activity_at')
     )
 
-@router.get("/", response_model=List[ClientProjectResponse])
-async def get_all_projects(admin = Depends(get_current_admin)):
-    """Get all client projects (Admin only)"""
+async def get_project_or_404(project_id: str) -> dict:
+    """Read the project header (no sub-entity arrays) or raise 404"""
+    project_doc = await project_store.get_project_header({"id": project_id})
+    if not project_doc:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
+    return project_doc
+
+async def get_page(project_id: str, field: str, cursor: Optional[str], limit: int):
+    """Fetch one page of a project sub-resource"""
+    await get_project_or_404(project_id)
+    try:
+        return await project_store.list_entries(project_id, field, cursor, limit)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+@router.get("/", response_model=Union[ClientProjectSummaryPage, List[ClientProjectResponse]])
+async def get_all_projects(
+    view: str = "full",
+    fields: Optional[str] = None,
+    status_filter: Optional[str] = Query(None, alias="status"),
+    priority: Optional[str] = None,
+    client_id: Optional[str] = None,
+    tag: Optional[str] = None,
+    q: Optional[str] = None,
+    sort: str = "-last_activity_at",
+    cursor: Optional[str] = None,
+    limit: int = project_store.DEFAULT_PAGE_SIZE,
+    admin = Depends(get_current_admin)
+):
+    """
+    Get all client projects (Admin only)
+    
+    Query params:
+    - view: "full" (default) returns every project with all sub-entities;
+      "summary" returns one page of lightweight rows with counters
+    - fields: comma-separated header fields to include in summary rows
+    - status, priority, client_id, tag, q (name search): filters
+    - sort: summary sort field, prefix with "-" for descending (default -last_activity_at)
+    - cursor, limit: summary pagination
+    """
+    match = {}
+    if status_filter:
+        match['status'] = status_filter
+    if priority:
+        match['priority'] = priority
+    if client_id:
+        match['client_id'] = client_id
+    if tag:
+        match['tags'] = tag
+    if q:
+        match['name'] = {"$regex": re.escape(q), "$options": "i"}
+    
+    if view == "summary":
+        descending = sort.startswith("-")
+        try:
+            items, next_cursor = await project_store.list_project_summaries(
+                match,
+                fields=[f.strip() for f in fields.split(",")] if fields else None,
+                sort_by=sort.lstrip("-"),
+                descending=descending,
+                cursor=cursor,
+                limit=limit
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        return ClientProjectSummaryPage(
+            items=[ClientProjectSummary(**item) for item in items],
+            next_cursor=next_cursor
+        )
+    
     projects = []
-    async for project_doc in client_projects_collection.find():
+    async for project_doc in project_store.find_full_projects(match):
         projects.append(convert_project_to_response(project_doc))
     return projects
 
 @router.get("/{project_id}", response_model=ClientProjectResponse)
 async def get_project(project_id: str, admin = Depends(get_current_admin)):
     """Get a specific client project (Admin only)"""
-    project_doc = await client_projects_collection.find_one({"id": project_id})
+    project_doc = await project_store.get_full_project({"id": project_id})
     
     if not project_doc:
         raise HTTPException(
@@ -212,20 +285,14 @@ async def create_project(project_data: ClientProjectCreate, admin = Depends(get_
         for a in project_dict['activity_log']
     ]
     
-    await client_projects_collection.insert_one(project_dict)
+    await project_store.insert_project(project_dict)
     
     return convert_project_to_response(project_dict)
 
 @router.put("/{project_id}", response_model=ClientProjectResponse)
 async def update_project(project_id: str, project_data: ClientProjectUpdate, admin = Depends(get_current_admin)):
     """Update a client project (Admin only)"""
-    project_doc = await client_projects_collection.find_one({"id": project_id})
-    
-    if not project_doc:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Project not found"
-        )
+    project_doc = await get_project_or_404(project_id)
     
     # Prepare update data
     update_data = {}
@@ -283,9 +350,8 @@ async def update_project(project_id: str, project_data: ClientProjectUpdate, adm
         changes.append("Tags updated")
     
     update_data['updated_at'] = datetime.utcnow().isoformat()
-    update_data['last_activity_at'] = datetime.utcnow().isoformat()
     
-    # Add activity log
+    # Add activity log together with the field changes
     if changes:
         activity = log_activity(
             project_id,
@@ -295,29 +361,30 @@ async def update_project(project_id: str, project_data: ClientProjectUpdate, adm
             admin.get("username", "Admin")
         )
         activity['timestamp'] = activity['timestamp'].isoformat()
+        await project_store.add_entries(project_id, {"activity_log": activity}, extra_set=update_data)
+    else:
+        update_data['last_activity_at'] = datetime.utcnow().isoformat()
         await client_projects_collection.update_one(
             {"id": project_id},
-            {"$push": {"activity_log": activity}}
+            {"$set": update_data}
         )
     
-    await client_projects_collection.update_one(
-        {"id": project_id},
-        {"$set": update_data}
-    )
-    
-    updated_project = await client_projects_collection.find_one({"id": project_id})
+    updated_project = await project_store.get_full_project({"id": project_id})
     return convert_project_to_response(updated_project)
 
 @router.delete("/{project_id}")
 async def delete_project(project_id: str, admin = Depends(get_current_admin)):
     """Delete a client project (Admin only)"""
-    project_doc = await client_projects_collection.find_one({"id": project_id})
+    project_doc = await project_store.get_project_header({"id": project_id})
     
     if project_doc:
-        # Delete associated files from filesystem
-        for file_info in project_doc.get('files', []):
+        # Blob-backed files: drop the project's refs in one go, the GC sweep frees the bytes
+        await blob_store.release_prefix(f"client_projects/{project_id}/")
+
+        # Files uploaded before the blob store live in the project directory
+        for file_info in await project_store.get_all_entries(project_id, "files"):
             file_path = file_info.get('file_path')
-            if file_path and os.path.exists(file_path):
+            if file_path and not file_info.get('blob_key') and os.path.exists(file_path):
                 try:
                     os.remove(file_path)
                 except Exception:
@@ -331,18 +398,29 @@ async def delete_project(project_id: str, admin = Depends(get_current_admin)):
             detail="Project not found"
         )
     
+    await project_store.delete_project_entries(project_id)
+    
     return {"message": "Project deleted successfully"}
 
 # ============================================================================
 # MILESTONE ENDPOINTS
 # ============================================================================
 
+@router.get("/{project_id}/milestones", response_model=MilestonePage)
+async def list_milestones(
+    project_id: str,
+    cursor: Optional[str] = None,
+    limit: int = project_store.DEFAULT_PAGE_SIZE,
+    admin = Depends(get_current_admin)
+):
+    """List a project's milestones, one page at a time"""
+    items, next_cursor = await get_page(project_id, "milestones", cursor, limit)
+    return MilestonePage(items=[MilestoneResponse(**m) for m in items], next_cursor=next_cursor)
+
 @router.post("/{project_id}/milestones", response_model=MilestoneResponse)
 async def add_milestone(project_id: str, milestone_data: MilestoneCreate, admin = Depends(get_current_admin)):
     """Add a milestone to project"""
-    project_doc = await client_projects_collection.find_one({"id": project_id})
-    if not project_doc:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
+    await get_project_or_404(project_id)
     
     milestone = ProjectMilestone(**milestone_data.model_dump())
     milestone_dict = milestone.model_dump()
@@ -360,16 +438,10 @@ async def add_milestone(project_id: str, milestone_data: MilestoneCreate, admin
     )
     activity['timestamp'] = activity['timestamp'].isoformat()
     
-    await client_projects_collection.update_one(
-        {"id": project_id},
-        {
-            "$push": {
-                "milestones": milestone_dict,
-                "activity_log": activity
-            },
-            "$set": {"last_activity_at": datetime.utcnow().isoformat()}
-        }
-    )
+    await project_store.add_entries(project_id, {
+        "milestones": milestone_dict,
+        "activity_log": activity
+    })
     
     return MilestoneResponse(**{**milestone_dict, 'created_at': milestone_dict['created_at']})
 
@@ -381,33 +453,21 @@ async def update_milestone(
     admin = Depends(get_current_admin)
 ):
     """Update a milestone"""
-    project_doc = await client_projects_collection.find_one({"id": project_id})
-    if not project_doc:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
-    
-    # Find and update milestone
-    milestones = project_doc.get('milestones', [])
-    milestone_found = False
-    
-    for idx, milestone in enumerate(milestones):
-        if milestone['id'] == milestone_id:
-            milestone_found = True
-            if milestone_data.title is not None:
-                milestones[idx]['title'] = milestone_data.title
-            if milestone_data.description is not None:
-                milestones[idx]['description'] = milestone_data.description
-            if milestone_data.due_date is not None:
-                milestones[idx]['due_date'] = milestone_data.due_date.isoformat()
-            if milestone_data.status is not None:
-                milestones[idx]['status'] = milestone_data.status
-                if milestone_data.status == "completed":
-                    milestones[idx]['completion_date'] = datetime.utcnow().isoformat()
-            if milestone_data.order is not None:
-                milestones[idx]['order'] = milestone_data.order
-            break
-    
-    if not milestone_found:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Milestone not found")
+    await get_project_or_404(project_id)
+    
+    changes = {}
+    if milestone_data.title is not None:
+        changes['title'] = milestone_data.title
+    if milestone_data.description is not None:
+        changes['description'] = milestone_data.description
+    if milestone_data.due_date is not None:
+        changes['due_date'] = milestone_data.due_date.isoformat()
+    if milestone_data.status is not None:
+        changes['status'] = milestone_data.status
+        if milestone_data.status == "completed":
+            changes['completion_date'] = datetime.utcnow().isoformat()
+    if milestone_data.order is not None:
+        changes['order'] = milestone_data.order
     
     # Add activity log
     activity = log_activity(
@@ -419,18 +479,10 @@ async def update_milestone(
     )
     activity['timestamp'] = activity['timestamp'].isoformat()
     
-    await client_projects_collection.update_one(
-        {"id": project_id},
-        {
-            "$set": {
-                "milestones": milestones,
-                "last_activity_at": datetime.utcnow().isoformat()
-            },
-            "$push": {"activity_log": activity}
-        }
-    )
+    updated_milestone = await project_store.update_entry(project_id, "milestones", milestone_id, changes, activity)
+    if not updated_milestone:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Milestone not found")
     
-    updated_milestone = milestones[idx]
     return MilestoneResponse(**updated_milestone)
 
 @router.delete("/{project_id}/milestones/{milestone_id}")
@@ -446,16 +498,9 @@ async def delete_milestone(project_id: str, milestone_id: str, admin = Depends(g
     )
     activity['timestamp'] = activity['timestamp'].isoformat()
     
-    result = await client_projects_collection.update_one(
-        {"id": project_id},
-        {
-            "$pull": {"milestones": {"id": milestone_id}},
-            "$push": {"activity_log": activity},
-            "$set": {"last_activity_at": datetime.utcnow().isoformat()}
-        }
-    )
+    removed = await project_store.remove_entry(project_id, "milestones", milestone_id, activity)
     
-    if result.modified_count == 0:
+    if not removed:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Milestone not found")
     
     return {"message": "Milestone deleted successfully"}
@@ -464,12 +509,21 @@ async def delete_milestone(project_id: str, milestone_id: str, admin = Depends(g
 # TASK ENDPOINTS
 # ============================================================================
 
+@router.get("/{project_id}/tasks", response_model=TaskPage)
+async def list_tasks(
+    project_id: str,
+    cursor: Optional[str] = None,
+    limit: int = project_store.DEFAULT_PAGE_SIZE,
+    admin = Depends(get_current_admin)
+):
+    """List a project's tasks, one page at a time"""
+    items, next_cursor = await get_page(project_id, "tasks", cursor, limit)
+    return TaskPage(items=[TaskResponse(**t) for t in items], next_cursor=next_cursor)
+
 @router.post("/{project_id}/tasks", response_model=TaskResponse)
 async def add_task(project_id: str, task_data: TaskCreate, admin = Depends(get_current_admin)):
     """Add a task to project"""
-    project_doc = await client_projects_collection.find_one({"id": project_id})
-    if not project_doc:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
+    await get_project_or_404(project_id)
     
     task = ProjectTask(**task_data.model_dump())
     task_dict = task.model_dump()
@@ -487,16 +541,10 @@ async def add_task(project_id: str, task_data: TaskCreate, admin = Depends(get_c
     )
     activity['timestamp'] = activity['timestamp'].isoformat()
     
-    await client_projects_collection.update_one(
-        {"id": project_id},
-        {
-            "$push": {
-                "tasks": task_dict,
-                "activity_log": activity
-            },
-            "$set": {"last_activity_at": datetime.utcnow().isoformat()}
-        }
-    )
+    await project_store.add_entries(project_id, {
+        "tasks": task_dict,
+        "activity_log": activity
+    })
     
     return TaskResponse(**task_dict)
 
@@ -508,36 +556,25 @@ async def update_task(
     admin = Depends(get_current_admin)
 ):
     """Update a task"""
-    project_doc = await client_projects_collection.find_one({"id": project_id})
-    if not project_doc:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
-    
-    tasks = project_doc.get('tasks', [])
-    task_found = False
-    
-    for idx, task in enumerate(tasks):
-        if task['id'] == task_id:
-            task_found = True
-            if task_data.title is not None:
-                tasks[idx]['title'] = task_data.title
-            if task_data.description is not None:
-                tasks[idx]['description'] = task_data.description
-            if task_data.status is not None:
-                tasks[idx]['status'] = task_data.status
-                if task_data.status == "completed":
-                    tasks[idx]['completed_at'] = datetime.utcnow().isoformat()
-            if task_data.priority is not None:
-                tasks[idx]['priority'] = task_data.priority
-            if task_data.assigned_to is not None:
-                tasks[idx]['assigned_to'] = task_data.assigned_to
-            if task_data.due_date is not None:
-                tasks[idx]['due_date'] = task_data.due_date.isoformat()
-            if task_data.milestone_id is not None:
-                tasks[idx]['milestone_id'] = task_data.milestone_id
-            break
-    
-    if not task_found:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
+    await get_project_or_404(project_id)
+    
+    changes = {}
+    if task_data.title is not None:
+        changes['title'] = task_data.title
+    if task_data.description is not None:
+        changes['description'] = task_data.description
+    if task_data.status is not None:
+        changes['status'] = task_data.status
+        if task_data.status == "completed":
+            changes['completed_at'] = datetime.utcnow().isoformat()
+    if task_data.priority is not None:
+        changes['priority'] = task_data.priority
+    if task_data.assigned_to is not None:
+        changes['assigned_to'] = task_data.assigned_to
+    if task_data.due_date is not None:
+        changes['due_date'] = task_data.due_date.isoformat()
+    if task_data.milestone_id is not None:
+        changes['milestone_id'] = task_data.milestone_id
     
     # Add activity log
     activity = log_activity(
@@ -549,18 +586,11 @@ async def update_task(
     )
     activity['timestamp'] = activity['timestamp'].isoformat()
     
-    await client_projects_collection.update_one(
-        {"id": project_id},
-        {
-            "$set": {
-                "tasks": tasks,
-                "last_activity_at": datetime.utcnow().isoformat()
-            },
-            "$push": {"activity_log": activity}
-        }
-    )
+    updated_task = await project_store.update_entry(project_id, "tasks", task_id, changes, activity)
+    if not updated_task:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
     
-    return TaskResponse(**tasks[idx])
+    return TaskResponse(**updated_task)
 
 @router.delete("/{project_id}/tasks/{task_id}")
 async def delete_task(project_id: str, task_id: str, admin = Depends(get_current_admin)):
@@ -574,16 +604,9 @@ async def delete_task(project_id: str, task_id: str, admin = Depends(get_current
     )
     activity['timestamp'] = activity['timestamp'].isoformat()
     
-    result = await client_projects_collection.update_one(
-        {"id": project_id},
-        {
-            "$pull": {"tasks": {"id": task_id}},
-            "$push": {"activity_log": activity},
-            "$set": {"last_activity_at": datetime.utcnow().isoformat()}
-        }
-    )
+    removed = await project_store.remove_entry(project_id, "tasks", task_id, activity)
     
-    if result.modified_count == 0:
+    if not removed:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
     
     return {"message": "Task deleted successfully"}
@@ -592,12 +615,21 @@ async def delete_task(project_id: str, task_id: str, admin = Depends(get_current
 # COMMENT ENDPOINTS
 # ============================================================================
 
+@router.get("/{project_id}/comments", response_model=CommentPage)
+async def list_comments(
+    project_id: str,
+    cursor: Optional[str] = None,
+    limit: int = project_store.DEFAULT_PAGE_SIZE,
+    admin = Depends(get_current_admin)
+):
+    """List a project's comments, one page at a time"""
+    items, next_cursor = await get_page(project_id, "comments", cursor, limit)
+    return CommentPage(items=[CommentResponse(**c) for c in items], next_cursor=next_cursor)
+
 @router.post("/{project_id}/comments", response_model=CommentResponse)
 async def add_comment(project_id: str, comment_data: CommentCreate, admin = Depends(get_current_admin)):
     """Add a comment to project"""
-    project_doc = await client_projects_collection.find_one({"id": project_id})
-    if not project_doc:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
+    await get_project_or_404(project_id)
     
     comment = ProjectComment(
         user_id=admin["id"],
@@ -619,31 +651,19 @@ async def add_comment(project_id: str, comment_data: CommentCreate, admin = Depe
     )
     activity['timestamp'] = activity['timestamp'].isoformat()
     
-    await client_projects_collection.update_one(
-        {"id": project_id},
-        {
-            "$push": {
-                "comments": comment_dict,
-                "activity_log": activity
-            },
-            "$set": {"last_activity_at": datetime.utcnow().isoformat()}
-        }
-    )
+    await project_store.add_entries(project_id, {
+        "comments": comment_dict,
+        "activity_log": activity
+    })
     
     return CommentResponse(**comment_dict)
 
 @router.delete("/{project_id}/comments/{comment_id}")
 async def delete_comment(project_id: str, comment_id: str, admin = Depends(get_current_admin)):
     """Delete a comment"""
-    result = await client_projects_collection.update_one(
-        {"id": project_id},
-        {
-            "$pull": {"comments": {"id": comment_id}},
-            "$set": {"last_activity_at": datetime.utcnow().isoformat()}
-        }
-    )
+    removed = await project_store.remove_entry(project_id, "comments", comment_id)
     
-    if result.modified_count == 0:
+    if not removed:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Comment not found")
     
     return {"message": "Comment deleted successfully"}
@@ -655,9 +675,7 @@ async def delete_comment(project_id: str, comment_id: str, admin = Depends(get_c
 @router.post("/{project_id}/team", response_model=TeamMemberResponse)
 async def add_team_member(project_id: str, member_data: TeamMemberAdd, admin = Depends(get_current_admin)):
     """Add a team member to project"""
-    project_doc = await client_projects_collection.find_one({"id": project_id})
-    if not project_doc:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
+    await get_project_or_404(project_id)
     
     member = TeamMember(**member_data.model_dump())
     member_dict = member.model_dump()
@@ -673,15 +691,11 @@ async def add_team_member(project_id: str, member_data: TeamMemberAdd, admin = D
     )
     activity['timestamp'] = activity['timestamp'].isoformat()
     
-    await client_projects_collection.update_one(
-        {"id": project_id},
-        {
-            "$push": {
-                "team_members": member_dict,
-                "activity_log": activity
-            },
-            "$set": {"last_activity_at": datetime.utcnow().isoformat()}
-        }
+    # Team members stay embedded on the project document (the list is small)
+    await project_store.add_entries(
+        project_id,
+        {"activity_log": activity},
+        extra_push={"team_members": member_dict}
     )
     
     return TeamMemberResponse(**member_dict)
@@ -709,9 +723,7 @@ async def remove_team_member(project_id: str, admin_id: str, admin = Depends(get
 @router.put("/{project_id}/budget", response_model=BudgetResponse)
 async def update_budget(project_id: str, budget_data: BudgetUpdate, admin = Depends(get_current_admin)):
     """Update project budget"""
-    project_doc = await client_projects_collection.find_one({"id": project_id})
-    if not project_doc:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
+    project_doc = await get_project_or_404(project_id)
     
     # Get current budget, handle None case
     current_budget = project_doc.get('budget')
@@ -740,16 +752,7 @@ async def update_budget(project_id: str, budget_data: BudgetUpdate, admin = Depe
     )
     activity['timestamp'] = activity['timestamp'].isoformat()
     
-    await client_projects_collection.update_one(
-        {"id": project_id},
-        {
-            "$set": {
-                "budget": current_budget,
-                "last_activity_at": datetime.utcnow().isoformat()
-            },
-            "$push": {"activity_log": activity}
-        }
-    )
+    await project_store.add_entries(project_id, {"activity_log": activity}, extra_set={"budget": current_budget})
     
     return BudgetResponse(**current_budget)
 
@@ -757,6 +760,17 @@ async def update_budget(project_id: str, budget_data: BudgetUpdate, admin = Depe
 # FILE ENDPOINTS
 # ============================================================================
 
+@router.get("/{project_id}/files", response_model=ProjectFilePage)
+async def list_project_files(
+    project_id: str,
+    cursor: Optional[str] = None,
+    limit: int = project_store.DEFAULT_PAGE_SIZE,
+    admin = Depends(get_current_admin)
+):
+    """List a project's files, one page at a time"""
+    items, next_cursor = await get_page(project_id, "files", cursor, limit)
+    return ProjectFilePage(items=[ProjectFileResponse(**f) for f in items], next_cursor=next_cursor)
+
 @router.post("/{project_id}/files", response_model=FileUploadResponse)
 async def upload_project_file(
     project_id: str,
@@ -764,44 +778,24 @@ async def upload_project_file(
     admin = Depends(get_current_admin)
 ):
     """Upload a file to a project (Admin only)"""
-    project_doc = await client_projects_collection.find_one({"id": project_id})
-    if not project_doc:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Project not found"
-        )
-    
-    # Create project-specific directory
-    project_dir = os.path.join(UPLOAD_DIR, project_id)
-    os.makedirs(project_dir, exist_ok=True)
-    
-    # Generate unique filename
-    file_id = str(uuid.uuid4())
-    file_extension = os.path.splitext(file.filename)[1]
-    safe_filename = f"{file_id}{file_extension}"
-    file_path = os.path.join(project_dir, safe_filename)
+    await get_project_or_404(project_id)
     
-    # Save file
-    try:
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        # Get file size
-        file_size = os.path.getsize(file_path)
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to save file: {str(e)}"
-        )
+    # Stream into the project-specific directory
+    stored = await save_upload(
+        file, os.path.join(UPLOAD_DIR, project_id), PROJECT_FILE_POLICY, namespace=f"client_projects/{project_id}"
+    )
+    file_id = stored["id"]
     
     # Create file metadata
     project_file = ProjectFile(
         id=file_id,
         filename=file.filename,
-        file_path=file_path,
+        file_path=stored["path"],
         uploaded_by=admin["id"],
-        file_size=file_size,
-        file_type=file.content_type
+        file_size=stored["size"],
+        file_type=file.content_type,
+        sha256=stored["sha256"],
+        blob_key=stored["blob_key"]
     )
     
     file_dict = project_file.model_dump()
@@ -818,16 +812,10 @@ async def upload_project_file(
     activity['timestamp'] = activity['timestamp'].isoformat()
     
     # Add file to project
-    await client_projects_collection.update_one(
-        {"id": project_id},
-        {
-            "$push": {
-                "files": file_dict,
-                "activity_log": activity
-            },
-            "$set": {"last_activity_at": datetime.utcnow().isoformat()}
-        }
-    )
+    await project_store.add_entries(project_id, {
+        "files": file_dict,
+        "activity_log": activity
+    })
     
     return FileUploadResponse(
         id=file_id,
@@ -842,19 +830,10 @@ async def delete_project_file(
     admin = Depends(get_current_admin)
 ):
     """Delete a file from a project (Admin only)"""
-    project_doc = await client_projects_collection.find_one({"id": project_id})
-    if not project_doc:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Project not found"
-        )
+    await get_project_or_404(project_id)
     
     # Find file in project
-    file_to_delete = None
-    for file_info in project_doc.get('files', []):
-        if file_info['id'] == file_id:
-            file_to_delete = file_info
-            break
+    file_to_delete = await project_store.get_entry(project_id, "files", file_id)
     
     if not file_to_delete:
         raise HTTPException(
@@ -862,9 +841,11 @@ async def delete_project_file(
             detail="File not found"
         )
     
-    # Delete file from filesystem
+    # Blob-backed files only lose their ref; older files are removed from disk
     file_path = file_to_delete['file_path']
-    if os.path.exists(file_path):
+    if file_to_delete.get('blob_key'):
+        await blob_store.release(file_to_delete['blob_key'])
+    elif os.path.exists(file_path):
         try:
             os.remove(file_path)
         except Exception as e:
@@ -884,17 +865,25 @@ async def delete_project_file(
     activity['timestamp'] = activity['timestamp'].isoformat()
     
     # Remove file from project
-    await client_projects_collection.update_one(
-        {"id": project_id},
-        {
-            "$pull": {"files": {"id": file_id}},
-            "$push": {"activity_log": activity},
-            "$set": {"last_activity_at": datetime.utcnow().isoformat()}
-        }
-    )
+    await project_store.remove_entry(project_id, "files", file_id, activity)
     
     return {"message": "File deleted successfully"}
 
+# ============================================================================
+# ACTIVITY ENDPOINTS
+# ============================================================================
+
+@router.get("/{project_id}/activity", response_model=ActivityPage)
+async def list_activity(
+    project_id: str,
+    cursor: Optional[str] = None,
+    limit: int = project_store.DEFAULT_PAGE_SIZE,
+    admin = Depends(get_current_admin)
+):
+    """List a project's activity log, one page at a time"""
+    items, next_cursor = await get_page(project_id, "activity_log", cursor, limit)
+    return ActivityPage(items=[ActivityResponse(**a) for a in items], next_cursor=next_cursor)
+
 # ============================================================================
 # CHAT ENDPOINTS (Admin)
 # ============================================================================
@@ -902,9 +891,7 @@ async def delete_project_file(
 @router.post("/{project_id}/chat", response_model=ChatMessageResponse)
 async def send_chat_message(project_id: str, message_data: ChatMessageCreate, admin = Depends(get_current_admin)):
     """Send a chat message to client (Admin)"""
-    project_doc = await client_projects_collection.find_one({"id": project_id})
-    if not project_doc:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
+    await get_project_or_404(project_id)
     
     chat_message = ChatMessage(
         sender_id=admin["id"],
@@ -927,39 +914,43 @@ async def send_chat_message(project_id: str, message_data: ChatMessageCreate, ad
     )
     activity['timestamp'] = activity['timestamp'].isoformat()
     
-    await client_projects_collection.update_one(
-        {"id": project_id},
-        {
-            "$push": {
-                "chat_messages": message_dict,
-                "activity_log": activity
-            },
-            "$set": {"last_activity_at": datetime.utcnow().isoformat()}
-        }
-    )
+    await project_store.ensure_chat_unread(project_id, "admin")
+    await project_store.add_entries(project_id, {
+        "chat_messages": message_dict,
+        "activity_log": activity
+    }, extra_inc=project_store.chat_unread_increment("admin"))
     
-    return ChatMessageResponse(**message_dict)
+    response = ChatMessageResponse(**message_dict)
+    await realtime.publish(realtime.project_channel(project_id), "message", response.model_dump(mode="json"))
+    return response
 
 @router.get("/{project_id}/chat", response_model=List[ChatMessageResponse])
-async def get_chat_messages(project_id: str, admin = Depends(get_current_admin)):
-    """Get all chat messages for a project (Admin)"""
-    project_doc = await client_projects_collection.find_one({"id": project_id})
-    if not project_doc:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
-    
-    # Mark admin messages as read
-    chat_messages = project_doc.get('chat_messages', [])
-    updated = False
-    for msg in chat_messages:
-        if msg['sender_type'] == 'client' and not msg.get('read', False):
-            msg['read'] = True
-            updated = True
-    
-    if updated:
-        await client_projects_collection.update_one(
-            {"id": project_id},
-            {"$set": {"chat_messages": chat_messages}}
-        )
+async def get_chat_messages(
+    project_id: str,
+    after: Optional[str] = None,
+    limit: int = project_store.DEFAULT_PAGE_SIZE,
+    wait: float = 0,
+    admin = Depends(get_current_admin)
+):
+    """
+    Get the latest chat messages for a project and mark the client's as read (Admin).
+    With ?after=<message id or timestamp> only newer messages are returned;
+    add ?wait=<seconds> to hold the request until one arrives.
+    """
+    await get_project_or_404(project_id)
+    
+    async def fetch():
+        if await project_store.mark_chat_read(project_id, "client"):
+            await realtime.publish(realtime.project_channel(project_id), "read", {"sender_type": "client"})
+        if not after:
+            return await project_store.latest_entries(project_id, "chat_messages", limit)
+        messages, _ = await project_store.entries_after(project_id, "chat_messages", after, limit)
+        return messages
+    
+    if after and wait > 0:
+        chat_messages = await realtime.long_poll(realtime.project_channel(project_id), fetch, wait)
+    else:
+        chat_messages = await fetch()
     
     return [
         ChatMessageResponse(
@@ -969,19 +960,47 @@ async def get_chat_messages(project_id: str, admin = Depends(get_current_admin))
             sender_type=cm['sender_type'],
             message=cm['message'],
             read=cm.get('read', False),
-            created_at=cm['created_at'] if isinstance(cm['created_at'], str) else cm['created_at'].isoformat()
+            created_at=cm['created_at']
         ) for cm in chat_messages
     ]
 
+@router.post("/{project_id}/events/ticket")
+async def create_project_stream_ticket(project_id: str, admin = Depends(get_current_admin)):
+    """Short-lived ticket for opening the project's event stream (Admin)"""
+    await get_project_or_404(project_id)
+    return {
+        "ticket": create_stream_ticket(ADMIN, admin["id"], realtime.project_channel(project_id)),
+        "expires_in": STREAM_TICKET_SECONDS
+    }
+
+@router.get("/{project_id}/events")
+async def stream_project_events(
+    project_id: str,
+    ticket: Optional[str] = None,
+    last_event_id: Optional[str] = Header(None)
+):
+    """Server-sent events for a project's chat: message, read (Admin, ?ticket= from .../events/ticket)"""
+    channel = realtime.project_channel(project_id)
+    await get_admin_from_stream_ticket(ticket, channel)
+    await get_project_or_404(project_id)
+    return realtime.stream(channel, last_event_id)
+
+@router.get("/{project_id}/chat/history", response_model=ChatMessagePage)
+async def list_chat_history(
+    project_id: str,
+    cursor: Optional[str] = None,
+    limit: int = project_store.DEFAULT_PAGE_SIZE,
+    admin = Depends(get_current_admin)
+):
+    """List a project's chat messages, one page at a time (does not mark them read)"""
+    items, next_cursor = await get_page(project_id, "chat_messages", cursor, limit)
+    return ChatMessagePage(items=[ChatMessageResponse(**cm) for cm in items], next_cursor=next_cursor)
+
 @router.get("/{project_id}/unread-count")
 async def get_unread_count(project_id: str, admin = Depends(get_current_admin)):
     """Get count of unread messages from client (Admin)"""
-    project_doc = await client_projects_collection.find_one({"id": project_id})
-    if not project_doc:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
+    await get_project_or_404(project_id)
     
-    chat_messages = project_doc.get('chat_messages', [])
-    unread_count = sum(1 for msg in chat_messages if msg['sender_type'] == 'client' and not msg.get('read', False))
+    unread_count = await project_store.chat_unread_count(project_id, "client")
     
     return {"unread_count": unread_count}
-
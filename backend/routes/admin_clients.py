@@ -2,10 +2,12 @@ from fastapi import APIRouter, HTTPException, status, Depends
 from typing import List
 from schemas.client import ClientCreate, ClientUpdate, ClientResponse
 from database import clients_collection
-from auth.password import hash_password
+from auth.password import hash_password_async
 from auth.admin_auth import get_current_admin
+from auth.principal_cache import invalidate_client
 from models.client import Client
 from datetime import datetime
+from pymongo.errors import DuplicateKeyError
 
 router = APIRouter(prefix="/admin/clients", tags=["admin-clients"])
 
@@ -49,19 +51,11 @@ async def get_client(client_id: str, admin = Depends(get_current_admin)):
 @router.post("/", response_model=ClientResponse)
 async def create_client(client_data: ClientCreate, admin = Depends(get_current_admin)):
     """Create a new client (Admin only)"""
-    # Check if email already exists
-    existing_client = await clients_collection.find_one({"email": client_data.email})
-    if existing_client:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered"
-        )
-    
     # Create client
     client = Client(
         name=client_data.name,
         email=client_data.email,
-        password_hash=hash_password(client_data.password),
+        password_hash=await hash_password_async(client_data.password),
         company=client_data.company,
         phone=client_data.phone,
         is_active=client_data.is_active,
@@ -71,7 +65,14 @@ async def create_client(client_data: ClientCreate, admin = Depends(get_current_a
     client_dict = client.model_dump()
     client_dict['created_at'] = client_dict['created_at'].isoformat()
     
-    await clients_collection.insert_one(client_dict)
+    # email is unique, so the insert itself rejects an existing (or concurrently created) client
+    try:
+        await clients_collection.insert_one(client_dict)
+    except DuplicateKeyError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered"
+        )
     
     return ClientResponse(
         id=client.id,
@@ -108,7 +109,7 @@ async def update_client(client_id: str, client_data: ClientUpdate, admin = Depen
             )
         update_data['email'] = client_data.email
     if client_data.password is not None:
-        update_data['password_hash'] = hash_password(client_data.password)
+        update_data['password_hash'] = await hash_password_async(client_data.password)
     if client_data.company is not None:
         update_data['company'] = client_data.company
     if client_data.phone is not None:
@@ -122,6 +123,7 @@ async def update_client(client_id: str, client_data: ClientUpdate, admin = Depen
         {"id": client_id},
         {"$set": update_data}
     )
+    invalidate_client(client_id)
     
     # Fetch updated client
     updated_client = await clients_collection.find_one({"id": client_id})
@@ -140,6 +142,7 @@ async def update_client(client_id: str, client_data: ClientUpdate, admin = Depen
 async def delete_client(client_id: str, admin = Depends(get_current_admin)):
     """Delete a client (Admin only)"""
     result = await clients_collection.delete_one({"id": client_id})
+    invalidate_client(client_id)
     
     if result.deleted_count == 0:
         raise HTTPException(
@@ -2,8 +2,12 @@ from fastapi import APIRouter, HTTPException, status, Depends
 from typing import List
 from schemas.admin import AdminCreate, AdminUpdate, AdminLogin, AdminResponse, TokenResponse
 from database import admins_collection
-from auth import hash_password, verify_password, create_access_token
+from auth import hash_password_async, verify_password_async, needs_rehash, create_access_token
+from auth.password import pool_stats
 from auth.admin_auth import get_current_admin, require_super_admin
+from auth.principal_cache import principal_cache, invalidate_admin
+from utils import blob_store, email_outbox, image_derivatives, realtime, response_cache
+from utils.uploads import upload_stats
 from models.admin import Admin, AdminPermissions
 from utils import serialize_document
 
@@ -27,12 +31,19 @@ async def admin_login(credentials: AdminLogin):
     
     # Verify password - handle both password and password_hash fields
     password_hash = admin_doc.get('password_hash', admin_doc.get('password'))
-    if not password_hash or not verify_password(credentials.password, password_hash):
+    if not password_hash or not await verify_password_async(credentials.password, password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid credentials"
         )
     
+    # Upgrade hashes made with an older bcrypt cost
+    if needs_rehash(password_hash):
+        await admins_collection.update_one(
+            {"id": admin_doc['id']},
+            {"$set": {"password_hash": await hash_password_async(credentials.password)}}
+        )
+    
     # Determine role - handle both role and is_super_admin fields
     role = admin_doc.get("role")
     if not role:
@@ -75,7 +86,7 @@ async def initialize_super_admin():
     # Create default super admin with all permissions
     admin = Admin(
         username="admin",
-        password_hash=hash_password("admin123"),
+        password_hash=await hash_password_async("admin123"),
         role="super_admin",
         permissions=AdminPermissions(
             canManageAdmins=True,
@@ -188,7 +199,7 @@ async def create_admin(
     # Create admin
     admin = Admin(
         username=admin_data.username,
-        password_hash=hash_password(admin_data.password),
+        password_hash=await hash_password_async(admin_data.password),
         role=admin_data.role,
         permissions=permissions,
         created_by=current_admin['username']
@@ -238,7 +249,7 @@ async def update_admin(
         update_data['username'] = admin_data.username
     
     if admin_data.password:
-        update_data['password_hash'] = hash_password(admin_data.password)
+        update_data['password_hash'] = await hash_password_async(admin_data.password)
     
     if admin_data.permissions:
         update_data['permissions'] = admin_data.permissions.model_dump()
@@ -248,6 +259,7 @@ async def update_admin(
             {"id": admin_id},
             {"$set": update_data}
         )
+        invalidate_admin(admin_id)
     
     return {"message": "Admin updated successfully"}
 
@@ -280,4 +292,52 @@ async def delete_admin(
         )
     
     await admins_collection.delete_one({"id": admin_id})
+    invalidate_admin(admin_id)
     return {"message": "Admin deleted successfully"}
+
+@router.get("/principal-cache/stats")
+async def get_principal_cache_stats(current_admin: dict = Depends(require_super_admin)):
+    """Authenticated-principal cache counters (super admin only)"""
+    return principal_cache.stats()
+
+@router.get("/password-pool/stats")
+async def get_password_pool_stats(current_admin: dict = Depends(require_super_admin)):
+    """bcrypt worker pool counters (super admin only)"""
+    return pool_stats()
+
+@router.get("/uploads/stats")
+async def get_upload_stats(current_admin: dict = Depends(require_super_admin)):
+    """Upload counts, bytes and throughput per upload type (super admin only)"""
+    return upload_stats()
+
+@router.get("/blobs/stats")
+async def get_blob_stats(current_admin: dict = Depends(require_super_admin)):
+    """Blob store size, refcounts, dedup savings and GC counters (super admin only)"""
+    return await blob_store.stats()
+
+@router.get("/image-derivatives/stats")
+async def get_image_derivative_stats(current_admin: dict = Depends(require_super_admin)):
+    """Image derivative queue counts and worker counters (super admin only)"""
+    return await image_derivatives.derivative_worker.stats()
+
+@router.get("/response-cache/stats")
+async def get_response_cache_stats(current_admin: dict = Depends(require_super_admin)):
+    """Public response cache size, hit ratio and invalidations (super admin only)"""
+    return response_cache.response_cache.stats()
+
+@router.get("/realtime/stats")
+async def get_realtime_stats(current_admin: dict = Depends(require_super_admin)):
+    """Open event streams and push counters for this worker (super admin only)"""
+    return realtime.hub.stats()
+
+@router.get("/email-outbox/stats")
+async def get_email_outbox_stats(current_admin: dict = Depends(require_super_admin)):
+    """Email outbox counts by status and worker counters (super admin only)"""
+    return await email_outbox.outbox_worker.stats()
+
+@router.post("/email-outbox/{message_id}/retry")
+async def retry_dead_email(message_id: str, current_admin: dict = Depends(require_super_admin)):
+    """Re-queue an email that was given up on (super admin only)"""
+    if not await email_outbox.retry(message_id):
+        raise HTTPException(status_code=404, detail="No dead email with this id")
+    return {"message": "Email re-queued"}
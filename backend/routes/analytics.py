@@ -1,138 +1,179 @@
 from fastapi import APIRouter, HTTPException, Depends
 from typing import Optional
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import uuid
 import logging
 
 from database import analytics_collection
 from schemas.analytics import (
     AnalyticsEventCreate,
+    AnalyticsEventBatch,
     AnalyticsEventResponse,
     AnalyticsSummary,
     PageViewStats,
-    BlogViewStats
+    BlogViewStats,
+    AnalyticsTimeSeries,
+    AnalyticsTimeSeriesPoint
 )
 from auth.admin_auth import get_current_admin
+from utils.analytics_buffer import ANALYTICS_BUFFERED, analytics_buffer
+from utils import analytics_rollups
 
 router = APIRouter(prefix="/analytics", tags=["analytics"])
 logger = logging.getLogger(__name__)
 
+def build_event(event: AnalyticsEventCreate) -> dict:
+    return {
+        "_id": str(uuid.uuid4()),
+        "event_type": event.event_type,
+        "page_name": event.page_name,
+        "blog_id": event.blog_id,
+        "blog_title": event.blog_title,
+        "timestamp": datetime.utcnow()
+    }
+
+async def store_events(events: list):
+    if ANALYTICS_BUFFERED:
+        analytics_buffer.add_many(events)
+        return
+    if len(events) == 1:
+        await analytics_collection.insert_one(events[0])
+    else:
+        await analytics_collection.insert_many(events, ordered=False)
+    await analytics_rollups.apply_rollups(events)
+
 @router.post("/event", status_code=201)
 async def track_event(event: AnalyticsEventCreate):
     """Track an analytics event - public endpoint, fails silently"""
     try:
-        event_data = {
-            "_id": str(uuid.uuid4()),
-            "event_type": event.event_type,
-            "page_name": event.page_name,
-            "blog_id": event.blog_id,
-            "blog_title": event.blog_title,
-            "timestamp": datetime.utcnow()
-        }
-        
-        await analytics_collection.insert_one(event_data)
+        await store_events([build_event(event)])
         return {"status": "success", "message": "Event tracked"}
     except Exception as e:
         # Fail silently - don't block user actions
         logger.warning(f"Analytics tracking failed: {str(e)}")
         return {"status": "success", "message": "Event received"}
 
+@router.post("/events", status_code=201)
+async def track_events(batch: AnalyticsEventBatch):
+    """Track several analytics events in one request - public endpoint, fails silently"""
+    try:
+        await store_events([build_event(event) for event in batch.events])
+        return {"status": "success", "message": f"{len(batch.events)} events tracked"}
+    except Exception as e:
+        logger.warning(f"Analytics batch tracking failed: {str(e)}")
+        return {"status": "success", "message": "Events received"}
+
+@router.get("/ingest-stats")
+async def get_ingest_stats(current_admin: dict = Depends(get_current_admin)):
+    """Counters for the buffered event ingestion - admin only"""
+    return analytics_buffer.stats()
+
+def _naive_utc(value: datetime) -> datetime:
+    """Rollup buckets are naive UTC; convert offset-aware inputs instead of dropping the offset"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def resolve_range(period: str, start: Optional[datetime], end: Optional[datetime]):
+    """Turn a preset period or an explicit start/end into a [start, end) range"""
+    now = datetime.utcnow()
+    end = _naive_utc(end) if end else now
+
+    if start:
+        start = _naive_utc(start)
+        period = "custom"
+    elif period == "today":
+        start = datetime(now.year, now.month, now.day)
+    elif period == "30days":
+        start = now - timedelta(days=30)
+    else:
+        if period != "7days":
+            period = "7days"
+        start = now - timedelta(days=7)
+
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    return start, end, period
+
 @router.get("/summary", response_model=AnalyticsSummary)
 async def get_analytics_summary(
     period: str = "7days",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
     current_admin: dict = Depends(get_current_admin)
 ):
-    """Get analytics summary - admin only"""
+    """Get analytics summary from the hourly/daily rollups - admin only"""
+    start, end, period = resolve_range(period, start, end)
+
     try:
-        # Calculate date range
-        now = datetime.utcnow()
-        
-        if period == "today":
-            start_date = datetime(now.year, now.month, now.day)
-        elif period == "7days":
-            start_date = now - timedelta(days=7)
-        elif period == "30days":
-            start_date = now - timedelta(days=30)
-        else:
-            start_date = now - timedelta(days=7)
-        
-        # Query filter
-        date_filter = {"timestamp": {"$gte": start_date}}
-        
-        # Get total page views
-        total_page_views = await analytics_collection.count_documents({
-            **date_filter,
-            "event_type": "page_view"
-        })
-        
-        # Get contact submissions
-        contact_submissions = await analytics_collection.count_documents({
-            **date_filter,
-            "event_type": "contact_submission"
-        })
-        
-        # Get calculator usage
-        calculator_opened = await analytics_collection.count_documents({
-            **date_filter,
-            "event_type": "calculator_opened"
-        })
-        
-        calculator_estimates = await analytics_collection.count_documents({
-            **date_filter,
-            "event_type": "calculator_estimate"
-        })
-        
-        # Get page views by page
-        page_views_pipeline = [
-            {"$match": {**date_filter, "event_type": "page_view"}},
-            {"$group": {
-                "_id": "$page_name",
-                "count": {"$sum": 1}
-            }},
-            {"$sort": {"count": -1}}
-        ]
-        
-        page_views_cursor = analytics_collection.aggregate(page_views_pipeline)
-        page_views_list = await page_views_cursor.to_list(length=None)
-        
+        groups = await analytics_rollups.totals(start, end)
+
+        totals_by_type = {}
+        page_counts = {}
+        blog_counts = {}
+        for group in groups:
+            key = group["_id"]
+            event_type = key.get("event_type")
+            totals_by_type[event_type] = totals_by_type.get(event_type, 0) + group["count"]
+
+            if event_type == "page_view" and key.get("page_name"):
+                page_counts[key["page_name"]] = page_counts.get(key["page_name"], 0) + group["count"]
+            elif event_type == "blog_view" and key.get("blog_id"):
+                count, title = blog_counts.get(key["blog_id"], (0, None))
+                blog_counts[key["blog_id"]] = (count + group["count"], title or group.get("blog_title"))
+
         page_views_by_page = [
-            PageViewStats(page_name=item["_id"], count=item["count"])
-            for item in page_views_list if item["_id"]
+            PageViewStats(page_name=page_name, count=count)
+            for page_name, count in sorted(page_counts.items(), key=lambda item: item[1], reverse=True)
         ]
-        
-        # Get blog views
-        blog_views_pipeline = [
-            {"$match": {**date_filter, "event_type": "blog_view"}},
-            {"$group": {
-                "_id": {"blog_id": "$blog_id", "blog_title": "$blog_title"},
-                "count": {"$sum": 1}
-            }},
-            {"$sort": {"count": -1}},
-            {"$limit": 10}
-        ]
-        
-        blog_views_cursor = analytics_collection.aggregate(blog_views_pipeline)
-        blog_views_list = await blog_views_cursor.to_list(length=None)
-        
+
+        top_blogs = sorted(blog_counts.items(), key=lambda item: item[1][0], reverse=True)[:10]
         blog_views = [
-            BlogViewStats(
-                blog_id=item["_id"]["blog_id"],
-                blog_title=item["_id"]["blog_title"] or "Untitled",
-                count=item["count"]
-            )
-            for item in blog_views_list if item["_id"]["blog_id"]
+            BlogViewStats(blog_id=blog_id, blog_title=title or "Untitled", count=count)
+            for blog_id, (count, title) in top_blogs
         ]
-        
+
         return AnalyticsSummary(
-            total_page_views=total_page_views,
-            contact_submissions=contact_submissions,
-            calculator_opened=calculator_opened,
-            calculator_estimates=calculator_estimates,
+            total_page_views=totals_by_type.get("page_view", 0),
+            contact_submissions=totals_by_type.get("contact_submission", 0),
+            calculator_opened=totals_by_type.get("calculator_opened", 0),
+            calculator_estimates=totals_by_type.get("calculator_estimate", 0),
             page_views_by_page=page_views_by_page,
             blog_views=blog_views,
             period=period
         )
-        
+
     except Exception as e:
         logger.error(f"Error fetching analytics summary: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/timeseries", response_model=AnalyticsTimeSeries)
+async def get_analytics_timeseries(
+    period: str = "7days",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    granularity: str = "day",
+    event_type: Optional[str] = "page_view",
+    page_name: Optional[str] = None,
+    blog_id: Optional[str] = None,
+    current_admin: dict = Depends(get_current_admin)
+):
+    """Event counts per hour or day for charts - admin only"""
+    if granularity not in analytics_rollups.GRANULARITIES:
+        raise HTTPException(status_code=400, detail="granularity must be 'hour' or 'day'")
+
+    start, end, period = resolve_range(period, start, end)
+    if granularity == analytics_rollups.HOUR and end - start > timedelta(days=31):
+        raise HTTPException(status_code=400, detail="Hourly series are limited to 31 days")
+
+    try:
+        points = await analytics_rollups.time_series(start, end, granularity, event_type, page_name, blog_id)
+        return AnalyticsTimeSeries(
+            granularity=granularity,
+            event_type=event_type,
+            period=period,
+            points=[AnalyticsTimeSeriesPoint(**point) for point in points]
+        )
+    except Exception as e:
+        logger.error(f"Error fetching analytics time series: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
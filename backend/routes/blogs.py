@@ -6,6 +6,7 @@ from utils import serialize_document, create_slug
 from models import Blog
 from datetime import datetime
 from auth.admin_auth import get_current_admin
+from utils import response_cache
 
 router = APIRouter(prefix="/blogs", tags=["blogs"])
 
@@ -63,6 +64,7 @@ async def create_blog(blog_data: BlogCreate, current_admin: dict = Depends(get_c
     doc['updated_at'] = doc['updated_at'].isoformat()
     
     await blogs_collection.insert_one(doc)
+    await response_cache.bump("blogs")
     return serialize_document(doc)
 
 @router.put("/admin/{blog_id}", response_model=BlogResponse)
@@ -101,6 +103,7 @@ async def update_blog(blog_id: str, blog_data: BlogUpdate, current_admin: dict =
         {"id": blog_id},
         {"$set": update_data}
     )
+    await response_cache.bump("blogs")
     
     updated_blog = await blogs_collection.find_one({"id": blog_id})
     return serialize_document(updated_blog)
@@ -109,6 +112,7 @@ async def update_blog(blog_id: str, blog_data: BlogUpdate, current_admin: dict =
 async def delete_blog(blog_id: str, current_admin: dict = Depends(get_current_admin)):
     """Delete a blog (admin only)"""
     result = await blogs_collection.delete_one({"id": blog_id})
+    await response_cache.bump("blogs")
     if result.deleted_count == 0:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
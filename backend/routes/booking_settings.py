@@ -10,6 +10,7 @@ from schemas.booking_setting import (
     BookingSettingResponse
 )
 from auth.admin_auth import get_current_admin
+from utils import slot_availability
 
 router = APIRouter(prefix="/booking-settings", tags=["booking-settings"])
 
@@ -58,6 +59,7 @@ async def create_booking_settings(
             {"id": existing["id"]},
             {"$set": settings_data}
         )
+        slot_availability.invalidate()
         updated = await booking_settings_collection.find_one({"id": existing["id"]})
         return updated
     else:
@@ -66,6 +68,7 @@ async def create_booking_settings(
         settings_data["created_at"] = now
         
         await booking_settings_collection.insert_one(settings_data)
+        slot_availability.invalidate()
         return settings_data
 
 @router.put("/admin/{settings_id}", response_model=BookingSettingResponse)
@@ -97,6 +100,7 @@ async def update_booking_settings(
         {"id": settings_id},
         {"$set": update_data}
     )
+    slot_availability.invalidate()
     
     updated = await booking_settings_collection.find_one({"id": settings_id})
     return updated
@@ -110,4 +114,5 @@ async def delete_booking_settings(
     result = await booking_settings_collection.delete_one({"id": settings_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Settings not found")
+    slot_availability.invalidate()
     return {"message": "Settings deleted successfully"}
@@ -1,11 +1,13 @@
 from fastapi import APIRouter, HTTPException, Depends
 from typing import List, Optional
-from datetime import datetime, timedelta
+from datetime import datetime
 import uuid
 import pytz
 from database import bookings_collection, booking_settings_collection
 from schemas.booking import BookingCreate, BookingUpdate, BookingResponse, AvailableSlot
 from auth.admin_auth import get_current_admin
+from utils.stats import facet_counts
+from utils import slot_availability
 
 router = APIRouter(prefix="/bookings", tags=["bookings"])
 
@@ -21,41 +23,43 @@ def get_ist_datetime(date_str: str, time_str: str = "00:00"):
     dt = datetime.strptime(f"{date_str} {time_str}", "%Y-%m-%d %H:%M")
     return IST.localize(dt)
 
-async def check_slot_availability(date: str, time_slot: str) -> dict:
-    """Check if a time slot is available on a given date"""
-    # Get booking settings
-    settings = await booking_settings_collection.find_one({"is_active": True})
-    if not settings:
-        return {"available": False, "reason": "Booking system is not active"}
-    
+def find_time_slot(settings: dict, date: str, time_slot: str):
+    """Return (slot settings, None) if the slot is bookable on that date, else (None, reason)"""
     # Parse date and get day of week
     try:
         booking_date = datetime.strptime(date, "%Y-%m-%d")
         day_name = booking_date.strftime("%A")
     except ValueError:
-        return {"available": False, "reason": "Invalid date format"}
+        return None, "Invalid date format"
     
     # Check if day is available
     if day_name not in settings.get("available_days", []):
-        return {"available": False, "reason": f"{day_name} is not available"}
+        return None, f"{day_name} is not available"
     
     # Check if time slot exists in settings
-    time_slots = settings.get("time_slots", [])
-    slot_info = None
-    for slot in time_slots:
+    for slot in settings.get("time_slots", []):
         slot_range = f"{slot['start_time']}-{slot['end_time']}"
         if slot_range == time_slot:
-            slot_info = slot
-            break
+            return slot, None
+    
+    return None, "Time slot not found"
+
+async def check_slot_availability(date: str, time_slot: str) -> dict:
+    """Check if a time slot is available on a given date"""
+    # Get booking settings
+    settings = await booking_settings_collection.find_one({"is_active": True})
+    if not settings:
+        return {"available": False, "reason": "Booking system is not active"}
     
+    slot_info, reason = find_time_slot(settings, date, time_slot)
     if not slot_info:
-        return {"available": False, "reason": "Time slot not found"}
+        return {"available": False, "reason": reason}
     
     # Check existing bookings for this slot
     existing_bookings = await bookings_collection.count_documents({
         "preferred_date": date,
         "preferred_time_slot": time_slot,
-        "status": {"$in": ["pending", "confirmed"]}
+        "status": {"$in": slot_availability.ACTIVE_STATUSES}
     })
     
     max_bookings = slot_info.get("max_bookings", 1)
@@ -71,6 +75,18 @@ async def check_slot_availability(date: str, time_slot: str) -> dict:
         "meeting_type": settings.get("meeting_type", "Google Meet")
     }
 
+async def reserve_or_400(settings: Optional[dict], date: str, time_slot: str):
+    """Take a place in the slot or raise 400 with the reason it is unavailable"""
+    if not settings:
+        raise HTTPException(status_code=400, detail="Booking system is not active")
+    
+    slot_info, reason = find_time_slot(settings, date, time_slot)
+    if not slot_info:
+        raise HTTPException(status_code=400, detail=reason)
+    
+    if await slot_availability.reserve_slot(date, time_slot, slot_info.get("max_bookings", 1)) is None:
+        raise HTTPException(status_code=400, detail="Slot is fully booked")
+
 # PUBLIC ENDPOINTS
 
 @router.get("/available-slots", response_model=List[AvailableSlot])
@@ -81,60 +97,24 @@ async def get_available_slots(start_date: str, days: int = 14):
     - start_date: YYYY-MM-DD format
     - days: number of days to check (default 14)
     """
-    settings = await booking_settings_collection.find_one({"is_active": True})
-    if not settings:
-        raise HTTPException(status_code=404, detail="Booking system is not active")
-    
     try:
         current_date = datetime.strptime(start_date, "%Y-%m-%d")
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
     
-    available_slots = []
-    
-    for i in range(days):
-        check_date = current_date + timedelta(days=i)
-        date_str = check_date.strftime("%Y-%m-%d")
-        day_name = check_date.strftime("%A")
-        
-        # Skip if day is not available
-        if day_name not in settings.get("available_days", []):
-            continue
-        
-        # Check each time slot
-        for slot in settings.get("time_slots", []):
-            time_slot_str = f"{slot['start_time']}-{slot['end_time']}"
-            
-            # Check availability
-            availability = await check_slot_availability(date_str, time_slot_str)
-            
-            available_slots.append({
-                "date": date_str,
-                "time_slot": time_slot_str,
-                "available_spots": availability.get("available_spots", 0) if availability.get("available") else 0,
-                "is_available": availability.get("available", False)
-            })
+    available_slots = await slot_availability.get_slot_grid(current_date, days)
+    if available_slots is None:
+        raise HTTPException(status_code=404, detail="Booking system is not active")
     
     return available_slots
 
 @router.post("/", response_model=BookingResponse)
 async def create_booking(booking: BookingCreate):
     """Create a new booking (PUBLIC)"""
-    # Validate slot availability
-    availability = await check_slot_availability(
-        booking.preferred_date,
-        booking.preferred_time_slot
-    )
-    
-    if not availability.get("available"):
-        raise HTTPException(
-            status_code=400,
-            detail=availability.get("reason", "Slot not available")
-        )
-    
-    # Get booking settings for meeting type
+    # Reserve a place in the slot atomically; fails if the slot is full
     settings = await booking_settings_collection.find_one({"is_active": True})
-    meeting_type = settings.get("meeting_type", "Google Meet") if settings else "Google Meet"
+    await reserve_or_400(settings, booking.preferred_date, booking.preferred_time_slot)
+    meeting_type = settings.get("meeting_type", "Google Meet")
     
     # Create booking
     now = get_ist_now().isoformat()
@@ -158,7 +138,11 @@ async def create_booking(booking: BookingCreate):
         "admin_notes": None
     }
     
-    await bookings_collection.insert_one(booking_data)
+    try:
+        await bookings_collection.insert_one(booking_data)
+    except Exception:
+        await slot_availability.release_slot(booking.preferred_date, booking.preferred_time_slot)
+        raise
     
     # Send email notification to admin (async, non-blocking)
     try:
@@ -246,40 +230,53 @@ async def update_booking(
     if booking_update.admin_notes is not None:
         update_data["admin_notes"] = booking_update.admin_notes
     
-    await bookings_collection.update_one(
-        {"id": booking_id},
+    # Keep the slot capacity counter in step with status changes
+    was_active = booking["status"] in slot_availability.ACTIVE_STATUSES
+    is_active = update_data.get("status", booking["status"]) in slot_availability.ACTIVE_STATUSES
+    date, time_slot = booking["preferred_date"], booking["preferred_time_slot"]
+    
+    if is_active and not was_active:
+        settings = await booking_settings_collection.find_one({"is_active": True})
+        await reserve_or_400(settings, date, time_slot)
+    
+    # Only apply if nobody changed the status meanwhile, so a place is released or taken once
+    result = await bookings_collection.update_one(
+        {"id": booking_id, "status": booking["status"]},
         {"$set": update_data}
     )
     
+    if result.matched_count == 0:
+        if is_active and not was_active:
+            await slot_availability.release_slot(date, time_slot)
+        raise HTTPException(status_code=409, detail="Booking was modified concurrently, please retry")
+    
+    if was_active and not is_active:
+        await slot_availability.release_slot(date, time_slot)
+    slot_availability.invalidate()
+    
     updated_booking = await bookings_collection.find_one({"id": booking_id})
     return updated_booking
 
 @router.delete("/admin/{booking_id}")
 async def delete_booking(booking_id: str, _: dict = Depends(get_current_admin)):
     """Delete a booking (ADMIN)"""
-    result = await bookings_collection.delete_one({"id": booking_id})
-    if result.deleted_count == 0:
+    booking = await bookings_collection.find_one_and_delete({"id": booking_id})
+    if not booking:
         raise HTTPException(status_code=404, detail="Booking not found")
+    
+    if booking.get("status") in slot_availability.ACTIVE_STATUSES:
+        await slot_availability.release_slot(booking["preferred_date"], booking["preferred_time_slot"])
+    slot_availability.invalidate()
     return {"message": "Booking deleted successfully"}
 
 @router.get("/admin/stats/summary")
 async def get_booking_stats(_: dict = Depends(get_current_admin)):
     """Get booking statistics (ADMIN)"""
-    total = await bookings_collection.count_documents({})
-    pending = await bookings_collection.count_documents({"status": "pending"})
-    confirmed = await bookings_collection.count_documents({"status": "confirmed"})
-    cancelled = await bookings_collection.count_documents({"status": "cancelled"})
-    
     today = get_ist_now().strftime("%Y-%m-%d")
-    upcoming = await bookings_collection.count_documents({
-        "status": "confirmed",
-        "preferred_date": {"$gte": today}
+    return await facet_counts(bookings_collection, {
+        "total": {},
+        "pending": {"status": "pending"},
+        "confirmed": {"status": "confirmed"},
+        "cancelled": {"status": "cancelled"},
+        "upcoming": {"status": "confirmed", "preferred_date": {"$gte": today}},
     })
-    
-    return {
-        "total": total,
-        "pending": pending,
-        "confirmed": confirmed,
-        "cancelled": cancelled,
-        "upcoming": upcoming
-    }
@@ -1,15 +1,94 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Header
 from typing import List, Optional
 from schemas.chat import ChatMessageCreate, ChatReply
 from database import conversations_collection
-from auth.admin_auth import get_current_admin, check_permission
+from auth import create_stream_ticket
+from auth.admin_auth import get_current_admin, get_admin_from_stream_ticket, check_permission
+from auth.jwt import STREAM_TICKET_SECONDS
+from auth.principal_cache import ADMIN
+from utils import realtime
+from utils.chat_inbox import (
+    adjust_total_unread, ensure_unread_count, fill_unread_counts, get_total_unread, message_preview
+)
+from utils.helpers import decode_cursor, encode_cursor, entries_after_expression, keyset_filter
 from models.chat import Conversation, ChatMessage
 from datetime import datetime
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/chat", tags=["chat"])
 
+# Messages returned with a single conversation (the newest ones)
+CHAT_PAGE_SIZE = 50
+MAX_CHAT_PAGE_SIZE = 200
+
+INBOX_PAGE_SIZE = 30
+MAX_INBOX_PAGE_SIZE = 100
+
+# Only the fields an inbox row shows
+INBOX_PROJECTION = {
+    "_id": 0, "id": 1, "customer_name": 1, "customer_email": 1, "customer_phone": 1,
+    "last_message_preview": 1, "last_message_sender": 1, "unread_count": 1,
+    "last_message_at": 1, "created_at": 1
+}
+
+def latest_messages_projection(limit: int = CHAT_PAGE_SIZE) -> dict:
+    """Projection that returns only the newest `limit` messages of a conversation"""
+    return {"_id": 0, "messages": {"$slice": -max(1, min(limit, MAX_CHAT_PAGE_SIZE))}}
+
+async def find_conversation(query: dict, after: Optional[str] = None, limit: int = CHAT_PAGE_SIZE) -> Optional[dict]:
+    """
+    A conversation with its newest messages, or with only the messages after
+    `after` (a message id or an ISO timestamp). has_more is set when more
+    messages follow the returned ones.
+    """
+    limit = max(1, min(limit, MAX_CHAT_PAGE_SIZE))
+    if not after:
+        conversation = await conversations_collection.find_one(query, latest_messages_projection(limit))
+        if conversation:
+            conversation['has_more'] = False
+        return conversation
+    
+    pipeline = [
+        {"$match": query},
+        {"$limit": 1},
+        {"$addFields": {"messages": entries_after_expression("messages", after, limit, "timestamp")}},
+        {"$project": {"_id": 0}}
+    ]
+    result = await conversations_collection.aggregate(pipeline).to_list(length=1)
+    if not result:
+        return None
+    conversation = result[0]
+    conversation['has_more'] = len(conversation['messages']) > limit
+    conversation['messages'] = conversation['messages'][:limit]
+    return conversation
+
+async def wait_for_messages(
+    conversation: Optional[dict], fetch, after: Optional[str], wait: float, public: bool = False
+) -> Optional[dict]:
+    """Long-poll: hold an empty incremental fetch until a message arrives or `wait` seconds pass"""
+    if not conversation or not after or wait <= 0 or conversation['messages']:
+        return conversation
+    return await realtime.long_poll(
+        realtime.conversation_channel(conversation['id']), fetch, wait,
+        ready=lambda c: c is None or bool(c['messages']), public=public
+    )
+
+async def publish_message(conversation: dict, message: dict, last_message_at: str):
+    """Push a new message to the conversation's stream and the admin inbox"""
+    await realtime.publish(realtime.conversation_channel(conversation['id']), "message", message)
+    await realtime.publish(realtime.INBOX_CHANNEL, "message", {
+        "id": conversation['id'],
+        "customerName": conversation['customer_name'],
+        "customerEmail": conversation['customer_email'],
+        "message": message,
+        "lastMessagePreview": message_preview(message['message']),
+        "lastMessageSender": message['sender'],
+        "lastMessageAt": last_message_at
+    })
+
 @router.post("/messages")
 async def create_message(message_data: ChatMessageCreate):
     """Create new customer message (public endpoint for chat widget)"""
@@ -34,55 +113,61 @@ async def create_message(message_data: ChatMessageCreate):
                 detail="Message too long (max 1000 characters)"
             )
         
-        # Find existing conversation by email
-        conversation = await conversations_collection.find_one({
-            "customer_email": message_data.customer_email
-        })
-        
-        # Create new message
         new_message = ChatMessage(
             sender="customer",
             message=message_data.message.strip(),
             read=False
         )
+        message_dict = new_message.model_dump()
+        message_dict['timestamp'] = message_dict['timestamp'].isoformat()
         
-        if conversation:
-            # Add message to existing conversation
-            message_dict = new_message.model_dump()
-            message_dict['timestamp'] = message_dict['timestamp'].isoformat()
-            
-            await conversations_collection.update_one(
-                {"id": conversation['id']},
-                {
-                    "$push": {"messages": message_dict},
-                    "$inc": {"unread_count": 1},
-                    "$set": {"last_message_at": datetime.utcnow().isoformat()}
-                }
-            )
-            return {"success": True, "id": conversation['id'], "message": "Message sent successfully"}
-        else:
-            # Create new conversation
-            new_conversation = Conversation(
-                customer_name=message_data.customer_name,
-                customer_email=message_data.customer_email,
-                customer_phone=message_data.customer_phone or "",
-                messages=[new_message],
-                unread_count=1
-            )
-            
-            conv_dict = new_conversation.model_dump()
-            conv_dict['created_at'] = conv_dict['created_at'].isoformat()
-            conv_dict['last_message_at'] = conv_dict['last_message_at'].isoformat()
-            
-            # Convert messages to dict
-            conv_dict['messages'] = []
-            for msg in new_conversation.messages:
-                msg_dict = msg.model_dump()
-                msg_dict['timestamp'] = msg_dict['timestamp'].isoformat()
-                conv_dict['messages'].append(msg_dict)
-            
-            await conversations_collection.insert_one(conv_dict)
-            return {"success": True, "id": new_conversation.id, "message": "Conversation started successfully"}
+        # Only used if this email has no conversation yet
+        new_conversation = Conversation(
+            customer_name=message_data.customer_name,
+            customer_email=message_data.customer_email,
+            customer_phone=message_data.customer_phone or ""
+        )
+        last_message_at = datetime.utcnow().isoformat()
+        
+        # Append to the email's conversation, creating it if needed, in one write.
+        # customer_email is unique, so concurrent first messages cannot create two.
+        update = {
+            "$push": {"messages": message_dict},
+            "$inc": {"unread_count": 1},
+            "$set": {
+                "last_message_at": last_message_at,
+                "last_message_preview": message_preview(new_message.message),
+                "last_message_sender": new_message.sender
+            },
+            "$setOnInsert": {
+                "id": new_conversation.id,
+                "customer_name": new_conversation.customer_name,
+                "customer_phone": new_conversation.customer_phone,
+                "created_at": new_conversation.created_at.isoformat()
+            }
+        }
+        await ensure_unread_count({"customer_email": message_data.customer_email})
+        for attempt in range(2):
+            try:
+                conversation = await conversations_collection.find_one_and_update(
+                    {"customer_email": message_data.customer_email},
+                    update,
+                    upsert=True,
+                    projection={"_id": 0, "id": 1, "customer_name": 1, "customer_email": 1},
+                    return_document=ReturnDocument.AFTER
+                )
+                break
+            except DuplicateKeyError:
+                # Lost the insert race to another first message; now it matches
+                if attempt:
+                    raise
+        
+        await adjust_total_unread(1)
+        await publish_message(conversation, message_dict, last_message_at)
+        
+        if conversation['id'] == new_conversation.id:
+            return {"success": True, "id": conversation['id'], "message": "Conversation started successfully"}
+        return {"success": True, "id": conversation['id'], "message": "Message sent successfully"}
     
     except HTTPException:
         raise
@@ -94,8 +179,18 @@ async def create_message(message_data: ChatMessageCreate):
         )
 
 @router.get("/user-conversation")
-async def get_user_conversation(email: str, phone: Optional[str] = None):
-    """Get user's conversation by email and phone (public endpoint)"""
+async def get_user_conversation(
+    email: str,
+    phone: Optional[str] = None,
+    after: Optional[str] = None,
+    limit: int = CHAT_PAGE_SIZE,
+    wait: float = 0
+):
+    """
+    Get user's conversation by email and phone (public endpoint).
+    With ?after=<message id or timestamp> only newer messages are returned;
+    add ?wait=<seconds> to hold the request until one arrives.
+    """
     try:
         if not email:
             raise HTTPException(
@@ -108,7 +203,10 @@ async def get_user_conversation(email: str, phone: Optional[str] = None):
         if phone:
             query["customer_phone"] = phone
         
-        conversation = await conversations_collection.find_one(query)
+        async def fetch():
+            return await find_conversation(query, after, limit)
+        
+        conversation = await wait_for_messages(await fetch(), fetch, after, wait, public=True)
         
         if not conversation:
             return {
@@ -125,8 +223,9 @@ async def get_user_conversation(email: str, phone: Optional[str] = None):
                 "customerEmail": conversation['customer_email'],
                 "customerPhone": conversation.get('customer_phone'),
                 "messages": conversation['messages'],
-                "lastMessageAt": conversation['last_message_at'],
-                "createdAt": conversation['created_at']
+                "hasMore": conversation['has_more'],
+                "lastMessageAt": conversation.get('last_message_at'),
+                "createdAt": conversation.get('created_at')
             }
         }
     except HTTPException:
@@ -138,57 +237,210 @@ async def get_user_conversation(email: str, phone: Optional[str] = None):
             detail="Failed to fetch conversation"
         )
 
+@router.get("/user-conversation/events")
+async def stream_user_conversation(
+    conversation_id: str,
+    email: str,
+    phone: Optional[str] = None,
+    last_event_id: Optional[str] = Header(None)
+):
+    """
+    Server-sent events for the user's conversation: message, read, deleted
+    (public endpoint). Needs the conversation id returned by /chat/messages or
+    /chat/user-conversation as well as the email, and only a few streams per
+    conversation may be open at once.
+    """
+    query = {"id": conversation_id, "customer_email": email}
+    if phone:
+        query["customer_phone"] = phone
+    
+    conversation = await conversations_collection.find_one(query, {"_id": 0, "id": 1})
+    if not conversation:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No conversation found"
+        )
+    
+    return realtime.stream(realtime.conversation_channel(conversation['id']), last_event_id, public=True)
+
+@router.get("/inbox")
+async def get_inbox(
+    cursor: Optional[str] = None,
+    limit: int = INBOX_PAGE_SIZE,
+    current_admin: dict = Depends(get_current_admin)
+):
+    """
+    One page of conversations, most recent first, with a preview of the last
+    message instead of the messages. Pass back nextCursor for the next page.
+    """
+    if not check_permission(current_admin, 'canAccessChat') and current_admin['role'] != 'super_admin':
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied"
+        )
+    
+    limit = max(1, min(limit, MAX_INBOX_PAGE_SIZE))
+    query = {}
+    if cursor:
+        try:
+            last_message_at, last_id = decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        query = keyset_filter("last_message_at", last_message_at, last_id, descending=True)
+    
+    conversations = await conversations_collection.find(query, INBOX_PROJECTION).sort(
+        [("last_message_at", -1), ("id", -1)]
+    ).limit(limit + 1).to_list(length=limit + 1)
+    has_more = len(conversations) > limit
+    conversations = conversations[:limit]
+    await fill_unread_counts(conversations)
+    next_cursor = (
+        encode_cursor(conversations[-1].get('last_message_at'), conversations[-1]['id']) if has_more else None
+    )
+    
+    return {
+        "success": True,
+        "conversations": [
+            {
+                "id": conv['id'],
+                "customerName": conv.get('customer_name', ""),
+                "customerEmail": conv.get('customer_email', ""),
+                "customerPhone": conv.get('customer_phone'),
+                "lastMessagePreview": conv.get('last_message_preview', ""),
+                "lastMessageSender": conv.get('last_message_sender'),
+                "unreadCount": conv.get('unread_count', 0),
+                "lastMessageAt": conv.get('last_message_at'),
+                "createdAt": conv.get('created_at')
+            }
+            for conv in conversations
+        ],
+        "nextCursor": next_cursor,
+        "totalUnread": await get_total_unread()
+    }
+
+def stream_ticket_response(admin: dict, channel: str) -> dict:
+    return {
+        "success": True,
+        "ticket": create_stream_ticket(ADMIN, admin['id'], channel),
+        "expiresIn": STREAM_TICKET_SECONDS
+    }
+
+@router.post("/conversations/events/ticket")
+async def create_conversations_stream_ticket(current_admin: dict = Depends(get_current_admin)):
+    """Short-lived ticket for opening /chat/conversations/events (EventSource cannot send headers)"""
+    if not check_permission(current_admin, 'canAccessChat') and current_admin['role'] != 'super_admin':
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied"
+        )
+    
+    return stream_ticket_response(current_admin, realtime.INBOX_CHANNEL)
+
+@router.get("/conversations/events")
+async def stream_conversations(
+    ticket: Optional[str] = None,
+    last_event_id: Optional[str] = Header(None)
+):
+    """Server-sent events for the inbox: message, read, deleted for every conversation (?ticket= from .../events/ticket)"""
+    current_admin = await get_admin_from_stream_ticket(ticket, realtime.INBOX_CHANNEL)
+    if not check_permission(current_admin, 'canAccessChat') and current_admin['role'] != 'super_admin':
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied"
+        )
+    
+    return realtime.stream(realtime.INBOX_CHANNEL, last_event_id)
+
+@router.post("/conversations/{conversation_id}/events/ticket")
+async def create_conversation_stream_ticket(
+    conversation_id: str,
+    current_admin: dict = Depends(get_current_admin)
+):
+    """Short-lived ticket for opening /chat/conversations/{id}/events"""
+    if not check_permission(current_admin, 'canAccessChat') and current_admin['role'] != 'super_admin':
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied"
+        )
+    
+    return stream_ticket_response(current_admin, realtime.conversation_channel(conversation_id))
+
+@router.get("/conversations/{conversation_id}/events")
+async def stream_conversation(
+    conversation_id: str,
+    ticket: Optional[str] = None,
+    last_event_id: Optional[str] = Header(None)
+):
+    """Server-sent events for one conversation: message, read, deleted (?ticket= from .../events/ticket)"""
+    channel = realtime.conversation_channel(conversation_id)
+    current_admin = await get_admin_from_stream_ticket(ticket, channel)
+    if not check_permission(current_admin, 'canAccessChat') and current_admin['role'] != 'super_admin':
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied"
+        )
+    
+    return realtime.stream(channel, last_event_id)
+
 @router.get("/conversations")
 async def get_conversations(current_admin: dict = Depends(get_current_admin)):
-    """Get all conversations (admin only)"""
+    """Get all conversations with their newest messages (admin only; the inbox list uses /chat/inbox)"""
     if not check_permission(current_admin, 'canAccessChat') and current_admin['role'] != 'super_admin':
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Access denied"
         )
     
-    conversations = await conversations_collection.find({}).sort("last_message_at", -1).to_list(length=1000)
+    # Newest messages only, and the maintained total instead of summing every conversation
+    conversations = await conversations_collection.find({}, latest_messages_projection()).sort(
+        [("last_message_at", -1), ("id", -1)]
+    ).to_list(length=1000)
+    await fill_unread_counts(conversations)
     
     result = []
-    total_unread = 0
-    
     for conv in conversations:
-        total_unread += conv.get('unread_count', 0)
         result.append({
             "id": conv['id'],
-            "customerName": conv['customer_name'],
-            "customerEmail": conv['customer_email'],
+            "customerName": conv.get('customer_name', ""),
+            "customerEmail": conv.get('customer_email', ""),
             "customerPhone": conv.get('customer_phone'),
-            "messages": conv['messages'],
+            "messages": conv.get('messages', []),
             "unreadCount": conv.get('unread_count', 0),
-            "lastMessageAt": conv['last_message_at'],
-            "createdAt": conv['created_at']
+            "lastMessageAt": conv.get('last_message_at'),
+            "createdAt": conv.get('created_at')
         })
     
     return {
         "success": True,
         "conversations": result,
-        "totalUnread": total_unread
+        "totalUnread": await get_total_unread()
     }
 
 @router.get("/conversations/{conversation_id}")
 async def get_conversation(
     conversation_id: str,
+    after: Optional[str] = None,
+    limit: int = CHAT_PAGE_SIZE,
+    wait: float = 0,
     current_admin: dict = Depends(get_current_admin)
 ):
-    """Get specific conversation"""
+    """Get specific conversation with its latest messages, or only those after ?after= (long-polls with ?wait=)"""
     if not check_permission(current_admin, 'canAccessChat') and current_admin['role'] != 'super_admin':
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Access denied"
         )
     
-    conversation = await conversations_collection.find_one({"id": conversation_id})
+    async def fetch():
+        return await find_conversation({"id": conversation_id}, after, limit)
+    
+    conversation = await wait_for_messages(await fetch(), fetch, after, wait)
     if not conversation:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Conversation not found"
         )
+    await fill_unread_counts([conversation])
     
     return {
         "id": conversation['id'],
@@ -196,9 +448,10 @@ async def get_conversation(
         "customerEmail": conversation['customer_email'],
         "customerPhone": conversation.get('customer_phone'),
         "messages": conversation['messages'],
+        "hasMore": conversation['has_more'],
         "unreadCount": conversation.get('unread_count', 0),
-        "lastMessageAt": conversation['last_message_at'],
-        "createdAt": conversation['created_at']
+        "lastMessageAt": conversation.get('last_message_at'),
+        "createdAt": conversation.get('created_at')
     }
 
 @router.put("/conversations/{conversation_id}/read")
@@ -213,28 +466,28 @@ async def mark_as_read(
             detail="Access denied"
         )
     
-    conversation = await conversations_collection.find_one({"id": conversation_id})
-    if not conversation:
+    await ensure_unread_count({"id": conversation_id})
+    
+    # Flip only the unread customer messages in place; the flags and the counter
+    # change in one write, so messages appended meanwhile are never lost. The
+    # count before the write is what leaves the global total.
+    before = await conversations_collection.find_one_and_update(
+        {"id": conversation_id},
+        {"$set": {"messages.$[m].read": True, "unread_count": 0}},
+        array_filters=[{"m.sender": "customer", "m.read": {"$ne": True}}],
+        projection={"_id": 0, "unread_count": 1},
+        return_document=ReturnDocument.BEFORE
+    )
+    if before is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Conversation not found"
         )
     
-    # Mark all customer messages as read
-    messages = conversation['messages']
-    for msg in messages:
-        if msg['sender'] == 'customer':
-            msg['read'] = True
-    
-    await conversations_collection.update_one(
-        {"id": conversation_id},
-        {
-            "$set": {
-                "messages": messages,
-                "unread_count": 0
-            }
-        }
-    )
+    if before.get('unread_count', 0):
+        await adjust_total_unread(-before['unread_count'])
+        await realtime.publish(realtime.conversation_channel(conversation_id), "read", {"unreadCount": 0})
+        await realtime.publish(realtime.INBOX_CHANNEL, "read", {"id": conversation_id})
     
     return {"message": "Marked as read"}
 
@@ -251,13 +504,6 @@ async def send_reply(
             detail="Access denied"
         )
     
-    conversation = await conversations_collection.find_one({"id": conversation_id})
-    if not conversation:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Conversation not found"
-        )
-    
     # Create admin reply message
     reply_message = ChatMessage(
         sender="admin",
@@ -267,17 +513,29 @@ async def send_reply(
     
     reply_dict = reply_message.model_dump()
     reply_dict['timestamp'] = reply_dict['timestamp'].isoformat()
+    last_message_at = datetime.utcnow().isoformat()
     
-    await conversations_collection.update_one(
+    updated_conv = await conversations_collection.find_one_and_update(
         {"id": conversation_id},
         {
             "$push": {"messages": reply_dict},
-            "$set": {"last_message_at": datetime.utcnow().isoformat()}
-        }
+            "$set": {
+                "last_message_at": last_message_at,
+                "last_message_preview": message_preview(reply_message.message),
+                "last_message_sender": reply_message.sender
+            }
+        },
+        projection=latest_messages_projection(),
+        return_document=ReturnDocument.AFTER
     )
+    if not updated_conv:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Conversation not found"
+        )
     
-    # Get updated conversation
-    updated_conv = await conversations_collection.find_one({"id": conversation_id})
+    await fill_unread_counts([updated_conv])
+    await publish_message(updated_conv, reply_dict, last_message_at)
     
     return {
         "success": True,
@@ -304,11 +562,18 @@ async def delete_conversation(
             detail="Only super admin can delete conversations"
         )
     
-    result = await conversations_collection.delete_one({"id": conversation_id})
-    if result.deleted_count == 0:
+    await ensure_unread_count({"id": conversation_id})
+    deleted = await conversations_collection.find_one_and_delete(
+        {"id": conversation_id}, projection={"_id": 0, "unread_count": 1}
+    )
+    if deleted is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Conversation not found"
         )
     
+    await adjust_total_unread(-deleted.get('unread_count', 0))
+    await realtime.publish(realtime.conversation_channel(conversation_id), "deleted", {"id": conversation_id})
+    await realtime.publish(realtime.INBOX_CHANNEL, "deleted", {"id": conversation_id})
+    
     return {"message": "Conversation deleted successfully"}
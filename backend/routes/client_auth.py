@@ -1,7 +1,7 @@
 from fastapi import APIRouter, HTTPException, status, Depends
 from schemas.client import ClientLogin, ClientTokenResponse, ClientResponse
 from database import clients_collection
-from auth.password import verify_password
+from auth.password import verify_password_async, hash_password_async, needs_rehash
 from auth.jwt import create_access_token
 from auth.client_auth import get_current_client
 from datetime import datetime
@@ -28,12 +28,19 @@ async def client_login(credentials: ClientLogin):
         )
     
     # Verify password
-    if not verify_password(credentials.password, client_doc['password_hash']):
+    if not await verify_password_async(credentials.password, client_doc['password_hash']):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password"
         )
     
+    # Upgrade hashes made with an older bcrypt cost
+    if needs_rehash(client_doc['password_hash']):
+        await clients_collection.update_one(
+            {"id": client_doc['id']},
+            {"$set": {"password_hash": await hash_password_async(credentials.password)}}
+        )
+    
     # Create access token with client type
     access_token = create_access_token(
         data={
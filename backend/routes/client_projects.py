@@ -1,18 +1,21 @@
-from fastapi import APIRouter, HTTPException, status, Depends
-from fastapi.responses import FileResponse
-from typing import List
+from fastapi import APIRouter, HTTPException, status, Depends, Header, Request
+from typing import List, Optional
 from schemas.client_project import (
     ClientProjectResponse, CommentCreate, CommentResponse,
     MilestoneResponse, TaskResponse, ProjectFileResponse,
     ActivityResponse, TeamMemberResponse, BudgetResponse,
-    ChatMessageCreate, ChatMessageResponse
+    ChatMessageCreate, ChatMessageResponse,
+    MilestonePage, TaskPage, ProjectFilePage, CommentPage, ChatMessagePage, ActivityPage
 )
-from database import client_projects_collection
-from auth.client_auth import get_current_client
+from auth import create_stream_ticket
+from auth.client_auth import get_current_client, get_client_from_stream_ticket
+from auth.jwt import STREAM_TICKET_SECONDS
+from auth.principal_cache import CLIENT
 from models.client_project import ProjectComment, ProjectActivity
 from models.client_project import ChatMessage
-from datetime import datetime
-import os
+from database import client_projects_collection
+from utils import blob_store, project_store, realtime
+from utils.file_responses import send_file
 
 router = APIRouter(prefix="/client/projects", tags=["client-projects"])
 
@@ -131,18 +134,41 @@ def convert_project_to_response(project_doc) -> ClientProjectResponse:
         last_activity_at=project_doc.get('last_activity_at')
     )
 
+async def get_my_project_or_404(project_id: str, client: dict) -> dict:
+    """Read the project header (no sub-entity arrays) if it belongs to the client"""
+    project_doc = await project_store.get_project_header({
+        "id": project_id,
+        "client_id": client["id"]
+    })
+    
+    if not project_doc:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found or not assigned to you"
+        )
+    
+    return project_doc
+
+async def get_page(project_id: str, field: str, cursor: Optional[str], limit: int, client: dict):
+    """Fetch one page of a project sub-resource"""
+    await get_my_project_or_404(project_id, client)
+    try:
+        return await project_store.list_entries(project_id, field, cursor, limit)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
 @router.get("/", response_model=List[ClientProjectResponse])
 async def get_my_projects(client = Depends(get_current_client)):
     """Get all projects assigned to the current client"""
     projects = []
-    async for project_doc in client_projects_collection.find({"client_id": client["id"]}):
+    async for project_doc in project_store.find_full_projects({"client_id": client["id"]}):
         projects.append(convert_project_to_response(project_doc))
     return projects
 
 @router.get("/{project_id}", response_model=ClientProjectResponse)
 async def get_project(project_id: str, client = Depends(get_current_client)):
     """Get a specific project (only if assigned to current client)"""
-    project_doc = await client_projects_collection.find_one({
+    project_doc = await project_store.get_full_project({
         "id": project_id,
         "client_id": client["id"]
     })
@@ -155,19 +181,69 @@ async def get_project(project_id: str, client = Depends(get_current_client)):
     
     return convert_project_to_response(project_doc)
 
+# ============================================================================
+# PAGED SUB-RESOURCES (Client)
+# ============================================================================
+
+@router.get("/{project_id}/milestones", response_model=MilestonePage)
+async def list_milestones(
+    project_id: str,
+    cursor: Optional[str] = None,
+    limit: int = project_store.DEFAULT_PAGE_SIZE,
+    client = Depends(get_current_client)
+):
+    """List a project's milestones, one page at a time"""
+    items, next_cursor = await get_page(project_id, "milestones", cursor, limit, client)
+    return MilestonePage(items=[MilestoneResponse(**m) for m in items], next_cursor=next_cursor)
+
+@router.get("/{project_id}/tasks", response_model=TaskPage)
+async def list_tasks(
+    project_id: str,
+    cursor: Optional[str] = None,
+    limit: int = project_store.DEFAULT_PAGE_SIZE,
+    client = Depends(get_current_client)
+):
+    """List a project's tasks, one page at a time"""
+    items, next_cursor = await get_page(project_id, "tasks", cursor, limit, client)
+    return TaskPage(items=[TaskResponse(**t) for t in items], next_cursor=next_cursor)
+
+@router.get("/{project_id}/files", response_model=ProjectFilePage)
+async def list_files(
+    project_id: str,
+    cursor: Optional[str] = None,
+    limit: int = project_store.DEFAULT_PAGE_SIZE,
+    client = Depends(get_current_client)
+):
+    """List a project's files, one page at a time"""
+    items, next_cursor = await get_page(project_id, "files", cursor, limit, client)
+    return ProjectFilePage(items=[ProjectFileResponse(**f) for f in items], next_cursor=next_cursor)
+
+@router.get("/{project_id}/comments", response_model=CommentPage)
+async def list_comments(
+    project_id: str,
+    cursor: Optional[str] = None,
+    limit: int = project_store.DEFAULT_PAGE_SIZE,
+    client = Depends(get_current_client)
+):
+    """List a project's comments, one page at a time"""
+    items, next_cursor = await get_page(project_id, "comments", cursor, limit, client)
+    return CommentPage(items=[CommentResponse(**c) for c in items], next_cursor=next_cursor)
+
+@router.get("/{project_id}/activity", response_model=ActivityPage)
+async def list_activity(
+    project_id: str,
+    cursor: Optional[str] = None,
+    limit: int = project_store.DEFAULT_PAGE_SIZE,
+    client = Depends(get_current_client)
+):
+    """List a project's activity log, one page at a time"""
+    items, next_cursor = await get_page(project_id, "activity_log", cursor, limit, client)
+    return ActivityPage(items=[ActivityResponse(**a) for a in items], next_cursor=next_cursor)
+
 @router.post("/{project_id}/comments", response_model=CommentResponse)
 async def add_comment(project_id: str, comment_data: CommentCreate, client = Depends(get_current_client)):
     """Add a comment to project (Client)"""
-    project_doc = await client_projects_collection.find_one({
-        "id": project_id,
-        "client_id": client["id"]
-    })
-    
-    if not project_doc:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Project not found or not assigned to you"
-        )
+    await get_my_project_or_404(project_id, client)
     
     comment = ProjectComment(
         user_id=client["id"],
@@ -189,16 +265,10 @@ async def add_comment(project_id: str, comment_data: CommentCreate, client = Dep
     activity_dict = activity.model_dump()
     activity_dict['timestamp'] = activity_dict['timestamp'].isoformat()
     
-    await client_projects_collection.update_one(
-        {"id": project_id},
-        {
-            "$push": {
-                "comments": comment_dict,
-                "activity_log": activity_dict
-            },
-            "$set": {"last_activity_at": datetime.utcnow().isoformat()}
-        }
-    )
+    await project_store.add_entries(project_id, {
+        "comments": comment_dict,
+        "activity_log": activity_dict
+    })
     
     return CommentResponse(**comment_dict)
 
@@ -206,46 +276,39 @@ async def add_comment(project_id: str, comment_data: CommentCreate, client = Dep
 async def download_project_file(
     project_id: str,
     file_id: str,
+    request: Request,
     client = Depends(get_current_client)
 ):
-    """Download a file from a project (only if project is assigned to current client)"""
-    # Verify project belongs to client
-    project_doc = await client_projects_collection.find_one({
-        "id": project_id,
-        "client_id": client["id"]
-    })
-    
-    if not project_doc:
+    """
+    Download a file from a project (only if project is assigned to current client).
+    Supports Range requests for resuming and ETag / Last-Modified revalidation.
+    """
+    # Ownership check only; the file is looked up on its own
+    if not await client_projects_collection.find_one({"id": project_id, "client_id": client["id"]}, {"_id": 1}):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Project not found or not assigned to you"
         )
     
-    # Find file in project
-    file_info = None
-    for f in project_doc.get('files', []):
-        if f['id'] == file_id:
-            file_info = f
-            break
-    
-    if not file_info:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="File not found"
+    ref = await blob_store.resolve_stem(f"client_projects/{project_id}/{file_id}")
+    if ref is not None:
+        return await send_file(
+            request, ref["path"], "application/octet-stream",
+            sha256=ref["sha256"], filename=ref.get("filename") or file_id
         )
     
-    file_path = file_info['file_path']
+    # Files uploaded before the blob store
+    file_info = await project_store.get_entry(project_id, "files", file_id)
     
-    if not os.path.exists(file_path):
+    if not file_info:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="File not found on server"
+            detail="File not found"
         )
     
-    return FileResponse(
-        path=file_path,
-        filename=file_info['filename'],
-        media_type='application/octet-stream'
+    return await send_file(
+        request, file_info['file_path'], 'application/octet-stream',
+        sha256=file_info.get('sha256'), filename=file_info['filename']
     )
 
 # ============================================================================
@@ -255,16 +318,7 @@ async def download_project_file(
 @router.post("/{project_id}/chat", response_model=ChatMessageResponse)
 async def send_chat_message(project_id: str, message_data: ChatMessageCreate, client = Depends(get_current_client)):
     """Send a chat message to admin (Client)"""
-    project_doc = await client_projects_collection.find_one({
-        "id": project_id,
-        "client_id": client["id"]
-    })
-    
-    if not project_doc:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Project not found or not assigned to you"
-        )
+    await get_my_project_or_404(project_id, client)
     
     chat_message = ChatMessage(
         sender_id=client["id"],
@@ -287,46 +341,43 @@ async def send_chat_message(project_id: str, message_data: ChatMessageCreate, cl
     activity_dict = activity.model_dump()
     activity_dict['timestamp'] = activity_dict['timestamp'].isoformat()
     
-    await client_projects_collection.update_one(
-        {"id": project_id},
-        {
-            "$push": {
-                "chat_messages": message_dict,
-                "activity_log": activity_dict
-            },
-            "$set": {"last_activity_at": datetime.utcnow().isoformat()}
-        }
-    )
+    await project_store.ensure_chat_unread(project_id, "client")
+    await project_store.add_entries(project_id, {
+        "chat_messages": message_dict,
+        "activity_log": activity_dict
+    }, extra_inc=project_store.chat_unread_increment("client"))
     
-    return ChatMessageResponse(**message_dict)
+    response = ChatMessageResponse(**message_dict)
+    await realtime.publish(realtime.project_channel(project_id), "message", response.model_dump(mode="json"))
+    return response
 
 @router.get("/{project_id}/chat", response_model=List[ChatMessageResponse])
-async def get_chat_messages(project_id: str, client = Depends(get_current_client)):
-    """Get all chat messages for a project (Client)"""
-    project_doc = await client_projects_collection.find_one({
-        "id": project_id,
-        "client_id": client["id"]
-    })
-    
-    if not project_doc:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Project not found or not assigned to you"
-        )
+async def get_chat_messages(
+    project_id: str,
+    after: Optional[str] = None,
+    limit: int = project_store.DEFAULT_PAGE_SIZE,
+    wait: float = 0,
+    client = Depends(get_current_client)
+):
+    """
+    Get the latest chat messages for a project and mark the admin's as read (Client).
+    With ?after=<message id or timestamp> only newer messages are returned;
+    add ?wait=<seconds> to hold the request until one arrives.
+    """
+    await get_my_project_or_404(project_id, client)
     
-    # Mark client messages as read
-    chat_messages = project_doc.get('chat_messages', [])
-    updated = False
-    for msg in chat_messages:
-        if msg['sender_type'] == 'admin' and not msg.get('read', False):
-            msg['read'] = True
-            updated = True
+    async def fetch():
+        if await project_store.mark_chat_read(project_id, "admin"):
+            await realtime.publish(realtime.project_channel(project_id), "read", {"sender_type": "admin"})
+        if not after:
+            return await project_store.latest_entries(project_id, "chat_messages", limit)
+        messages, _ = await project_store.entries_after(project_id, "chat_messages", after, limit)
+        return messages
     
-    if updated:
-        await client_projects_collection.update_one(
-            {"id": project_id},
-            {"$set": {"chat_messages": chat_messages}}
-        )
+    if after and wait > 0:
+        chat_messages = await realtime.long_poll(realtime.project_channel(project_id), fetch, wait)
+    else:
+        chat_messages = await fetch()
     
     return [
         ChatMessageResponse(
@@ -336,7 +387,38 @@ async def get_chat_messages(project_id: str, client = Depends(get_current_client
             sender_type=cm['sender_type'],
             message=cm['message'],
             read=cm.get('read', False),
-            created_at=cm['created_at'] if isinstance(cm['created_at'], str) else cm['created_at'].isoformat()
+            created_at=cm['created_at']
         ) for cm in chat_messages
     ]
 
+@router.post("/{project_id}/events/ticket")
+async def create_project_stream_ticket(project_id: str, client = Depends(get_current_client)):
+    """Short-lived ticket for opening the project's event stream (Client)"""
+    await get_my_project_or_404(project_id, client)
+    return {
+        "ticket": create_stream_ticket(CLIENT, client["id"], realtime.project_channel(project_id)),
+        "expires_in": STREAM_TICKET_SECONDS
+    }
+
+@router.get("/{project_id}/events")
+async def stream_project_events(
+    project_id: str,
+    ticket: Optional[str] = None,
+    last_event_id: Optional[str] = Header(None)
+):
+    """Server-sent events for a project's chat: message, read (Client, ?ticket= from .../events/ticket)"""
+    channel = realtime.project_channel(project_id)
+    client = await get_client_from_stream_ticket(ticket, channel)
+    await get_my_project_or_404(project_id, client)
+    return realtime.stream(channel, last_event_id)
+
+@router.get("/{project_id}/chat/history", response_model=ChatMessagePage)
+async def list_chat_history(
+    project_id: str,
+    cursor: Optional[str] = None,
+    limit: int = project_store.DEFAULT_PAGE_SIZE,
+    client = Depends(get_current_client)
+):
+    """List a project's chat messages, one page at a time (does not mark them read)"""
+    items, next_cursor = await get_page(project_id, "chat_messages", cursor, limit, client)
+    return ChatMessagePage(items=[ChatMessageResponse(**cm) for cm in items], next_cursor=next_cursor)
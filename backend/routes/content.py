@@ -4,6 +4,7 @@ from database import content_collection
 from utils import serialize_document
 from models.content import WebsiteContent
 from datetime import datetime
+from utils import response_cache
 
 router = APIRouter(prefix="/content", tags=["content"])
 
@@ -18,6 +19,7 @@ async def get_content():
         doc = default_content.model_dump()
         doc['updated_at'] = doc['updated_at'].isoformat()
         await content_collection.insert_one(doc)
+        await response_cache.bump("content")
         return serialize_document(doc)
     
     return serialize_document(content)
@@ -34,6 +36,7 @@ async def update_content(content_data: ContentUpdate):
         doc = default_content.model_dump()
         doc['updated_at'] = doc['updated_at'].isoformat()
         await content_collection.insert_one(doc)
+        await response_cache.bump("content")
         existing = doc
     
     # Update only provided fields
@@ -44,6 +47,7 @@ async def update_content(content_data: ContentUpdate):
         {"id": "website_content"},
         {"$set": update_data}
     )
+    await response_cache.bump("content")
     
     updated_content = await content_collection.find_one({"id": "website_content"})
     return serialize_document(updated_content)
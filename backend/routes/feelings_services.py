@@ -21,6 +21,7 @@ from models.feelings_service import FeelingsService
 from models.service_request import ServiceRequest
 from models.generated_link import GeneratedLink
 from auth.admin_auth import get_current_admin
+from utils import response_cache
 
 router = APIRouter(prefix="/feelings-services", tags=["Feelings Services"])
 
@@ -46,6 +47,7 @@ async def create_feelings_service(
     }
     
     await feelings_services_collection.insert_one(service_doc)
+    await response_cache.bump("feelings_services")
     return {"message": "Feelings service created successfully", "id": service_id}
 
 
@@ -94,6 +96,7 @@ async def update_feelings_service(
         {"id": service_id},
         {"$set": update_data}
     )
+    await response_cache.bump("feelings_services")
     
     return {"message": "Service updated successfully"}
 
@@ -105,6 +108,7 @@ async def delete_feelings_service(
 ):
     """Delete a feelings service (Admin only)"""
     result = await feelings_services_collection.delete_one({"id": service_id})
+    await response_cache.bump("feelings_services")
     
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Service not found")
@@ -0,0 +1,33 @@
+"""
+Prometheus scrape endpoint (GET /metrics), outside the /api prefix.
+
+The scraper must send "Authorization: Bearer <METRICS_TOKEN>". Without a
+token the endpoint answers 404, unless METRICS_PUBLIC=true opts in to serving
+it unauthenticated (only behind a proxy that restricts /metrics).
+"""
+import hmac
+import os
+
+from fastapi import APIRouter, HTTPException, Request, status
+from fastapi.responses import PlainTextResponse
+
+from utils import metrics
+
+router = APIRouter(tags=["metrics"])
+
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+METRICS_PUBLIC = os.environ.get("METRICS_PUBLIC", "false").lower() == "true"
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router.get("/metrics", include_in_schema=False)
+async def get_metrics(request: Request):
+    # Fail closed: no token and no explicit opt-in means no endpoint
+    if not metrics.METRICS_ENABLED or not (METRICS_TOKEN or METRICS_PUBLIC):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if METRICS_TOKEN:
+        supplied = request.headers.get("authorization", "")
+        if not hmac.compare_digest(supplied, f"Bearer {METRICS_TOKEN}"):
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token")
+    return PlainTextResponse(metrics.render(), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -4,44 +4,53 @@ from schemas.newsletter import NewsletterSubscribe, NewsletterResponse, Newslett
 from database import newsletter_collection
 from utils import serialize_document
 from models.newsletter import NewsletterSubscriber
-from datetime import datetime
 from auth.admin_auth import get_current_admin
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 
 router = APIRouter(prefix="/newsletter", tags=["newsletter"])
 
 @router.post("/subscribe", response_model=dict)
 async def subscribe_to_newsletter(subscription_data: NewsletterSubscribe):
     """Subscribe to newsletter (public endpoint)"""
-    # Check if email already exists
-    existing = await newsletter_collection.find_one({"email": subscription_data.email})
-    
-    if existing:
-        # If already subscribed
-        if existing.get("status") == "subscribed":
-            return {
-                "message": "This email is already subscribed to our newsletter",
-                "status": "already_subscribed"
-            }
-        # If previously unsubscribed, resubscribe
-        else:
-            await newsletter_collection.update_one(
-                {"email": subscription_data.email},
-                {"$set": {"status": "subscribed", "created_at": datetime.utcnow()}}
-            )
-            return {
-                "message": "Successfully resubscribed to newsletter!",
-                "status": "resubscribed"
-            }
-    
-    # Create new subscriber
     subscriber = NewsletterSubscriber(**subscription_data.model_dump())
     doc = subscriber.model_dump()
     doc['created_at'] = doc['created_at'].isoformat()
     
-    await newsletter_collection.insert_one(doc)
+    # Insert the subscriber unless the email is already there, in one write;
+    # email is unique, so concurrent sign-ups cannot create two
+    try:
+        existing = await newsletter_collection.find_one_and_update(
+            {"email": subscription_data.email},
+            {"$setOnInsert": doc},
+            upsert=True,
+            projection={"_id": 0, "status": 1},
+            return_document=ReturnDocument.BEFORE
+        )
+    except DuplicateKeyError:
+        # Lost the insert race to a concurrent sign-up for the same email
+        existing = await newsletter_collection.find_one({"email": subscription_data.email}, {"_id": 0, "status": 1})
+    
+    if existing is None:
+        return {
+            "message": "Successfully subscribed to newsletter!",
+            "status": "subscribed"
+        }
+    
+    # If previously unsubscribed, resubscribe
+    result = await newsletter_collection.update_one(
+        {"email": subscription_data.email, "status": {"$ne": "subscribed"}},
+        {"$set": {"status": "subscribed", "created_at": doc['created_at']}}
+    )
+    if result.modified_count:
+        return {
+            "message": "Successfully resubscribed to newsletter!",
+            "status": "resubscribed"
+        }
+    
     return {
-        "message": "Successfully subscribed to newsletter!",
-        "status": "subscribed"
+        "message": "This email is already subscribed to our newsletter",
+        "status": "already_subscribed"
     }
 
 @router.get("/admin/all", response_model=List[NewsletterResponse])
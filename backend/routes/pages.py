@@ -5,6 +5,7 @@ from database import page_content_collection
 from utils import serialize_document
 from models import PageContent
 from datetime import datetime
+from utils import response_cache
 
 router = APIRouter(prefix="/pages", tags=["pages"])
 
@@ -43,6 +44,7 @@ async def update_page_content(page_name: str, content: Dict[str, Any]):
                     "updated_at": datetime.utcnow().isoformat()
                 }}
             )
+            await response_cache.bump("page_content")
         else:
             # Create new section
             page_content = PageContent(
@@ -53,6 +55,7 @@ async def update_page_content(page_name: str, content: Dict[str, Any]):
             doc = page_content.model_dump()
             doc['updated_at'] = doc['updated_at'].isoformat()
             await page_content_collection.insert_one(doc)
+            await response_cache.bump("page_content")
     
     return {"message": "Page content updated successfully"}
 
@@ -64,4 +67,5 @@ async def create_page_section(page_data: PageContentCreate):
     doc['updated_at'] = doc['updated_at'].isoformat()
     
     await page_content_collection.insert_one(doc)
+    await response_cache.bump("page_content")
     return serialize_document(doc)
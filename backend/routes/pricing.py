@@ -5,6 +5,7 @@ from utils import serialize_document
 from models.pricing import Pricing, WebsiteType, Technology, Feature, TimelineMultiplier
 from datetime import datetime
 from auth.admin_auth import get_current_admin
+from utils import response_cache
 
 router = APIRouter(prefix="/pricing", tags=["pricing"])
 
@@ -51,6 +52,7 @@ async def get_pricing():
         doc = default_pricing.model_dump()
         doc['updated_at'] = doc['updated_at'].isoformat()
         await pricing_collection.insert_one(doc)
+        await response_cache.bump("pricing")
         
         return default_pricing.model_dump()
     
@@ -73,6 +75,7 @@ async def update_pricing(
             {"id": "pricing_config"},
             {"$set": update_data}
         )
+        await response_cache.bump("pricing")
     else:
         # Create new pricing with defaults
         pricing = Pricing(
@@ -86,6 +89,7 @@ async def update_pricing(
         doc = pricing.model_dump()
         doc['updated_at'] = doc['updated_at'].isoformat()
         await pricing_collection.insert_one(doc)
+        await response_cache.bump("pricing")
     
     updated_pricing = await pricing_collection.find_one({"id": "pricing_config"})
     return serialize_document(updated_pricing)
@@ -6,6 +6,7 @@ from utils import serialize_document, create_slug
 from models import Project
 from datetime import datetime
 from auth.admin_auth import get_current_admin
+from utils import response_cache
 
 router = APIRouter(prefix="/projects", tags=["projects"])
 
@@ -47,6 +48,7 @@ async def create_project(project_data: ProjectCreate):
     doc['updated_at'] = doc['updated_at'].isoformat()
     
     await projects_collection.insert_one(doc)
+    await response_cache.bump("projects")
     return serialize_document(doc)
 
 @router.put("/{project_id}", response_model=ProjectResponse)
@@ -73,6 +75,7 @@ async def update_project(project_id: str, project_data: ProjectUpdate):
         {"id": project_id},
         {"$set": update_data}
     )
+    await response_cache.bump("projects")
     
     updated_project = await projects_collection.find_one({"id": project_id})
     return serialize_document(updated_project)
@@ -81,6 +84,7 @@ async def update_project(project_id: str, project_data: ProjectUpdate):
 async def delete_project(project_id: str):
     """Delete a project"""
     result = await projects_collection.delete_one({"id": project_id})
+    await response_cache.bump("projects")
     if result.deleted_count == 0:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -5,6 +5,7 @@ import uuid
 from database import db
 from models.service_contact import ServiceContact, ServiceContactCreate, ServiceContactUpdate
 from auth.admin_auth import get_current_admin
+from utils.stats import facet_counts
 
 router = APIRouter(prefix="/service-contacts", tags=["service-contacts"])
 
@@ -151,19 +152,13 @@ async def get_service_contacts_stats(current_admin = Depends(get_current_admin))
     Get statistics for service contacts (Admin only)
     """
     try:
-        total = await db.service_contacts.count_documents({})
-        new = await db.service_contacts.count_documents({"status": "new"})
-        contacted = await db.service_contacts.count_documents({"status": "contacted"})
-        converted = await db.service_contacts.count_documents({"status": "converted"})
-        closed = await db.service_contacts.count_documents({"status": "closed"})
-        
-        return {
-            "total": total,
-            "new": new,
-            "contacted": contacted,
-            "converted": converted,
-            "closed": closed
-        }
+        return await facet_counts(db.service_contacts, {
+            "total": {},
+            "new": {"status": "new"},
+            "contacted": {"status": "contacted"},
+            "converted": {"status": "converted"},
+            "closed": {"status": "closed"},
+        })
         
     except Exception as e:
         print(f"Error fetching stats: {str(e)}")
@@ -5,10 +5,10 @@ from database import services_collection
 from utils import serialize_document
 from models import Service
 from datetime import datetime
-import os
-import shutil
 from pathlib import Path
-import uuid
+from utils.uploads import SERVICE_IMAGE_POLICY, save_upload
+from utils import image_derivatives
+from utils import response_cache
 
 router = APIRouter(prefix="/services", tags=["services"])
 
@@ -16,12 +16,22 @@ router = APIRouter(prefix="/services", tags=["services"])
 UPLOAD_DIR = Path("/app/public/uploads/services")
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
+def _image_urls(service: dict) -> List[str]:
+    return [url for url in [service.get("image"), *(service.get("images") or [])] if url]
+
+async def with_responsive_images(services: List[dict]) -> List[dict]:
+    """Attach srcset-ready variants of each service's uploaded images"""
+    sets = await image_derivatives.responsive_images(url for service in services for url in _image_urls(service))
+    for service in services:
+        service["responsive_images"] = {url: sets[url] for url in _image_urls(service) if url in sets}
+    return services
+
 @router.get("/", response_model=List[ServiceResponse])
 async def get_services():
     """Get all services"""
     cursor = services_collection.find().sort("order", 1)
     services = await cursor.to_list(length=100)
-    return [serialize_document(service) for service in services]
+    return await with_responsive_images([serialize_document(service) for service in services])
 
 @router.get("/{service_id}", response_model=ServiceResponse)
 async def get_service(service_id: str):
@@ -32,7 +42,7 @@ async def get_service(service_id: str):
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Service not found"
         )
-    return serialize_document(service)
+    return (await with_responsive_images([serialize_document(service)]))[0]
 
 @router.post("/", response_model=ServiceResponse)
 async def create_service(service_data: ServiceCreate):
@@ -43,6 +53,7 @@ async def create_service(service_data: ServiceCreate):
     doc['updated_at'] = doc['updated_at'].isoformat()
     
     await services_collection.insert_one(doc)
+    await response_cache.bump("services")
     return serialize_document(doc)
 
 @router.put("/{service_id}", response_model=ServiceResponse)
@@ -64,6 +75,7 @@ async def update_service(service_id: str, service_data: ServiceUpdate):
         {"id": service_id},
         {"$set": update_data}
     )
+    await response_cache.bump("services")
     
     updated_service = await services_collection.find_one({"id": service_id})
     return serialize_document(updated_service)
@@ -72,6 +84,7 @@ async def update_service(service_id: str, service_data: ServiceUpdate):
 async def delete_service(service_id: str):
     """Delete a service"""
     result = await services_collection.delete_one({"id": service_id})
+    await response_cache.bump("services")
     if result.deleted_count == 0:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -83,41 +96,22 @@ async def delete_service(service_id: str):
 async def upload_service_image(file: UploadFile = File(...)):
     """
     Upload service image file (public endpoint - no auth required for admin panel use)
-    Supported formats: JPG, PNG, WEBP
+    Supported formats: JPG, PNG, WEBP (max UPLOAD_MAX_MB_SERVICE_IMAGE MB)
+    Resized/WebP variants are generated in the background and show up in
+    the services' responsive_images once ready.
     """
-    try:
-        # Validate file type
-        allowed_extensions = {'.jpg', '.jpeg', '.png', '.webp'}
-        file_extension = os.path.splitext(file.filename)[1].lower()
-        
-        if file_extension not in allowed_extensions:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Invalid file type. Allowed: {', '.join(allowed_extensions)}"
-            )
-        
-        # Generate unique filename
-        unique_filename = f"{uuid.uuid4()}{file_extension}"
-        file_path = UPLOAD_DIR / unique_filename
-        
-        # Save file
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        # Return URL path (relative to public directory)
-        file_url = f"/uploads/services/{unique_filename}"
-        
-        return {
-            "success": True,
-            "url": file_url,
-            "filename": file.filename,
-            "message": "Image uploaded successfully"
-        }
+    stored = await save_upload(file, UPLOAD_DIR, SERVICE_IMAGE_POLICY, namespace="uploads/services")
+    derivatives_queued = await image_derivatives.enqueue(stored["sha256"], stored["path"])
     
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"File upload failed: {str(e)}"
-        )
+    # Return URL path (relative to public directory)
+    file_url = f"/uploads/services/{stored['stored_name']}"
+    
+    return {
+        "success": True,
+        "url": file_url,
+        "filename": file.filename,
+        "size": stored["size"],
+        "sha256": stored["sha256"],
+        "derivatives": "pending" if derivatives_queued else None,
+        "message": "Image uploaded successfully"
+    }
@@ -3,6 +3,7 @@ from schemas.skill import SkillCreate, SkillUpdate
 from database import skills_collection
 from auth.admin_auth import get_current_admin
 from models.skill import Skill
+from utils import response_cache
 
 router = APIRouter(prefix="/skills", tags=["skills"])
 
@@ -36,6 +37,7 @@ async def create_skill(
     skill_dict['created_at'] = skill_dict['created_at'].isoformat()
     
     await skills_collection.insert_one(skill_dict)
+    await response_cache.bump("skills")
     
     return {"id": skill.id, "message": "Skill created successfully"}
 
@@ -64,6 +66,7 @@ async def update_skill(
             {"id": skill_id},
             {"$set": update_data}
         )
+        await response_cache.bump("skills")
     
     return {"message": "Skill updated successfully"}
 
@@ -74,6 +77,7 @@ async def delete_skill(
 ):
     """Delete skill (admin only)"""
     result = await skills_collection.delete_one({"id": skill_id})
+    await response_cache.bump("skills")
     if result.deleted_count == 0:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -5,9 +5,8 @@ from database import storage_collection
 from auth.admin_auth import get_current_admin, check_permission
 from models.storage import StorageItem
 from datetime import datetime
-import os
-import shutil
 from pathlib import Path
+from utils.uploads import STORAGE_POLICY, save_upload
 
 router = APIRouter(prefix="/storage", tags=["storage"])
 
@@ -169,23 +168,8 @@ async def upload_file(
             detail="Access denied"
         )
     
-    try:
-        # Generate unique filename
-        import uuid
-        file_extension = os.path.splitext(file.filename)[1]
-        unique_filename = f"{uuid.uuid4()}{file_extension}"
-        file_path = UPLOAD_DIR / unique_filename
-        
-        # Save file
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        # Return URL
-        file_url = f"/uploads/{unique_filename}"
-        return {"url": file_url, "filename": file.filename}
+    stored = await save_upload(file, UPLOAD_DIR, STORAGE_POLICY, namespace="uploads")
     
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"File upload failed: {str(e)}"
-        )
+    # Return URL
+    file_url = f"/uploads/{stored['stored_name']}"
+    return {"url": file_url, "filename": file.filename, "size": stored["size"], "sha256": stored["sha256"]}
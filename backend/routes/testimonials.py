@@ -7,6 +7,7 @@ from database import testimonials_collection, clients_collection, client_project
 from schemas.testimonial import TestimonialCreate, TestimonialSubmit, TestimonialUpdate, TestimonialResponse
 from auth.admin_auth import get_current_admin
 from auth.client_auth import get_current_client
+from utils import response_cache
 
 router = APIRouter()
 
@@ -78,6 +79,7 @@ async def submit_testimonial(testimonial: TestimonialSubmit):
         }
         
         await testimonials_collection.insert_one(testimonial_dict)
+        await response_cache.bump("testimonials")
         
         return {
             "message": "Thank you for your testimonial! It has been submitted for review.",
@@ -135,6 +137,7 @@ async def create_testimonial(
         }
         
         await testimonials_collection.insert_one(testimonial_dict)
+        await response_cache.bump("testimonials")
         
         return testimonial_helper(testimonial_dict)
     except Exception as e:
@@ -168,6 +171,7 @@ async def update_testimonial(
             {"id": testimonial_id},
             {"$set": update_data}
         )
+        await response_cache.bump("testimonials")
         
         # Fetch and return updated testimonial
         updated_testimonial = await testimonials_collection.find_one({"id": testimonial_id})
@@ -192,6 +196,7 @@ async def delete_testimonial(
         
         # Delete testimonial
         result = await testimonials_collection.delete_one({"id": testimonial_id})
+        await response_cache.bump("testimonials")
         
         if result.deleted_count == 0:
             raise HTTPException(status_code=404, detail="Testimonial not found")
@@ -270,6 +275,7 @@ async def submit_client_testimonial(
         }
         
         await testimonials_collection.insert_one(testimonial_dict)
+        await response_cache.bump("testimonials")
         
         return {
             "message": "Thank you for your testimonial! It has been submitted for review.",
@@ -361,6 +367,7 @@ async def update_client_testimonial(
             {"id": testimonial_id},
             {"$set": update_data}
         )
+        await response_cache.bump("testimonials")
         
         # Fetch and return updated testimonial
         updated_testimonial = await testimonials_collection.find_one({"id": testimonial_id})
@@ -0,0 +1,49 @@
+"""
+Public file serving for /uploads/... URLs.
+
+Files uploaded through the blob store are looked up by their ref key
+("uploads/<path>") and served from the content-addressed blob. Files written
+before the blob store existed are still served from the uploads directory.
+Both support Range requests and ETag / Last-Modified revalidation.
+"""
+import mimetypes
+from pathlib import Path
+
+from fastapi import APIRouter, HTTPException, Request, status
+from starlette.concurrency import run_in_threadpool
+
+from utils import blob_store
+from utils.file_responses import send_file
+
+router = APIRouter(prefix="/uploads", tags=["uploads"])
+
+UPLOADS_DIR = Path("/app/public/uploads")
+UPLOADS_DIR.mkdir(parents=True, exist_ok=True)
+
+# Upload names are random and never reused, so browsers and CDNs may keep them for a day
+UPLOADS_CACHE_CONTROL = "public, max-age=86400"
+
+
+def _legacy_path(path: str):
+    """The file under UPLOADS_DIR, refusing anything that escapes it"""
+    candidate = (UPLOADS_DIR / path).resolve()
+    root = UPLOADS_DIR.resolve()
+    if root not in candidate.parents or not candidate.is_file():
+        return None
+    return candidate
+
+
+@router.api_route("/{path:path}", methods=["GET", "HEAD"])
+async def get_upload(path: str, request: Request):
+    """Serve an uploaded file by its public path"""
+    # Type comes from the public name, as StaticFiles did; blob paths have no extension
+    media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+    ref = await blob_store.resolve(f"uploads/{path}")
+    if ref is not None:
+        return await send_file(request, ref["path"], media_type, sha256=ref["sha256"], cache_control=UPLOADS_CACHE_CONTROL)
+
+    legacy = await run_in_threadpool(_legacy_path, path)
+    if legacy is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
+    return await send_file(request, str(legacy), media_type, cache_control=UPLOADS_CACHE_CONTROL)
@@ -9,6 +9,10 @@ class AnalyticsEventCreate(BaseModel):
     blog_id: Optional[str] = None
     blog_title: Optional[str] = None
 
+class AnalyticsEventBatch(BaseModel):
+    """Schema for sending several analytics events in one request"""
+    events: List[AnalyticsEventCreate] = Field(..., min_length=1, max_length=50)
+
 class AnalyticsEventResponse(BaseModel):
     """Response schema for analytics events"""
     id: str
@@ -37,4 +41,16 @@ class AnalyticsSummary(BaseModel):
     calculator_estimates: int
     page_views_by_page: List[PageViewStats]
     blog_views: List[BlogViewStats]
-    period: str  # 'today', '7days', '30days'
+    period: str  # 'today', '7days', '30days', 'custom'
+
+class AnalyticsTimeSeriesPoint(BaseModel):
+    """Event count for one hourly or daily bucket"""
+    bucket: datetime
+    count: int
+
+class AnalyticsTimeSeries(BaseModel):
+    """Event counts over time"""
+    granularity: str  # 'hour', 'day'
+    event_type: Optional[str] = None
+    period: str
+    points: List[AnalyticsTimeSeriesPoint]
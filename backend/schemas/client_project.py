@@ -1,4 +1,4 @@
-from pydantic import BaseModel, field_validator
+from pydantic import BaseModel, field_validator, model_serializer
 from typing import Optional, List, Dict
 from datetime import date
 
@@ -12,6 +12,7 @@ class ProjectFileResponse(BaseModel):
     uploaded_by: str
     file_size: Optional[int] = 0
     file_type: Optional[str] = None
+    sha256: Optional[str] = None
 
 # Milestone Schemas
 class MilestoneCreate(BaseModel):
@@ -252,3 +253,73 @@ class FileUploadResponse(BaseModel):
     id: str
     filename: str
     message: str
+
+# Paged sub-resource schemas
+class MilestonePage(BaseModel):
+    """One page of a project's milestones"""
+    items: List[MilestoneResponse]
+    next_cursor: Optional[str] = None
+
+class TaskPage(BaseModel):
+    """One page of a project's tasks"""
+    items: List[TaskResponse]
+    next_cursor: Optional[str] = None
+
+class ProjectFilePage(BaseModel):
+    """One page of a project's files"""
+    items: List[ProjectFileResponse]
+    next_cursor: Optional[str] = None
+
+class CommentPage(BaseModel):
+    """One page of a project's comments"""
+    items: List[CommentResponse]
+    next_cursor: Optional[str] = None
+
+class ChatMessagePage(BaseModel):
+    """One page of a project's chat messages"""
+    items: List[ChatMessageResponse]
+    next_cursor: Optional[str] = None
+
+class ActivityPage(BaseModel):
+    """One page of a project's activity log"""
+    items: List[ActivityResponse]
+    next_cursor: Optional[str] = None
+
+# Project summary schemas (dashboard list view)
+class ClientProjectSummary(BaseModel):
+    """Lightweight project row: requested header fields plus server-side counters"""
+    id: str
+    name: Optional[str] = None
+    client_id: Optional[str] = None
+    description: Optional[str] = None
+    status: Optional[str] = None
+    priority: Optional[str] = None
+    progress: Optional[int] = None
+    start_date: Optional[str] = None
+    expected_delivery: Optional[str] = None
+    actual_delivery: Optional[str] = None
+    notes: Optional[str] = None
+    tags: Optional[List[str]] = None
+    budget: Optional[Dict] = None
+    team_members: Optional[List[Dict]] = None
+    created_at: Optional[str] = None
+    updated_at: Optional[str] = None
+    last_activity_at: Optional[str] = None
+    milestone_count: int = 0
+    open_milestones: int = 0
+    task_count: int = 0
+    completed_tasks: int = 0
+    file_count: int = 0
+    comment_count: int = 0
+    unread_chat: int = 0
+    
+    @model_serializer(mode="wrap")
+    def only_requested_fields(self, handler):
+        # Header fields that were not requested are left out rather than sent as null
+        data = handler(self)
+        return {k: v for k, v in data.items() if k in self.model_fields_set}
+
+class ClientProjectSummaryPage(BaseModel):
+    """One page of project summaries"""
+    items: List[ClientProjectSummary]
+    next_cursor: Optional[str] = None
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 class ServiceCreate(BaseModel):
     title: str
@@ -27,6 +27,19 @@ class ServiceUpdate(BaseModel):
     active: Optional[bool] = None
     order: Optional[int] = None
 
+class ImageSource(BaseModel):
+    type: str  # MIME type, e.g. image/webp
+    srcset: str
+
+class ResponsiveImage(BaseModel):
+    """srcset-ready variants of an uploaded image (see utils/image_derivatives.py)"""
+    src: str  # Original upload
+    srcset: str  # Fallback-format variants plus the original
+    sources: List[ImageSource] = []  # Modern formats for <picture><source>
+    width: int
+    height: int
+    placeholder: Optional[str] = None  # Tiny blurred data URI to show while loading
+
 class ServiceResponse(BaseModel):
     id: str
     title: str
@@ -42,5 +55,6 @@ class ServiceResponse(BaseModel):
     active: bool = True
     order: int = 0
     slug: Optional[str] = None  # Add slug field
+    responsive_images: Dict[str, ResponsiveImage] = {}  # Keyed by image URL, once derivatives are ready
     created_at: Optional[str] = None
     updated_at: Optional[str] = None
@@ -9,6 +9,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from database import services_collection
+from utils.response_cache import bump_shared
 from models.service import Service
 from datetime import datetime
 import uuid
@@ -69,6 +70,7 @@ async def main():
     try:
         print("🚀 Adding Engagement/Proposal Website service...")
         await add_engagement_service()
+        await bump_shared("services")
         print("\n✨ Done!")
     except Exception as e:
         print(f"❌ Error: {e}")
@@ -0,0 +1,95 @@
+"""
+Bytes on the wire and compression CPU cost for the larger JSON endpoints.
+
+For every path, fetches the response with Accept-Encoding identity, gzip and
+br from the running server and reports the transferred size and the median
+latency. It then compresses the identity body locally with the server's own
+settings (utils/compression.py) to report the CPU time one compression costs.
+That is what every uncached request pays; response cache hits pay it only once
+per entry.
+
+Usage (against a running backend):
+    cd /app/backend
+    python scripts/benchmark/benchmark_compression.py --url http://localhost:8001 \\
+        --username admin --password admin123 --runs 20
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+# Add backend directory to path
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from utils import compression
+
+DEFAULT_PATHS = [
+    "/api/services/",
+    "/api/projects/",
+    "/api/blogs/",
+    "/api/newsletter/admin/all",
+    "/api/admin/client-projects/",
+]
+
+
+async def fetch(client: httpx.AsyncClient, path: str, encoding: str, headers: dict, runs: int):
+    """Median latency in ms, bytes on the wire and the decoded body"""
+    latencies, wire, body = [], 0, b""
+    for _ in range(runs):
+        started = time.perf_counter()
+        response = await client.get(path, headers={**headers, "Accept-Encoding": encoding})
+        latencies.append((time.perf_counter() - started) * 1000)
+        if response.status_code != 200:
+            return None
+        wire, body = response.num_bytes_downloaded, response.content
+    return statistics.median(latencies), wire, body
+
+
+def cpu_cost(body: bytes, encoding: str, runs: int) -> float:
+    """CPU milliseconds to compress body once"""
+    started = time.process_time()
+    for _ in range(runs):
+        compression.compress(body, encoding)
+    return (time.process_time() - started) * 1000 / runs
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Response compression benchmark")
+    parser.add_argument("--url", default="http://localhost:8001")
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="admin123")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("paths", nargs="*", default=DEFAULT_PATHS)
+    args = parser.parse_args()
+
+    encodings = ["identity", *reversed(compression.encodings())]
+    async with httpx.AsyncClient(base_url=args.url, timeout=60) as client:
+        login = await client.post("/api/admins/login", json={"username": args.username, "password": args.password})
+        headers = {"Authorization": f"Bearer {login.json()['token']}"} if login.status_code == 200 else {}
+
+        print(f"{'path':<32} {'encoding':<9} {'bytes':>10} {'ratio':>7} {'p50':>9} {'cpu/req':>9}")
+        for path in args.paths:
+            baseline = None
+            for encoding in encodings:
+                result = await fetch(client, path, encoding, headers, args.runs)
+                if result is None:
+                    print(f"{path:<32} skipped (not 200)")
+                    break
+                latency, wire, body = result
+                baseline = baseline or wire
+                compressed = encoding != "identity" and len(body) >= compression.COMPRESSION_MIN_BYTES
+                cpu = cpu_cost(body, encoding, args.runs) if compressed else 0.0
+                print(f"{path:<32} {encoding:<9} {wire:>10} {wire / baseline:>6.1%} "
+                      f"{latency:>7.1f}ms {cpu:>7.2f}ms")
+
+    print(f"\nThreshold {compression.COMPRESSION_MIN_BYTES} bytes, gzip level {compression.COMPRESSION_GZIP_LEVEL}, "
+          f"brotli quality {compression.COMPRESSION_BROTLI_QUALITY}"
+          + ("" if compression.brotli is not None else " (brotli not installed)"))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,125 @@
+"""
+Before/after latency of the hot queries with and without the index registry.
+
+Seeds a throwaway database (<DB_NAME>_index_bench), times each query with only
+the default _id index, applies db_indexes.ensure_indexes() to the same
+database and times them again. The throwaway database is dropped at the end.
+
+Usage:
+    cd /app/backend
+    python scripts/benchmark/benchmark_indexes.py [--docs 20000] [--runs 50] [--keep]
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add backend directory to path
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from database import client, DB_NAME
+from db_indexes import ensure_indexes
+
+BENCH_COLLECTIONS = ["clients", "client_projects", "bookings", "blogs", "conversations", "analytics", "newsletter"]
+
+
+async def seed(db, docs: int):
+    """Insert `docs` documents per collection, shaped like the real ones"""
+    now = datetime.utcnow()
+    rng = random.Random(42)
+    batch = 1000
+
+    def stamp(i):
+        return (now - timedelta(minutes=i)).isoformat()
+
+    generators = {
+        "clients": lambda i: {"id": str(uuid.uuid4()), "email": f"client{i}@example.com", "name": f"Client {i}", "is_active": True, "created_at": stamp(i)},
+        "client_projects": lambda i: {"id": str(uuid.uuid4()), "client_id": f"client-{i % 500}", "name": f"Project {i}", "status": "in_progress", "last_activity_at": stamp(i)},
+        "bookings": lambda i: {
+            "id": str(uuid.uuid4()),
+            "preferred_date": (now + timedelta(days=i % 365)).strftime("%Y-%m-%d"),
+            "preferred_time_slot": f"{9 + i % 9:02d}:00",
+            "status": rng.choice(["pending", "confirmed", "cancelled"]),
+            "created_at": stamp(i),
+        },
+        "blogs": lambda i: {"id": str(uuid.uuid4()), "slug": f"post-{i}", "status": rng.choice(["draft", "published"]), "created_at": stamp(i)},
+        "conversations": lambda i: {"id": str(uuid.uuid4()), "customer_email": f"visitor{i % 2000}@example.com", "last_message_at": stamp(i)},
+        "analytics": lambda i: {"event_type": rng.choice(["page_view", "click", "form_submit"]), "page": "/", "timestamp": stamp(i)},
+        "newsletter": lambda i: {"id": str(uuid.uuid4()), "email": f"reader{i}@example.com", "created_at": stamp(i)},
+    }
+
+    for name, make in generators.items():
+        for start in range(0, docs, batch):
+            await db[name].insert_many([make(i) for i in range(start, min(start + batch, docs))])
+
+
+def queries(docs: int):
+    """(label, coroutine factory) pairs mirroring the route lookups"""
+    mid = docs // 2
+    day = (datetime.utcnow() + timedelta(days=mid % 365)).strftime("%Y-%m-%d")
+    return [
+        ("clients by email (login)", lambda db: db.clients.find_one({"email": f"client{mid}@example.com"})),
+        ("client projects by client_id", lambda db: db.client_projects.find({"client_id": "client-7"}).to_list(None)),
+        ("bookings on a date (slots)", lambda db: db.bookings.find({"preferred_date": day, "status": {"$in": ["pending", "confirmed"]}}).to_list(None)),
+        ("blog by slug (public)", lambda db: db.blogs.find_one({"slug": f"post-{mid}", "status": "published"})),
+        ("conversation by customer_email", lambda db: db.conversations.find_one({"customer_email": "visitor42@example.com"})),
+        ("latest conversations", lambda db: db.conversations.find().sort("last_message_at", -1).limit(50).to_list(50)),
+        ("analytics page_views last day", lambda db: db.analytics.count_documents({"event_type": "page_view", "timestamp": {"$gte": (datetime.utcnow() - timedelta(days=1)).isoformat()}})),
+        ("newsletter by email (subscribe)", lambda db: db.newsletter.find_one({"email": f"reader{mid}@example.com"})),
+    ]
+
+
+async def measure(db, runs: int, docs: int):
+    results = {}
+    for label, run in queries(docs):
+        await run(db)  # warm up
+        samples = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            await run(db)
+            samples.append((time.perf_counter() - started) * 1000)
+        samples.sort()
+        results[label] = (samples[len(samples) // 2], samples[int(len(samples) * 0.95) - 1])
+    return results
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=20000, help="documents per collection")
+    parser.add_argument("--runs", type=int, default=50, help="timed runs per query")
+    parser.add_argument("--keep", action="store_true", help="keep the benchmark database")
+    args = parser.parse_args()
+
+    bench_db = client[f"{DB_NAME}_index_bench"]
+    await client.drop_database(bench_db.name)
+
+    print(f"🌱 Seeding {args.docs} documents into each of {len(BENCH_COLLECTIONS)} collections ({bench_db.name})...")
+    await seed(bench_db, args.docs)
+
+    print("⏱️  Without indexes...")
+    before = await measure(bench_db, args.runs, args.docs)
+
+    report = await ensure_indexes(collections=BENCH_COLLECTIONS, database=bench_db)
+    created = sum(len(entry.get("created", [])) for entry in report.values())
+    print(f"🔧 Built {created} indexes")
+
+    print("⏱️  With indexes...")
+    after = await measure(bench_db, args.runs, args.docs)
+
+    print(f"\n{'query':<36} {'p50 before':>11} {'p50 after':>10} {'p95 before':>11} {'p95 after':>10} {'speedup':>8}")
+    for label in before:
+        b50, b95 = before[label]
+        a50, a95 = after[label]
+        speedup = b50 / a50 if a50 else float("inf")
+        print(f"{label:<36} {b50:>9.2f}ms {a50:>8.2f}ms {b95:>9.2f}ms {a95:>8.2f}ms {speedup:>7.1f}x")
+
+    if not args.keep:
+        await client.drop_database(bench_db.name)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,95 @@
+"""
+Latency of unrelated endpoints while a burst of logins hits the server.
+
+Measures GET <probe path> latency first on an idle server, then while
+--concurrency clients hammer POST /api/admins/login. With bcrypt on the event
+loop the probe p99 climbs to several login durations; with the bcrypt pool it
+should stay close to the idle baseline. Also reports login throughput and how
+many logins were turned away with 429.
+
+Usage (against a running backend):
+    cd /app/backend
+    python scripts/benchmark/benchmark_login_burst.py \\
+        --url http://localhost:8001 --username admin --password admin123 \\
+        --concurrency 50 --duration 10
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * pct / 100), len(ordered) - 1)]
+
+
+async def probe(client: httpx.AsyncClient, path: str, stop_at: float, interval: float):
+    """Call an unrelated endpoint at a steady rate; returns latencies in ms"""
+    latencies = []
+    while time.perf_counter() < stop_at:
+        started = time.perf_counter()
+        await client.get(path)
+        latencies.append((time.perf_counter() - started) * 1000)
+        await asyncio.sleep(interval)
+    return latencies
+
+
+async def login_loop(client: httpx.AsyncClient, username: str, password: str, stop_at: float, results: dict):
+    while time.perf_counter() < stop_at:
+        started = time.perf_counter()
+        response = await client.post("/api/admins/login", json={"username": username, "password": password})
+        elapsed = (time.perf_counter() - started) * 1000
+        results.setdefault(response.status_code, []).append(elapsed)
+
+
+def report(label: str, latencies):
+    print(f"{label:<28} n={len(latencies):<6} p50={percentile(latencies, 50):8.1f}ms "
+          f"p95={percentile(latencies, 95):8.1f}ms p99={percentile(latencies, 99):8.1f}ms "
+          f"max={max(latencies, default=0):8.1f}ms")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Login burst benchmark")
+    parser.add_argument("--url", default="http://localhost:8001")
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="admin123")
+    parser.add_argument("--probe-path", default="/api/services/")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--probe-interval", type=float, default=0.05)
+    args = parser.parse_args()
+
+    limits = httpx.Limits(max_connections=args.concurrency + 10)
+    async with httpx.AsyncClient(base_url=args.url, timeout=60, limits=limits) as client:
+        print(f"⏱️  Idle baseline ({args.duration:.0f}s)...")
+        idle = await probe(client, args.probe_path, time.perf_counter() + args.duration, args.probe_interval)
+
+        print(f"🔥 Login burst: {args.concurrency} concurrent clients ({args.duration:.0f}s)...")
+        stop_at = time.perf_counter() + args.duration
+        logins = {}
+        burst_probe, *_ = await asyncio.gather(
+            probe(client, args.probe_path, stop_at, args.probe_interval),
+            *[login_loop(client, args.username, args.password, stop_at, logins) for _ in range(args.concurrency)],
+        )
+
+    print()
+    report(f"GET {args.probe_path} idle", idle)
+    report(f"GET {args.probe_path} burst", burst_probe)
+    for status_code, latencies in sorted(logins.items()):
+        report(f"login -> {status_code}", latencies)
+
+    ok = len(logins.get(200, []))
+    print(f"\nLogin throughput: {ok / args.duration:.1f}/s ok, "
+          f"{len(logins.get(429, []))} rejected with 429")
+    if idle and burst_probe:
+        print(f"Probe p99 slowdown under burst: {percentile(burst_probe, 99) / max(percentile(idle, 99), 0.001):.1f}x "
+              f"(median {statistics.median(burst_probe):.1f}ms vs {statistics.median(idle):.1f}ms)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,128 @@
+"""
+Requests per second of the middleware stack on a trivial endpoint.
+
+Builds two throwaway FastAPI apps with a single GET /ping, one with the
+proxy-header / request-ID / timing middlewares written on BaseHTTPMiddleware
+(as server.py and backend_structure_samples had them) and one with the pure
+ASGI versions from utils/middleware.py, and the latter plus MetricsMiddleware
+(utils/metrics.py) to show what instrumentation costs. Requests go through
+httpx's ASGI transport, so no network or database is involved and the
+difference is the middleware overhead alone. A bare app is measured too as
+the floor.
+
+Usage:
+    cd /app/backend
+    python scripts/benchmark/benchmark_middleware.py --requests 5000 --concurrency 20
+"""
+import argparse
+import asyncio
+import sys
+import time
+import uuid
+from pathlib import Path
+
+import httpx
+from fastapi import FastAPI
+from starlette.middleware.base import BaseHTTPMiddleware
+
+# Add backend directory to path
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from utils.metrics import MetricsMiddleware
+from utils.middleware import ProxyHeaderMiddleware, RequestIDMiddleware, TimingMiddleware
+
+
+class OldProxyHeaderMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        forwarded_proto = request.headers.get("X-Forwarded-Proto")
+        if forwarded_proto:
+            request.scope["scheme"] = forwarded_proto
+        forwarded_host = request.headers.get("X-Forwarded-Host")
+        if forwarded_host:
+            request.scope["server"] = (forwarded_host, None)
+        return await call_next(request)
+
+
+class OldRequestIDMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        request_id = str(uuid.uuid4())
+        request.state.request_id = request_id
+        response = await call_next(request)
+        response.headers["X-Request-ID"] = request_id
+        return response
+
+
+class OldTimingMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        start_time = time.time()
+        response = await call_next(request)
+        response.headers["X-Process-Time"] = str(time.time() - start_time)
+        return response
+
+
+def build_app(middlewares) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    for middleware in middlewares:
+        app.add_middleware(middleware)
+    return app
+
+
+STACKS = {
+    "bare": [],
+    "BaseHTTPMiddleware": [OldProxyHeaderMiddleware, OldTimingMiddleware, OldRequestIDMiddleware],
+    "pure ASGI": [ProxyHeaderMiddleware, TimingMiddleware, RequestIDMiddleware],
+    "pure ASGI + metrics": [ProxyHeaderMiddleware, TimingMiddleware, MetricsMiddleware, RequestIDMiddleware],
+}
+
+
+async def run(app: FastAPI, total: int, concurrency: int) -> float:
+    """Requests per second for `total` requests from `concurrency` clients"""
+    transport = httpx.ASGITransport(app=app)
+    headers = {"X-Forwarded-Proto": "https", "X-Forwarded-Host": "example.com"}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(min(total, 200)):  # Warm up
+            await client.get("/ping", headers=headers)
+
+        remaining = total
+
+        async def worker():
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                response = await client.get("/ping", headers=headers)
+                assert response.status_code == 200
+
+        started = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+        return total / (time.perf_counter() - started)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Middleware stack micro-benchmark")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    results = {}
+    for name, middlewares in STACKS.items():
+        app = build_app(middlewares)
+        # Best of several rounds, to keep scheduler noise out
+        results[name] = max([await run(app, args.requests, args.concurrency) for _ in range(args.rounds)])
+        print(f"{name:<20} {results[name]:>9.0f} req/s  ({1e6 / results[name]:.0f}µs per request)")
+
+    old, new = results["BaseHTTPMiddleware"], results["pure ASGI"]
+    print(f"\nPure ASGI stack: {new / old:.2f}x the throughput of the BaseHTTPMiddleware stack, "
+          f"{(1 / old - 1 / new) * 1e6:.0f}µs less per request")
+    instrumented = results["pure ASGI + metrics"]
+    print(f"Metrics overhead: {(1 / instrumented - 1 / new) * 1e6:.0f}µs per request "
+          f"({(new - instrumented) / new:.1%} of trivial-endpoint throughput)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,42 @@
+"""
+Store every summary sort field on existing client projects.
+
+The admin project list (view=summary) sorts and pages on the stored fields
+through their (field, id) indexes. New projects get every sort field on
+insert (null when there is no value, last_activity_at = created_at); this
+gives older projects the same shape. Projects without last_activity_at
+would otherwise sort below every project with one.
+
+Usage:
+    cd /app/backend
+    python scripts/maintenance/backfill_project_sort_fields.py
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+# Add backend directory to path
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from database import client_projects_collection
+from utils.project_store import SUMMARY_SORT_FIELDS
+
+
+async def main():
+    print("🔄 Backfilling last_activity_at from created_at...")
+    result = await client_projects_collection.update_many(
+        {"last_activity_at": None, "created_at": {"$ne": None}},
+        [{"$set": {"last_activity_at": "$created_at"}}]
+    )
+    print(f"✅ Updated {result.modified_count} projects")
+
+    print("🔄 Storing missing sort fields as null...")
+    for field in SUMMARY_SORT_FIELDS:
+        result = await client_projects_collection.update_many({field: {"$exists": False}}, {"$set": {field: None}})
+        if result.modified_count:
+            print(f"  {field}: {result.modified_count} projects")
+    print("🎉 Done")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
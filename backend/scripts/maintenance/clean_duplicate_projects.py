@@ -1,5 +1,6 @@
 import asyncio
 from database import projects_collection
+from utils.response_cache import bump_shared
 
 async def clean_duplicates():
     """Remove the old duplicate projects"""
@@ -13,6 +14,7 @@ async def clean_duplicates():
             print(f"✅ Deleted old project: {slug}")
         else:
             print(f"ℹ️  Project not found: {slug}")
+    await bump_shared("projects")
     
     print("\n🎉 Cleanup completed!")
 
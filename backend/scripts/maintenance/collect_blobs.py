@@ -0,0 +1,40 @@
+"""
+Run the blob store garbage collection once.
+
+The server already sweeps every BLOB_GC_INTERVAL_SECONDS; use this to free
+space right away, e.g. after deleting large projects.
+
+Usage:
+    cd /app/backend
+    python scripts/maintenance/collect_blobs.py               # blobs unused for BLOB_GC_GRACE_SECONDS
+    python scripts/maintenance/collect_blobs.py --grace 0     # every unused blob
+"""
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+# Add backend directory to path
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from utils import blob_store
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Remove unreferenced blobs")
+    parser.add_argument("--grace", type=float, default=blob_store.BLOB_GC_GRACE_SECONDS,
+                        help="only remove blobs unused for at least this many seconds")
+    args = parser.parse_args()
+
+    total = {"collected": 0, "bytes_freed": 0}
+    while True:
+        result = await blob_store.collect_garbage(args.grace)
+        total["collected"] += result["collected"]
+        total["bytes_freed"] += result["bytes_freed"]
+        if result["collected"] == 0:
+            break
+    print(f"✅ Removed {total['collected']} blobs, freed {total['bytes_freed'] / 1024 / 1024:.1f} MB")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
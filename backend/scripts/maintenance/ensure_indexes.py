@@ -0,0 +1,42 @@
+"""
+Apply the index registry (db_indexes.py) and print the drift report.
+
+The backend already does this on startup unless ENSURE_INDEXES_ON_STARTUP=false;
+use this script to check a database without building anything, or to build
+indexes ahead of a deploy.
+
+Usage:
+    cd /app/backend
+    python scripts/maintenance/ensure_indexes.py --check   # report only
+    python scripts/maintenance/ensure_indexes.py
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+# Add backend directory to path
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from db_indexes import ensure_indexes
+
+
+async def main(check_only: bool):
+    report = await ensure_indexes(create=not check_only)
+
+    if not report:
+        print("✅ Indexes match the registry")
+        return
+
+    for collection_name, entry in report.items():
+        print(f"📂 {collection_name}")
+        for kind, names in entry.items():
+            for name in names:
+                print(f"   {kind}: {name}")
+
+    if any("failed" in entry for entry in report.values()):
+        print("\n⚠️  Some indexes could not be built (see 'failed' above)")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(check_only="--check" in sys.argv))
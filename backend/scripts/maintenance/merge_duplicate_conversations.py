@@ -0,0 +1,85 @@
+"""
+Merge website chat conversations that share a customer email.
+
+Chat intake now upserts one conversation per customer_email and relies on
+the unique customer_email_unique index. Before that, two first messages
+sent at the same moment could each start a conversation, and the index
+cannot be built while such duplicates exist. This folds every duplicate
+into the oldest conversation for its email: messages are combined in
+timestamp order, unread counts are added up and the inbox fields are taken
+from the newest message. Run it before restarting with the new index (or
+when ensure_indexes reports customer_email_unique as failed).
+
+Usage:
+    cd /app/backend
+    python scripts/maintenance/merge_duplicate_conversations.py [--dry-run]
+"""
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+# Add backend directory to path
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from database import conversations_collection
+from db_indexes import ensure_indexes
+from utils.chat_inbox import message_preview
+
+
+def _sort_key(value):
+    # Older documents store ISO strings, newer ones datetimes
+    return str(value.isoformat() if hasattr(value, "isoformat") else value or "")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Merge duplicate chat conversations")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would be merged")
+    args = parser.parse_args()
+
+    print("🔍 Looking for conversations sharing a customer email...")
+    duplicates = await conversations_collection.aggregate([
+        {"$group": {"_id": "$customer_email", "ids": {"$push": "$id"}, "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}},
+    ]).to_list(length=None)
+
+    if not duplicates:
+        print("✅ No duplicate conversations")
+    merged = 0
+    for group in duplicates:
+        conversations = await conversations_collection.find(
+            {"id": {"$in": group["ids"]}}, {"_id": 0}
+        ).to_list(length=None)
+        conversations.sort(key=lambda c: _sort_key(c.get("created_at")))
+        keep, others = conversations[0], conversations[1:]
+        print(f"  {group['_id']}: keeping {keep['id']}, merging {len(others)}")
+        if args.dry_run:
+            continue
+
+        messages = [m for c in conversations for m in c.get("messages", [])]
+        messages.sort(key=lambda m: _sort_key(m.get("timestamp")))
+        last = messages[-1] if messages else {}
+        await conversations_collection.update_one({"id": keep["id"]}, {"$set": {
+            "messages": messages,
+            "unread_count": sum(c.get("unread_count", 0) for c in conversations),
+            "last_message_preview": message_preview(last.get("message", "")),
+            "last_message_sender": last.get("sender"),
+            "last_message_at": max((c.get("last_message_at") for c in conversations), key=_sort_key),
+        }})
+        await conversations_collection.delete_many({"id": {"$in": [c["id"] for c in others]}})
+        merged += len(others)
+
+    if args.dry_run:
+        print("ℹ️  Dry run, nothing changed")
+        return
+    print(f"✅ Merged {merged} duplicate conversations")
+
+    print("🔄 Building the conversation indexes...")
+    report = await ensure_indexes(["conversations"])
+    for kind, names in report.get("conversations", {}).items():
+        print(f"  {kind}: {', '.join(names)}")
+    print("🎉 Done")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
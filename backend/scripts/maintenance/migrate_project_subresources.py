@@ -0,0 +1,95 @@
+"""
+One-time migration: move client project sub-entities (milestones, tasks, files,
+comments, chat messages, activity log) out of the client_projects documents and
+into their own collections keyed by project_id.
+
+Run this before starting the backend with CLIENT_PROJECT_STORAGE=split.
+Safe to re-run: entries already copied are skipped, and the arrays are only
+removed from a project once all of its entries are in place.
+
+Usage:
+    cd /app/backend
+    python scripts/maintenance/migrate_project_subresources.py [--dry-run]
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+# Add backend directory to path
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from pymongo import InsertOne
+from pymongo.errors import BulkWriteError
+
+from database import client_projects_collection
+from utils.project_store import SUBRESOURCE_COLLECTIONS, SUBRESOURCE_FIELDS, ensure_indexes
+
+DUPLICATE_KEY_ERROR = 11000
+
+
+async def copy_entries(project_id: str, field: str, entries: list) -> int:
+    """Copy one array into its collection, preserving order; returns the number inserted"""
+    if not entries:
+        return 0
+
+    requests = [InsertOne({**entry, "project_id": project_id}) for entry in entries if entry.get("id")]
+    if not requests:
+        return 0
+
+    try:
+        result = await SUBRESOURCE_COLLECTIONS[field].bulk_write(requests, ordered=True)
+        return result.inserted_count
+    except BulkWriteError as e:
+        # Entries copied by a previous run hit the unique (project_id, id) index
+        errors = [err for err in e.details.get("writeErrors", []) if err.get("code") != DUPLICATE_KEY_ERROR]
+        if errors:
+            raise
+        # Ordered insert stops at the first duplicate; retry the rest unordered
+        result = await SUBRESOURCE_COLLECTIONS[field].bulk_write(requests, ordered=False)
+        return result.inserted_count
+
+
+async def migrate(dry_run: bool = False):
+    """Move every project's arrays into the dedicated collections"""
+    print("🔧 Migrating client project sub-entities to dedicated collections...")
+
+    if not dry_run:
+        await ensure_indexes()
+
+    projects_migrated = 0
+    totals = {field: 0 for field in SUBRESOURCE_FIELDS}
+
+    projection = {"_id": 0, "id": 1, **{field: 1 for field in SUBRESOURCE_FIELDS}}
+    query = {"$or": [{field: {"$exists": True}} for field in SUBRESOURCE_FIELDS]}
+
+    async for project in client_projects_collection.find(query, projection):
+        project_id = project["id"]
+        counts = {field: len(project.get(field) or []) for field in SUBRESOURCE_FIELDS}
+
+        if dry_run:
+            print(f"  • {project_id}: " + ", ".join(f"{k}={v}" for k, v in counts.items()))
+        else:
+            for field in SUBRESOURCE_FIELDS:
+                try:
+                    totals[field] += await copy_entries(project_id, field, project.get(field) or [])
+                except BulkWriteError as e:
+                    print(f"❌ {project_id}/{field}: {e.details.get('writeErrors', [])[:1]}")
+                    break
+            else:
+                await client_projects_collection.update_one(
+                    {"id": project_id},
+                    {"$unset": {field: "" for field in SUBRESOURCE_FIELDS}}
+                )
+                print(f"  ✅ {project_id}")
+
+        projects_migrated += 1
+
+    print(f"\n📊 Projects processed: {projects_migrated}")
+    if not dry_run:
+        for field, count in totals.items():
+            print(f"  • {field}: {count} entries copied")
+        print("\n🎉 Migration complete. Set CLIENT_PROJECT_STORAGE=split and restart the backend.")
+
+
+if __name__ == "__main__":
+    asyncio.run(migrate(dry_run="--dry-run" in sys.argv))
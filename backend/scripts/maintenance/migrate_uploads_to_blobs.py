@@ -0,0 +1,111 @@
+"""
+Move files uploaded before the blob store into it.
+
+New uploads go straight to the content-addressed blob store (utils/blob_store.py).
+This script moves the older ones too so their duplicate bytes are reclaimed:
+
+- every file under /app/public/uploads becomes the ref "uploads/<relative path>",
+  so its /uploads/... URL keeps working
+- every client project file becomes "client_projects/<project_id>/<name>" and its
+  file entry gets the new file_path and blob_key
+
+Files are moved, not copied. Re-running only picks up what is left.
+
+Usage:
+    cd /app/backend
+    python scripts/maintenance/migrate_uploads_to_blobs.py --dry-run   # report duplicates only
+    python scripts/maintenance/migrate_uploads_to_blobs.py
+"""
+import argparse
+import asyncio
+import os
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+# Add backend directory to path
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from database import client_projects_collection, project_files_collection
+from utils import blob_store, project_store
+
+PUBLIC_UPLOADS_DIR = Path("/app/public/uploads")
+
+
+def public_files():
+    if not PUBLIC_UPLOADS_DIR.exists():
+        return
+    for root, _dirs, names in os.walk(PUBLIC_UPLOADS_DIR):
+        for name in names:
+            path = Path(root) / name
+            if name.startswith(".") or name.endswith(".part"):
+                continue
+            yield path, f"uploads/{path.relative_to(PUBLIC_UPLOADS_DIR).as_posix()}"
+
+
+async def project_files():
+    async for project in client_projects_collection.find({}, {"_id": 0, "id": 1}):
+        for entry in await project_store.get_all_entries(project["id"], "files"):
+            if entry.get("blob_key") or not entry.get("file_path"):
+                continue
+            path = Path(entry["file_path"])
+            if path.is_file():
+                yield project["id"], entry, path
+
+
+async def set_file_location(project_id: str, file_id: str, file_path: str, blob_key: str):
+    # Written directly so last_activity_at is left alone
+    if project_store.SPLIT_STORAGE:
+        await project_files_collection.update_one(
+            {"project_id": project_id, "id": file_id},
+            {"$set": {"file_path": file_path, "blob_key": blob_key}}
+        )
+    else:
+        await client_projects_collection.update_one(
+            {"id": project_id, "files.id": file_id},
+            {"$set": {"files.$.file_path": file_path, "files.$.blob_key": blob_key}}
+        )
+
+
+async def dry_run():
+    by_hash = defaultdict(list)
+    paths = [path for path, _key in public_files()]
+    paths += [path async for _pid, _entry, path in project_files()]
+    for path in paths:
+        info = blob_store.hash_file(path)
+        by_hash[info["sha256"]].append((path, info["size"]))
+
+    total = sum(size for files in by_hash.values() for _path, size in files)
+    unique = sum(files[0][1] for files in by_hash.values())
+    print(f"📄 {len(paths)} files, {len(by_hash)} distinct contents")
+    print(f"💾 {total / 1024 / 1024:.1f} MB on disk, {unique / 1024 / 1024:.1f} MB after dedup")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Move existing uploads into the blob store")
+    parser.add_argument("--dry-run", action="store_true", help="only report how much would be saved")
+    args = parser.parse_args()
+
+    if args.dry_run:
+        await dry_run()
+        return
+
+    moved = 0
+    for path, key in list(public_files()):
+        await blob_store.import_file(path, key, filename=path.name)
+        moved += 1
+    print(f"✅ Moved {moved} public uploads")
+
+    moved = 0
+    async for project_id, entry, path in project_files():
+        key = f"client_projects/{project_id}/{path.name}"
+        stored = await blob_store.import_file(path, key, filename=entry.get("filename"), content_type=entry.get("file_type"))
+        await set_file_location(project_id, entry["id"], stored["path"], key)
+        moved += 1
+    print(f"✅ Moved {moved} client project files")
+
+    print(f"📊 {await blob_store.stats()}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
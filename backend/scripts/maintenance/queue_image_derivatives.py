@@ -0,0 +1,57 @@
+"""
+Queue responsive image derivatives for service images uploaded earlier.
+
+New uploads are queued automatically. This picks up images that were already
+referenced by services, and can re-queue images whose derivatives failed.
+The running server renders them in the background.
+
+Only images stored in the blob store are considered; run
+migrate_uploads_to_blobs.py first for files uploaded before it.
+
+Usage:
+    cd /app/backend
+    python scripts/maintenance/queue_image_derivatives.py
+    python scripts/maintenance/queue_image_derivatives.py --retry-failed
+"""
+import argparse
+import asyncio
+import sys
+from datetime import datetime
+from pathlib import Path
+
+# Add backend directory to path
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from database import image_derivatives_collection, services_collection
+from utils import blob_store, image_derivatives
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Queue image derivatives for existing service images")
+    parser.add_argument("--retry-failed", action="store_true", help="also re-queue images whose derivatives failed")
+    args = parser.parse_args()
+
+    if not image_derivatives.available():
+        print("❌ Image derivatives are disabled or Pillow is not installed")
+        return
+
+    if args.retry_failed:
+        result = await image_derivatives_collection.update_many(
+            {"status": image_derivatives.FAILED},
+            {"$set": {"status": image_derivatives.PENDING, "attempts": 0, "next_attempt_at": datetime.utcnow()}}
+        )
+        print(f"🔁 Re-queued {result.modified_count} failed images")
+
+    queued = 0
+    async for service in services_collection.find({}, {"_id": 0, "image": 1, "images": 1}):
+        for url in [service.get("image"), *(service.get("images") or [])]:
+            if not url or not url.startswith("/uploads/"):
+                continue
+            ref = await blob_store.resolve(url[1:])
+            if ref is not None and await image_derivatives.enqueue(ref["sha256"], ref["path"]):
+                queued += 1
+    print(f"✅ Checked {queued} service images; ones already queued or processed are left as they are")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
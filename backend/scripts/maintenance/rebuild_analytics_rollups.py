@@ -0,0 +1,37 @@
+"""
+Rebuild the hourly/daily analytics rollups from the raw analytics events.
+
+The admin summary reads only the rollups, which are maintained as events are
+ingested. Run this once after deploying rollups so earlier history shows up,
+or to repair them after rollup_failures appear in /api/analytics/ingest-stats.
+
+Usage:
+    cd /app/backend
+    python scripts/maintenance/rebuild_analytics_rollups.py               # all history
+    python scripts/maintenance/rebuild_analytics_rollups.py --days 30     # last 30 days only
+"""
+import argparse
+import asyncio
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add backend directory to path
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from utils.analytics_rollups import rebuild_rollups
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Rebuild analytics rollups")
+    parser.add_argument("--days", type=int, default=None, help="only rebuild the last N days")
+    args = parser.parse_args()
+
+    since = datetime.utcnow() - timedelta(days=args.days) if args.days else None
+    print(f"🔄 Rebuilding analytics rollups {'for all history' if since is None else f'since {since.date()}'}...")
+    written = await rebuild_rollups(since)
+    print(f"✅ Wrote {written} rollup documents")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
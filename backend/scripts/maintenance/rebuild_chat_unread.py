@@ -0,0 +1,62 @@
+"""
+Recount unread chat messages into the counters the chat endpoints maintain.
+
+Client projects keep chat_unread.client / chat_unread.admin on the project
+document. Website conversations keep unread_count plus the inbox preview
+(last_message_preview / last_message_sender), and the counters document
+"chat_unread" holds the total for the inbox. All of them are updated as
+messages are sent and read. Counts from before the counters existed are
+filled in from the messages on first use; run this once after upgrading so
+old conversations also get their inbox preview, or to repair counters after
+editing chats by hand. Conversations imported without a
+last_message_at get it from their last message so the inbox can page them.
+
+Usage:
+    cd /app/backend
+    python scripts/maintenance/rebuild_chat_unread.py
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+# Add backend directory to path
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from database import client_projects_collection, conversations_collection, counters_collection
+from utils.chat_inbox import PREVIEW_LENGTH, TOTAL_UNREAD_COUNTER, UNREAD_MESSAGES_EXPRESSION
+from utils import project_store
+
+
+async def main():
+    print("🔄 Recounting unread project chat messages...")
+    projects = 0
+    async for project in client_projects_collection.find({}, {"_id": 0, "id": 1}):
+        await project_store.rebuild_chat_unread(project["id"])
+        projects += 1
+    print(f"✅ Updated {projects} projects")
+
+    print("🔄 Recounting unread website chat messages and inbox previews...")
+    result = await conversations_collection.update_many({}, [{"$set": {
+        "unread_count": UNREAD_MESSAGES_EXPRESSION,
+        "last_message_preview": {"$substrCP": [
+            {"$ifNull": [{"$arrayElemAt": ["$messages.message", -1]}, ""]}, 0, PREVIEW_LENGTH
+        ]},
+        "last_message_sender": {"$arrayElemAt": ["$messages.sender", -1]},
+        # The inbox sorts and pages on last_message_at; fill it where it was never set
+        "last_message_at": {"$ifNull": [
+            "$last_message_at",
+            {"$ifNull": [{"$arrayElemAt": ["$messages.timestamp", -1]}, "$created_at"]}
+        ]},
+    }}])
+    print(f"✅ Updated {result.modified_count} conversations")
+
+    totals = await conversations_collection.aggregate([
+        {"$group": {"_id": None, "value": {"$sum": "$unread_count"}}}
+    ]).to_list(length=1)
+    total = totals[0]["value"] if totals else 0
+    await counters_collection.update_one({"_id": TOTAL_UNREAD_COUNTER}, {"$set": {"value": total}}, upsert=True)
+    print(f"✅ Total unread website chat messages: {total}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -3,6 +3,7 @@ Update demo URLs for Social Media Management and Analytics Dashboard projects
 """
 import asyncio
 from database import projects_collection
+from utils.response_cache import bump_shared
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
 from dotenv import load_dotenv
@@ -31,6 +32,7 @@ async def update_demo_urls():
         print("✅ Updated Real-Time Analytics Dashboard demo URL")
     else:
         print("⚠️  Analytics Dashboard not found or already updated")
+    await bump_shared("projects")
     
     # Verify the updates
     print("\n📋 Current demo projects:")
@@ -10,6 +10,7 @@ backend_dir = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(backend_dir))
 
 from database import services_collection
+from utils.response_cache import bump_shared
 
 async def remove_old_services():
     """Remove all services from the old services collection"""
@@ -30,6 +31,7 @@ async def remove_old_services():
 async def main():
     try:
         await remove_old_services()
+        await bump_shared("services")
         print("\n🎉 Cleanup completed successfully!")
     except Exception as e:
         print(f"\n❌ Error: {e}")
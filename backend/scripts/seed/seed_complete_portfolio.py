@@ -10,6 +10,7 @@ from datetime import datetime
 sys.path.insert(0, str(Path(__file__).parent))
 
 from database import projects_collection, close_db_connection
+from utils.response_cache import bump_shared
 from models.project import Project
 
 async def seed_complete_portfolio():
@@ -229,6 +230,7 @@ async def main():
     """Main execution"""
     try:
         await seed_complete_portfolio()
+        await bump_shared("projects")
     except Exception as e:
         print(f"❌ Error: {str(e)}")
         import traceback
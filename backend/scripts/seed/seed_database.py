@@ -18,6 +18,7 @@ from database import (
     close_db_connection
 )
 from auth import hash_password
+from utils.response_cache import bump_shared
 from models import User, Service, Project, ContactSubmission, Settings, PageContent
 
 async def seed_admin_user():
@@ -336,6 +337,7 @@ async def main():
         await seed_settings()
         await seed_page_content()
         await seed_sample_contacts()
+        await bump_shared("services", "projects", "page_content")
         
         print("\n✅ Database seeding completed successfully!\n")
         print("Admin Login Credentials:")
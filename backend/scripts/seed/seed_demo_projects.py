@@ -2,6 +2,7 @@ import asyncio
 import uuid
 from datetime import datetime
 from database import projects_collection
+from utils.response_cache import bump_shared
 
 async def seed_demo_projects():
     """Add the two demo projects to the portfolio"""
@@ -111,6 +112,7 @@ The dashboard updates metrics every few seconds, providing an up-to-the-minute v
             # Insert new project
             await projects_collection.insert_one(project)
             print(f"✅ Added new project: {project['title']}")
+    await bump_shared("projects")
     
     print("\n🎉 Demo projects seeding completed!")
 
@@ -10,6 +10,7 @@ backend_dir = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(backend_dir))
 
 from database import feelings_services_collection
+from utils.response_cache import bump_shared
 from datetime import datetime
 import uuid
 
@@ -67,6 +68,7 @@ async def seed_engagement_service():
 async def main():
     try:
         await seed_engagement_service()
+        await bump_shared("feelings_services")
         print("\n🎉 Seeding completed successfully!")
     except Exception as e:
         print(f"\n❌ Error: {e}")
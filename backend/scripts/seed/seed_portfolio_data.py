@@ -9,6 +9,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent))
 
 from database import projects_collection, close_db_connection
+from utils.response_cache import bump_shared
 from models.project import Project
 
 async def seed_portfolio_projects():
@@ -149,6 +150,7 @@ async def seed_portfolio_projects():
 async def main():
     try:
         await seed_portfolio_projects()
+        await bump_shared("projects")
     except Exception as e:
         print(f"❌ Error seeding data: {e}")
         import traceback
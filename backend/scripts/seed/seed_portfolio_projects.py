@@ -10,6 +10,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 from motor.motor_asyncio import AsyncIOMotorClient
+from utils.response_cache import bump_shared
 from dotenv import load_dotenv
 import os
 import uuid
@@ -226,6 +227,7 @@ async def seed_projects():
         print(f"❌ Error seeding projects: {e}")
         raise
     finally:
+        await bump_shared("projects", versions_collection=db.cache_versions)
         client.close()
         print("\n🔌 Database connection closed")
 
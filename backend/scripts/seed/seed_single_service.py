@@ -12,6 +12,7 @@ sys.path.insert(0, str(backend_dir))
 
 import asyncio
 from motor.motor_asyncio import AsyncIOMotorClient
+from utils.response_cache import bump_shared
 from dotenv import load_dotenv
 import uuid
 from datetime import datetime
@@ -75,6 +76,8 @@ async def seed_single_service():
     print("\n✅ Services updated successfully!")
     print("🗑️  All other services have been removed")
     
+    await bump_shared("services", versions_collection=db.cache_versions)
+    
     # Close connection
     client.close()
 
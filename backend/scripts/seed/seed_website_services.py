@@ -12,6 +12,7 @@ sys.path.insert(0, str(backend_dir))
 
 import asyncio
 from motor.motor_asyncio import AsyncIOMotorClient
+from utils.response_cache import bump_shared
 from dotenv import load_dotenv
 import uuid
 from datetime import datetime
@@ -229,6 +230,8 @@ async def seed_services():
     print("\n" + "=" * 70)
     print("✅ Services seeding completed successfully!")
     
+    await bump_shared("services", versions_collection=db.cache_versions)
+    
     # Close connection
     client.close()
 
@@ -10,6 +10,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from motor.motor_asyncio import AsyncIOMotorClient
+from utils.response_cache import bump_shared
 import os
 from dotenv import load_dotenv
 from datetime import datetime
@@ -189,6 +190,7 @@ async def seed_invitation_services():
         raise
     
     finally:
+        await bump_shared("feelings_services", versions_collection=db.cache_versions)
         client.close()
 
 if __name__ == "__main__":
@@ -10,6 +10,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from motor.motor_asyncio import AsyncIOMotorClient
+from utils.response_cache import bump_shared
 import os
 from dotenv import load_dotenv
 from datetime import datetime
@@ -220,6 +221,7 @@ async def seed_website_templates():
         raise
     
     finally:
+        await bump_shared("services", versions_collection=db.cache_versions)
         client.close()
 
 if __name__ == "__main__":
@@ -1,5 +1,4 @@
 from fastapi import FastAPI, APIRouter
-from fastapi.staticfiles import StaticFiles
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 import os
@@ -44,6 +43,10 @@ from routes.booking_settings import router as booking_settings_router
 # Service Contacts Router
 from routes.service_contacts import router as service_contacts_router
 
+# Public uploaded files
+from routes.uploads import router as uploads_router
+from routes.metrics import router as metrics_router
+
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
@@ -65,22 +68,23 @@ app = FastAPI(
 # -------------------------------------------------------------------
 # Proxy Header Middleware
 # -------------------------------------------------------------------
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
+# Pure ASGI middlewares (utils/middleware.py); BaseHTTPMiddleware would add a
+# task and a memory stream to every request
+from utils.middleware import ProxyHeaderMiddleware, RequestIDMiddleware, TimingMiddleware
 
-class ProxyHeaderMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        forwarded_proto = request.headers.get("X-Forwarded-Proto")
-        if forwarded_proto:
-            request.scope["scheme"] = forwarded_proto
+app.add_middleware(ProxyHeaderMiddleware)
 
-        forwarded_host = request.headers.get("X-Forwarded-Host")
-        if forwarded_host:
-            request.scope["server"] = (forwarded_host, None)
+# Reject oversized uploads from Content-Length before reading the body
+from utils.uploads import UploadLimitMiddleware
+app.add_middleware(UploadLimitMiddleware)
 
-        return await call_next(request)
+# Cache public read endpoints; added before CORS so CORS headers stay per request
+from utils.response_cache import ResponseCacheMiddleware
+app.add_middleware(ResponseCacheMiddleware)
 
-app.add_middleware(ProxyHeaderMiddleware)
+# Compress large text responses (brotli/gzip); outside the cache, which keeps its own compressed copies
+from utils.compression import CompressionMiddleware
+app.add_middleware(CompressionMiddleware)
 
 # -------------------------------------------------------------------
 # ✅ CORS (FIXED FOR VERCEL + RENDER)
@@ -99,6 +103,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Outermost, so the ID, timing and metrics cover CORS and everything inside it
+from utils.metrics import MetricsMiddleware
+app.add_middleware(TimingMiddleware)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(RequestIDMiddleware)
+
 # -------------------------------------------------------------------
 # Routers
 # -------------------------------------------------------------------
@@ -145,16 +155,17 @@ api_router.include_router(service_contacts_router)
 app.include_router(api_router)
 
 # -------------------------------------------------------------------
-# Static Files (Serve uploaded files)
+# Uploaded Files
 # -------------------------------------------------------------------
-# Create public/uploads directory if it doesn't exist
-PUBLIC_DIR = Path("/app/public")
-PUBLIC_DIR.mkdir(parents=True, exist_ok=True)
-UPLOADS_DIR = PUBLIC_DIR / "uploads"
-UPLOADS_DIR.mkdir(parents=True, exist_ok=True)
+# /uploads/... resolves through the blob store, falling back to files
+# written to /app/public/uploads before it existed
+app.include_router(uploads_router)
 
-# Mount static files
-app.mount("/uploads", StaticFiles(directory=str(UPLOADS_DIR)), name="uploads")
+# -------------------------------------------------------------------
+# Metrics
+# -------------------------------------------------------------------
+# Prometheus text format; see utils/metrics.py for the series
+app.include_router(metrics_router)
 
 # -------------------------------------------------------------------
 # Startup Initialization
@@ -165,8 +176,28 @@ async def startup_event():
         from auto_init import auto_initialize_database
         await auto_initialize_database()
 
+        from db_indexes import ENSURE_INDEXES_ON_STARTUP, ensure_indexes, log_report
+        if ENSURE_INDEXES_ON_STARTUP:
+            log_report(await ensure_indexes())
+
+        from utils.analytics_buffer import ANALYTICS_BUFFERED, analytics_buffer
+        if ANALYTICS_BUFFERED:
+            analytics_buffer.start()
+
+        from utils.email_outbox import outbox_worker
+        outbox_worker.start()
+
+        from utils.blob_store import blob_collector
+        blob_collector.start()
+
+        from utils.image_derivatives import derivative_worker
+        derivative_worker.start()
+
+        from utils.realtime import hub
+        await hub.start()
+
         from database import admins_collection
-        from auth.password import hash_password
+        from auth.password import hash_password_async
         import uuid
         from datetime import datetime
 
@@ -178,7 +209,7 @@ async def startup_event():
             admin_user = {
                 "id": str(uuid.uuid4()),
                 "username": "maneesh",
-                "password_hash": hash_password("maneesh123"),
+                "password_hash": await hash_password_async("maneesh123"),
                 "role": "super_admin",
                 "permissions": {"canManageAdmins": True},
                 "created_at": datetime.utcnow().isoformat(),
@@ -200,4 +231,19 @@ async def startup_event():
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    from utils.analytics_buffer import analytics_buffer
+    await analytics_buffer.stop()
+
+    from utils.email_outbox import outbox_worker
+    await outbox_worker.stop()
+
+    from utils.blob_store import blob_collector
+    await blob_collector.stop()
+
+    from utils.image_derivatives import derivative_worker
+    await derivative_worker.stop()
+
+    from utils.realtime import hub
+    await hub.stop()
+
     await close_db_connection()
@@ -0,0 +1,192 @@
+"""
+Buffered ingestion for analytics events.
+
+POST /analytics/event used to do one insert_one per page view. Events are now
+appended to an in-process buffer and written by a background task with
+insert_many(ordered=False) whenever ANALYTICS_BATCH_SIZE events are waiting or
+ANALYTICS_FLUSH_INTERVAL_SECONDS have passed, whichever comes first.
+
+The buffer holds at most ANALYTICS_QUEUE_MAX events. When it is full the oldest
+event is dropped (analytics are best-effort; a visitor request is never
+blocked). Events still buffered are flushed from the shutdown hook, so only a
+hard kill loses them. Every stored batch is also added to the hourly/daily
+rollups (see analytics_rollups).
+
+Set ANALYTICS_BUFFERED=false to go back to one synchronous insert per event.
+"""
+import asyncio
+import logging
+import os
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional
+
+from pymongo.errors import BulkWriteError
+
+from database import analytics_collection
+from utils.analytics_rollups import apply_rollups
+
+logger = logging.getLogger(__name__)
+
+ANALYTICS_BUFFERED = os.environ.get("ANALYTICS_BUFFERED", "true").lower() == "true"
+ANALYTICS_BATCH_SIZE = int(os.environ.get("ANALYTICS_BATCH_SIZE", "200"))
+ANALYTICS_FLUSH_INTERVAL_SECONDS = float(os.environ.get("ANALYTICS_FLUSH_INTERVAL_SECONDS", "2"))
+ANALYTICS_QUEUE_MAX = int(os.environ.get("ANALYTICS_QUEUE_MAX", "10000"))
+
+
+class AnalyticsBuffer:
+    """Bounded drop-oldest buffer drained in batches by a background task"""
+
+    def __init__(
+        self,
+        collection=analytics_collection,
+        batch_size: int = ANALYTICS_BATCH_SIZE,
+        flush_interval: float = ANALYTICS_FLUSH_INTERVAL_SECONDS,
+        max_size: int = ANALYTICS_QUEUE_MAX,
+    ):
+        self.collection = collection
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.max_size = max(1, max_size)
+        self._events: deque = deque()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._stopping = False
+
+        self.queued = 0
+        self.flushed = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+        self.rollup_failures = 0
+
+    # ------------------------------------------------------------------
+    # Producer side
+    # ------------------------------------------------------------------
+
+    def add(self, event: Dict[str, Any]):
+        """Queue one event; never blocks and never raises"""
+        self.add_many([event])
+
+    def add_many(self, events: Iterable[Dict[str, Any]]):
+        """Queue several events, dropping the oldest ones if the buffer is full"""
+        for event in events:
+            if len(self._events) >= self.max_size:
+                self._events.popleft()
+                self.dropped += 1
+            self._events.append(event)
+            self.queued += 1
+
+        self._ensure_worker()
+        if len(self._events) >= self.batch_size and self._wakeup is not None:
+            self._wakeup.set()
+
+    # ------------------------------------------------------------------
+    # Consumer side
+    # ------------------------------------------------------------------
+
+    def start(self):
+        """Start the flush task on the running event loop (idempotent)"""
+        self._stopping = False
+        self._ensure_worker()
+
+    def _ensure_worker(self):
+        if self._stopping or (self._worker is not None and not self._worker.done()):
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # No loop yet; start() or the next add() will spawn the task
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._worker = loop.create_task(self._run())
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.warning(f"Analytics flush failed: {e}")
+
+    async def flush(self) -> int:
+        """Write everything currently buffered; returns the number of events stored"""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+
+        stored = 0
+        async with self._flush_lock:
+            while self._events:
+                batch = [self._events.popleft() for _ in range(min(self.batch_size, len(self._events)))]
+                stored += await self._write(batch)
+        return stored
+
+    async def _write(self, batch: List[Dict[str, Any]]) -> int:
+        self.batches += 1
+        stored = batch
+        try:
+            await self.collection.insert_many(batch, ordered=False)
+        except BulkWriteError as e:
+            # Per-document failures (e.g. duplicate _id) are not retried
+            rejected = {error["index"] for error in e.details.get("writeErrors", [])}
+            stored = [event for i, event in enumerate(batch) if i not in rejected]
+            self.failed += len(batch) - len(stored)
+            logger.warning(f"Analytics batch partially written: {len(stored)}/{len(batch)}")
+        except Exception as e:
+            # Database unavailable: put the batch back in front and retry on the next tick
+            self._requeue(batch)
+            raise e
+        self.flushed += len(stored)
+
+        try:
+            await apply_rollups(stored)
+        except Exception as e:
+            # Raw events are stored; scripts/maintenance/rebuild_analytics_rollups.py repairs the rollups
+            self.rollup_failures += 1
+            logger.warning(f"Analytics rollup update failed: {e}")
+        return len(stored)
+
+    def _requeue(self, batch: List[Dict[str, Any]]):
+        room = self.max_size - len(self._events)
+        if room < len(batch):
+            # Keep the newest events; the oldest part of the batch is dropped
+            self.dropped += len(batch) - max(room, 0)
+            batch = batch[len(batch) - max(room, 0):]
+        self._events.extendleft(reversed(batch))
+
+    async def stop(self):
+        """Stop the flush task and write whatever is still buffered"""
+        self._stopping = True
+        if self._worker is not None:
+            self._wakeup.set()
+            try:
+                await self._worker
+            except Exception:
+                pass
+            self._worker = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Analytics final flush failed, {len(self._events)} events lost: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": ANALYTICS_BUFFERED,
+            "pending": len(self._events),
+            "queued": self.queued,
+            "flushed": self.flushed,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "batches": self.batches,
+            "rollup_failures": self.rollup_failures,
+            "batch_size": self.batch_size,
+            "flush_interval_seconds": self.flush_interval,
+            "max_size": self.max_size,
+        }
+
+
+analytics_buffer = AnalyticsBuffer()
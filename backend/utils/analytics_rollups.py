@@ -0,0 +1,214 @@
+"""
+Hourly and daily rollups of analytics events.
+
+Each rollup document counts the events of one type for one page/blog in one
+bucket:
+
+    {
+        "_id": "hour|2025-01-31T14:00:00|page_view|home|",
+        "granularity": "hour",            # or "day"
+        "bucket": datetime(2025, 1, 31, 14),
+        "event_type": "page_view",
+        "page_name": "home",
+        "blog_id": None,
+        "blog_title": None,
+        "count": 42,
+    }
+
+Rollups are maintained with $inc upserts every time raw events are written
+(see analytics_buffer), so the admin summary and time series read a few
+documents per day instead of every raw event. rebuild_rollups() recomputes
+them from the raw collection for history recorded before rollups existed.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from pymongo import UpdateOne
+
+from database import analytics_collection, analytics_rollups_collection
+
+HOUR = "hour"
+DAY = "day"
+GRANULARITIES = (HOUR, DAY)
+
+
+def _bucket_start(timestamp: datetime, granularity: str) -> datetime:
+    if granularity == DAY:
+        return datetime(timestamp.year, timestamp.month, timestamp.day)
+    return datetime(timestamp.year, timestamp.month, timestamp.day, timestamp.hour)
+
+
+def _rollup_id(granularity: str, bucket: datetime, event_type: str, page_name: Optional[str], blog_id: Optional[str]) -> str:
+    return "|".join([granularity, bucket.isoformat(), event_type, page_name or "", blog_id or ""])
+
+
+def rollup_updates(events: Iterable[Dict[str, Any]], replace: bool = False) -> List[UpdateOne]:
+    """
+    Turn raw events into one upsert per (granularity, bucket, event_type, page, blog).
+    With replace=True the count is set instead of incremented (used by rebuilds).
+    """
+    counts: Dict[Tuple, int] = defaultdict(int)
+    titles: Dict[Tuple, Optional[str]] = {}
+
+    for event in events:
+        timestamp = event.get("timestamp")
+        if not isinstance(timestamp, datetime):
+            continue
+        for granularity in GRANULARITIES:
+            key = (
+                granularity,
+                _bucket_start(timestamp, granularity),
+                event["event_type"],
+                event.get("page_name"),
+                event.get("blog_id"),
+            )
+            counts[key] += event.get("count", 1)
+            if event.get("blog_title"):
+                titles[key] = event["blog_title"]
+
+    updates = []
+    for key, count in counts.items():
+        granularity, bucket, event_type, page_name, blog_id = key
+        fields = {
+            "granularity": granularity,
+            "bucket": bucket,
+            "event_type": event_type,
+            "page_name": page_name,
+            "blog_id": blog_id,
+        }
+        update: Dict[str, Any]
+        if replace:
+            update = {"$set": {**fields, "count": count}}
+        else:
+            update = {"$setOnInsert": fields, "$inc": {"count": count}}
+        if key in titles:
+            update.setdefault("$set", {})["blog_title"] = titles[key]
+        updates.append(UpdateOne({"_id": _rollup_id(*key)}, update, upsert=True))
+    return updates
+
+
+async def apply_rollups(events: Iterable[Dict[str, Any]]):
+    """Add freshly stored raw events to the rollups"""
+    updates = rollup_updates(events)
+    if updates:
+        await analytics_rollups_collection.bulk_write(updates, ordered=False)
+
+
+def range_filter(start: datetime, end: datetime) -> Dict[str, Any]:
+    """
+    Match the rollups covering [start, end): daily buckets for whole days,
+    hourly buckets for the partial days at either edge. Start and end are
+    truncated to the hour, the finest granularity kept.
+    """
+    start = _bucket_start(start, HOUR)
+    end = _bucket_start(end, HOUR) + (timedelta(hours=1) if end.minute or end.second or end.microsecond else timedelta(0))
+
+    first_full_day = _bucket_start(start, DAY)
+    if first_full_day < start:
+        first_full_day += timedelta(days=1)
+    last_full_day = _bucket_start(end, DAY)
+
+    if first_full_day >= last_full_day:
+        return {"granularity": HOUR, "bucket": {"$gte": start, "$lt": end}}
+
+    return {"$or": [
+        {"granularity": DAY, "bucket": {"$gte": first_full_day, "$lt": last_full_day}},
+        {"granularity": HOUR, "bucket": {"$gte": start, "$lt": first_full_day}},
+        {"granularity": HOUR, "bucket": {"$gte": last_full_day, "$lt": end}},
+    ]}
+
+
+async def totals(start: datetime, end: datetime) -> List[Dict[str, Any]]:
+    """Event counts in the range grouped by (event_type, page_name, blog_id)"""
+    pipeline = [
+        {"$match": range_filter(start, end)},
+        {"$group": {
+            "_id": {"event_type": "$event_type", "page_name": "$page_name", "blog_id": "$blog_id"},
+            "count": {"$sum": "$count"},
+            "blog_title": {"$max": "$blog_title"},
+        }},
+    ]
+    return await analytics_rollups_collection.aggregate(pipeline).to_list(length=None)
+
+
+async def time_series(
+    start: datetime,
+    end: datetime,
+    granularity: str,
+    event_type: Optional[str] = None,
+    page_name: Optional[str] = None,
+    blog_id: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """Counts per bucket in [start, end), zero-filled"""
+    match: Dict[str, Any] = {
+        "granularity": granularity,
+        "bucket": {"$gte": _bucket_start(start, granularity), "$lt": end},
+    }
+    if event_type:
+        match["event_type"] = event_type
+    if page_name:
+        match["page_name"] = page_name
+    if blog_id:
+        match["blog_id"] = blog_id
+
+    pipeline = [
+        {"$match": match},
+        {"$group": {"_id": "$bucket", "count": {"$sum": "$count"}}},
+    ]
+    counts = {doc["_id"]: doc["count"] async for doc in analytics_rollups_collection.aggregate(pipeline)}
+
+    step = timedelta(days=1) if granularity == DAY else timedelta(hours=1)
+    points = []
+    bucket = _bucket_start(start, granularity)
+    while bucket < end:
+        points.append({"bucket": bucket, "count": counts.get(bucket, 0)})
+        bucket += step
+    return points
+
+
+async def rebuild_rollups(since: Optional[datetime] = None, batch_size: int = 1000) -> int:
+    """
+    Recompute rollups from raw events (all history, or from `since` onwards,
+    aligned to the day). Returns the number of rollup documents written.
+    Events ingested while this runs may be counted twice; run it during a
+    quiet period or with ANALYTICS_BUFFERED=false and traffic paused.
+    """
+    query: Dict[str, Any] = {"timestamp": {"$type": "date"}}
+    if since is not None:
+        since = _bucket_start(since, DAY)
+        query["timestamp"]["$gte"] = since
+        await analytics_rollups_collection.delete_many({"bucket": {"$gte": since}})
+    else:
+        await analytics_rollups_collection.delete_many({})
+
+    pipeline = [
+        {"$match": query},
+        {"$group": {
+            "_id": {
+                "hour": {"$dateToString": {"format": "%Y-%m-%dT%H:00:00", "date": "$timestamp"}},
+                "event_type": "$event_type",
+                "page_name": "$page_name",
+                "blog_id": "$blog_id",
+            },
+            "count": {"$sum": 1},
+            "blog_title": {"$max": "$blog_title"},
+        }},
+    ]
+
+    # Hourly groups come back from the server; daily ones are summed from them
+    hourly = []
+    async for doc in analytics_collection.aggregate(pipeline, allowDiskUse=True):
+        hourly.append({
+            "timestamp": datetime.fromisoformat(doc["_id"]["hour"]),
+            "event_type": doc["_id"]["event_type"],
+            "page_name": doc["_id"].get("page_name"),
+            "blog_id": doc["_id"].get("blog_id"),
+            "blog_title": doc.get("blog_title"),
+            "count": doc["count"],
+        })
+
+    updates = rollup_updates(hourly, replace=True)
+    for i in range(0, len(updates), batch_size):
+        await analytics_rollups_collection.bulk_write(updates[i:i + batch_size], ordered=False)
+    return len(updates)
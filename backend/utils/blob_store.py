@@ -0,0 +1,308 @@
+"""
+Content-addressed blob store for uploaded files.
+
+Every upload is stored once, under its SHA-256, in BLOB_STORE_DIR:
+
+    <BLOB_STORE_DIR>/ab/cd/abcd...ef
+
+Two collections track who uses what:
+
+    blobs       _id = sha256, size, refcount, created_at, unreferenced_at
+    blob_refs   _id = ref key, sha256, filename, content_type, created_at
+
+A ref key is the name a file is known by to the rest of the app, so URL
+shapes do not change:
+
+    uploads/<stored_name>                     -> /uploads/<stored_name>
+    uploads/services/<stored_name>            -> /uploads/services/<stored_name>
+    client_projects/<project_id>/<stored_name> -> project file download
+
+Uploading the same bytes twice adds a second ref and bumps the refcount; the
+second copy on disk is discarded. Deleting a file only drops its ref, so
+deleting a project is one query over its ref prefix plus one counter update
+per distinct blob. Blobs whose refcount reached zero more than
+BLOB_GC_GRACE_SECONDS ago are removed by BlobCollector, a background sweep
+started from server.py.
+
+Ordering is what keeps a concurrent upload and sweep safe: commit() bumps the
+refcount before it puts the file in place, and the sweep moves a blob aside
+before deleting its document only if the refcount is still zero, putting the
+file back when it lost that race.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
+from starlette.concurrency import run_in_threadpool
+
+from database import blob_refs_collection, blobs_collection
+
+logger = logging.getLogger(__name__)
+
+BLOB_STORE_ENABLED = os.environ.get("BLOB_STORE_ENABLED", "true").lower() == "true"
+BLOB_STORE_DIR = Path(os.environ.get("BLOB_STORE_DIR", "/app/backend/uploads/blobs"))
+BLOB_GC_INTERVAL_SECONDS = float(os.environ.get("BLOB_GC_INTERVAL_SECONDS", "3600"))
+BLOB_GC_GRACE_SECONDS = float(os.environ.get("BLOB_GC_GRACE_SECONDS", "86400"))
+
+# Uploads are streamed here first so the final rename stays on one filesystem
+TEMP_DIR = BLOB_STORE_DIR / "tmp"
+TRASH_DIR = BLOB_STORE_DIR / "trash"
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+_stats = {"stored": 0, "deduplicated": 0, "bytes_deduplicated": 0, "collected": 0, "bytes_collected": 0}
+
+
+def blob_path(sha256: str) -> Path:
+    return BLOB_STORE_DIR / sha256[:2] / sha256[2:4] / sha256
+
+
+def _place(temp_path: Path, path: Path) -> bool:
+    """Move the temp file into place unless the blob is already on disk"""
+    if path.exists():
+        os.remove(temp_path)
+        return False
+    path.parent.mkdir(parents=True, exist_ok=True)
+    os.replace(temp_path, path)
+    return True
+
+
+async def _add_reference(sha256: str, size: int, content_type: Optional[str]):
+    update = {
+        "$inc": {"refcount": 1},
+        "$unset": {"unreferenced_at": ""},
+        "$setOnInsert": {"size": size, "content_type": content_type, "created_at": datetime.utcnow()},
+    }
+    try:
+        await blobs_collection.update_one({"_id": sha256}, update, upsert=True)
+    except DuplicateKeyError:
+        # Two first uploads of the same content raced on the upsert; the document exists now
+        await blobs_collection.update_one({"_id": sha256}, update)
+
+
+async def _drop_references(counts: Dict[str, int]):
+    """Decrement refcounts and stamp the blobs that are no longer used"""
+    if not counts:
+        return
+    await blobs_collection.bulk_write(
+        [UpdateOne({"_id": sha256}, {"$inc": {"refcount": -n}}) for sha256, n in counts.items()],
+        ordered=False,
+    )
+    await blobs_collection.update_many(
+        {"_id": {"$in": list(counts)}, "refcount": {"$lte": 0}, "unreferenced_at": None},
+        {"$set": {"unreferenced_at": datetime.utcnow()}},
+    )
+
+
+async def commit(
+    temp_path: Path,
+    key: str,
+    sha256: str,
+    size: int,
+    filename: Optional[str] = None,
+    content_type: Optional[str] = None,
+) -> Path:
+    """
+    Store a fully written temp file as the blob for `sha256` and point `key` at it.
+    The temp file is consumed either way. Returns the blob path.
+    """
+    await _add_reference(sha256, size, content_type)
+    path = blob_path(sha256)
+    placed = await run_in_threadpool(_place, Path(temp_path), path)
+    if placed:
+        _stats["stored"] += 1
+    else:
+        _stats["deduplicated"] += 1
+        _stats["bytes_deduplicated"] += size
+
+    previous = await blob_refs_collection.find_one_and_update(
+        {"_id": key},
+        {"$set": {
+            "sha256": sha256,
+            "filename": filename,
+            "content_type": content_type,
+            "created_at": datetime.utcnow(),
+        }},
+        upsert=True,
+        return_document=ReturnDocument.BEFORE,
+    )
+    if previous is not None:
+        # The key was overwritten; it no longer holds on to its old blob
+        await _drop_references({previous["sha256"]: 1})
+    return path
+
+
+def hash_file(path: Path) -> Dict[str, Any]:
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+            size += len(chunk)
+    return {"sha256": digest.hexdigest(), "size": size}
+
+
+async def import_file(path: Path, key: str, filename: Optional[str] = None, content_type: Optional[str] = None) -> Dict[str, Any]:
+    """Move an existing file into the store under `key` (used by the migration script)"""
+    info = await run_in_threadpool(hash_file, path)
+    await run_in_threadpool(TEMP_DIR.mkdir, parents=True, exist_ok=True)
+    temp_path = TEMP_DIR / f"{uuid.uuid4().hex}.part"
+    await run_in_threadpool(os.replace, path, temp_path)
+    stored = await commit(temp_path, key, info["sha256"], info["size"], filename, content_type)
+    return {**info, "path": str(stored)}
+
+
+def _with_path(ref: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    if ref is None:
+        return None
+    return {**ref, "path": str(blob_path(ref["sha256"]))}
+
+
+async def resolve(key: str) -> Optional[Dict[str, Any]]:
+    """The ref for `key` plus its blob path, or None if the key is unknown"""
+    return _with_path(await blob_refs_collection.find_one({"_id": key}))
+
+
+async def resolve_stem(stem: str) -> Optional[Dict[str, Any]]:
+    """
+    Like resolve() for a key known only up to its extension, e.g.
+    "client_projects/<project_id>/<file_id>". The anchored prefix is an _id index range scan.
+    """
+    return _with_path(await blob_refs_collection.find_one({"_id": {"$regex": f"^{re.escape(stem)}(\\.[^/]*)?$"}}))
+
+
+async def release(key: str) -> bool:
+    """Drop one ref; returns False if the key was unknown"""
+    ref = await blob_refs_collection.find_one_and_delete({"_id": key})
+    if ref is None:
+        return False
+    await _drop_references({ref["sha256"]: 1})
+    return True
+
+
+async def release_prefix(prefix: str) -> int:
+    """Drop every ref whose key starts with `prefix` (e.g. a whole project); returns the count"""
+    refs = await blob_refs_collection.find(
+        {"_id": {"$regex": f"^{re.escape(prefix)}"}}, {"sha256": 1}
+    ).to_list(length=None)
+    if not refs:
+        return 0
+    await blob_refs_collection.delete_many({"_id": {"$in": [ref["_id"] for ref in refs]}})
+    await _drop_references(Counter(ref["sha256"] for ref in refs))
+    return len(refs)
+
+
+# ============================================================================
+# GARBAGE COLLECTION
+# ============================================================================
+
+def _move_aside(path: Path, trash_path: Path) -> bool:
+    try:
+        trash_path.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(path, trash_path)
+        return True
+    except FileNotFoundError:
+        return False
+
+
+def _finish_sweep(path: Path, trash_path: Path, deleted: bool):
+    if not deleted and not path.exists():
+        # Re-referenced while we held the file; put it back
+        os.replace(trash_path, path)
+        return
+    try:
+        os.remove(trash_path)
+    except FileNotFoundError:
+        pass
+
+
+async def collect_garbage(grace_seconds: float = BLOB_GC_GRACE_SECONDS, limit: int = 1000) -> Dict[str, int]:
+    """Remove blobs that have been unreferenced for longer than `grace_seconds`"""
+    cutoff = datetime.utcnow() - timedelta(seconds=grace_seconds)
+    candidates = await blobs_collection.find(
+        {"refcount": {"$lte": 0}, "unreferenced_at": {"$lte": cutoff}}, {"size": 1}
+    ).to_list(length=limit)
+
+    collected = 0
+    bytes_freed = 0
+    for blob in candidates:
+        sha256 = blob["_id"]
+        path = blob_path(sha256)
+        trash_path = TRASH_DIR / f"{sha256}.{uuid.uuid4().hex}"
+        moved = await run_in_threadpool(_move_aside, path, trash_path)
+
+        result = await blobs_collection.delete_one({"_id": sha256, "refcount": {"$lte": 0}})
+        deleted = result.deleted_count == 1
+        if moved:
+            await run_in_threadpool(_finish_sweep, path, trash_path, deleted)
+        if deleted:
+            collected += 1
+            bytes_freed += blob.get("size", 0)
+
+    _stats["collected"] += collected
+    _stats["bytes_collected"] += bytes_freed
+    return {"collected": collected, "bytes_freed": bytes_freed}
+
+
+class BlobCollector:
+    """Background task that runs collect_garbage every BLOB_GC_INTERVAL_SECONDS"""
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self.last_run_at: Optional[datetime] = None
+
+    def start(self):
+        if self._task is not None and not self._task.done():
+            return
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(BLOB_GC_INTERVAL_SECONDS)
+            try:
+                result = await collect_garbage()
+                self.last_run_at = datetime.utcnow()
+                if result["collected"]:
+                    logger.info(f"Blob GC removed {result['collected']} blobs ({result['bytes_freed']} bytes)")
+            except Exception as e:
+                logger.warning(f"Blob GC failed: {e}")
+
+
+blob_collector = BlobCollector()
+
+
+async def stats() -> Dict[str, Any]:
+    totals = {"blobs": 0, "bytes": 0, "references": 0, "unreferenced": 0}
+    async for row in blobs_collection.aggregate([{"$group": {
+        "_id": None,
+        "blobs": {"$sum": 1},
+        "bytes": {"$sum": "$size"},
+        "references": {"$sum": "$refcount"},
+        "unreferenced": {"$sum": {"$cond": [{"$lte": ["$refcount", 0]}, 1, 0]}},
+    }}]):
+        totals = {k: row[k] for k in totals}
+    return {
+        "enabled": BLOB_STORE_ENABLED,
+        **totals,
+        **_stats,
+        "gc_last_run_at": blob_collector.last_run_at.isoformat() if blob_collector.last_run_at else None,
+    }
+
@@ -0,0 +1,93 @@
+"""
+Denormalized inbox data for website chat conversations.
+
+Every message write also sets last_message_preview / last_message_sender on
+the conversation and moves the total of all unread_counts, kept in the
+counters collection under TOTAL_UNREAD_COUNTER. The inbox (GET /chat/inbox)
+then reads one small page of conversation headers plus one counter document,
+never the messages. Conversations and databases from before these fields are
+counted from their messages on first use (ensure_unread_count and the first
+counter write or read); scripts/maintenance/rebuild_chat_unread.py
+recomputes everything from the messages.
+"""
+from typing import List
+
+from pymongo import ReturnDocument
+
+from database import conversations_collection, counters_collection
+
+PREVIEW_LENGTH = 120
+
+# counters document holding the sum of every conversation's unread_count
+TOTAL_UNREAD_COUNTER = "chat_unread"
+
+# Aggregation expression: a conversation's unread customer messages
+UNREAD_MESSAGES_EXPRESSION = {"$size": {"$filter": {
+    "input": {"$ifNull": ["$messages", []]},
+    "as": "m",
+    "cond": {"$and": [{"$eq": ["$$m.sender", "customer"]}, {"$ne": ["$$m.read", True]}]},
+}}}
+
+
+def message_preview(text: str) -> str:
+    """One-line, length-capped copy of a message for the inbox"""
+    text = " ".join(text.split())
+    return text if len(text) <= PREVIEW_LENGTH else text[:PREVIEW_LENGTH - 1] + "…"
+
+
+async def ensure_unread_count(query: dict):
+    """
+    Give a conversation that predates unread_count its count from the
+    messages, so the next $inc or reset starts from the right number
+    """
+    await conversations_collection.update_many(
+        {**query, "unread_count": {"$exists": False}},
+        [{"$set": {"unread_count": UNREAD_MESSAGES_EXPRESSION}}]
+    )
+
+
+async def fill_unread_counts(conversations: List[dict]):
+    """ensure_unread_count for the listed conversations that lack one, updating the dicts too"""
+    missing = [conv['id'] for conv in conversations if 'unread_count' not in conv]
+    if not missing:
+        return
+    await ensure_unread_count({"id": {"$in": missing}})
+    counts = {
+        doc['id']: doc['unread_count']
+        async for doc in conversations_collection.find({"id": {"$in": missing}}, {"_id": 0, "id": 1, "unread_count": 1})
+    }
+    for conv in conversations:
+        if conv['id'] in counts:
+            conv['unread_count'] = counts[conv['id']]
+
+
+async def _seed_total_unread() -> dict:
+    # Conversations without unread_count yet are counted from their messages,
+    # the same number ensure_unread_count gives them later
+    result = await conversations_collection.aggregate([
+        {"$group": {"_id": None, "value": {"$sum": {"$ifNull": ["$unread_count", UNREAD_MESSAGES_EXPRESSION]}}}}
+    ]).to_list(length=1)
+    value = result[0]["value"] if result else 0
+    return await counters_collection.find_one_and_update(
+        {"_id": TOTAL_UNREAD_COUNTER}, {"$setOnInsert": {"value": value}},
+        upsert=True, return_document=ReturnDocument.AFTER
+    )
+
+
+async def adjust_total_unread(delta: int):
+    """Move the total after a conversation write (call ensure_unread_count before that write)"""
+    if not delta:
+        return
+    result = await counters_collection.update_one({"_id": TOTAL_UNREAD_COUNTER}, {"$inc": {"value": delta}})
+    if not result.matched_count:
+        # No counter yet: the sum already includes the write being counted
+        await _seed_total_unread()
+
+
+async def get_total_unread() -> int:
+    """Unread customer messages across all conversations, from the counter document"""
+    counter = await counters_collection.find_one({"_id": TOTAL_UNREAD_COUNTER})
+    if counter is None:
+        # First read on a database that predates the counter: sum once and keep it
+        counter = await _seed_total_unread()
+    return max(0, counter["value"])
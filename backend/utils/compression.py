@@ -0,0 +1,236 @@
+"""
+Negotiated response compression (brotli, gzip).
+
+CompressionMiddleware compresses text-like responses (JSON, HTML, CSS, JS,
+SVG, ...) of at least COMPRESSION_MIN_BYTES when the client's Accept-Encoding
+allows it, preferring brotli when the brotli package is installed. It leaves
+a response alone when:
+
+- it already has a Content-Encoding (e.g. replayed compressed by the response cache)
+- it supports byte ranges (file downloads: ranges refer to the stored bytes)
+- it is an event stream, a HEAD response or has no body (204/304)
+
+A body sent in one message (JSONResponse) is compressed in one go, in the
+thread pool once it is larger than COMPRESSION_THREADPOOL_BYTES. A streamed
+body is compressed chunk by chunk, with a flush after every chunk so nothing
+is held back.
+
+negotiate() / compress() / encoded_headers() are shared with
+utils/response_cache.py, which keeps compressed copies of cached entries so a
+hit costs no compression at all.
+"""
+import os
+import zlib
+from typing import List, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+try:
+    import brotli
+except ImportError:  # Optional: gzip only
+    brotli = None
+
+COMPRESSION_ENABLED = os.environ.get("COMPRESSION_ENABLED", "true").lower() == "true"
+COMPRESSION_MIN_BYTES = int(os.environ.get("COMPRESSION_MIN_BYTES", "1024"))
+COMPRESSION_GZIP_LEVEL = int(os.environ.get("COMPRESSION_GZIP_LEVEL", "6"))
+# 4-5 is the usual sweet spot for on-the-fly brotli; 11 is for static assets
+COMPRESSION_BROTLI_QUALITY = int(os.environ.get("COMPRESSION_BROTLI_QUALITY", "4"))
+COMPRESSION_THREADPOOL_BYTES = int(os.environ.get("COMPRESSION_THREADPOOL_BYTES", str(256 * 1024)))
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "application/rss+xml",
+    "image/svg+xml",
+    "text/",
+)
+NEVER_COMPRESS_TYPES = ("text/event-stream",)
+
+
+def encodings() -> Tuple[str, ...]:
+    """Supported encodings, most preferred first"""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate(accept_encoding: Optional[str]) -> Optional[str]:
+    """Best supported encoding the client accepts (q > 0), or None for identity"""
+    if not COMPRESSION_ENABLED or not accept_encoding:
+        return None
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    wildcard = accepted.get("*", 0.0)
+    best, best_quality = None, 0.0
+    for encoding in encodings():
+        quality = accepted.get(encoding, wildcard)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compressible(content_type: Optional[str]) -> bool:
+    if not content_type:
+        return False
+    content_type = content_type.lower()
+    if content_type.startswith(NEVER_COMPRESS_TYPES):
+        return False
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=COMPRESSION_BROTLI_QUALITY, mode=brotli.MODE_TEXT)
+    compressor = zlib.compressobj(COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+    return compressor.compress(body) + compressor.flush()
+
+
+async def compress_async(body: bytes, encoding: str) -> bytes:
+    """compress(), off the event loop for large bodies"""
+    if len(body) > COMPRESSION_THREADPOOL_BYTES:
+        return await run_in_threadpool(compress, body, encoding)
+    return compress(body, encoding)
+
+
+class StreamCompressor:
+    """Incremental compressor whose output can be sent after every chunk"""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=COMPRESSION_BROTLI_QUALITY, mode=brotli.MODE_TEXT)
+        else:
+            self._zlib = zlib.compressobj(COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def chunk(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._brotli.process(data) + self._brotli.flush()
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._brotli.finish()
+        return self._zlib.flush()
+
+
+def _get(headers: List[Tuple[bytes, bytes]], name: bytes) -> Optional[str]:
+    for key, value in headers:
+        if key.lower() == name:
+            return value.decode("latin-1")
+    return None
+
+
+def with_vary(headers: List[Tuple[bytes, bytes]]) -> List[Tuple[bytes, bytes]]:
+    """Add Accept-Encoding to Vary, keeping whatever it already lists"""
+    vary = _get(headers, b"vary")
+    if vary is None:
+        return headers + [(b"vary", b"Accept-Encoding")]
+    if "accept-encoding" in vary.lower() or vary.strip() == "*":
+        return headers
+    merged = f"{vary}, Accept-Encoding".encode("latin-1")
+    return [(k, merged if k.lower() == b"vary" else v) for k, v in headers]
+
+
+def encoded_headers(headers: List[Tuple[bytes, bytes]], encoding: str, length: Optional[int]) -> List[Tuple[bytes, bytes]]:
+    """Headers for the compressed representation; length None for a streamed body"""
+    headers = [(k, v) for k, v in headers if k.lower() != b"content-length"]
+    headers.append((b"content-encoding", encoding.encode("latin-1")))
+    if length is not None:
+        headers.append((b"content-length", str(length).encode("latin-1")))
+    # A strong validator names exact bytes, which have changed
+    etag = _get(headers, b"etag")
+    if etag is not None and not etag.startswith("W/"):
+        headers = [(k, f"W/{etag}".encode("latin-1") if k.lower() == b"etag" else v) for k, v in headers]
+    return headers
+
+
+def _request_header(scope, name: bytes) -> Optional[str]:
+    for key, value in scope.get("headers", []):
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+class CompressionMiddleware:
+    """Compress eligible responses with the client's preferred encoding"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if not COMPRESSION_ENABLED or scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate(_request_header(scope, b"accept-encoding"))
+        start = None
+        buffered: List[bytes] = []
+        buffered_size = 0
+        stream: Optional[StreamCompressor] = None
+        passthrough = False
+
+        async def compressing_send(message):
+            nonlocal start, buffered_size, stream, passthrough
+
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                eligible = (
+                    message["status"] not in (204, 206, 304)
+                    and compressible(_get(headers, b"content-type"))
+                    and _get(headers, b"accept-ranges") is None
+                )
+                if not eligible:
+                    passthrough = True
+                    await send(message)
+                    return
+                # The response depends on Accept-Encoding whether or not this one is compressed
+                message = {**message, "headers": with_vary(headers)}
+                if encoding is None or _get(headers, b"content-encoding") is not None:
+                    passthrough = True
+                    await send(message)
+                    return
+                start = message  # Held until we know whether the body is big enough
+                return
+
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if stream is not None:
+                data = stream.chunk(body) if more_body else stream.chunk(body) + stream.finish()
+                await send({"type": "http.response.body", "body": data, "more_body": more_body})
+                return
+
+            buffered.append(body)
+            buffered_size += len(body)
+            if not more_body:
+                whole = b"".join(buffered)
+                if buffered_size < COMPRESSION_MIN_BYTES:
+                    await send(start)
+                    await send({"type": "http.response.body", "body": whole})
+                    return
+                compressed = await compress_async(whole, encoding)
+                await send({**start, "headers": encoded_headers(start["headers"], encoding, len(compressed))})
+                await send({"type": "http.response.body", "body": compressed})
+                return
+
+            if buffered_size >= COMPRESSION_MIN_BYTES:
+                # A large streamed body: compress from here on, flushing every chunk
+                stream = StreamCompressor(encoding)
+                await send({**start, "headers": encoded_headers(start["headers"], encoding, None)})
+                data = stream.chunk(b"".join(buffered))
+                buffered.clear()
+                await send({"type": "http.response.body", "body": data, "more_body": True})
+
+        await self.app(scope, receive, compressing_send)
@@ -0,0 +1,250 @@
+"""
+Persistent outbox for transactional email.
+
+Request handlers never talk to Brevo. They call enqueue(), which stores the
+Brevo payload in the email_outbox collection, and return immediately. A
+background worker (started from server.py) claims due messages one at a time
+with an atomic find_one_and_update and posts them with a pooled async HTTP
+client.
+
+Message lifecycle (the "status" field):
+
+    pending -> sending -> sent
+                  |
+                  +-> pending (retry with exponential backoff)
+                  +-> dead    (4xx other than 408/429, or EMAIL_MAX_ATTEMPTS reached)
+
+A message left in "sending" by a crashed worker is picked up again once its
+lease (EMAIL_SEND_LEASE_SECONDS) expires. Dead messages stay in the collection
+for inspection and can be re-queued with retry().
+
+Point BREVO_API_URL at a local fake server (tests/backend/fake_brevo_server.py)
+to exercise the whole path without sending real email.
+"""
+import asyncio
+import logging
+import os
+import random
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+import httpx
+from pymongo import ASCENDING, ReturnDocument
+
+from database import email_outbox_collection
+
+logger = logging.getLogger(__name__)
+
+BREVO_API_KEY = os.environ.get('BREVO_API_KEY', '')
+BREVO_API_URL = os.environ.get('BREVO_API_URL', "https://api.brevo.com/v3/smtp/email")
+
+EMAIL_HTTP_TIMEOUT_SECONDS = float(os.environ.get("EMAIL_HTTP_TIMEOUT_SECONDS", "10"))
+EMAIL_MAX_ATTEMPTS = int(os.environ.get("EMAIL_MAX_ATTEMPTS", "8"))
+EMAIL_RETRY_BASE_SECONDS = float(os.environ.get("EMAIL_RETRY_BASE_SECONDS", "5"))
+EMAIL_RETRY_MAX_SECONDS = float(os.environ.get("EMAIL_RETRY_MAX_SECONDS", "3600"))
+EMAIL_OUTBOX_POLL_SECONDS = float(os.environ.get("EMAIL_OUTBOX_POLL_SECONDS", "5"))
+EMAIL_SEND_LEASE_SECONDS = float(os.environ.get("EMAIL_SEND_LEASE_SECONDS", "120"))
+
+PENDING = "pending"
+SENDING = "sending"
+SENT = "sent"
+DEAD = "dead"
+STATUSES = (PENDING, SENDING, SENT, DEAD)
+
+# Client errors that are worth retrying; any other 4xx means the payload is bad
+RETRYABLE_CLIENT_ERRORS = {408, 429}
+
+
+class PermanentSendError(Exception):
+    """The message can never be delivered as is"""
+
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff with jitter (50-100% of the step), capped at EMAIL_RETRY_MAX_SECONDS"""
+    ceiling = min(EMAIL_RETRY_BASE_SECONDS * (2 ** max(attempts - 1, 0)), EMAIL_RETRY_MAX_SECONDS)
+    return random.uniform(ceiling / 2, ceiling)
+
+
+async def enqueue(payload: Dict[str, Any], kind: str) -> str:
+    """Store a Brevo payload for delivery; returns the outbox message id"""
+    now = datetime.utcnow()
+    message_id = str(uuid.uuid4())
+    await email_outbox_collection.insert_one({
+        "_id": message_id,
+        "kind": kind,
+        "payload": payload,
+        "status": PENDING,
+        "attempts": 0,
+        "next_attempt_at": now,
+        "created_at": now,
+        "updated_at": now,
+        "last_error": None,
+    })
+    outbox_worker.notify()
+    return message_id
+
+
+async def retry(message_id: str) -> bool:
+    """Put a dead message back in the queue"""
+    now = datetime.utcnow()
+    result = await email_outbox_collection.update_one(
+        {"_id": message_id, "status": DEAD},
+        {"$set": {"status": PENDING, "attempts": 0, "next_attempt_at": now, "updated_at": now}},
+    )
+    if result.modified_count:
+        outbox_worker.notify()
+    return bool(result.modified_count)
+
+
+class OutboxWorker:
+    """Background task that drains the outbox"""
+
+    def __init__(self):
+        self._client: Optional[httpx.AsyncClient] = None
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping = False
+
+        self.sent = 0
+        self.retried = 0
+        self.dead = 0
+
+    def start(self):
+        """Create the HTTP client and start the worker on the running loop"""
+        if self._task is not None and not self._task.done():
+            return
+        self._stopping = False
+        self._client = httpx.AsyncClient(
+            timeout=httpx.Timeout(EMAIL_HTTP_TIMEOUT_SECONDS),
+            limits=httpx.Limits(max_connections=10, max_keepalive_connections=5),
+            headers={"accept": "application/json", "content-type": "application/json"},
+        )
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def notify(self):
+        """Wake the worker now instead of at the next poll"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def stop(self):
+        self._stopping = True
+        if self._task is not None:
+            self.notify()
+            try:
+                await asyncio.wait_for(self._task, timeout=EMAIL_HTTP_TIMEOUT_SECONDS + 1)
+            except (asyncio.TimeoutError, Exception):
+                self._task.cancel()
+            self._task = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                while not self._stopping and await self.process_one():
+                    pass
+            except Exception as e:
+                logger.warning(f"Email outbox worker error: {e}")
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=EMAIL_OUTBOX_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def _claim(self) -> Optional[Dict[str, Any]]:
+        now = datetime.utcnow()
+        return await email_outbox_collection.find_one_and_update(
+            {"$or": [
+                {"status": PENDING, "next_attempt_at": {"$lte": now}},
+                {"status": SENDING, "lease_until": {"$lt": now}},
+            ]},
+            {
+                "$set": {
+                    "status": SENDING,
+                    "lease_until": now + timedelta(seconds=EMAIL_SEND_LEASE_SECONDS),
+                    "updated_at": now,
+                },
+                "$inc": {"attempts": 1},
+            },
+            sort=[("next_attempt_at", ASCENDING)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def _post(self, payload: Dict[str, Any]):
+        if self._client is None:
+            raise RuntimeError("Email outbox worker is not started")
+        try:
+            response = await self._client.post(BREVO_API_URL, json=payload, headers={"api-key": BREVO_API_KEY})
+        except httpx.HTTPError as e:
+            raise RuntimeError(f"{type(e).__name__}: {e}")
+
+        if response.status_code >= 400:
+            error = f"HTTP {response.status_code}: {response.text[:500]}"
+            if response.status_code < 500 and response.status_code not in RETRYABLE_CLIENT_ERRORS:
+                raise PermanentSendError(error)
+            raise RuntimeError(error)
+
+    async def process_one(self) -> bool:
+        """Send the next due message; returns False when nothing is due"""
+        message = await self._claim()
+        if message is None:
+            return False
+
+        now = datetime.utcnow()
+        try:
+            await self._post(message["payload"])
+        except PermanentSendError as e:
+            await self._finish(message, DEAD, str(e))
+            self.dead += 1
+            logger.error(f"Email {message['_id']} ({message['kind']}) rejected: {e}")
+        except Exception as e:
+            if message["attempts"] >= EMAIL_MAX_ATTEMPTS:
+                await self._finish(message, DEAD, str(e))
+                self.dead += 1
+                logger.error(f"Email {message['_id']} ({message['kind']}) gave up after {message['attempts']} attempts: {e}")
+            else:
+                delay = retry_delay(message["attempts"])
+                await email_outbox_collection.update_one(
+                    {"_id": message["_id"], "status": SENDING},
+                    {"$set": {
+                        "status": PENDING,
+                        "next_attempt_at": now + timedelta(seconds=delay),
+                        "last_error": str(e),
+                        "updated_at": now,
+                    }, "$unset": {"lease_until": ""}},
+                )
+                self.retried += 1
+                logger.warning(f"Email {message['_id']} failed (attempt {message['attempts']}), retrying in {delay:.1f}s: {e}")
+        else:
+            await self._finish(message, SENT, None)
+            self.sent += 1
+        return True
+
+    async def _finish(self, message: Dict[str, Any], status: str, error: Optional[str]):
+        now = datetime.utcnow()
+        update = {"status": status, "updated_at": now, "last_error": error}
+        if status == SENT:
+            update["sent_at"] = now
+        await email_outbox_collection.update_one(
+            {"_id": message["_id"], "status": SENDING},
+            {"$set": update, "$unset": {"lease_until": ""}},
+        )
+
+    async def stats(self) -> Dict[str, Any]:
+        counts = {status: 0 for status in STATUSES}
+        async for row in email_outbox_collection.aggregate([{"$group": {"_id": "$status", "count": {"$sum": 1}}}]):
+            counts[row["_id"]] = row["count"]
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "by_status": counts,
+            "sent": self.sent,
+            "retried": self.retried,
+            "dead": self.dead,
+        }
+
+
+outbox_worker = OutboxWorker()
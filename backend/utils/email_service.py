@@ -1,26 +1,24 @@
+"""
+Email notifications via Brevo.
+
+The send_* functions only build the Brevo payload and put it in the email
+outbox (utils/email_outbox.py); a background worker delivers it with retries.
+"""
 import os
-import requests
 from typing import Optional
 
-BREVO_API_KEY = os.environ.get('BREVO_API_KEY', '')
-BREVO_API_URL = "https://api.brevo.com/v3/smtp/email"
+from utils.email_outbox import BREVO_API_KEY, enqueue
 ADMIN_EMAIL = os.environ.get('ADMIN_EMAIL', 'admin@promptforgedev.com')
 BREVO_SENDER_EMAIL = os.environ.get('BREVO_SENDER_EMAIL', 'noreply@promptforgedev.com')
 BREVO_SENDER_NAME = os.environ.get('BREVO_SENDER_NAME', 'Prompt Forge')
 
-def send_contact_email(name: str, email: str, message: str, phone: Optional[str] = None) -> bool:
-    """Send contact form notification email via Brevo"""
+async def send_contact_email(name: str, email: str, message: str, phone: Optional[str] = None) -> bool:
+    """Queue a contact form notification email"""
     
     if not BREVO_API_KEY:
         print("Warning: BREVO_API_KEY not configured. Email not sent.")
         return False
     
-    headers = {
-        "accept": "application/json",
-        "api-key": BREVO_API_KEY,
-        "content-type": "application/json"
-    }
-    
     phone_text = f"<p><strong>Phone:</strong> {phone}</p>" if phone else ""
     
     email_data = {
@@ -53,28 +51,16 @@ def send_contact_email(name: str, email: str, message: str, phone: Optional[str]
         }
     }
     
-    try:
-        response = requests.post(BREVO_API_URL, json=email_data, headers=headers)
-        response.raise_for_status()
-        print(f"Email sent successfully to {ADMIN_EMAIL}")
-        return True
-    except requests.exceptions.RequestException as e:
-        print(f"Failed to send email: {str(e)}")
-        return False
+    await enqueue(email_data, kind="contact_email")
+    return True
 
-def send_chat_notification(customer_name: str, customer_email: str, message: str) -> bool:
-    """Send notification when customer sends a chat message"""
+async def send_chat_notification(customer_name: str, customer_email: str, message: str) -> bool:
+    """Queue a notification when customer sends a chat message"""
     
     if not BREVO_API_KEY:
         print("Warning: BREVO_API_KEY not configured. Email not sent.")
         return False
     
-    headers = {
-        "accept": "application/json",
-        "api-key": BREVO_API_KEY,
-        "content-type": "application/json"
-    }
-    
     email_data = {
         "sender": {
             "name": BREVO_SENDER_NAME,
@@ -100,28 +86,16 @@ def send_chat_notification(customer_name: str, customer_email: str, message: str
         """
     }
     
-    try:
-        response = requests.post(BREVO_API_URL, json=email_data, headers=headers)
-        response.raise_for_status()
-        print(f"Chat notification sent to {ADMIN_EMAIL}")
-        return True
-    except requests.exceptions.RequestException as e:
-        print(f"Failed to send chat notification: {str(e)}")
-        return False
+    await enqueue(email_data, kind="chat_notification")
+    return True
 
 async def send_booking_notification(booking_data: dict) -> bool:
-    """Send notification when a new booking is created"""
+    """Queue a notification when a new booking is created"""
     
     if not BREVO_API_KEY:
         print("Warning: BREVO_API_KEY not configured. Email not sent.")
         return False
     
-    headers = {
-        "accept": "application/json",
-        "api-key": BREVO_API_KEY,
-        "content-type": "application/json"
-    }
-    
     message_text = f"<p><strong>Message:</strong> {booking_data.get('message')}</p>" if booking_data.get('message') else ""
     
     email_data = {
@@ -159,11 +133,5 @@ async def send_booking_notification(booking_data: dict) -> bool:
         }
     }
     
-    try:
-        response = requests.post(BREVO_API_URL, json=email_data, headers=headers)
-        response.raise_for_status()
-        print(f"Booking notification sent to {ADMIN_EMAIL}")
-        return True
-    except requests.exceptions.RequestException as e:
-        print(f"Failed to send booking notification: {str(e)}")
-        return False
+    await enqueue(email_data, kind="booking_notification")
+    return True
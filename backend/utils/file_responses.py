@@ -0,0 +1,170 @@
+"""
+File downloads with validators and byte ranges.
+
+Starlette's FileResponse (0.37) always sends the whole file and ignores
+conditional headers. send_file() adds what resumable, cacheable downloads need:
+
+- ETag: strong, from the content SHA-256 when it is known, otherwise a weak
+  tag from mtime and size
+- If-None-Match / If-Modified-Since -> 304 Not Modified
+- Range: bytes=... (single range) -> 206 Partial Content, guarded by If-Range;
+  unsatisfiable ranges get 416. Multiple ranges are answered with the full file,
+  which RFC 9110 allows.
+"""
+import os
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Optional, Tuple
+
+import anyio
+from fastapi import HTTPException, Request, status
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import FileResponse, Response
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def strong_etag(sha256: str) -> str:
+    return f'"{sha256}"'
+
+
+def _weak_etag(stat_result: os.stat_result) -> str:
+    return f'W/"{int(stat_result.st_mtime)}-{stat_result.st_size}"'
+
+
+def _opaque(tag: str) -> str:
+    return tag.strip()[2:] if tag.strip().startswith("W/") else tag.strip()
+
+
+def etag_matches(header: str, etag: str) -> bool:
+    """If-None-Match uses weak comparison"""
+    if header.strip() == "*":
+        return True
+    return any(_opaque(tag) == _opaque(etag) for tag in header.split(","))
+
+
+def _not_modified_since(header: str, stat_result: os.stat_result) -> bool:
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    return int(stat_result.st_mtime) <= since.timestamp()
+
+
+def _if_range_holds(header: Optional[str], etag: str, last_modified: str) -> bool:
+    """If-Range uses strong comparison; a date must match Last-Modified exactly"""
+    if header is None:
+        return True
+    header = header.strip()
+    if header.startswith(('"', 'W/')):
+        return not etag.startswith("W/") and header == etag
+    return header == last_modified
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    (start, end) inclusive for a single "bytes=" range, or None when the header
+    should be ignored (other units, several ranges, bad syntax).
+    Raises RangeNotSatisfiable when the range lies outside the file.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, dash, last = spec.strip().partition("-")
+    if not dash:
+        return None
+    try:
+        if first == "":
+            # Suffix range: the last N bytes
+            length = int(last)
+            if length <= 0:
+                raise RangeNotSatisfiable()
+            return max(size - length, 0), size - 1
+        start = int(first)
+        end = int(last) if last else None
+    except ValueError:
+        return None
+    if end is not None and start > end:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable()
+    return start, size - 1 if end is None else min(end, size - 1)
+
+
+class FileRangeResponse(FileResponse):
+    """FileResponse that sends bytes start..end (inclusive) with status 206"""
+
+    def __init__(self, path, start: int, end: int, stat_result: os.stat_result, **kwargs):
+        super().__init__(path, status_code=status.HTTP_206_PARTIAL_CONTENT, stat_result=stat_result, **kwargs)
+        self.start = start
+        self.end = end
+        self.headers["content-length"] = str(end - start + 1)
+        self.headers["content-range"] = f"bytes {start}-{end}/{stat_result.st_size}"
+
+    async def __call__(self, scope, receive, send):
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if scope["method"].upper() == "HEAD":
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            await file.seek(self.start)
+            remaining = self.end - self.start + 1
+            while remaining > 0:
+                chunk = await file.read(min(self.chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+            if remaining > 0:
+                # File shrank underneath us; close the body rather than hang
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+async def send_file(
+    request: Request,
+    path: str,
+    media_type: Optional[str] = None,
+    sha256: Optional[str] = None,
+    filename: Optional[str] = None,
+    cache_control: str = "private, no-cache",
+) -> Response:
+    """Serve `path` honouring conditional and Range headers; 404 if it is missing"""
+    try:
+        stat_result = await run_in_threadpool(os.stat, path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found on server")
+
+    etag = strong_etag(sha256) if sha256 else _weak_etag(stat_result)
+    last_modified = formatdate(stat_result.st_mtime, usegmt=True)
+    headers = {
+        "etag": etag,
+        "last-modified": last_modified,
+        "accept-ranges": "bytes",
+        "cache-control": cache_control,
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_none_match is not None:
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    elif if_modified_since is not None and _not_modified_since(if_modified_since, stat_result):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    range_header = request.headers.get("range")
+    if range_header and _if_range_holds(request.headers.get("if-range"), etag, last_modified):
+        try:
+            byte_range = parse_range(range_header, stat_result.st_size)
+        except RangeNotSatisfiable:
+            return Response(
+                status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                headers={**headers, "content-range": f"bytes */{stat_result.st_size}"},
+            )
+        if byte_range is not None:
+            return FileRangeResponse(
+                path, *byte_range, stat_result=stat_result,
+                headers=headers, media_type=media_type, filename=filename,
+            )
+
+    return FileResponse(path, headers=headers, media_type=media_type, filename=filename, stat_result=stat_result)
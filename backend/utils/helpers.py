@@ -1,6 +1,8 @@
+import base64
+import json
 import re
 from datetime import datetime
-from typing import Any, Dict
+from typing import Any, Dict, Tuple
 
 def create_slug(title: str) -> str:
     """Create a URL-friendly slug from a title"""
@@ -24,3 +26,69 @@ def serialize_document(doc: Dict[str, Any]) -> Dict[str, Any]:
             doc[key] = value.isoformat()
     
     return doc
+
+def is_timestamp(value: str) -> bool:
+    """True if value is an ISO 8601 date/time rather than an id"""
+    try:
+        datetime.fromisoformat(value)
+        return True
+    except ValueError:
+        return False
+
+def entries_after_expression(field: str, after: str, limit: int, time_key: str) -> Dict[str, Any]:
+    """
+    Aggregation expression for the entries of an array that come after
+    `after`: the entry with that id, or an ISO timestamp compared with
+    time_key. Up to limit + 1 are returned, so the caller can tell whether
+    more follow. An id that is no longer in the array gives the newest
+    `limit` entries.
+    """
+    entries = {"$ifNull": [f"${field}", []]}
+    if is_timestamp(after):
+        return {"$slice": [
+            {"$filter": {"input": entries, "as": "entry", "cond": {"$gt": [f"$$entry.{time_key}", after]}}},
+            limit + 1
+        ]}
+    return {"$let": {
+        "vars": {"position": {"$indexOfArray": [{"$ifNull": [f"${field}.id", []]}, after]}},
+        "in": {"$cond": [
+            {"$gte": ["$$position", 0]},
+            {"$slice": [entries, {"$add": ["$$position", 1]}, limit + 1]},
+            {"$slice": [entries, -limit]}
+        ]}
+    }}
+
+def encode_cursor(sort_value: Any, last_id: str) -> str:
+    """Opaque keyset cursor: the sort value and id of the last row of a page"""
+    # Datetimes are tagged so they come back as datetimes, not strings (which sort apart in BSON)
+    if isinstance(sort_value, datetime):
+        sort_value = {"$date": sort_value.isoformat()}
+    return base64.urlsafe_b64encode(json.dumps([sort_value, last_id]).encode()).decode()
+
+def decode_cursor(cursor: str) -> Tuple[Any, str]:
+    """Inverse of encode_cursor; raises ValueError on a malformed cursor"""
+    try:
+        sort_value, last_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if isinstance(sort_value, dict):
+            sort_value = datetime.fromisoformat(sort_value["$date"])
+    except (ValueError, TypeError, KeyError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(last_id, str) or not isinstance(sort_value, (str, int, float, datetime, type(None))):
+        raise ValueError("Invalid cursor")
+    return sort_value, last_id
+
+def keyset_filter(field: str, sort_value: Any, last_id: str, descending: bool) -> Dict[str, Any]:
+    """
+    Match the rows after (sort_value, last_id) in a sort on (field, id), in a
+    form a (field, id) index can serve. Missing/null values sort before every
+    other value, so they get their own branches instead of a range comparison.
+    """
+    op = "$lt" if descending else "$gt"
+    if sort_value is None:
+        if descending:
+            return {field: None, "id": {op: last_id}}
+        return {"$or": [{field: {"$ne": None}}, {field: None, "id": {op: last_id}}]}
+    branches = [{field: {op: sort_value}}, {field: sort_value, "id": {op: last_id}}]
+    if descending:
+        branches.append({field: None})
+    return {"$or": branches}
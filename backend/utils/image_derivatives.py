@@ -0,0 +1,315 @@
+"""
+Responsive derivatives (resized variants, WebP, blur placeholder) for uploaded images.
+
+Uploading an image only queues work. enqueue() upserts a document in the
+image_derivatives collection keyed by the image's SHA-256, so the same image
+uploaded twice is processed once. DerivativeWorker (started from server.py)
+claims pending documents and renders them in a process pool
+(utils/image_render.py), never on the request path. Every variant is put in
+the blob store and served as
+
+    /uploads/derivatives/<sha256>/<width>.<webp|jpg|png>
+
+Document lifecycle (the "status" field):
+
+    pending -> processing -> ready
+                   |
+                   +-> pending (retry), then failed after IMAGE_DERIVATIVE_MAX_ATTEMPTS
+
+responsive_images() turns upload URLs into srcset-ready structures for API
+responses. Pillow is required; without it uploads behave as before and no
+derivatives are made.
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+import shutil
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+
+from pymongo import ASCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from starlette.concurrency import run_in_threadpool
+
+from database import blob_refs_collection, image_derivatives_collection
+from utils import blob_store, response_cache
+
+try:
+    from utils import image_render
+except ImportError:  # Pillow is not installed
+    image_render = None
+
+logger = logging.getLogger(__name__)
+
+IMAGE_DERIVATIVES_ENABLED = os.environ.get("IMAGE_DERIVATIVES_ENABLED", "true").lower() == "true"
+IMAGE_VARIANT_WIDTHS = [int(w) for w in os.environ.get("IMAGE_VARIANT_WIDTHS", "320,640,960,1280,1920").split(",") if w.strip()]
+IMAGE_QUALITY = int(os.environ.get("IMAGE_QUALITY", "80"))
+IMAGE_WORKERS = int(os.environ.get("IMAGE_WORKERS", "2"))
+IMAGE_DERIVATIVE_MAX_ATTEMPTS = int(os.environ.get("IMAGE_DERIVATIVE_MAX_ATTEMPTS", "3"))
+IMAGE_DERIVATIVE_POLL_SECONDS = float(os.environ.get("IMAGE_DERIVATIVE_POLL_SECONDS", "30"))
+IMAGE_DERIVATIVE_LEASE_SECONDS = float(os.environ.get("IMAGE_DERIVATIVE_LEASE_SECONDS", "300"))
+
+PENDING = "pending"
+PROCESSING = "processing"
+READY = "ready"
+FAILED = "failed"
+STATUSES = (PENDING, PROCESSING, READY, FAILED)
+
+
+def available() -> bool:
+    return IMAGE_DERIVATIVES_ENABLED and image_render is not None
+
+
+async def enqueue(sha256: str, source_path: str) -> bool:
+    """Queue derivative generation for an uploaded image; False if derivatives are off"""
+    if not available():
+        return False
+    now = datetime.utcnow()
+    try:
+        await image_derivatives_collection.update_one(
+            {"_id": sha256},
+            {"$setOnInsert": {
+                "status": PENDING,
+                "source_path": source_path,
+                "attempts": 0,
+                "next_attempt_at": now,
+                "created_at": now,
+                "updated_at": now,
+            }},
+            upsert=True,
+        )
+    except DuplicateKeyError:
+        pass  # The same image was queued concurrently
+    derivative_worker.notify()
+    return True
+
+
+# ============================================================================
+# API STRUCTURE
+# ============================================================================
+
+def _srcset(variants: List[Dict[str, Any]]) -> str:
+    return ", ".join(f"{v['url']} {v['width']}w" for v in sorted(variants, key=lambda v: v["width"]))
+
+
+def image_set(url: str, doc: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    srcset-ready structure for one image:
+    {"src", "srcset", "sources": [{"type", "srcset"}], "width", "height", "placeholder"}
+    `srcset` lists the fallback-format variants plus the original upload at full width.
+    """
+    webp = [v for v in doc["variants"] if v["format"] == "webp"]
+    fallback = [v for v in doc["variants"] if v["format"] != "webp"]
+    fallback.append({"url": url, "width": doc["width"]})
+    return {
+        "src": url,
+        "srcset": _srcset(fallback),
+        "sources": [{"type": "image/webp", "srcset": _srcset(webp)}] if webp else [],
+        "width": doc["width"],
+        "height": doc["height"],
+        "placeholder": doc.get("placeholder"),
+    }
+
+
+async def responsive_images(urls: Iterable[Optional[str]]) -> Dict[str, Dict[str, Any]]:
+    """
+    Map each upload URL that has ready derivatives to its image_set().
+    Two queries however many URLs: their blob refs, then their derivative documents.
+    """
+    keys: Dict[str, List[str]] = {}
+    for url in urls:
+        if not url:
+            continue
+        path = urlparse(url).path
+        if path.startswith("/uploads/"):
+            keys.setdefault(path[1:], []).append(url)
+    if not keys:
+        return {}
+
+    urls_by_sha: Dict[str, List[str]] = {}
+    async for ref in blob_refs_collection.find({"_id": {"$in": list(keys)}}, {"sha256": 1}):
+        urls_by_sha.setdefault(ref["sha256"], []).extend(keys[ref["_id"]])
+    if not urls_by_sha:
+        return {}
+
+    result = {}
+    async for doc in image_derivatives_collection.find({"_id": {"$in": list(urls_by_sha)}, "status": READY}):
+        for url in urls_by_sha[doc["_id"]]:
+            result[url] = image_set(url, doc)
+    return result
+
+
+# ============================================================================
+# WORKER
+# ============================================================================
+
+class DerivativeWorker:
+    """Background task that renders queued images in a process pool"""
+
+    def __init__(self):
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping = False
+
+        self.rendered = 0
+        self.failed = 0
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        # spawn: workers must not inherit the event loop, Mongo client or their threads
+        return ProcessPoolExecutor(max_workers=IMAGE_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+
+    def start(self):
+        """Start the worker on the running loop (no-op without Pillow)"""
+        if not available() or (self._task is not None and not self._task.done()):
+            return
+        self._stopping = False
+        self._pool = self._new_pool()
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def notify(self):
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def stop(self):
+        self._stopping = True
+        if self._task is not None:
+            self.notify()
+            try:
+                await asyncio.wait_for(self._task, timeout=5)
+            except (asyncio.TimeoutError, Exception):
+                self._task.cancel()
+            self._task = None
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                while not self._stopping and await self.process_one():
+                    pass
+            except Exception as e:
+                logger.warning(f"Image derivative worker error: {e}")
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=IMAGE_DERIVATIVE_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def _claim(self) -> Optional[Dict[str, Any]]:
+        now = datetime.utcnow()
+        return await image_derivatives_collection.find_one_and_update(
+            {"$or": [
+                {"status": PENDING, "next_attempt_at": {"$lte": now}},
+                {"status": PROCESSING, "lease_until": {"$lt": now}},
+            ]},
+            {
+                "$set": {
+                    "status": PROCESSING,
+                    "lease_until": now + timedelta(seconds=IMAGE_DERIVATIVE_LEASE_SECONDS),
+                    "updated_at": now,
+                },
+                "$inc": {"attempts": 1},
+            },
+            sort=[("next_attempt_at", ASCENDING)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def _render(self, source_path: str, out_dir: Path) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(
+                self._pool, image_render.render_derivatives,
+                source_path, IMAGE_VARIANT_WIDTHS, IMAGE_QUALITY, str(out_dir)
+            )
+        except BrokenProcessPool:
+            # A worker process died (e.g. out of memory); the next job gets a fresh pool
+            self._pool = self._new_pool()
+            raise
+
+    async def process_one(self) -> bool:
+        """Render the next queued image; returns False when nothing is due"""
+        job = await self._claim()
+        if job is None:
+            return False
+
+        sha256 = job["_id"]
+        out_dir = blob_store.TEMP_DIR / f"derive-{uuid.uuid4().hex}"
+        try:
+            await run_in_threadpool(out_dir.mkdir, parents=True, exist_ok=True)
+            result = await self._render(job["source_path"], out_dir)
+
+            variants = []
+            for variant in result["variants"]:
+                key = f"uploads/derivatives/{sha256}/{variant['width']}.{variant['extension']}"
+                await blob_store.commit(
+                    Path(variant["path"]), key, variant["sha256"], variant["size"],
+                    content_type=variant["content_type"]
+                )
+                variants.append({
+                    "url": f"/{key}",
+                    "width": variant["width"],
+                    "format": variant["format"],
+                    "content_type": variant["content_type"],
+                    "size": variant["size"],
+                })
+
+            await image_derivatives_collection.update_one(
+                {"_id": sha256, "status": PROCESSING},
+                {"$set": {
+                    "status": READY,
+                    "width": result["width"],
+                    "height": result["height"],
+                    "placeholder": result["placeholder"],
+                    "variants": variants,
+                    "last_error": None,
+                    "updated_at": datetime.utcnow(),
+                }, "$unset": {"lease_until": ""}},
+            )
+            self.rendered += 1
+            # Cached service responses embed responsive_images
+            await response_cache.bump("image_derivatives")
+        except Exception as e:
+            now = datetime.utcnow()
+            gave_up = job["attempts"] >= IMAGE_DERIVATIVE_MAX_ATTEMPTS
+            await image_derivatives_collection.update_one(
+                {"_id": sha256, "status": PROCESSING},
+                {"$set": {
+                    "status": FAILED if gave_up else PENDING,
+                    "next_attempt_at": now + timedelta(seconds=IMAGE_DERIVATIVE_POLL_SECONDS * job["attempts"]),
+                    "last_error": f"{type(e).__name__}: {e}",
+                    "updated_at": now,
+                }, "$unset": {"lease_until": ""}},
+            )
+            if gave_up:
+                self.failed += 1
+            logger.warning(f"Image derivatives for {sha256} failed (attempt {job['attempts']}): {e}")
+        finally:
+            await run_in_threadpool(shutil.rmtree, out_dir, True)
+        return True
+
+    async def stats(self) -> Dict[str, Any]:
+        counts = {status: 0 for status in STATUSES}
+        async for row in image_derivatives_collection.aggregate([{"$group": {"_id": "$status", "count": {"$sum": 1}}}]):
+            counts[row["_id"]] = row["count"]
+        return {
+            "available": available(),
+            "running": self._task is not None and not self._task.done(),
+            "workers": IMAGE_WORKERS,
+            "widths": IMAGE_VARIANT_WIDTHS,
+            "by_status": counts,
+            "rendered": self.rendered,
+            "failed": self.failed,
+        }
+
+
+derivative_worker = DerivativeWorker()
@@ -0,0 +1,89 @@
+"""
+Image resizing and encoding, run inside the derivative process pool.
+
+This module only depends on Pillow so worker processes start quickly and never
+import the database layer. render_derivatives() is the single entry point; it
+writes every variant to `out_dir` and returns plain data the parent process
+stores (see utils/image_derivatives.py).
+"""
+import base64
+import hashlib
+import io
+import os
+import uuid
+from typing import Any, Dict, List, Sequence
+
+from PIL import Image, ImageFilter, ImageOps
+
+PLACEHOLDER_WIDTH = 16
+
+FALLBACK_MIME = {"JPEG": "image/jpeg", "PNG": "image/png"}
+EXTENSIONS = {"WEBP": "webp", "JPEG": "jpg", "PNG": "png"}
+
+
+def _has_alpha(image: Image.Image) -> bool:
+    return image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+
+
+def _encode(image: Image.Image, fmt: str, quality: int) -> bytes:
+    buffer = io.BytesIO()
+    if fmt == "JPEG":
+        image.convert("RGB").save(buffer, "JPEG", quality=quality, optimize=True, progressive=True)
+    elif fmt == "PNG":
+        image.save(buffer, "PNG", optimize=True)
+    else:
+        image.save(buffer, "WEBP", quality=quality, method=4)
+    return buffer.getvalue()
+
+
+def _write(data: bytes, out_dir: str) -> Dict[str, Any]:
+    path = os.path.join(out_dir, f".{uuid.uuid4().hex}.part")
+    with open(path, "wb") as handle:
+        handle.write(data)
+    return {"path": path, "size": len(data), "sha256": hashlib.sha256(data).hexdigest()}
+
+
+def render_derivatives(source_path: str, widths: Sequence[int], quality: int, out_dir: str) -> Dict[str, Any]:
+    """
+    Resize `source_path` to each width narrower than the original and encode
+    every size as WebP plus a JPEG (or PNG, if the image has transparency)
+    fallback. The original width gets a WebP only; the upload itself is its fallback.
+    """
+    with Image.open(source_path) as opened:
+        image = ImageOps.exif_transpose(opened)
+        image.load()
+
+    alpha = _has_alpha(image)
+    image = image.convert("RGBA" if alpha else "RGB")
+    fallback = "PNG" if alpha else "JPEG"
+    original_width, original_height = image.size
+
+    variants: List[Dict[str, Any]] = []
+    targets = sorted({w for w in widths if w < original_width}) + [original_width]
+    for width in targets:
+        if width == original_width:
+            resized, formats = image, ["WEBP"]
+        else:
+            height = max(1, round(original_height * width / original_width))
+            resized, formats = image.resize((width, height), Image.LANCZOS), ["WEBP", fallback]
+        for fmt in formats:
+            written = _write(_encode(resized, fmt, quality), out_dir)
+            variants.append({
+                **written,
+                "width": width,
+                "format": fmt.lower(),
+                "extension": EXTENSIONS[fmt],
+                "content_type": "image/webp" if fmt == "WEBP" else FALLBACK_MIME[fmt],
+            })
+
+    tiny_height = max(1, round(original_height * PLACEHOLDER_WIDTH / original_width))
+    tiny = image.resize((PLACEHOLDER_WIDTH, tiny_height), Image.BILINEAR).filter(ImageFilter.GaussianBlur(1))
+    placeholder = "data:image/webp;base64," + base64.b64encode(_encode(tiny, "WEBP", 40)).decode("ascii")
+
+    return {
+        "width": original_width,
+        "height": original_height,
+        "fallback_format": fallback.lower(),
+        "placeholder": placeholder,
+        "variants": variants,
+    }
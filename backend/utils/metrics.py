@@ -0,0 +1,305 @@
+"""
+Request and database instrumentation, exported in the Prometheus text format.
+
+MetricsMiddleware records for every HTTP request, labelled by route template
+("/api/services/{service_id}", never the raw path):
+
+- http_request_duration_seconds   histogram, method + route
+- http_requests_total             counter, method + route + status
+- http_response_bytes_total       counter, bytes sent (after compression)
+- http_request_db_seconds         histogram of Mongo time spent per request
+- http_request_db_queries         histogram of Mongo commands per request
+
+CommandTimer is a pymongo command listener (registered in database.py).
+Motor runs each command on its executor with the caller's contextvars, so
+the listener can charge the command to the request that issued it. It also
+keeps process-wide series:
+
+- mongo_command_duration_seconds  histogram, command + collection
+- mongo_documents_returned_total  counter, command + collection
+
+Requests slower than SLOW_REQUEST_MS are logged with a per-collection query
+breakdown and the request ID (except event streams, which are meant to stay
+open) and time long-polls spent waiting (record_wait()). GET /metrics (routes/metrics.py) serves
+render(). Each request costs a few dict updates under one lock and no
+allocation per query beyond the breakdown entry.
+"""
+import logging
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional, Sequence, Tuple
+
+from pymongo import monitoring
+from starlette.routing import Match
+
+logger = logging.getLogger(__name__)
+
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "true").lower() == "true"
+SLOW_REQUEST_MS = float(os.environ.get("SLOW_REQUEST_MS", "500"))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+# Requests that matched no route share one label so scanners can't blow up the series
+UNMATCHED_ROUTE = "unmatched"
+# Commands without a collection (ping, hello, ...)
+NO_COLLECTION = "-"
+# Route templates resolved for requests answered before routing (response cache hits)
+ROUTE_CACHE_SIZE = 10_000
+
+_lock = threading.Lock()
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labels: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, label_values: Tuple[str, ...], value: float):
+        # Caller holds _lock. Layout: [bucket counts..., sum, count]
+        series = self._series.get(label_values)
+        if series is None:
+            series = self._series[label_values] = [0] * (len(self.buckets) + 2)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[i] += 1
+                break
+        series[-2] += value
+        series[-1] += 1
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for label_values, series in sorted(self._series.items()):
+            labels = _labels(self.labels, label_values)
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{labels},le="+Inf"}} {series[-1]}')
+            lines.append(f"{self.name}_sum{{{labels}}} {series[-2]}")
+            lines.append(f"{self.name}_count{{{labels}}} {series[-1]}")
+        return "\n".join(lines)
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels: Sequence[str]):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._series: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, label_values: Tuple[str, ...], amount: float = 1):
+        # Caller holds _lock
+        self._series[label_values] = self._series.get(label_values, 0) + amount
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for label_values, value in sorted(self._series.items()):
+            lines.append(f"{self.name}{{{_labels(self.labels, label_values)}}} {value}")
+        return "\n".join(lines)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Sequence[str], values: Sequence[str]) -> str:
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+
+
+request_duration = Histogram("http_request_duration_seconds", "HTTP request latency", ("method", "route"), LATENCY_BUCKETS)
+requests_total = Counter("http_requests_total", "HTTP requests", ("method", "route", "status"))
+response_bytes = Counter("http_response_bytes_total", "HTTP response body bytes sent", ("method", "route"))
+request_db_time = Histogram("http_request_db_seconds", "MongoDB time per HTTP request", ("method", "route"), LATENCY_BUCKETS)
+request_db_queries = Histogram("http_request_db_queries", "MongoDB commands per HTTP request", ("method", "route"), QUERY_COUNT_BUCKETS)
+command_duration = Histogram("mongo_command_duration_seconds", "MongoDB command latency", ("command", "collection"), DB_LATENCY_BUCKETS)
+command_failures = Counter("mongo_command_failures_total", "Failed MongoDB commands", ("command", "collection"))
+documents_returned = Counter("mongo_documents_returned_total", "Documents returned by MongoDB cursors", ("command", "collection"))
+
+REGISTRY = (
+    request_duration, requests_total, response_bytes, request_db_time, request_db_queries,
+    command_duration, command_failures, documents_returned,
+)
+
+
+def render() -> str:
+    with _lock:
+        return "\n".join(metric.render() for metric in REGISTRY) + "\n"
+
+
+# ============================================================================
+# PER-REQUEST ATTRIBUTION
+# ============================================================================
+
+class RequestMetrics:
+    """Mongo work done on behalf of one request"""
+    __slots__ = ("db_seconds", "queries", "breakdown", "waited")
+
+    def __init__(self):
+        self.db_seconds = 0.0
+        self.queries = 0
+        # Time spent idle by design (long-polls), left out of the slow-request check
+        self.waited = 0.0
+        # (command, collection) -> [count, seconds, documents]
+        self.breakdown: Dict[Tuple[str, str], list] = {}
+
+
+_current: ContextVar[Optional[RequestMetrics]] = ContextVar("request_metrics", default=None)
+
+
+def record_wait(seconds: float):
+    """Note that the current request deliberately sat idle for `seconds`"""
+    current = _current.get()
+    if current is not None:
+        current.waited += seconds
+
+
+def _returned_documents(reply) -> int:
+    cursor = reply.get("cursor")
+    if isinstance(cursor, dict):
+        batch = cursor.get("firstBatch", cursor.get("nextBatch"))
+        if batch is not None:
+            return len(batch)
+    return 0
+
+
+class CommandTimer(monitoring.CommandListener):
+    """Time every Mongo command and charge it to the current request"""
+
+    def __init__(self):
+        # pymongo request_id -> collection, between started and succeeded/failed
+        self._collections: Dict[Tuple[int, int], str] = {}
+
+    def started(self, event):
+        if event.command_name == "getMore":
+            collection = event.command.get("collection", NO_COLLECTION)
+        else:
+            collection = event.command.get(event.command_name)
+            if not isinstance(collection, str):
+                collection = NO_COLLECTION
+        self._collections[(event.request_id, event.operation_id)] = collection
+
+    def succeeded(self, event):
+        self._record(event, _returned_documents(event.reply), failed=False)
+
+    def failed(self, event):
+        self._record(event, 0, failed=True)
+
+    def _record(self, event, documents: int, failed: bool):
+        collection = self._collections.pop((event.request_id, event.operation_id), NO_COLLECTION)
+        seconds = event.duration_micros / 1_000_000
+        key = (event.command_name, collection)
+        current = _current.get()
+        with _lock:
+            command_duration.observe(key, seconds)
+            if documents:
+                documents_returned.inc(key, documents)
+            if failed:
+                command_failures.inc(key)
+            if current is not None:
+                current.db_seconds += seconds
+                current.queries += 1
+                entry = current.breakdown.get(key)
+                if entry is None:
+                    current.breakdown[key] = [1, seconds, documents]
+                else:
+                    entry[0] += 1
+                    entry[1] += seconds
+                    entry[2] += documents
+
+
+command_timer = CommandTimer()
+
+
+# ============================================================================
+# MIDDLEWARE
+# ============================================================================
+
+_route_cache: Dict[Tuple[str, str], str] = {}
+
+
+def _route_template(scope) -> str:
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    # Answered before routing (e.g. a response cache hit): find the route it would have matched
+    key = (scope["method"], scope["path"])
+    template = _route_cache.get(key)
+    if template is None:
+        template = UNMATCHED_ROUTE
+        app = scope.get("app")
+        for candidate in getattr(getattr(app, "router", None), "routes", ()):
+            match, _ = candidate.matches(scope)
+            if match == Match.FULL:
+                template = candidate.path
+                break
+        if len(_route_cache) >= ROUTE_CACHE_SIZE:
+            _route_cache.clear()
+        _route_cache[key] = template
+    return template
+
+
+def _log_slow(scope, route: str, status_code: int, seconds: float, request: RequestMetrics):
+    request_id = scope.get("state", {}).get("request_id", "-")
+    breakdown = "; ".join(
+        f"{command} {collection} x{count} {total * 1000:.1f}ms {documents} docs"
+        for (command, collection), (count, total, documents)
+        in sorted(request.breakdown.items(), key=lambda item: -item[1][1])
+    ) or "no queries"
+    logger.warning(
+        f"Slow request [{request_id}] {scope['method']} {route} {status_code} {seconds * 1000:.0f}ms "
+        f"(db {request.db_seconds * 1000:.0f}ms in {request.queries} queries: {breakdown})"
+    )
+
+
+class MetricsMiddleware:
+    """Record latency, status, bytes and Mongo usage per route"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if not METRICS_ENABLED or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request = RequestMetrics()
+        token = _current.set(request)
+        started = time.perf_counter()
+        status_code = 500
+        sent = 0
+        event_stream = False
+
+        async def measuring_send(message):
+            nonlocal status_code, sent, event_stream
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                event_stream = any(
+                    key == b"content-type" and value.startswith(b"text/event-stream")
+                    for key, value in message.get("headers", [])
+                )
+            elif message["type"] == "http.response.body":
+                sent += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, measuring_send)
+        finally:
+            _current.reset(token)
+            seconds = time.perf_counter() - started
+            route = _route_template(scope) if status_code != 404 or "route" in scope else UNMATCHED_ROUTE
+            labels = (scope["method"], route)
+            with _lock:
+                request_duration.observe(labels, seconds)
+                requests_total.inc((scope["method"], route, str(status_code)))
+                response_bytes.inc(labels, sent)
+                request_db_time.observe(labels, request.db_seconds)
+                request_db_queries.observe(labels, request.queries)
+            if (seconds - request.waited) * 1000 >= SLOW_REQUEST_MS and not event_stream:
+                _log_slow(scope, route, status_code, seconds, request)
@@ -0,0 +1,119 @@
+"""
+Request-level middlewares, written as plain ASGI callables.
+
+Starlette's BaseHTTPMiddleware runs the rest of the app in a separate task and
+pipes the response through a memory stream. That costs a task plus a queue
+hop per request and buffers streamed bodies. These middlewares only look at
+the scope and wrap `send`, so a response passes through untouched.
+
+- ProxyHeaderMiddleware: scheme/host from X-Forwarded-Proto / X-Forwarded-Host
+- RequestIDMiddleware: X-Request-ID on every response (kept from the request
+  when a proxy already set a sane one), available as request.state.request_id
+- TimingMiddleware: X-Process-Time (seconds until the response headers are
+  sent); the full duration is logged at DEBUG with the request ID
+
+scripts/benchmark/benchmark_middleware.py compares this stack with the
+BaseHTTPMiddleware versions.
+"""
+import logging
+import re
+import time
+import uuid
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+REQUEST_ID_HEADER = b"x-request-id"
+# Accept upstream IDs only if they are short and cannot smuggle anything into logs
+VALID_REQUEST_ID = re.compile(r"^[A-Za-z0-9._\-]{1,128}$")
+
+
+def _header(scope, name: bytes) -> Optional[str]:
+    for key, value in scope.get("headers", []):
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+def _first(value: str) -> str:
+    """First entry of a header that every proxy hop may append to"""
+    return value.split(",")[0].strip()
+
+
+class ProxyHeaderMiddleware:
+    """Use the client-facing scheme and host when running behind a reverse proxy"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] in ("http", "websocket"):
+            forwarded_proto = _header(scope, b"x-forwarded-proto")
+            forwarded_host = _header(scope, b"x-forwarded-host")
+            # Modified in place: outer middlewares read what routing adds to the scope
+            if forwarded_proto:
+                scheme = _first(forwarded_proto).lower()
+                if scope["type"] == "websocket":
+                    scheme = "wss" if scheme in ("https", "wss") else "ws"
+                scope["scheme"] = scheme
+            if forwarded_host:
+                scope["server"] = (_first(forwarded_host), None)
+        await self.app(scope, receive, send)
+
+
+class RequestIDMiddleware:
+    """Tag each request and its response with an X-Request-ID"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = _header(scope, REQUEST_ID_HEADER)
+        if request_id is None or not VALID_REQUEST_ID.match(request_id):
+            request_id = uuid.uuid4().hex
+        scope.setdefault("state", {})["request_id"] = request_id
+        encoded = request_id.encode("latin-1")
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": list(message.get("headers", [])) + [(REQUEST_ID_HEADER, encoded)]}
+            await send(message)
+
+        await self.app(scope, receive, send_with_id)
+
+
+class TimingMiddleware:
+    """Add X-Process-Time and log how long each request took"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_time(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                elapsed = f"{time.perf_counter() - started:.6f}".encode("latin-1")
+                message = {**message, "headers": list(message.get("headers", [])) + [(b"x-process-time", elapsed)]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_time)
+        finally:
+            if logger.isEnabledFor(logging.DEBUG):
+                request_id = scope.get("state", {}).get("request_id", "-")
+                logger.debug(
+                    f"[{request_id}] {scope['method']} {scope['path']} {status_code} "
+                    f"{time.perf_counter() - started:.3f}s"
+                )
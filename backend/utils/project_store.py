@@ -0,0 +1,625 @@
+"""
+Storage layer for client project sub-entities.
+
+A client project has six unbounded lists: milestones, tasks, files, comments,
+chat messages and the activity log. Two storage modes are supported, selected
+with the CLIENT_PROJECT_STORAGE environment variable:
+
+- "embedded" (default): the lists live as arrays on the client_projects document
+- "split": each list lives in its own collection, one document per entry,
+  keyed by project_id
+
+Routes should go through this module instead of touching the arrays directly,
+so that the project "header" can be read without pulling the whole history.
+
+The header also keeps chat_unread.<sender_type>: the number of unread chat
+messages sent by the client / the admin. Sending a message increments it and
+mark_chat_read() flips the flags and resets it in the same write, so an unread
+badge never has to scan the chat. A project without a counter for a sender
+(written before it existed) gets it counted from its messages the first time
+it is changed or read (ensure_chat_unread).
+Run scripts/maintenance/migrate_project_subresources.py before switching a
+populated database to split mode.
+"""
+import asyncio
+import os
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ASCENDING, ReturnDocument
+
+from database import (
+    client_projects_collection,
+    project_milestones_collection,
+    project_tasks_collection,
+    project_files_collection,
+    project_comments_collection,
+    project_chat_messages_collection,
+    project_activity_collection,
+)
+from utils.helpers import decode_cursor, encode_cursor, entries_after_expression, is_timestamp, keyset_filter
+
+STORAGE_MODE = os.environ.get("CLIENT_PROJECT_STORAGE", "embedded").lower()
+SPLIT_STORAGE = STORAGE_MODE == "split"
+
+# Array field on the project document -> dedicated collection
+SUBRESOURCE_COLLECTIONS = {
+    "milestones": project_milestones_collection,
+    "tasks": project_tasks_collection,
+    "files": project_files_collection,
+    "comments": project_comments_collection,
+    "chat_messages": project_chat_messages_collection,
+    "activity_log": project_activity_collection,
+}
+
+SUBRESOURCE_FIELDS = tuple(SUBRESOURCE_COLLECTIONS.keys())
+
+# Projection that returns the project without any sub-entity arrays
+HEADER_PROJECTION = {"_id": 0, **{field: 0 for field in SUBRESOURCE_FIELDS}}
+
+# Projection used when reading entries out of a split collection
+ENTRY_PROJECTION = {"_id": 0, "project_id": 0}
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+CHAT_UNREAD_FIELD = "chat_unread"
+
+
+def _now() -> str:
+    return datetime.utcnow().isoformat()
+
+
+def _clean(entry: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Strip storage fields and convert dates to ISO strings"""
+    if entry is None:
+        return None
+    entry.pop("_id", None)
+    entry.pop("project_id", None)
+    for key, value in entry.items():
+        if isinstance(value, (datetime, date)):
+            entry[key] = value.isoformat()
+    return entry
+
+
+def _element_condition(alias: str, match: Dict[str, Any]) -> Dict[str, Any]:
+    """Translate a simple {field: value | {"$ne": value}} match into an aggregation condition"""
+    conditions = []
+    for field, value in match.items():
+        if isinstance(value, dict) and "$ne" in value:
+            conditions.append({"$ne": [f"$${alias}.{field}", value["$ne"]]})
+        else:
+            conditions.append({"$eq": [f"$${alias}.{field}", value]})
+    return {"$and": conditions} if conditions else True
+
+
+async def ensure_indexes():
+    """Create the indexes the split collections rely on (declared in db_indexes)"""
+    from db_indexes import ensure_indexes as ensure_registry_indexes
+    return await ensure_registry_indexes([c.name for c in SUBRESOURCE_COLLECTIONS.values()])
+
+
+# ============================================================================
+# PROJECT DOCUMENTS
+# ============================================================================
+
+async def get_project_header(query: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Read a project without any of its sub-entity arrays"""
+    return await client_projects_collection.find_one(query, HEADER_PROJECTION)
+
+
+async def _load_entries(project_id: str, field: str) -> List[Dict[str, Any]]:
+    cursor = SUBRESOURCE_COLLECTIONS[field].find({"project_id": project_id}, ENTRY_PROJECTION).sort("_id", ASCENDING)
+    return await cursor.to_list(length=None)
+
+
+async def get_full_project(query: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Read a project together with all of its sub-entities"""
+    if not SPLIT_STORAGE:
+        return await client_projects_collection.find_one(query)
+
+    project = await get_project_header(query)
+    if not project:
+        return None
+
+    lists = await asyncio.gather(*(_load_entries(project["id"], field) for field in SUBRESOURCE_FIELDS))
+    project.update(zip(SUBRESOURCE_FIELDS, lists))
+    return project
+
+
+def find_full_projects(query: Dict[str, Any]):
+    """Iterate over projects matching query, each with all of its sub-entities"""
+    if not SPLIT_STORAGE:
+        return client_projects_collection.find(query)
+
+    pipeline = [{"$match": query}, {"$project": HEADER_PROJECTION}]
+    for field, collection in SUBRESOURCE_COLLECTIONS.items():
+        pipeline.append({
+            "$lookup": {
+                "from": collection.name,
+                "let": {"pid": "$id"},
+                "pipeline": [
+                    {"$match": {"$expr": {"$eq": ["$project_id", "$$pid"]}}},
+                    {"$sort": {"_id": 1}},
+                    {"$project": ENTRY_PROJECTION},
+                ],
+                "as": field,
+            }
+        })
+    return client_projects_collection.aggregate(pipeline)
+
+
+async def insert_project(project_dict: Dict[str, Any]):
+    """Insert a new project, moving its sub-entities out in split mode"""
+    # Summary sort fields are always stored, so keyset pages can use their indexes
+    project_dict.setdefault("last_activity_at", project_dict.get("created_at"))
+    for field in SUMMARY_SORT_FIELDS:
+        project_dict.setdefault(field, None)
+    if not SPLIT_STORAGE:
+        await client_projects_collection.insert_one(project_dict)
+        return
+
+    header = {k: v for k, v in project_dict.items() if k not in SUBRESOURCE_FIELDS}
+    await client_projects_collection.insert_one(header)
+    for field in SUBRESOURCE_FIELDS:
+        entries = project_dict.get(field) or []
+        if entries:
+            await SUBRESOURCE_COLLECTIONS[field].insert_many(
+                [{**entry, "project_id": project_dict["id"]} for entry in entries]
+            )
+
+
+async def delete_project_entries(project_id: str):
+    """Remove every sub-entity of a project (split mode only)"""
+    if not SPLIT_STORAGE:
+        return
+    await asyncio.gather(*(
+        collection.delete_many({"project_id": project_id})
+        for collection in SUBRESOURCE_COLLECTIONS.values()
+    ))
+
+
+# ============================================================================
+# SUB-ENTITIES
+# ============================================================================
+
+async def add_entries(
+    project_id: str,
+    entries: Dict[str, Dict[str, Any]],
+    extra_set: Optional[Dict[str, Any]] = None,
+    extra_push: Optional[Dict[str, Any]] = None,
+    extra_inc: Optional[Dict[str, Any]] = None
+):
+    """
+    Append one entry to each of the given lists and touch last_activity_at.
+    entries maps a list name (e.g. "comments", "activity_log") to the new entry.
+    extra_set / extra_push / extra_inc are applied to the project document itself.
+    """
+    set_fields = {"last_activity_at": _now(), **(extra_set or {})}
+
+    if not SPLIT_STORAGE:
+        update: Dict[str, Any] = {"$push": {**entries, **(extra_push or {})}, "$set": set_fields}
+        if extra_inc:
+            update["$inc"] = extra_inc
+        await client_projects_collection.update_one({"id": project_id}, update)
+        return
+
+    await asyncio.gather(*(
+        SUBRESOURCE_COLLECTIONS[field].insert_one({**entry, "project_id": project_id})
+        for field, entry in entries.items()
+    ))
+    header_update: Dict[str, Any] = {"$set": set_fields}
+    if extra_push:
+        header_update["$push"] = extra_push
+    if extra_inc:
+        header_update["$inc"] = extra_inc
+    await client_projects_collection.update_one({"id": project_id}, header_update)
+
+
+async def get_all_entries(project_id: str, field: str) -> List[Dict[str, Any]]:
+    """Fetch one complete list of a project, without the other lists"""
+    if SPLIT_STORAGE:
+        return [_clean(entry) for entry in await _load_entries(project_id, field)]
+
+    project = await client_projects_collection.find_one({"id": project_id}, {"_id": 0, field: 1})
+    return [_clean(entry) for entry in (project or {}).get(field) or []]
+
+
+async def get_entry(project_id: str, field: str, entry_id: str) -> Optional[Dict[str, Any]]:
+    """Fetch a single entry without loading the rest of the list"""
+    if SPLIT_STORAGE:
+        entry = await SUBRESOURCE_COLLECTIONS[field].find_one({"project_id": project_id, "id": entry_id})
+        return _clean(entry)
+
+    project = await client_projects_collection.find_one(
+        {"id": project_id, f"{field}.id": entry_id},
+        {"_id": 0, field: {"$elemMatch": {"id": entry_id}}}
+    )
+    if not project or not project.get(field):
+        return None
+    return _clean(project[field][0])
+
+
+async def update_entry(
+    project_id: str,
+    field: str,
+    entry_id: str,
+    changes: Dict[str, Any],
+    activity: Optional[Dict[str, Any]] = None
+) -> Optional[Dict[str, Any]]:
+    """Apply changes to a single entry in place and return it, or None if it does not exist"""
+    if SPLIT_STORAGE:
+        collection = SUBRESOURCE_COLLECTIONS[field]
+        entry_query = {"project_id": project_id, "id": entry_id}
+        if changes:
+            entry = await collection.find_one_and_update(entry_query, {"$set": changes}, return_document=ReturnDocument.AFTER)
+        else:
+            entry = await collection.find_one(entry_query)
+        if entry is None:
+            return None
+        if activity:
+            await add_entries(project_id, {"activity_log": activity})
+        return _clean(entry)
+
+    update: Dict[str, Any] = {
+        "$set": {
+            **{f"{field}.$.{key}": value for key, value in changes.items()},
+            "last_activity_at": _now(),
+        }
+    }
+    if activity:
+        update["$push"] = {"activity_log": activity}
+
+    project = await client_projects_collection.find_one_and_update(
+        {"id": project_id, f"{field}.id": entry_id},
+        update,
+        projection={"_id": 0, field: {"$elemMatch": {"id": entry_id}}},
+        return_document=ReturnDocument.AFTER
+    )
+    if not project or not project.get(field):
+        return None
+    return _clean(project[field][0])
+
+
+async def remove_entry(
+    project_id: str,
+    field: str,
+    entry_id: str,
+    activity: Optional[Dict[str, Any]] = None,
+    key: str = "id"
+) -> bool:
+    """Remove a single entry; returns False if it does not exist"""
+    if SPLIT_STORAGE:
+        result = await SUBRESOURCE_COLLECTIONS[field].delete_one({"project_id": project_id, key: entry_id})
+        if result.deleted_count == 0:
+            return False
+        if activity:
+            await add_entries(project_id, {"activity_log": activity})
+        else:
+            await client_projects_collection.update_one({"id": project_id}, {"$set": {"last_activity_at": _now()}})
+        return True
+
+    update: Dict[str, Any] = {
+        "$pull": {field: {key: entry_id}},
+        "$set": {"last_activity_at": _now()},
+    }
+    if activity:
+        update["$push"] = {"activity_log": activity}
+
+    result = await client_projects_collection.update_one({"id": project_id, f"{field}.{key}": entry_id}, update)
+    return result.matched_count > 0
+
+
+async def list_entries(
+    project_id: str,
+    field: str,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Return one page of a project's list in insertion order.
+    The cursor is opaque to callers; pass back next_cursor to get the following page.
+    Raises ValueError on a malformed cursor.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    if SPLIT_STORAGE:
+        query: Dict[str, Any] = {"project_id": project_id}
+        if cursor:
+            try:
+                query["_id"] = {"$gt": ObjectId(cursor)}
+            except (InvalidId, TypeError):
+                raise ValueError("Invalid cursor")
+        docs = await SUBRESOURCE_COLLECTIONS[field].find(query).sort("_id", ASCENDING).limit(limit + 1).to_list(length=limit + 1)
+        has_more = len(docs) > limit
+        docs = docs[:limit]
+        next_cursor = str(docs[-1]["_id"]) if has_more else None
+        return [_clean(doc) for doc in docs], next_cursor
+
+    try:
+        offset = int(cursor) if cursor else 0
+    except ValueError:
+        raise ValueError("Invalid cursor")
+    if offset < 0:
+        raise ValueError("Invalid cursor")
+
+    project = await client_projects_collection.find_one(
+        {"id": project_id},
+        {"_id": 0, "id": 1, field: {"$slice": [offset, limit + 1]}}
+    )
+    docs = (project or {}).get(field) or []
+    has_more = len(docs) > limit
+    docs = docs[:limit]
+    next_cursor = str(offset + limit) if has_more else None
+    return [_clean(doc) for doc in docs], next_cursor
+
+
+async def latest_entries(project_id: str, field: str, limit: int = DEFAULT_PAGE_SIZE) -> List[Dict[str, Any]]:
+    """The newest `limit` entries of a list, oldest first, without reading the rest"""
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    if SPLIT_STORAGE:
+        docs = await SUBRESOURCE_COLLECTIONS[field].find(
+            {"project_id": project_id}, ENTRY_PROJECTION
+        ).sort("_id", -1).limit(limit).to_list(length=limit)
+        return [_clean(doc) for doc in reversed(docs)]
+
+    project = await client_projects_collection.find_one(
+        {"id": project_id},
+        {"_id": 0, "id": 1, field: {"$slice": -limit}}
+    )
+    return [_clean(doc) for doc in (project or {}).get(field) or []]
+
+
+async def entries_after(
+    project_id: str,
+    field: str,
+    after: str,
+    limit: int = DEFAULT_PAGE_SIZE,
+    time_key: str = "created_at"
+) -> Tuple[List[Dict[str, Any]], bool]:
+    """
+    Entries added after `after` (an entry id, or an ISO timestamp compared with
+    time_key), oldest first, and whether more follow. An id that is no longer
+    in the list gives the newest `limit` entries.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    if SPLIT_STORAGE:
+        collection = SUBRESOURCE_COLLECTIONS[field]
+        if is_timestamp(after):
+            query = {"project_id": project_id, time_key: {"$gt": after}}
+        else:
+            anchor = await collection.find_one({"project_id": project_id, "id": after}, {"_id": 1})
+            if anchor is None:
+                return await latest_entries(project_id, field, limit), False
+            query = {"project_id": project_id, "_id": {"$gt": anchor["_id"]}}
+        docs = await collection.find(query, ENTRY_PROJECTION).sort("_id", ASCENDING).limit(limit + 1).to_list(length=limit + 1)
+    else:
+        pipeline = [
+            {"$match": {"id": project_id}},
+            {"$project": {"_id": 0, "entries": entries_after_expression(field, after, limit, time_key)}},
+        ]
+        result = await client_projects_collection.aggregate(pipeline).to_list(length=1)
+        docs = result[0]["entries"] if result else []
+
+    return [_clean(doc) for doc in docs[:limit]], len(docs) > limit
+
+
+async def count_entries(project_id: str, field: str, match: Dict[str, Any]) -> int:
+    """Count the entries of a list that match simple field conditions"""
+    if SPLIT_STORAGE:
+        return await SUBRESOURCE_COLLECTIONS[field].count_documents({"project_id": project_id, **match})
+
+    pipeline = [
+        {"$match": {"id": project_id}},
+        {"$project": {
+            "_id": 0,
+            "count": {"$size": {"$filter": {
+                "input": {"$ifNull": [f"${field}", []]},
+                "as": "entry",
+                "cond": _element_condition("entry", match),
+            }}},
+        }},
+    ]
+    result = await client_projects_collection.aggregate(pipeline).to_list(length=1)
+    return result[0]["count"] if result else 0
+
+
+# ============================================================================
+# CHAT UNREAD COUNTERS
+# ============================================================================
+
+def chat_unread_increment(sender_type: str) -> Dict[str, int]:
+    """extra_inc for add_entries() when a message from sender_type is added"""
+    return {f"{CHAT_UNREAD_FIELD}.{sender_type}": 1}
+
+
+async def ensure_chat_unread(project_id: str, sender_type: str):
+    """
+    Count a project's unread messages from sender_type into its header when
+    the counter is missing (projects written before it existed). Call before
+    changing the counter, so it starts from the messages already there.
+    """
+    counter = f"{CHAT_UNREAD_FIELD}.{sender_type}"
+    missing = {"id": project_id, counter: {"$exists": False}}
+    if not await client_projects_collection.count_documents(missing, limit=1):
+        return
+    count = await count_entries(project_id, "chat_messages", {"sender_type": sender_type, "read": {"$ne": True}})
+    # Whoever sets it first wins; a concurrent caller counted the same messages
+    await client_projects_collection.update_one(missing, {"$set": {counter: count}})
+
+
+async def mark_chat_read(project_id: str, sender_type: str) -> int:
+    """
+    Mark every unread message sent by sender_type as read and reset its
+    counter. Returns how many messages were flipped (embedded mode: 1 if any).
+    """
+    unread = {"sender_type": sender_type, "read": {"$ne": True}}
+    counter = f"{CHAT_UNREAD_FIELD}.{sender_type}"
+
+    if SPLIT_STORAGE:
+        # Older messages must be in the counter before they are counted out of it
+        await ensure_chat_unread(project_id, sender_type)
+        result = await project_chat_messages_collection.update_many(
+            {"project_id": project_id, **unread}, {"$set": {"read": True}}
+        )
+        if result.modified_count:
+            # Each message was counted once when sent and is flipped exactly once here,
+            # so decrementing (not zeroing) stays right while new messages arrive.
+            # Never below zero, should a message have escaped the count.
+            await client_projects_collection.update_one(
+                {"id": project_id},
+                [{"$set": {counter: {"$max": [0, {"$subtract": [
+                    {"$ifNull": [f"${counter}", 0]}, result.modified_count
+                ]}]}}}]
+            )
+        return result.modified_count
+
+    # The flags and the counter change in one document write, so a message
+    # pushed concurrently is either marked and counted out, or neither
+    result = await client_projects_collection.update_one(
+        {"id": project_id, "chat_messages": {"$elemMatch": unread}},
+        {"$set": {"chat_messages.$[m].read": True, counter: 0}},
+        array_filters=[{"m.sender_type": sender_type, "m.read": {"$ne": True}}]
+    )
+    return result.modified_count
+
+
+async def rebuild_chat_unread(project_id: str) -> Dict[str, int]:
+    """Recount a project's unread chat messages into its header counters"""
+    counts = {}
+    for sender_type in ("client", "admin"):
+        counts[sender_type] = await count_entries(
+            project_id, "chat_messages", {"sender_type": sender_type, "read": {"$ne": True}}
+        )
+    await client_projects_collection.update_one({"id": project_id}, {"$set": {CHAT_UNREAD_FIELD: counts}})
+    return counts
+
+
+async def chat_unread_count(project_id: str, sender_type: str) -> int:
+    """Unread messages sent by sender_type, from the header counter"""
+    await ensure_chat_unread(project_id, sender_type)
+    header = await client_projects_collection.find_one({"id": project_id}, {"_id": 0, CHAT_UNREAD_FIELD: 1})
+    counts = (header or {}).get(CHAT_UNREAD_FIELD) or {}
+    return max(0, counts.get(sender_type, 0))
+
+
+# ============================================================================
+# PROJECT SUMMARIES (dashboard list view)
+# ============================================================================
+
+# Header fields a summary may include; "id" is always returned
+SUMMARY_FIELDS = (
+    "name", "client_id", "description", "status", "priority", "progress",
+    "start_date", "expected_delivery", "actual_delivery", "notes", "tags",
+    "budget", "team_members", "created_at", "updated_at", "last_activity_at",
+)
+DEFAULT_SUMMARY_FIELDS = (
+    "name", "client_id", "status", "priority", "progress",
+    "expected_delivery", "created_at", "last_activity_at",
+)
+
+# Sortable fields. Each has a (field, id) index in db_indexes.py, and
+# insert_project() writes every one of them (null when there is no value) so
+# the keyset comparisons run on stored values, never computed ones.
+SUMMARY_SORT_FIELDS = (
+    "last_activity_at", "created_at", "updated_at", "expected_delivery",
+    "name", "status", "priority", "progress",
+)
+
+# Counters computed from the sub-entity lists: name -> (list, element condition or None for all)
+SUMMARY_COUNTS = {
+    "milestone_count": ("milestones", None),
+    "open_milestones": ("milestones", {"status": {"$ne": "completed"}}),
+    "task_count": ("tasks", None),
+    "completed_tasks": ("tasks", {"status": "completed"}),
+    "file_count": ("files", None),
+    "comment_count": ("comments", None),
+}
+
+# Element fields each list needs for the counters above (split mode lookups)
+_COUNT_LOOKUP_FIELDS = {
+    "milestones": ["status"],
+    "tasks": ["status"],
+    "files": [],
+    "comments": [],
+}
+
+
+def _count_expression(field: str, condition: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    source = {"$ifNull": [f"${field}", []]}
+    if condition is None:
+        return {"$size": source}
+    return {"$size": {"$filter": {"input": source, "as": "entry", "cond": _element_condition("entry", condition)}}}
+
+
+async def list_project_summaries(
+    match: Dict[str, Any],
+    fields: Optional[List[str]] = None,
+    sort_by: str = "last_activity_at",
+    descending: bool = True,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Return one page of lightweight project summaries in a single aggregation.
+    Only the requested header fields are projected, and the sub-entity counters
+    are computed server-side, so no list is transferred to the application.
+    Raises ValueError on an unknown sort field or a malformed cursor.
+    """
+    if sort_by not in SUMMARY_SORT_FIELDS:
+        raise ValueError(f"Cannot sort by '{sort_by}'")
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    fields = [f for f in (fields or DEFAULT_SUMMARY_FIELDS) if f in SUMMARY_FIELDS]
+    direction = -1 if descending else 1
+
+    if cursor:
+        sort_value, last_id = decode_cursor(cursor)
+        match = {"$and": [match, keyset_filter(sort_by, sort_value, last_id, descending)]}
+
+    pipeline: List[Dict[str, Any]] = [
+        {"$match": match},
+        {"$sort": {sort_by: direction, "id": direction}},
+        {"$limit": limit + 1},
+    ]
+
+    if SPLIT_STORAGE:
+        # Bring in only the element fields the counters need
+        for field, keep in _COUNT_LOOKUP_FIELDS.items():
+            pipeline.append({
+                "$lookup": {
+                    "from": SUBRESOURCE_COLLECTIONS[field].name,
+                    "let": {"pid": "$id"},
+                    "pipeline": [
+                        {"$match": {"$expr": {"$eq": ["$project_id", "$$pid"]}}},
+                        {"$project": {"_id": 0, **{k: 1 for k in keep}}},
+                    ],
+                    "as": field,
+                }
+            })
+
+    pipeline.append({"$project": {
+        "_id": 0,
+        "id": 1,
+        **{f: 1 for f in {*fields, sort_by}},
+        **{name: _count_expression(field, condition) for name, (field, condition) in SUMMARY_COUNTS.items()},
+        # Unread client messages come from the header counter, never the chat itself
+        "unread_chat": f"${CHAT_UNREAD_FIELD}.client",
+    }})
+
+    docs = await client_projects_collection.aggregate(pipeline).to_list(length=limit + 1)
+    has_more = len(docs) > limit
+    docs = docs[:limit]
+    next_cursor = encode_cursor(docs[-1].get(sort_by), docs[-1]["id"]) if has_more else None
+    for doc in docs:
+        if sort_by not in fields:
+            doc.pop(sort_by, None)
+        if "unread_chat" not in doc:
+            # Written before the counter existed; counted (and stored) once
+            doc["unread_chat"] = await chat_unread_count(doc["id"], "client")
+        doc["unread_chat"] = max(0, doc["unread_chat"])
+        _clean(doc)
+    return docs, next_cursor
@@ -0,0 +1,436 @@
+"""
+Server-sent event push for the chat screens.
+
+Write handlers call publish(channel, type, data) after a change is stored.
+The event goes to the broker, and the broker hands it to the Hub in every
+worker. Each hub keeps the last REALTIME_REPLAY_EVENTS events of each channel
+and feeds them to that worker's open streams. The browser's EventSource holds
+a single response open, so nothing is polled and no document is re-read while
+a chat is idle.
+
+Channels:
+
+    conversation:<id>   website chat thread (widget and admin view)
+    chat:inbox          every website conversation (admin inbox)
+    project:<id>        client project chat (client and admin)
+
+Brokers (REALTIME_BROKER):
+
+    auto    mongo when the server runs several workers (--workers / -w or
+            WEB_CONCURRENCY above 1), memory otherwise (default)
+    memory  events stay in this worker (single worker only: a message
+            posted on one worker never reaches streams on another, so
+            starting it under several workers logs an error)
+    mongo   events go through the capped realtime_events collection, which
+            every worker tails with one awaiting cursor. A stand-in for Redis
+            pub/sub that needs no extra service.
+
+Every event carries an id. EventSource sends the last one back in
+Last-Event-ID when it reconnects, and the stream replays whatever the
+channel buffer holds after it. If the id has already left the buffer (or
+came from a restarted worker), the stream sends a "reset" event instead and
+the client refetches over REST.
+
+A subscriber that falls REALTIME_SUBSCRIBER_QUEUE events behind is
+disconnected. It reconnects and catches up from the buffer.
+
+Authenticated streams are opened with a short-lived stream ticket bound to
+the channel (auth.jwt.create_stream_ticket), never with the access token. A
+public stream (the website chat) is limited to
+REALTIME_PUBLIC_STREAMS_PER_CHANNEL open connections per channel, and
+public long polls count against the same limit.
+
+long_poll() uses the same channels for clients that cannot keep a stream
+open: the request waits for the channel's next event instead of re-querying.
+"""
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+import uuid
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Optional, Set
+
+from bson import ObjectId
+from fastapi import HTTPException, status
+from fastapi.responses import StreamingResponse
+from pymongo import CursorType
+from pymongo.errors import CollectionInvalid
+
+from database import realtime_events_collection
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+REALTIME_BROKER = os.environ.get("REALTIME_BROKER", "auto").lower()
+REALTIME_REPLAY_EVENTS = int(os.environ.get("REALTIME_REPLAY_EVENTS", "200"))
+REALTIME_MAX_CHANNELS = int(os.environ.get("REALTIME_MAX_CHANNELS", "10000"))
+REALTIME_SUBSCRIBER_QUEUE = int(os.environ.get("REALTIME_SUBSCRIBER_QUEUE", "256"))
+REALTIME_HEARTBEAT_SECONDS = float(os.environ.get("REALTIME_HEARTBEAT_SECONDS", "15"))
+REALTIME_RETRY_MS = int(os.environ.get("REALTIME_RETRY_MS", "3000"))
+REALTIME_EVENTS_MAX_MB = float(os.environ.get("REALTIME_EVENTS_MAX_MB", "64"))
+REALTIME_TAIL_RETRY_SECONDS = float(os.environ.get("REALTIME_TAIL_RETRY_SECONDS", "1"))
+REALTIME_LONG_POLL_MAX_SECONDS = float(os.environ.get("REALTIME_LONG_POLL_MAX_SECONDS", "30"))
+REALTIME_PUBLIC_STREAMS_PER_CHANNEL = int(os.environ.get("REALTIME_PUBLIC_STREAMS_PER_CHANNEL", "3"))
+
+INBOX_CHANNEL = "chat:inbox"
+RESET_EVENT = "reset"
+
+
+def conversation_channel(conversation_id: str) -> str:
+    return f"conversation:{conversation_id}"
+
+
+def project_channel(project_id: str) -> str:
+    return f"project:{project_id}"
+
+
+@dataclass
+class Event:
+    id: str
+    channel: str
+    type: str
+    data: Any
+
+    def encode(self) -> str:
+        payload = json.dumps(self.data, default=str, separators=(",", ":"))
+        # Without an id line the client keeps its previous Last-Event-ID
+        prefix = f"id: {self.id}\n" if self.id else ""
+        return f"{prefix}event: {self.type}\ndata: {payload}\n\n"
+
+
+# Put on a subscriber's queue to end its stream
+_CLOSE = object()
+
+
+@dataclass(eq=False)
+class Subscription:
+    channel: str
+    queue: asyncio.Queue = field(default_factory=lambda: asyncio.Queue(REALTIME_SUBSCRIBER_QUEUE))
+    closed: bool = False
+    # Opened without authentication; counted against REALTIME_PUBLIC_STREAMS_PER_CHANNEL
+    public: bool = False
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        # Make room so the stream wakes up even if it fell behind
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(_CLOSE)
+
+
+# ============================================================================
+# BROKERS
+# ============================================================================
+
+class MemoryBroker:
+    """Deliver straight to this worker's hub"""
+    name = "memory"
+
+    def __init__(self):
+        self.deliver: Callable[[Event], None] = lambda event: None  # Set by the Hub
+        self._epoch = uuid.uuid4().hex[:8]
+        self._seq = 0
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    async def publish(self, channel: str, event_type: str, data: Any):
+        # Ids are only meaningful to this process
+        self._seq += 1
+        self.deliver(Event(f"{self._epoch}-{self._seq}", channel, event_type, data))
+
+
+class MongoBroker:
+    """Share events between workers through a tailed capped collection"""
+    name = "mongo"
+
+    def __init__(self):
+        self.deliver: Callable[[Event], None] = lambda event: None  # Set by the Hub
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        # Ids delivered lately, to skip them when a dead cursor is reopened
+        self._recent: Deque[ObjectId] = deque(maxlen=REALTIME_REPLAY_EVENTS)
+
+    async def start(self):
+        if self._task is not None and not self._task.done():
+            return
+        try:
+            await realtime_events_collection.database.create_collection(
+                realtime_events_collection.name, capped=True, size=int(REALTIME_EVENTS_MAX_MB * 1024 * 1024)
+            )
+        except CollectionInvalid:
+            pass  # Already there
+        self._stopping = False
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        self._stopping = True
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._task = None
+
+    async def publish(self, channel: str, event_type: str, data: Any):
+        await realtime_events_collection.insert_one({
+            "channel": channel,
+            "type": event_type,
+            "data": data,
+            "created_at": datetime.utcnow(),
+        })
+
+    async def _run(self):
+        # History from before this worker started is not replayed
+        since = ObjectId.from_datetime(datetime.utcnow())
+        while not self._stopping:
+            try:
+                # Other workers' ObjectIds are only ordered to the second, so
+                # reopen a little early and skip what was already delivered
+                cursor = realtime_events_collection.find(
+                    {"_id": {"$gte": since}}, cursor_type=CursorType.TAILABLE_AWAIT
+                )
+                async for doc in cursor:
+                    if doc["_id"] in self._recent:
+                        continue
+                    self._recent.append(doc["_id"])
+                    since = ObjectId.from_datetime(doc["_id"].generation_time - timedelta(seconds=2))
+                    self.deliver(Event(str(doc["_id"]), doc["channel"], doc["type"], doc["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Realtime event tail error: {e}")
+            # The cursor dies when the collection is empty or the server drops it
+            await asyncio.sleep(REALTIME_TAIL_RETRY_SECONDS)
+
+
+# ============================================================================
+# HUB
+# ============================================================================
+
+class Hub:
+    def __init__(self, broker):
+        self.broker = broker
+        broker.deliver = self._deliver
+        # channel -> recent events, least recently used first
+        self._buffers: "OrderedDict[str, Deque[Event]]" = OrderedDict()
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+
+        self.published = 0
+        self.delivered = 0
+        self.replayed = 0
+        self.resets = 0
+        self.dropped = 0
+
+    async def start(self):
+        await self.broker.start()
+
+    async def stop(self):
+        await self.broker.stop()
+        for subscriptions in list(self._subscribers.values()):
+            for subscription in list(subscriptions):
+                subscription.close()
+
+    async def publish(self, channel: str, event_type: str, data: Any):
+        await self.broker.publish(channel, event_type, data)
+        self.published += 1
+
+    def _deliver(self, event: Event):
+        buffer = self._buffers.get(event.channel)
+        if buffer is None:
+            buffer = self._buffers[event.channel] = deque(maxlen=REALTIME_REPLAY_EVENTS)
+            if len(self._buffers) > REALTIME_MAX_CHANNELS:
+                self._buffers.popitem(last=False)
+        else:
+            self._buffers.move_to_end(event.channel)
+        buffer.append(event)
+
+        for subscription in list(self._subscribers.get(event.channel, ())):
+            try:
+                subscription.queue.put_nowait(event)
+                self.delivered += 1
+            except asyncio.QueueFull:
+                self.dropped += 1
+                subscription.close()
+
+    def subscribe(self, channel: str, last_event_id: Optional[str] = None, public: bool = False) -> Subscription:
+        """
+        Start receiving a channel's events. With last_event_id, whatever the
+        buffer holds after it is queued first (or a reset if it is gone).
+        """
+        subscription = Subscription(channel, public=public)
+        if last_event_id:
+            buffer = self._buffers.get(channel, ())
+            ids = [event.id for event in buffer]
+            missed = list(buffer)[ids.index(last_event_id) + 1:] if last_event_id in ids else None
+            if missed is not None and len(missed) < REALTIME_SUBSCRIBER_QUEUE:
+                for event in missed:
+                    subscription.queue.put_nowait(event)
+                self.replayed += len(missed)
+            else:
+                subscription.queue.put_nowait(Event("", channel, RESET_EVENT, {}))
+                self.resets += 1
+        self._subscribers.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscriptions = self._subscribers.get(subscription.channel)
+        if subscriptions is not None:
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscribers[subscription.channel]
+
+    def subscriber_count(self, channel: str, public_only: bool = False) -> int:
+        return sum(
+            1 for subscription in self._subscribers.get(channel, ())
+            if subscription.public or not public_only
+        )
+
+    def stats(self) -> Dict:
+        return {
+            "broker": self.broker.name,
+            "channels": len(self._buffers),
+            "subscribers": sum(len(subscriptions) for subscriptions in self._subscribers.values()),
+            "published": self.published,
+            "delivered": self.delivered,
+            "replayed": self.replayed,
+            "resets": self.resets,
+            "dropped": self.dropped,
+        }
+
+
+def _worker_count() -> int:
+    """Worker processes the server was started with, from its command line or WEB_CONCURRENCY"""
+    # uvicorn's worker processes are spawned with the parent's argv; gunicorn's are forked
+    args = sys.argv
+    for i, arg in enumerate(args):
+        if arg in ("--workers", "-w") and i + 1 < len(args):
+            value = args[i + 1]
+        elif arg.startswith("--workers="):
+            value = arg.split("=", 1)[1]
+        else:
+            continue
+        try:
+            return int(value)
+        except ValueError:
+            break
+    try:
+        return int(os.environ.get("WEB_CONCURRENCY", "1"))
+    except ValueError:
+        return 1
+
+
+WORKER_COUNT = _worker_count()
+if REALTIME_BROKER == "auto":
+    REALTIME_BROKER = "mongo" if WORKER_COUNT > 1 else "memory"
+elif REALTIME_BROKER == "memory" and WORKER_COUNT > 1:
+    logger.error(
+        f"REALTIME_BROKER=memory with {WORKER_COUNT} workers: chat events only reach streams "
+        "in the worker that handled the write, so admins will miss messages. Use REALTIME_BROKER=mongo."
+    )
+
+hub = Hub(MongoBroker() if REALTIME_BROKER == "mongo" else MemoryBroker())
+
+
+async def publish(channel: str, event_type: str, data: Any):
+    """Push an event to the channel's open streams; a failure is logged, never raised"""
+    try:
+        await hub.publish(channel, event_type, data)
+    except Exception as e:
+        logger.warning(f"Realtime publish to {channel} failed: {e}")
+
+
+def _check_public_limit(channel: str):
+    if hub.subscriber_count(channel, public_only=True) >= REALTIME_PUBLIC_STREAMS_PER_CHANNEL:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many open streams for this conversation"
+        )
+
+
+async def long_poll(
+    channel: str,
+    fetch: Callable[[], Awaitable[Any]],
+    timeout: float,
+    ready: Callable[[Any], bool] = bool,
+    public: bool = False
+) -> Any:
+    """
+    Return fetch() as soon as ready() accepts it: now, or after a later event
+    on the channel, or whatever it gives once `timeout` seconds have passed.
+    A public wait counts against REALTIME_PUBLIC_STREAMS_PER_CHANNEL (429 beyond it).
+    """
+    timeout = max(0.0, min(timeout, REALTIME_LONG_POLL_MAX_SECONDS))
+    if public:
+        _check_public_limit(channel)
+    # Subscribed before the first fetch so an event in between is not missed
+    subscription = hub.subscribe(channel, public=public)
+    started = time.monotonic()
+    try:
+        result = await fetch()
+        while not ready(result) and not subscription.closed:
+            remaining = timeout - (time.monotonic() - started)
+            if remaining <= 0:
+                break
+            waiting_since = time.monotonic()
+            try:
+                await asyncio.wait_for(subscription.queue.get(), timeout=remaining)
+            except asyncio.TimeoutError:
+                break
+            finally:
+                metrics.record_wait(time.monotonic() - waiting_since)
+            result = await fetch()
+        return result
+    finally:
+        hub.unsubscribe(subscription)
+
+
+# ============================================================================
+# SERVER-SENT EVENTS
+# ============================================================================
+
+async def _event_source(channel: str, last_event_id: Optional[str], public: bool) -> AsyncIterator[str]:
+    # Subscribed here, not in stream(), so the finally below always runs
+    subscription = hub.subscribe(channel, last_event_id, public)
+    try:
+        # stream() checked the limit, but streams opened at the same moment may all have passed it
+        if public and hub.subscriber_count(channel, public_only=True) > REALTIME_PUBLIC_STREAMS_PER_CHANNEL:
+            return
+        yield f"retry: {REALTIME_RETRY_MS}\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), timeout=REALTIME_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                # Keeps proxies from closing an idle connection
+                yield ": keep-alive\n\n"
+                continue
+            if event is _CLOSE:
+                return
+            yield event.encode()
+    finally:
+        hub.unsubscribe(subscription)
+
+
+def stream(channel: str, last_event_id: Optional[str] = None, public: bool = False) -> StreamingResponse:
+    """
+    An SSE response carrying a channel's events until the client disconnects.
+    A public stream gets 429 once the channel has REALTIME_PUBLIC_STREAMS_PER_CHANNEL of them.
+    """
+    if public:
+        _check_public_limit(channel)
+    return StreamingResponse(
+        _event_source(channel, last_event_id, public),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,484 @@
+"""
+Response cache for the public, read-mostly GET endpoints.
+
+ResponseCacheMiddleware stores the serialized body of 200 responses for the
+routes in CACHED_ROUTES. The key is built from the path, the normalized query
+string and the current version of every collection the route reads. Write
+handlers call bump("<collection>") after changing data. That moves the
+version on, so the next request misses, and superseded entries simply age
+out of the LRU. Nothing is ever deleted by key. Seed and maintenance scripts
+write from another process, so they call bump_shared(), which moves the
+versions in cache_versions that every backend reads. Entries also expire
+after RESPONSE_CACHE_TTL_SECONDS, which covers edits made by hand.
+
+Backends (RESPONSE_CACHE_BACKEND):
+
+    memory  versions and entries live in the worker (default, single worker);
+            script bumps are read from cache_versions at most every
+            RESPONSE_CACHE_VERSION_SECONDS
+    mongo   versions in cache_versions, entries in response_cache (TTL index),
+            shared by every worker, with the per-worker LRU in front. A
+            stand-in for Redis/memcached that needs no extra service; a
+            worker sees another worker's bump within
+            RESPONSE_CACHE_VERSION_SECONDS.
+
+Concurrent misses for the same key are collapsed: one request renders the
+response, the others wait for it.
+
+HTTP validators come from the same versions. Every 200 from a cached route
+carries a weak ETag derived from the cache key, so If-None-Match is answered
+with 304 before the handler runs or any body is built. It also carries the
+route's Cache-Control policy (max-age / s-maxage / stale-while-revalidate),
+which can be overridden per route with CACHE_CONTROL_<ROUTE NAME>, e.g.
+CACHE_CONTROL_BLOGS="public, max-age=30". Requests with an Authorization
+header (the admin UI) get "private, no-cache" so shared caches keep out of them.
+
+Entries are stored uncompressed. A hit for a client that accepts br/gzip is
+compressed once and the compressed copy is kept on the entry in this worker's
+LRU (counted against its size), so later hits just replay it.
+CompressionMiddleware (utils/compression.py) handles misses.
+
+The middleware must sit inside CORSMiddleware so per-origin headers are never
+cached.
+"""
+import asyncio
+import hashlib
+import os
+import re
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+from bson import Binary
+from pymongo import ReturnDocument
+
+from database import cache_versions_collection, response_cache_collection
+from utils import compression
+from utils.file_responses import etag_matches
+
+RESPONSE_CACHE_ENABLED = os.environ.get("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+RESPONSE_CACHE_BACKEND = os.environ.get("RESPONSE_CACHE_BACKEND", "memory").lower()
+RESPONSE_CACHE_TTL_SECONDS = float(os.environ.get("RESPONSE_CACHE_TTL_SECONDS", "300"))
+RESPONSE_CACHE_MAX_MB = float(os.environ.get("RESPONSE_CACHE_MAX_MB", "32"))
+RESPONSE_CACHE_MAX_ENTRY_KB = float(os.environ.get("RESPONSE_CACHE_MAX_ENTRY_KB", "1024"))
+RESPONSE_CACHE_VERSION_SECONDS = float(os.environ.get("RESPONSE_CACHE_VERSION_SECONDS", "1"))
+
+# Browsers revalidate every time (a cheap 304); the CDN keeps a copy for
+# s-maxage and may serve it stale while it refetches in the background
+CACHE_CONTROL_LISTING = "public, max-age=0, s-maxage=60, stale-while-revalidate=300"
+# Site copy that changes a few times a year
+CACHE_CONTROL_STATIC = "public, max-age=0, s-maxage=300, stale-while-revalidate=3600"
+CACHE_CONTROL_AUTHORIZED = "private, no-cache"
+
+
+@dataclass(frozen=True)
+class CachedRoute:
+    name: str
+    pattern: "re.Pattern"
+    collections: Tuple[str, ...]
+    default_cache_control: str = CACHE_CONTROL_LISTING
+
+    @property
+    def cache_control(self) -> str:
+        return os.environ.get(f"CACHE_CONTROL_{self.name.upper()}", self.default_cache_control)
+
+
+# Public GET routes and the collections their responses are built from.
+# Only routes whose output does not depend on who is asking belong here.
+CACHED_ROUTES: List[CachedRoute] = [
+    CachedRoute("services", re.compile(r"^(/api)?/services/([^/]+)?$"), ("services", "image_derivatives")),
+    CachedRoute("projects", re.compile(r"^(/api)?/projects/((?!all$)[^/]+)?$"), ("projects",)),
+    CachedRoute("blogs", re.compile(r"^(/api)?/blogs/((?!admin$)[^/]+)?$"), ("blogs",)),
+    CachedRoute("skills", re.compile(r"^(/api)?/skills/?$"), ("skills",)),
+    CachedRoute("pricing", re.compile(r"^(/api)?/pricing/$"), ("pricing",), CACHE_CONTROL_STATIC),
+    CachedRoute("content", re.compile(r"^(/api)?/content/$"), ("content",), CACHE_CONTROL_STATIC),
+    CachedRoute("about", re.compile(r"^(/api)?/about/$"), ("about",), CACHE_CONTROL_STATIC),
+    CachedRoute("pages", re.compile(r"^(/api)?/pages/[^/]+$"), ("page_content",), CACHE_CONTROL_STATIC),
+    CachedRoute("testimonials", re.compile(r"^(/api)?/testimonials/$"), ("testimonials",)),
+    CachedRoute("feelings_services", re.compile(r"^(/api)?/feelings-services/((?!requests$|links$)[^/]+)?$"), ("feelings_services",)),
+]
+
+# Never replayed from the cache
+UNCACHEABLE_HEADERS = {b"set-cookie"}
+# Set per request by the middleware, never stored
+VALIDATOR_HEADERS = {b"etag", b"cache-control"}
+
+
+def match_route(path: str) -> Optional[CachedRoute]:
+    for route in CACHED_ROUTES:
+        if route.pattern.match(path):
+            return route
+    return None
+
+
+@dataclass
+class CachedResponse:
+    status: int
+    headers: List[Tuple[bytes, bytes]]
+    body: bytes
+    expires_at: float = field(default_factory=lambda: time.time() + RESPONSE_CACHE_TTL_SECONDS)
+    # Compressed copies of body by content-coding, filled on demand
+    encoded: Dict[str, bytes] = field(default_factory=dict)
+
+    @property
+    def size(self) -> int:
+        return (len(self.body) + sum(len(k) + len(v) for k, v in self.headers)
+                + sum(len(body) for body in self.encoded.values()))
+
+    def header(self, name: bytes) -> Optional[str]:
+        for key, value in self.headers:
+            if key.lower() == name:
+                return value.decode("latin-1")
+        return None
+
+
+class LRUStore:
+    """Entries bounded by total bytes, least recently used evicted first"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        # Size when inserted; an entry grows when compressed copies are added
+        self._sizes: Dict[str, int] = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.time():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def set(self, key: str, entry: CachedResponse):
+        if key in self._entries:
+            self._remove(key)
+        size = entry.size
+        if size > self.max_bytes:
+            return
+        self._entries[key] = entry
+        self._sizes[key] = size
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key: str):
+        del self._entries[key]
+        self.bytes -= self._sizes.pop(key)
+
+
+# ============================================================================
+# BACKENDS
+# ============================================================================
+
+class MemoryBackend:
+    """Versions in this worker only; the LRU is the whole cache"""
+    name = "memory"
+
+    def __init__(self):
+        self._versions: Dict[str, int] = {}
+        # Bumps made by scripts (bump_shared), from cache_versions
+        self._shared: Dict[str, int] = {}
+        self._refreshed_at = 0.0
+        # Versions restart at 0 with the process and differ between workers,
+        # so ETags must not be comparable across either
+        self.epoch = uuid.uuid4().hex
+
+    async def versions(self, names: Sequence[str]) -> Dict[str, int]:
+        if time.monotonic() - self._refreshed_at > RESPONSE_CACHE_VERSION_SECONDS:
+            self._shared = {doc["_id"]: doc["version"] async for doc in cache_versions_collection.find()}
+            self._refreshed_at = time.monotonic()
+        # Both counts only grow, so the sum moves whenever either does
+        return {name: self._versions.get(name, 0) + self._shared.get(name, 0) for name in names}
+
+    async def bump(self, name: str) -> int:
+        self._versions[name] = self._versions.get(name, 0) + 1
+        return self._versions[name]
+
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        return None
+
+    async def set(self, key: str, entry: CachedResponse):
+        pass
+
+
+class MongoBackend:
+    """Versions and entries in Mongo so every worker shares them"""
+    name = "mongo"
+
+    def __init__(self):
+        self._versions: Dict[str, int] = {}
+        self._refreshed_at = 0.0
+        self.epoch = ""  # Versions are shared and persistent
+
+    async def versions(self, names: Sequence[str]) -> Dict[str, int]:
+        if time.monotonic() - self._refreshed_at > RESPONSE_CACHE_VERSION_SECONDS:
+            self._versions = {doc["_id"]: doc["version"] async for doc in cache_versions_collection.find()}
+            self._refreshed_at = time.monotonic()
+        return {name: self._versions.get(name, 0) for name in names}
+
+    async def bump(self, name: str) -> int:
+        doc = await cache_versions_collection.find_one_and_update(
+            {"_id": name}, {"$inc": {"version": 1}}, upsert=True, return_document=ReturnDocument.AFTER
+        )
+        self._versions[name] = doc["version"]
+        return doc["version"]
+
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        doc = await response_cache_collection.find_one({"_id": key})
+        if doc is None:
+            return None
+        expires_at = doc["expires_at"].replace(tzinfo=timezone.utc).timestamp()
+        # The TTL monitor only runs once a minute
+        if expires_at <= time.time():
+            return None
+        return CachedResponse(
+            status=doc["status"],
+            headers=[(k.encode("latin-1"), v.encode("latin-1")) for k, v in doc["headers"]],
+            body=bytes(doc["body"]),
+            expires_at=expires_at,
+        )
+
+    async def set(self, key: str, entry: CachedResponse):
+        await response_cache_collection.replace_one(
+            {"_id": key},
+            {
+                "status": entry.status,
+                "headers": [[k.decode("latin-1"), v.decode("latin-1")] for k, v in entry.headers],
+                "body": Binary(entry.body),
+                "expires_at": datetime.utcfromtimestamp(entry.expires_at),
+            },
+            upsert=True,
+        )
+
+
+# ============================================================================
+# CACHE
+# ============================================================================
+
+class ResponseCache:
+    def __init__(self, backend):
+        self.backend = backend
+        self.local = LRUStore(int(RESPONSE_CACHE_MAX_MB * 1024 * 1024))
+        self.max_entry_bytes = int(RESPONSE_CACHE_MAX_ENTRY_KB * 1024)
+        self._inflight: Dict[str, asyncio.Event] = {}
+
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.bumps = 0
+        self.not_modified = 0
+
+    async def key_for(self, path: str, query_string: bytes, collections: Sequence[str]) -> str:
+        query = urlencode(sorted(parse_qsl(query_string.decode("latin-1"), keep_blank_values=True)))
+        versions = await self.backend.versions(collections)
+        tag = ",".join(f"{name}={versions[name]}" for name in collections)
+        return f"{path}?{query}|{tag}"
+
+    def etag_for(self, key: str) -> str:
+        """
+        Weak ETag for a cache key. It also rolls over every TTL window, like
+        cached entries, to cover writes made without a bump.
+        """
+        window = int(time.time() // RESPONSE_CACHE_TTL_SECONDS)
+        digest = hashlib.blake2b(f"{self.backend.epoch}|{window}|{key}".encode(), digest_size=12).hexdigest()
+        return f'W/"{digest}"'
+
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        entry = self.local.get(key)
+        if entry is None:
+            entry = await self.backend.get(key)
+            if entry is not None:
+                self.local.set(key, entry)
+                self.shared_hits += 1
+        if entry is not None:
+            self.hits += 1
+        return entry
+
+    async def encoded_body(self, key: str, entry: CachedResponse, encoding: str) -> bytes:
+        """entry.body compressed with `encoding`, compressing only the first time"""
+        body = entry.encoded.get(encoding)
+        if body is None:
+            body = await compression.compress_async(entry.body, encoding)
+            entry.encoded[encoding] = body
+            # Re-insert so the LRU accounts for the extra bytes
+            self.local.set(key, entry)
+        return body
+
+    async def set(self, key: str, entry: CachedResponse):
+        if entry.size > self.max_entry_bytes:
+            return
+        self.local.set(key, entry)
+        await self.backend.set(key, entry)
+        self.stores += 1
+
+    async def bump(self, *collections: str):
+        """Invalidate every cached response built from these collections"""
+        for name in collections:
+            await self.backend.bump(name)
+            self.bumps += 1
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": RESPONSE_CACHE_ENABLED,
+            "backend": self.backend.name,
+            "entries": len(self.local),
+            "bytes": self.local.bytes,
+            "max_bytes": self.local.max_bytes,
+            "hits": self.hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+            "stores": self.stores,
+            "evictions": self.local.evictions,
+            "bumps": self.bumps,
+            "not_modified": self.not_modified,
+        }
+
+
+response_cache = ResponseCache(MongoBackend() if RESPONSE_CACHE_BACKEND == "mongo" else MemoryBackend())
+
+
+async def bump(*collections: str):
+    """Call after writing to a collection listed in CACHED_ROUTES"""
+    await response_cache.bump(*collections)
+
+
+async def bump_shared(*collections: str, versions_collection=None):
+    """
+    bump() for writes made outside the server (seed and maintenance scripts).
+    Moves the shared versions in cache_versions, which every backend reads, so
+    running workers stop serving and 304-ing the old responses. Scripts with
+    their own client pass its db.cache_versions.
+    """
+    if versions_collection is None:
+        versions_collection = cache_versions_collection
+    for name in collections:
+        await versions_collection.update_one({"_id": name}, {"$inc": {"version": 1}}, upsert=True)
+
+
+# ============================================================================
+# MIDDLEWARE
+# ============================================================================
+
+def _validators(etag: str, cache_control: str) -> List[Tuple[bytes, bytes]]:
+    return [(b"etag", etag.encode("latin-1")), (b"cache-control", cache_control.encode("latin-1"))]
+
+
+def _header(scope, name: bytes) -> Optional[str]:
+    for key, value in scope.get("headers", []):
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+async def _replay(scope, key: str, entry: CachedResponse, send, validators: List[Tuple[bytes, bytes]]):
+    headers = entry.headers + validators + [(b"x-cache", b"HIT")]
+    body = entry.body
+    if scope["method"] == "HEAD":
+        body = b""
+    elif len(body) >= compression.COMPRESSION_MIN_BYTES and compression.compressible(entry.header(b"content-type")):
+        encoding = compression.negotiate(_header(scope, b"accept-encoding"))
+        if encoding is not None:
+            body = await response_cache.encoded_body(key, entry, encoding)
+            headers = compression.encoded_headers(headers, encoding, len(body))
+    await send({"type": "http.response.start", "status": entry.status, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+class ResponseCacheMiddleware:
+    """Serve CACHED_ROUTES from response_cache, filling it on a miss, and answer revalidations"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if not RESPONSE_CACHE_ENABLED or scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+        route = match_route(scope["path"])
+        if route is None:
+            await self.app(scope, receive, send)
+            return
+
+        head = scope["method"] == "HEAD"
+        key = await response_cache.key_for(scope["path"], scope.get("query_string", b""), route.collections)
+
+        etag = response_cache.etag_for(key)
+        cache_control = CACHE_CONTROL_AUTHORIZED if _header(scope, b"authorization") else route.cache_control
+        validators = _validators(etag, cache_control)
+        if_none_match = _header(scope, b"if-none-match")
+        if if_none_match is not None and etag_matches(if_none_match, etag):
+            # Nothing the route reads has changed since the client's copy was made
+            response_cache.not_modified += 1
+            await send({"type": "http.response.start", "status": 304, "headers": validators})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        entry = await response_cache.get(key)
+        if entry is None and key in response_cache._inflight:
+            # Someone is already rendering this response; wait for it instead of querying too
+            try:
+                await asyncio.wait_for(response_cache._inflight[key].wait(), timeout=5)
+            except asyncio.TimeoutError:
+                pass
+            entry = await response_cache.get(key)
+        if entry is not None:
+            await _replay(scope, key, entry, send, validators)
+            return
+
+        response_cache.misses += 1
+        owner = key not in response_cache._inflight
+        if owner:
+            response_cache._inflight[key] = asyncio.Event()
+
+        start = {}
+        chunks: List[bytes] = []
+        size = 0
+        cacheable = not head
+
+        async def capture(message):
+            nonlocal size, cacheable
+            if message["type"] == "http.response.start":
+                start.update(message)
+                headers = list(message.get("headers", []))
+                if message["status"] != 200 or any(k.lower() in UNCACHEABLE_HEADERS for k, _ in headers):
+                    cacheable = False
+                if message["status"] == 200:
+                    headers = [(k, v) for k, v in headers if k.lower() not in VALIDATOR_HEADERS] + validators
+                message = {**message, "headers": headers + [(b"x-cache", b"MISS")]}
+            elif message["type"] == "http.response.body" and cacheable:
+                chunks.append(message.get("body", b""))
+                size += len(chunks[-1])
+                if size > response_cache.max_entry_bytes:
+                    cacheable = False
+                    chunks.clear()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, capture)
+            if cacheable and start:
+                await response_cache.set(key, CachedResponse(
+                    status=start["status"],
+                    headers=[(k, v) for k, v in start.get("headers", [])
+                             if k.lower() not in UNCACHEABLE_HEADERS | VALIDATOR_HEADERS],
+                    body=b"".join(chunks),
+                ))
+        finally:
+            if owner:
+                response_cache._inflight.pop(key).set()
+
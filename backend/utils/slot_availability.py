@@ -0,0 +1,177 @@
+"""
+Booking slot grid for GET /bookings/available-slots.
+
+The grid is built from one booking_settings read plus one $group over the
+bookings in the date range, instead of two queries per (day, slot) cell.
+Results are cached for AVAILABLE_SLOTS_CACHE_SECONDS; any booking or booking
+settings write calls invalidate() so this worker never serves a stale grid
+(other workers catch up within the TTL, and create_booking re-checks the slot).
+
+Capacity is enforced with one booking_slots document per (date, time slot):
+
+    {"_id": "2025-02-03|10:00-11:00", "date": ..., "time_slot": ..., "booked": 1}
+
+reserve_slot() takes a place with a single find_one_and_update whose filter
+requires booked < max_bookings, so concurrent bookings can never overfill a
+slot. release_slot() gives the place back when a booking is cancelled or
+deleted. The first reservation of a slot seeds "booked" from the bookings
+already stored, so slots booked before this existed are counted correctly.
+"""
+import copy
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from database import bookings_collection, booking_settings_collection, booking_slots_collection
+
+AVAILABLE_SLOTS_CACHE_SECONDS = float(os.environ.get("AVAILABLE_SLOTS_CACHE_SECONDS", "15"))
+AVAILABLE_SLOTS_CACHE_MAX_ENTRIES = 64
+
+ACTIVE_STATUSES = ["pending", "confirmed"]
+
+_cache: "OrderedDict[Tuple[str, int], Tuple[float, List[Dict]]]" = OrderedDict()
+
+
+def invalidate():
+    """Drop every cached grid; call after any booking or settings change"""
+    _cache.clear()
+
+
+async def booked_counts(start_date: str, end_date: str) -> Dict[Tuple[str, str], int]:
+    """Active bookings per (date, time slot) between two YYYY-MM-DD dates, inclusive"""
+    pipeline = [
+        {"$match": {
+            "preferred_date": {"$gte": start_date, "$lte": end_date},
+            "status": {"$in": ACTIVE_STATUSES},
+        }},
+        {"$group": {
+            "_id": {"date": "$preferred_date", "slot": "$preferred_time_slot"},
+            "count": {"$sum": 1},
+        }},
+    ]
+    return {
+        (doc["_id"]["date"], doc["_id"]["slot"]): doc["count"]
+        async for doc in bookings_collection.aggregate(pipeline)
+    }
+
+
+def build_grid(settings: Dict, start: datetime, days: int, counts: Dict[Tuple[str, str], int]) -> List[Dict]:
+    available_days = settings.get("available_days", [])
+    grid = []
+
+    for i in range(days):
+        check_date = start + timedelta(days=i)
+        date_str = check_date.strftime("%Y-%m-%d")
+
+        # Skip if day is not available
+        if check_date.strftime("%A") not in available_days:
+            continue
+
+        for slot in settings.get("time_slots", []):
+            time_slot_str = f"{slot['start_time']}-{slot['end_time']}"
+            available_spots = max(slot.get("max_bookings", 1) - counts.get((date_str, time_slot_str), 0), 0)
+            grid.append({
+                "date": date_str,
+                "time_slot": time_slot_str,
+                "available_spots": available_spots,
+                "is_available": available_spots > 0,
+            })
+
+    return grid
+
+
+async def get_slot_grid(start: datetime, days: int) -> Optional[List[Dict]]:
+    """The availability grid for `days` days from `start`, or None if booking is inactive"""
+    key = (start.strftime("%Y-%m-%d"), days)
+    now = time.monotonic()
+
+    cached = _cache.get(key)
+    if cached and cached[0] > now:
+        _cache.move_to_end(key)
+        return copy.deepcopy(cached[1])
+
+    settings = await booking_settings_collection.find_one({"is_active": True})
+    if not settings:
+        return None
+
+    if days > 0:
+        end = start + timedelta(days=days - 1)
+        counts = await booked_counts(key[0], end.strftime("%Y-%m-%d"))
+    else:
+        counts = {}
+    grid = build_grid(settings, start, days, counts)
+
+    if AVAILABLE_SLOTS_CACHE_SECONDS > 0:
+        _cache[key] = (now + AVAILABLE_SLOTS_CACHE_SECONDS, copy.deepcopy(grid))
+        _cache.move_to_end(key)
+        while len(_cache) > AVAILABLE_SLOTS_CACHE_MAX_ENTRIES:
+            _cache.popitem(last=False)
+
+    return grid
+
+
+# ============================================================================
+# CAPACITY COUNTERS
+# ============================================================================
+
+def _slot_key(date: str, time_slot: str) -> str:
+    return f"{date}|{time_slot}"
+
+
+async def _ensure_slot_document(date: str, time_slot: str):
+    """Create the capacity document for a slot, seeded from existing bookings"""
+    key = _slot_key(date, time_slot)
+    if await booking_slots_collection.find_one({"_id": key}, {"_id": 1}):
+        return
+
+    booked = await bookings_collection.count_documents({
+        "preferred_date": date,
+        "preferred_time_slot": time_slot,
+        "status": {"$in": ACTIVE_STATUSES},
+    })
+    try:
+        await booking_slots_collection.update_one(
+            {"_id": key},
+            {"$setOnInsert": {
+                "date": date,
+                "time_slot": time_slot,
+                "booked": booked,
+                "created_at": datetime.utcnow().isoformat(),
+            }},
+            upsert=True,
+        )
+    except DuplicateKeyError:
+        pass  # A concurrent request created it first
+
+
+async def reserve_slot(date: str, time_slot: str, max_bookings: int) -> Optional[int]:
+    """
+    Atomically take one place in a slot. Returns the number of places left,
+    or None if the slot is already full.
+    """
+    await _ensure_slot_document(date, time_slot)
+
+    slot = await booking_slots_collection.find_one_and_update(
+        {"_id": _slot_key(date, time_slot), "booked": {"$lt": max_bookings}},
+        {"$inc": {"booked": 1}, "$set": {"updated_at": datetime.utcnow().isoformat()}},
+        return_document=ReturnDocument.AFTER,
+    )
+    if slot is None:
+        return None
+
+    invalidate()
+    return max(max_bookings - slot["booked"], 0)
+
+
+async def release_slot(date: str, time_slot: str):
+    """Give one place back (booking cancelled or deleted)"""
+    await booking_slots_collection.update_one(
+        {"_id": _slot_key(date, time_slot), "booked": {"$gt": 0}},
+        {"$inc": {"booked": -1}, "$set": {"updated_at": datetime.utcnow().isoformat()}},
+    )
+    invalidate()
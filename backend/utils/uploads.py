@@ -0,0 +1,266 @@
+"""
+Shared upload pipeline for storage files, service images and client project files.
+
+save_upload() copies an UploadFile to its final directory without blocking
+the event loop. Chunks are read asynchronously and written from the
+threadpool into a temp file next to the destination. The temp file is renamed
+into place only when the copy is complete, so a half-written file is never
+visible. While copying it:
+
+- rejects the upload as soon as it exceeds the policy's size limit (413)
+- checks the extension and declared MIME type before any byte is written (415),
+  and for image policies checks the file signature of the first chunk
+- computes the SHA-256 of the content for integrity checks and dedup
+
+When a namespace is given and the blob store is enabled (utils/blob_store.py),
+the finished temp file is handed to the content-addressed store instead of
+being renamed into `directory`. The file keeps its usual name as the ref key
+"<namespace>/<stored_name>", so URLs look the same, but identical content is
+kept on disk only once.
+
+UploadLimitMiddleware rejects oversized requests from their Content-Length
+header before the multipart body is even received.
+
+upload_stats() reports counts, bytes and throughput per policy.
+"""
+import hashlib
+import os
+import re
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from fastapi import HTTPException, UploadFile, status
+from starlette.concurrency import run_in_threadpool
+
+from utils import blob_store
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+MB = 1024 * 1024
+
+
+@dataclass(frozen=True)
+class UploadPolicy:
+    """Limits applied to one kind of upload"""
+    name: str
+    max_bytes: int
+    allowed_extensions: Optional[FrozenSet[str]] = None   # None = any extension
+    allowed_mime_prefixes: Optional[Tuple[str, ...]] = None  # None = any declared type
+    sniff_images: bool = False
+
+
+STORAGE_POLICY = UploadPolicy(
+    name="storage",
+    max_bytes=int(os.environ.get("UPLOAD_MAX_MB_STORAGE", "50")) * MB,
+)
+
+SERVICE_IMAGE_POLICY = UploadPolicy(
+    name="service_image",
+    max_bytes=int(os.environ.get("UPLOAD_MAX_MB_SERVICE_IMAGE", "5")) * MB,
+    allowed_extensions=frozenset({'.jpg', '.jpeg', '.png', '.webp'}),
+    allowed_mime_prefixes=("image/",),
+    sniff_images=True,
+)
+
+PROJECT_FILE_POLICY = UploadPolicy(
+    name="project_file",
+    max_bytes=int(os.environ.get("UPLOAD_MAX_MB_PROJECT_FILE", "200")) * MB,
+)
+
+# Upload endpoints and their policies, for UploadLimitMiddleware
+UPLOAD_ROUTES: List[Tuple["re.Pattern", UploadPolicy]] = [
+    (re.compile(r"^(/api)?/storage/upload$"), STORAGE_POLICY),
+    (re.compile(r"^(/api)?/services/upload-image$"), SERVICE_IMAGE_POLICY),
+    (re.compile(r"^(/api)?/admin/client-projects/[^/]+/files$"), PROJECT_FILE_POLICY),
+]
+
+# Room for multipart boundaries and part headers on top of the file itself
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+IMAGE_SIGNATURES = (
+    b"\xff\xd8\xff",          # JPEG
+    b"\x89PNG\r\n\x1a\n",     # PNG
+    b"GIF87a", b"GIF89a",     # GIF
+)
+
+
+def _is_image(head: bytes) -> bool:
+    if head.startswith(IMAGE_SIGNATURES):
+        return True
+    return head[:4] == b"RIFF" and head[8:12] == b"WEBP"
+
+
+# ============================================================================
+# METRICS
+# ============================================================================
+
+_stats: Dict[str, Dict[str, float]] = {}
+
+
+def _record(policy: UploadPolicy, outcome: str, size: int = 0, seconds: float = 0.0):
+    entry = _stats.setdefault(policy.name, {"uploads": 0, "rejected": 0, "failed": 0, "bytes": 0, "seconds": 0.0})
+    entry[outcome] += 1
+    entry["bytes"] += size
+    entry["seconds"] += seconds
+
+
+def upload_stats() -> Dict[str, Dict[str, float]]:
+    """Per-policy counters with average throughput in MB/s"""
+    report = {}
+    for name, entry in _stats.items():
+        report[name] = {
+            **entry,
+            "seconds": round(entry["seconds"], 3),
+            "throughput_mb_s": round(entry["bytes"] / MB / entry["seconds"], 2) if entry["seconds"] else 0.0,
+        }
+    return report
+
+
+# ============================================================================
+# SAVING
+# ============================================================================
+
+def _reject(policy: UploadPolicy, status_code: int, detail: str):
+    _record(policy, "rejected")
+    raise HTTPException(status_code=status_code, detail=detail)
+
+
+def check_upload(file: UploadFile, policy: UploadPolicy) -> str:
+    """Validate what is known before reading the body; returns the lowercased extension"""
+    extension = os.path.splitext(file.filename or "")[1].lower()
+
+    if policy.allowed_extensions is not None and extension not in policy.allowed_extensions:
+        _reject(policy, status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                f"Invalid file type. Allowed: {', '.join(sorted(policy.allowed_extensions))}")
+
+    if policy.allowed_mime_prefixes is not None:
+        content_type = (file.content_type or "").lower()
+        if not content_type.startswith(policy.allowed_mime_prefixes):
+            _reject(policy, status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, f"Unsupported content type: {content_type or 'unknown'}")
+
+    if file.size is not None and file.size > policy.max_bytes:
+        _reject(policy, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                f"File too large. Maximum size is {policy.max_bytes // MB} MB")
+
+    return extension
+
+
+async def save_upload(
+    file: UploadFile,
+    directory: Path,
+    policy: UploadPolicy,
+    file_id: Optional[str] = None,
+    namespace: Optional[str] = None
+) -> Dict:
+    """
+    Stream `file` into `directory` as <file_id><extension>, or into the blob
+    store under "<namespace>/<file_id><extension>" when a namespace is given.
+    Returns {"id", "path", "stored_name", "blob_key", "filename", "size", "sha256", "content_type", "seconds"};
+    blob_key is None for files written to `directory`.
+    """
+    extension = check_upload(file, policy)
+    file_id = file_id or str(uuid.uuid4())
+    stored_name = f"{file_id}{extension}"
+    blob_key = f"{namespace}/{stored_name}" if namespace and blob_store.BLOB_STORE_ENABLED else None
+    directory = blob_store.TEMP_DIR if blob_key else Path(directory)
+    final_path = directory / stored_name
+    temp_path = directory / f".{stored_name}.{uuid.uuid4().hex}.part"
+
+    await run_in_threadpool(directory.mkdir, parents=True, exist_ok=True)
+
+    started = time.perf_counter()
+    digest = hashlib.sha256()
+    size = 0
+    handle = await run_in_threadpool(open, temp_path, "wb")
+    try:
+        first = True
+        while True:
+            chunk = await file.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+
+            if first and policy.sniff_images and not _is_image(chunk[:16]):
+                _reject(policy, status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, "File content is not a supported image")
+            first = False
+
+            size += len(chunk)
+            if size > policy.max_bytes:
+                _reject(policy, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        f"File too large. Maximum size is {policy.max_bytes // MB} MB")
+
+            digest.update(chunk)
+            await run_in_threadpool(handle.write, chunk)
+
+        await run_in_threadpool(handle.close)
+        if blob_key:
+            final_path = await blob_store.commit(
+                temp_path, blob_key, digest.hexdigest(), size, file.filename, file.content_type
+            )
+        else:
+            await run_in_threadpool(os.replace, temp_path, final_path)
+    except HTTPException:
+        await run_in_threadpool(_discard, handle, temp_path)
+        raise
+    except Exception as e:
+        await run_in_threadpool(_discard, handle, temp_path)
+        _record(policy, "failed")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"File upload failed: {str(e)}"
+        )
+
+    seconds = time.perf_counter() - started
+    _record(policy, "uploads", size, seconds)
+
+    return {
+        "id": file_id,
+        "path": str(final_path),
+        "stored_name": stored_name,
+        "blob_key": blob_key,
+        "filename": file.filename,
+        "size": size,
+        "sha256": digest.hexdigest(),
+        "content_type": file.content_type,
+        "seconds": seconds,
+    }
+
+
+def _discard(handle, temp_path: Path):
+    try:
+        handle.close()
+    finally:
+        try:
+            os.remove(temp_path)
+        except FileNotFoundError:
+            pass
+
+
+# ============================================================================
+# EARLY REJECTION
+# ============================================================================
+
+class UploadLimitMiddleware:
+    """Answer 413 for oversized upload requests before reading their body"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["method"] == "POST":
+            policy = next((p for pattern, p in UPLOAD_ROUTES if pattern.match(scope["path"])), None)
+            if policy is not None:
+                content_length = dict(scope["headers"]).get(b"content-length")
+                if content_length and content_length.isdigit() and int(content_length) > policy.max_bytes + MULTIPART_OVERHEAD_BYTES:
+                    _record(policy, "rejected")
+                    body = f'{{"detail":"File too large. Maximum size is {policy.max_bytes // MB} MB"}}'.encode()
+                    await send({
+                        "type": "http.response.start",
+                        "status": 413,
+                        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode()), (b"connection", b"close")],
+                    })
+                    await send({"type": "http.response.body", "body": body})
+                    return
+        await self.app(scope, receive, send)
@@ -2,31 +2,94 @@ import React, { useState, useEffect } from 'react';
 import { MessageCircle, Send, Trash2, Mail, Phone, Clock, CheckCircle } from 'lucide-react';
 import axios from 'axios';
 import { getBackendURL } from '../../lib/utils';
+import { openEventStream } from '../../services/eventStream';
 
 const BACKEND_URL = getBackendURL();
+const INBOX_PAGE_SIZE = 30;
+
+const authHeaders = () => {
+  const token = localStorage.getItem('admin_token') || localStorage.getItem('adminToken');
+  return { Authorization: `Bearer ${token}` };
+};
+
+// Short-lived ticket for opening an event stream (EventSource cannot send headers)
+const getStreamTicket = async (path) => {
+  const response = await axios.post(`${BACKEND_URL}${path}/ticket`, {}, { headers: authHeaders() });
+  return response.data.ticket;
+};
 
 const ChatManager = () => {
   const [conversations, setConversations] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [selectedConv, setSelectedConv] = useState(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [replyText, setReplyText] = useState('');
   const [totalUnread, setTotalUnread] = useState(0);
 
   useEffect(() => {
     fetchConversations();
-    // Poll for new messages every 30 seconds
-    const interval = setInterval(fetchConversations, 30000);
-    return () => clearInterval(interval);
+    // New messages, read receipts and deletions are pushed over the inbox stream
+    return openEventStream(`${BACKEND_URL}/chat/conversations/events`, {
+      getTicket: () => getStreamTicket('/chat/conversations/events'),
+      onEvent: applyInboxEvent,
+      onReset: () => fetchConversations()
+    });
   }, []);
 
+  // Keep the open conversation current from its own stream
+  const selectedId = selectedConv?.id;
+  useEffect(() => {
+    if (!selectedId) return undefined;
+    const path = `/chat/conversations/${selectedId}/events`;
+    return openEventStream(`${BACKEND_URL}${path}`, {
+      getTicket: () => getStreamTicket(path),
+      onEvent: (type, data) => {
+        if (type === 'deleted') {
+          setSelectedConv(null);
+          return;
+        }
+        setSelectedConv((conv) => {
+          if (!conv || conv.id !== selectedId) return conv;
+          if (type === 'message') {
+            if (conv.messages.some((msg) => msg.id === data.id)) return conv;
+            return { ...conv, messages: [...conv.messages, data] };
+          }
+          // read: the admin read every customer message
+          return {
+            ...conv,
+            messages: conv.messages.map((msg) => (msg.sender === 'customer' ? { ...msg, read: true } : msg))
+          };
+        });
+      },
+      onReset: () => refreshSelectedConversation(selectedId)
+    });
+  }, [selectedId]);
+
+  const refreshSelectedConversation = async (id) => {
+    try {
+      const response = await axios.get(`${BACKEND_URL}/chat/conversations/${id}`, { headers: authHeaders() });
+      setSelectedConv((conv) => (conv && conv.id === id ? response.data : conv));
+    } catch (error) {
+      console.error('Error fetching conversation:', error);
+    }
+  };
+
+  // One inbox page: rows carry a preview of the last message, not the messages
+  const fetchInboxPage = async (cursor = null, limit = INBOX_PAGE_SIZE) => {
+    const response = await axios.get(`${BACKEND_URL}/chat/inbox`, {
+      params: { limit, ...(cursor ? { cursor } : {}) },
+      headers: authHeaders()
+    });
+    setTotalUnread(response.data.totalUnread);
+    return response.data;
+  };
+
   const fetchConversations = async () => {
     try {
-      const token = localStorage.getItem('admin_token') || localStorage.getItem('adminToken');
-      const response = await axios.get(`${BACKEND_URL}/chat/conversations`, {
-        headers: { Authorization: `Bearer ${token}` }
-      });
-      setConversations(response.data.conversations);
-      setTotalUnread(response.data.totalUnread);
+      const data = await fetchInboxPage();
+      setConversations(data.conversations);
+      setNextCursor(data.nextCursor);
     } catch (error) {
       console.error('Error fetching conversations:', error);
     } finally {
@@ -34,19 +97,69 @@ const ChatManager = () => {
     }
   };
 
+  const loadMoreConversations = async () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    try {
+      const data = await fetchInboxPage(nextCursor);
+      setConversations((rows) => [
+        ...rows,
+        ...data.conversations.filter((row) => !rows.some((existing) => existing.id === row.id))
+      ]);
+      setNextCursor(data.nextCursor);
+    } catch (error) {
+      console.error('Error fetching conversations:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  // Only the unread total is needed, so ask for the smallest page
+  const refreshTotalUnread = () => {
+    fetchInboxPage(null, 1).catch((error) => console.error('Error fetching unread total:', error));
+  };
+
+  // Update the loaded rows from an inbox event instead of refetching the list
+  const applyInboxEvent = (type, data) => {
+    if (type === 'message') {
+      const isCustomer = data.message.sender === 'customer';
+      setConversations((rows) => {
+        const existing = rows.find((row) => row.id === data.id);
+        const row = {
+          ...(existing || { id: data.id, customerPhone: null, createdAt: data.lastMessageAt, unreadCount: 0 }),
+          customerName: data.customerName,
+          customerEmail: data.customerEmail,
+          lastMessagePreview: data.lastMessagePreview,
+          lastMessageSender: data.lastMessageSender,
+          lastMessageAt: data.lastMessageAt
+        };
+        if (isCustomer) row.unreadCount += 1;
+        return [row, ...rows.filter((other) => other.id !== data.id)];
+      });
+      if (isCustomer) setTotalUnread((total) => total + 1);
+      return;
+    }
+    if (type === 'read') {
+      setConversations((rows) => rows.map((row) => (row.id === data.id ? { ...row, unreadCount: 0 } : row)));
+    } else if (type === 'deleted') {
+      setConversations((rows) => rows.filter((row) => row.id !== data.id));
+    }
+    refreshTotalUnread();
+  };
+
   const selectConversation = async (conv) => {
-    setSelectedConv(conv);
+    // The inbox row has no messages; show it right away and load them
+    setSelectedConv({ ...conv, messages: [] });
+    await refreshSelectedConversation(conv.id);
     
-    // Mark as read if there are unread messages
+    // Mark as read if there are unread messages (the inbox stream updates the row)
     if (conv.unreadCount > 0) {
       try {
-        const token = localStorage.getItem('admin_token') || localStorage.getItem('adminToken');
         await axios.put(
           `${BACKEND_URL}/chat/conversations/${conv.id}/read`,
           {},
-          { headers: { Authorization: `Bearer ${token}` } }
+          { headers: authHeaders() }
         );
-        fetchConversations();
       } catch (error) {
         console.error('Error marking as read:', error);
       }
@@ -58,16 +171,14 @@ const ChatManager = () => {
     if (!replyText.trim() || !selectedConv) return;
 
     try {
-      const token = localStorage.getItem('admin_token') || localStorage.getItem('adminToken');
       const response = await axios.post(
         `${BACKEND_URL}/chat/conversations/${selectedConv.id}/reply`,
         { message: replyText },
-        { headers: { Authorization: `Bearer ${token}` } }
+        { headers: authHeaders() }
       );
       
       setSelectedConv(response.data.conversation);
       setReplyText('');
-      fetchConversations();
     } catch (error) {
       console.error('Error sending reply:', error);
       alert('Failed to send reply');
@@ -78,15 +189,13 @@ const ChatManager = () => {
     if (!window.confirm('Are you sure you want to delete this conversation?')) return;
 
     try {
-      const token = localStorage.getItem('admin_token') || localStorage.getItem('adminToken');
       await axios.delete(`${BACKEND_URL}/chat/conversations/${id}`, {
-        headers: { Authorization: `Bearer ${token}` }
+        headers: authHeaders()
       });
       
       if (selectedConv && selectedConv.id === id) {
         setSelectedConv(null);
       }
-      fetchConversations();
     } catch (error) {
       console.error('Error deleting conversation:', error);
       alert('Failed to delete conversation');
@@ -161,6 +270,11 @@ const ChatManager = () => {
                 <p style={{ margin: '4px 0', fontSize: '12px', color: '#6b7280' }}>
                   {conv.customerEmail}
                 </p>
+                {conv.lastMessagePreview && (
+                  <p style={{ margin: '4px 0', fontSize: '12px', color: '#374151', overflow: 'hidden', textOverflow: 'ellipsis', whiteSpace: 'nowrap' }}>
+                    {conv.lastMessageSender === 'admin' ? 'You: ' : ''}{conv.lastMessagePreview}
+                  </p>
+                )}
                 <p style={{ margin: '4px 0', fontSize: '11px', color: '#9ca3af' }}>
                   <Clock size={12} style={{ display: 'inline', marginRight: '4px' }} />
                   {formatDate(conv.lastMessageAt)}
@@ -168,6 +282,19 @@ const ChatManager = () => {
               </div>
             ))}
 
+            {nextCursor && (
+              <div style={{ padding: '12px', textAlign: 'center' }}>
+                <button
+                  className="admin-btn admin-btn-secondary"
+                  onClick={loadMoreConversations}
+                  disabled={loadingMore}
+                  data-testid="load-more-conversations"
+                >
+                  {loadingMore ? 'Loading...' : 'Load more'}
+                </button>
+              </div>
+            )}
+
             {conversations.length === 0 && (
               <div style={{ padding: '40px', textAlign: 'center', color: '#6b7280' }}>
                 <MessageCircle size={48} style={{ margin: '0 auto 16px' }} />
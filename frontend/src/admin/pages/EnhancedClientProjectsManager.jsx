@@ -30,6 +30,7 @@ import {
   RefreshCw, Archive, Copy, Eye, TrendingUp, AlertCircle
 } from 'lucide-react';
 import clientService from '../../services/clientService';
+import { openEventStream } from '../../services/eventStream';
 
 export default function EnhancedClientProjectsManager() {
   const [projects, setProjects] = useState([]);
@@ -83,8 +84,26 @@ export default function EnhancedClientProjectsManager() {
   useEffect(() => {
     if (selectedProject && activeTab === 'chat') {
       fetchChatMessages();
+
+      // New messages and read receipts are pushed over the project's event stream
+      const projectId = selectedProject.id;
+      return openEventStream(clientService.getAdminChatStreamUrl(projectId), {
+        getTicket: () => clientService.getAdminChatStreamTicket(projectId),
+        onEvent: (type, data) => {
+          if (type === 'message') {
+            setChatMessages((messages) => (
+              messages.some((m) => m.id === data.id) ? messages : [...messages, data]
+            ));
+            // Fetching marks the client's new message read
+            if (data.sender_type === 'client') fetchChatMessages();
+          } else if (type === 'read' && data.sender_type === 'admin') {
+            setChatMessages((messages) => messages.map((m) => (m.sender_type === 'admin' ? { ...m, read: true } : m)));
+          }
+        },
+        onReset: () => fetchChatMessages()
+      });
     }
-  }, [selectedProject, activeTab]);
+  }, [selectedProject?.id, activeTab]);
 
   useEffect(() => {
     scrollToBottom();
@@ -2,6 +2,7 @@ import React, { useState, useEffect, useRef, useCallback } from 'react';
 import { MessageCircle, Send, User, Mail, Phone, Clock, Star, CheckCircle } from 'lucide-react';
 import axios from 'axios';
 import { getBackendURL } from '../lib/utils';
+import { openEventStream } from '../services/eventStream';
 
 const BACKEND_URL = getBackendURL();
 
@@ -26,7 +27,6 @@ const Chat = () => {
   const [testimonialSubmitted, setTestimonialSubmitted] = useState(false);
   const [hoveredRating, setHoveredRating] = useState(0);
   const messagesEndRef = useRef(null);
-  const intervalRef = useRef(null);
   const lastFetchRef = useRef(0);
 
   // Optimized scroll to bottom
@@ -78,26 +78,36 @@ const Chat = () => {
     }
   }, []);
 
-  // Auto-refresh with cleanup
+  // Replies and read receipts are pushed over the conversation's event stream
+  const conversationId = conversation?.id;
   useEffect(() => {
-    if (isAuthenticated && userInfo.email) {
-      // Clear existing interval
-      if (intervalRef.current) {
-        clearInterval(intervalRef.current);
-      }
-      
-      // Set new interval for 5 seconds
-      intervalRef.current = setInterval(() => {
-        fetchConversation();
-      }, 5000);
-      
-      return () => {
-        if (intervalRef.current) {
-          clearInterval(intervalRef.current);
+    if (!isAuthenticated || !conversationId || !userInfo.email) return undefined;
+
+    const params = new URLSearchParams({ conversation_id: conversationId, email: userInfo.email });
+    if (userInfo.phone) params.set('phone', userInfo.phone);
+
+    return openEventStream(`${BACKEND_URL}/chat/user-conversation/events?${params}`, {
+      onEvent: (type, data) => {
+        if (type === 'deleted') {
+          setConversation(null);
+          return;
         }
-      };
-    }
-  }, [isAuthenticated, userInfo.email, fetchConversation]);
+        setConversation((conv) => {
+          if (!conv || conv.id !== conversationId) return conv;
+          if (type === 'message') {
+            if (conv.messages.some((msg) => msg.id === data.id)) return conv;
+            return { ...conv, messages: [...conv.messages, data] };
+          }
+          // read: the team has read every customer message
+          return {
+            ...conv,
+            messages: conv.messages.map((msg) => (msg.sender === 'customer' ? { ...msg, read: true } : msg))
+          };
+        });
+      },
+      onReset: () => fetchConversation()
+    });
+  }, [isAuthenticated, conversationId, userInfo.email, userInfo.phone, fetchConversation]);
 
   // Scroll when conversation changes
   useEffect(() => {
@@ -196,9 +206,6 @@ const Chat = () => {
   };
 
   const handleLogout = () => {
-    if (intervalRef.current) {
-      clearInterval(intervalRef.current);
-    }
     localStorage.removeItem('chat_user_info');
     setIsAuthenticated(false);
     setConversation(null);
@@ -2,6 +2,7 @@ import React, { useState, useEffect, useRef } from 'react';
 import { useNavigate } from 'react-router-dom';
 import api from '../services/api';
 import clientService from '../services/clientService';
+import { openEventStream } from '../services/eventStream';
 import { Button } from '../components/ui/button';
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from '../components/ui/card';
 import { Badge } from '../components/ui/badge';
@@ -79,14 +80,25 @@ export default function ClientDashboard() {
     if (selectedProject && activeTab === 'chat') {
       fetchChatMessages();
       
-      // Auto-refresh chat messages every 10 seconds when on chat tab
-      const chatRefreshInterval = setInterval(() => {
-        fetchChatMessages();
-      }, 10000); // 10 seconds
-      
-      return () => clearInterval(chatRefreshInterval);
+      // New messages and read receipts are pushed over the project's event stream
+      const projectId = selectedProject.id;
+      return openEventStream(clientService.getClientChatStreamUrl(projectId), {
+        getTicket: () => clientService.getClientChatStreamTicket(projectId, localStorage.getItem('client_token')),
+        onEvent: (type, data) => {
+          if (type === 'message') {
+            setChatMessages((messages) => (
+              messages.some((m) => m.id === data.id) ? messages : [...messages, data]
+            ));
+            // Fetching marks the admin's new message read
+            if (data.sender_type === 'admin') fetchChatMessages();
+          } else if (type === 'read' && data.sender_type === 'client') {
+            setChatMessages((messages) => messages.map((m) => (m.sender_type === 'client' ? { ...m, read: true } : m)));
+          }
+        },
+        onReset: () => fetchChatMessages()
+      });
     }
-  }, [selectedProject, activeTab]);
+  }, [selectedProject?.id, activeTab]);
 
   useEffect(() => {
     scrollToBottom();
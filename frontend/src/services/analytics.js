@@ -3,16 +3,25 @@ import { getBackendURL } from '../lib/utils';
 
 const API_URL = getBackendURL();
 
+const BATCH_DELAY_MS = 1000;
+const MAX_BATCH_SIZE = 50;
+
+let pendingEvents = [];
+let flushTimer = null;
+
 /**
- * Track analytics event - fails silently to not block user actions
+ * Send queued events in one request - fails silently to not block user actions
  */
-const trackEvent = async (eventType, data = {}) => {
+const flushEvents = async () => {
+  flushTimer = null;
+  const events = pendingEvents.splice(0, MAX_BATCH_SIZE);
+  if (pendingEvents.length > 0) {
+    flushTimer = setTimeout(flushEvents, 0);
+  }
+  if (events.length === 0) return;
+
   try {
-    // Non-blocking async call
-    await axios.post(`${API_URL}/analytics/event`, {
-      event_type: eventType,
-      ...data
-    }, {
+    await axios.post(`${API_URL}/analytics/events`, { events }, {
       timeout: 2000 // 2 second timeout
     });
   } catch (error) {
@@ -21,6 +30,19 @@ const trackEvent = async (eventType, data = {}) => {
   }
 };
 
+/**
+ * Track analytics event - queued and sent in batches
+ */
+const trackEvent = (eventType, data = {}) => {
+  pendingEvents.push({
+    event_type: eventType,
+    ...data
+  });
+  if (!flushTimer) {
+    flushTimer = setTimeout(flushEvents, BATCH_DELAY_MS);
+  }
+};
+
 /**
  * Track page view
  */
@@ -1,9 +1,10 @@
 import api from './api';
 
 class ChatService {
-  async getConversations() {
+  // One inbox page (last-message previews, no messages); pass back nextCursor for the next
+  async getInbox(cursor = null, limit = 30) {
     try {
-      const response = await api.get('/chat/conversations');
+      const response = await api.get('/chat/inbox', { params: { limit, ...(cursor ? { cursor } : {}) } });
       return response.data;
     } catch (error) {
       console.error('Error fetching conversations:', error);
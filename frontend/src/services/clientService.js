@@ -168,6 +168,14 @@ const clientService = {
     return response.data;
   },
 
+  // Event stream for a project's chat (Admin); the ticket goes in the URL instead of the token
+  getAdminChatStreamTicket: async (projectId) => {
+    const response = await api.post(`/admin/client-projects/${projectId}/events/ticket`);
+    return response.data.ticket;
+  },
+
+  getAdminChatStreamUrl: (projectId) => `${api.defaults.baseURL}/admin/client-projects/${projectId}/events`,
+
   // Get unread message count (Admin)
   getUnreadMessageCount: async (projectId) => {
     const response = await api.get(`/admin/client-projects/${projectId}/unread-count`);
@@ -199,6 +207,22 @@ const clientService = {
     return response.data;
   },
 
+  // Event stream for a project's chat (Client); the ticket goes in the URL instead of the token
+  getClientChatStreamTicket: async (projectId, token) => {
+    const response = await api.post(
+      `/client/projects/${projectId}/events/ticket`,
+      {},
+      {
+        headers: {
+          Authorization: `Bearer ${token}`
+        }
+      }
+    );
+    return response.data.ticket;
+  },
+
+  getClientChatStreamUrl: (projectId) => `${api.defaults.baseURL}/client/projects/${projectId}/events`,
+
   // Add comment (Client)
   addClientComment: async (projectId, message, token) => {
     const response = await api.post(
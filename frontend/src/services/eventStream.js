@@ -0,0 +1,88 @@
+/**
+ * SERVER-SENT EVENTS FOR THE CHAT SCREENS
+ *
+ * The backend pushes chat messages and read receipts over .../events
+ * endpoints, so chat screens no longer poll. EventSource cannot send an
+ * Authorization header, so authenticated streams first fetch a short-lived
+ * ticket (POST .../events/ticket) and put that in the URL; the login token
+ * never goes into a URL.
+ *
+ * The browser reconnects a dropped stream by itself and the server replays
+ * what was missed (Last-Event-ID). When the server refuses the reconnect
+ * (expired ticket, restarted server) a new ticket is fetched, the stream is
+ * reopened after a backoff, and onReset() lets the screen refetch over REST.
+ * onReset() also runs when the server sends a "reset" event.
+ */
+
+const EVENT_TYPES = ['message', 'read', 'deleted'];
+const MAX_RETRY_DELAY = 30000;
+
+/**
+ * Open a stream and return a function that closes it.
+ * @param {string} url - Absolute .../events URL (may already have a query string)
+ * @param {object} options
+ * @param {function} [options.getTicket] - Async, resolves to a stream ticket (authenticated streams)
+ * @param {function} options.onEvent - Called with (type, data) for message / read / deleted
+ * @param {function} [options.onReset] - Called when events may have been missed
+ */
+export function openEventStream(url, { getTicket, onEvent, onReset }) {
+  let source = null;
+  let closed = false;
+  let retryTimer = null;
+  let attempt = 0;
+
+  const reset = () => {
+    if (!closed && onReset) onReset();
+  };
+
+  const scheduleReconnect = () => {
+    if (closed) return;
+    const delay = Math.min(MAX_RETRY_DELAY, 1000 * 2 ** attempt);
+    attempt += 1;
+    retryTimer = setTimeout(async () => {
+      await connect();
+      reset();
+    }, delay);
+  };
+
+  const connect = async () => {
+    let streamUrl = url;
+    if (getTicket) {
+      try {
+        const ticket = await getTicket();
+        streamUrl += `${url.includes('?') ? '&' : '?'}ticket=${encodeURIComponent(ticket)}`;
+      } catch (error) {
+        console.error('Error fetching stream ticket:', error);
+        scheduleReconnect();
+        return;
+      }
+    }
+    if (closed) return;
+
+    source = new EventSource(streamUrl);
+    source.onopen = () => {
+      attempt = 0;
+    };
+    EVENT_TYPES.forEach((type) => {
+      source.addEventListener(type, (event) => onEvent(type, JSON.parse(event.data)));
+    });
+    source.addEventListener('reset', reset);
+    source.onerror = () => {
+      // While CONNECTING the browser is retrying with Last-Event-ID on its own
+      if (source.readyState === EventSource.CLOSED) {
+        source = null;
+        scheduleReconnect();
+      }
+    };
+  };
+
+  connect();
+
+  return () => {
+    closed = true;
+    clearTimeout(retryTimer);
+    if (source) source.close();
+  };
+}
+
+export default openEventStream;
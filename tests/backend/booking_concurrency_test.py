@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Booking Slot Concurrency Load Test
+Fires N parallel bookings at one slot and checks the slot is never overbooked
+"""
+
+import requests
+import sys
+import json
+import uuid
+from datetime import datetime, date, timedelta
+from concurrent.futures import ThreadPoolExecutor
+
+class BookingConcurrencyTester:
+    def __init__(self, base_url="http://localhost:8001/api", parallel_requests=50):
+        self.base_url = base_url
+        self.parallel_requests = parallel_requests
+        self.admin_token = None
+        self.tests_run = 0
+        self.tests_passed = 0
+        self.failed_tests = []
+        self.created_booking_ids = []
+
+    def log_result(self, test_name, success, error=None):
+        """Log test results"""
+        self.tests_run += 1
+        if success:
+            self.tests_passed += 1
+            print(f"✅ {test_name} - PASSED")
+        else:
+            self.failed_tests.append({"test": test_name, "error": error})
+            print(f"❌ {test_name} - FAILED: {error}")
+
+    def admin_headers(self):
+        return {"Authorization": f"Bearer {self.admin_token}"}
+
+    def test_admin_login(self):
+        """Admin login, needed to inspect and clean up bookings"""
+        response = requests.post(f"{self.base_url}/admins/login", json={
+            "username": "admin",
+            "password": "admin123"
+        })
+        success = response.status_code == 200 and "token" in response.json()
+        if success:
+            self.admin_token = response.json()["token"]
+        self.log_result("Admin Login", success, None if success else f"Status {response.status_code}")
+        return success
+
+    def find_open_slot(self):
+        """Pick the first slot in the coming weeks that still has free places"""
+        start = (date.today() + timedelta(days=1)).isoformat()
+        response = requests.get(f"{self.base_url}/bookings/available-slots", params={"start_date": start, "days": 30})
+        if response.status_code != 200:
+            self.log_result("Find Open Slot", False, f"Status {response.status_code}")
+            return None
+
+        for slot in response.json():
+            if slot["is_available"]:
+                print(f"   📅 Using {slot['date']} {slot['time_slot']} ({slot['available_spots']} places left)")
+                self.log_result("Find Open Slot", True)
+                return slot
+
+        self.log_result("Find Open Slot", False, "No available slot in the next 30 days")
+        return None
+
+    def book(self, slot):
+        unique_id = str(uuid.uuid4())[:8]
+        response = requests.post(f"{self.base_url}/bookings/", json={
+            "name": f"Load Test {unique_id}",
+            "email": f"loadtest{unique_id}@example.com",
+            "phone": "+1234567890",
+            "preferred_date": slot["date"],
+            "preferred_time_slot": slot["time_slot"],
+            "message": "booking concurrency test"
+        })
+        return response.status_code, response.json() if response.content else {}
+
+    def test_parallel_bookings(self, slot):
+        """N parallel bookings: exactly the free places succeed, the rest get 400"""
+        print(f"\n🔍 Firing {self.parallel_requests} parallel bookings...")
+        with ThreadPoolExecutor(max_workers=self.parallel_requests) as executor:
+            results = list(executor.map(lambda _: self.book(slot), range(self.parallel_requests)))
+
+        accepted = [body for status, body in results if status == 200]
+        rejected = [body for status, body in results if status == 400]
+        self.created_booking_ids = [body["id"] for body in accepted]
+        print(f"   Accepted: {len(accepted)}, rejected: {len(rejected)}")
+
+        self.log_result(
+            "No Overbooking",
+            len(accepted) <= slot["available_spots"],
+            f"{len(accepted)} bookings accepted for {slot['available_spots']} places"
+        )
+        self.log_result(
+            "All Free Places Used",
+            len(accepted) == min(slot["available_spots"], self.parallel_requests),
+            f"{len(accepted)} accepted, expected {min(slot['available_spots'], self.parallel_requests)}"
+        )
+        self.log_result(
+            "Rejections Are 'Slot is fully booked'",
+            all(body.get("detail") == "Slot is fully booked" for body in rejected),
+            f"Unexpected rejection bodies: {rejected[:3]}"
+        )
+
+        # The slot must now be reported as full
+        response = requests.get(
+            f"{self.base_url}/bookings/available-slots",
+            params={"start_date": slot["date"], "days": 1}
+        )
+        cell = next((s for s in response.json() if s["time_slot"] == slot["time_slot"]), None)
+        expected_left = max(slot["available_spots"] - len(accepted), 0)
+        self.log_result(
+            "Remaining Places Reported",
+            cell is not None and cell["available_spots"] == expected_left,
+            f"Expected {expected_left} places left, got {cell}"
+        )
+
+    def test_release_on_cancel(self, slot):
+        """Cancelling one booking frees exactly one place"""
+        if not self.created_booking_ids:
+            return
+        booking_id = self.created_booking_ids[0]
+        response = requests.put(
+            f"{self.base_url}/bookings/admin/{booking_id}",
+            json={"status": "cancelled"},
+            headers=self.admin_headers()
+        )
+        self.log_result("Cancel Booking", response.status_code == 200, f"Status {response.status_code}")
+
+        status, body = self.book(slot)
+        self.log_result("Freed Place Can Be Booked", status == 200, f"Status {status}: {body}")
+        if status == 200:
+            self.created_booking_ids.append(body["id"])
+
+        status, body = self.book(slot)
+        self.log_result("Slot Full Again", status == 400, f"Status {status}: {body}")
+        if status == 200:
+            self.created_booking_ids.append(body["id"])
+
+    def cleanup_test_data(self):
+        """Delete the bookings created by this test (releases their places)"""
+        print(f"\n🧹 Deleting {len(self.created_booking_ids)} test bookings...")
+        for booking_id in self.created_booking_ids:
+            requests.delete(f"{self.base_url}/bookings/admin/{booking_id}", headers=self.admin_headers())
+
+    def run_all_tests(self):
+        print("🚀 Starting Booking Concurrency Tests")
+        print("=" * 70)
+
+        if not self.test_admin_login():
+            return False
+
+        slot = self.find_open_slot()
+        if slot:
+            self.test_parallel_bookings(slot)
+            self.test_release_on_cancel(slot)
+            self.cleanup_test_data()
+
+        print("\n" + "=" * 70)
+        print("📊 BOOKING CONCURRENCY TEST SUMMARY")
+        print("=" * 70)
+        print(f"Total Tests: {self.tests_run}")
+        print(f"Passed: {self.tests_passed}")
+        print(f"Failed: {len(self.failed_tests)}")
+
+        if self.failed_tests:
+            print("\n❌ FAILED TESTS:")
+            for test in self.failed_tests:
+                print(f"   • {test['test']}: {test['error']}")
+
+        return len(self.failed_tests) == 0
+
+def main():
+    """Main test execution"""
+    parallel_requests = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    tester = BookingConcurrencyTester(parallel_requests=parallel_requests)
+    success = tester.run_all_tests()
+
+    results = {
+        "timestamp": datetime.now().isoformat(),
+        "parallel_requests": parallel_requests,
+        "total_tests": tester.tests_run,
+        "passed_tests": tester.tests_passed,
+        "failed_tests": len(tester.failed_tests),
+        "failed_test_details": tester.failed_tests
+    }
+    print(json.dumps(results, indent=2))
+
+    return 0 if success else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
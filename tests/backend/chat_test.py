@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Chat Test
+Checks that marking a conversation read clears only its customer messages and
+takes its unread count off the inbox total exactly once, that ?after= (message
+id or timestamp) returns only newer messages with hasMore, and that inbox pages
+neither repeat nor skip conversations whose last_message_at ties.
+
+The tie check sets last_message_at directly in MongoDB when MONGODB_URI (and
+DB_NAME) point at the backend's database; otherwise the conversations keep
+their own timestamps and only paging is checked.
+"""
+
+import os
+import requests
+import sys
+import json
+import uuid
+from datetime import datetime
+
+class ChatTester:
+    def __init__(self, base_url="http://localhost:8001/api"):
+        self.base_url = base_url
+        self.admin_token = None
+        self.tests_run = 0
+        self.tests_passed = 0
+        self.failed_tests = []
+        self.run_id = str(uuid.uuid4())[:8]
+        self.conversation_ids = []
+
+    def log_result(self, test_name, success, error=None):
+        """Log test results"""
+        self.tests_run += 1
+        if success:
+            self.tests_passed += 1
+            print(f"✅ {test_name} - PASSED")
+        else:
+            self.failed_tests.append({"test": test_name, "error": error})
+            print(f"❌ {test_name} - FAILED: {error}")
+
+    def admin_headers(self):
+        return {"Authorization": f"Bearer {self.admin_token}"}
+
+    def test_admin_login(self):
+        """Admin login, needed for the inbox and to clean up"""
+        response = requests.post(f"{self.base_url}/admins/login", json={
+            "username": "admin",
+            "password": "admin123"
+        })
+        success = response.status_code == 200 and "token" in response.json()
+        if success:
+            self.admin_token = response.json()["token"]
+        self.log_result("Admin Login", success, None if success else f"Status {response.status_code}")
+        return success
+
+    def start_conversation(self, label, messages):
+        """Send customer messages from a new email and return the conversation id"""
+        email = f"chat-{label}-{self.run_id}@example.com"
+        conversation_id = None
+        for text in messages:
+            response = requests.post(f"{self.base_url}/chat/messages", json={
+                "customer_name": f"Chat Test {label}",
+                "customer_email": email,
+                "message": text
+            })
+            conversation_id = response.json().get("id")
+        self.conversation_ids.append(conversation_id)
+        return conversation_id
+
+    def get_conversation(self, conversation_id, **params):
+        response = requests.get(
+            f"{self.base_url}/chat/conversations/{conversation_id}",
+            params=params,
+            headers=self.admin_headers()
+        )
+        return response.json()
+
+    def total_unread(self):
+        response = requests.get(f"{self.base_url}/chat/inbox", params={"limit": 1}, headers=self.admin_headers())
+        return response.json()["totalUnread"]
+
+    def test_mark_read(self):
+        """Mark-read clears only this conversation's customer messages, once"""
+        print("\n🔍 Testing mark as read...")
+        read_id = self.start_conversation("read", ["first", "second", "third"])
+        other_id = self.start_conversation("other", ["untouched"])
+        requests.post(
+            f"{self.base_url}/chat/conversations/{read_id}/reply",
+            json={"message": "admin reply"},
+            headers=self.admin_headers()
+        )
+        requests.post(f"{self.base_url}/chat/messages", json={
+            "customer_name": "Chat Test read",
+            "customer_email": f"chat-read-{self.run_id}@example.com",
+            "message": "fourth"
+        })
+
+        before = self.total_unread()
+        conversation = self.get_conversation(read_id)
+        self.log_result(
+            "Unread Count Before Read",
+            conversation["unreadCount"] == 4,
+            f"Unread count {conversation['unreadCount']}, expected 4"
+        )
+
+        response = requests.put(f"{self.base_url}/chat/conversations/{read_id}/read", headers=self.admin_headers())
+        self.log_result("Mark Read", response.status_code == 200, f"Status {response.status_code}")
+
+        conversation = self.get_conversation(read_id)
+        customer = [m for m in conversation["messages"] if m["sender"] == "customer"]
+        admin = [m for m in conversation["messages"] if m["sender"] == "admin"]
+        self.log_result(
+            "Customer Messages Read",
+            conversation["unreadCount"] == 0 and len(customer) == 4 and all(m["read"] for m in customer),
+            f"Unread count {conversation['unreadCount']}, unread customer messages {[m['message'] for m in customer if not m['read']]}"
+        )
+        self.log_result(
+            "Admin Messages Untouched",
+            len(admin) == 1 and admin[0]["message"] == "admin reply",
+            f"Admin messages {admin}"
+        )
+
+        other = self.get_conversation(other_id)
+        self.log_result(
+            "Other Conversation Still Unread",
+            other["unreadCount"] == 1 and not other["messages"][0]["read"],
+            f"Unread count {other['unreadCount']}"
+        )
+
+        after_first = self.total_unread()
+        self.log_result(
+            "Total Unread Decremented",
+            after_first == before - 4,
+            f"Total went from {before} to {after_first}, expected {before - 4}"
+        )
+
+        requests.put(f"{self.base_url}/chat/conversations/{read_id}/read", headers=self.admin_headers())
+        after_second = self.total_unread()
+        self.log_result(
+            "Second Read Changes Nothing",
+            after_second == after_first,
+            f"Total went from {after_first} to {after_second}"
+        )
+
+    def test_messages_after(self):
+        """?after=<message id> and ?after=<timestamp> return only newer messages"""
+        print("\n🔍 Testing incremental message fetches...")
+        conversation_id = self.start_conversation("after", [f"message {i}" for i in range(5)])
+        messages = self.get_conversation(conversation_id)["messages"]
+        if len(messages) != 5:
+            self.log_result("Messages Stored", False, f"{len(messages)} messages stored, expected 5")
+            return
+        newer = [m["id"] for m in messages[2:]]
+
+        for label, after in [("Id", messages[1]["id"]), ("Timestamp", messages[1]["timestamp"])]:
+            page = self.get_conversation(conversation_id, after=after)
+            self.log_result(
+                f"After {label} Returns Newer",
+                [m["id"] for m in page["messages"]] == newer and page["hasMore"] is False,
+                f"Got {[m['message'] for m in page['messages']]}, hasMore {page['hasMore']}"
+            )
+
+            page = self.get_conversation(conversation_id, after=after, limit=2)
+            self.log_result(
+                f"After {label} Sets hasMore",
+                [m["id"] for m in page["messages"]] == newer[:2] and page["hasMore"] is True,
+                f"Got {[m['message'] for m in page['messages']]}, hasMore {page['hasMore']}"
+            )
+
+        page = self.get_conversation(conversation_id, after=messages[-1]["id"])
+        self.log_result(
+            "After Newest Is Empty",
+            page["messages"] == [] and page["hasMore"] is False,
+            f"Got {len(page['messages'])} messages, hasMore {page['hasMore']}"
+        )
+
+        response = requests.get(f"{self.base_url}/chat/user-conversation", params={
+            "email": f"chat-after-{self.run_id}@example.com",
+            "after": messages[1]["id"],
+            "limit": 2
+        })
+        conversation = response.json().get("conversation") or {}
+        self.log_result(
+            "Public After Sets hasMore",
+            [m["id"] for m in conversation.get("messages", [])] == newer[:2] and conversation.get("hasMore") is True,
+            f"Status {response.status_code}, body {response.json()}"
+        )
+
+    def tie_last_message_at(self, conversation_ids):
+        """Give the conversations one shared last_message_at, if the database is reachable"""
+        mongodb_uri = os.environ.get("MONGODB_URI")
+        if not mongodb_uri:
+            print("   MONGODB_URI not set, paging without forced ties")
+            return False
+        from pymongo import MongoClient
+        client = MongoClient(mongodb_uri)
+        try:
+            db = client[os.environ.get("DB_NAME", "promptforge_dev_db")]
+            # Newer than any real message, so the tied rows head the inbox
+            db.conversations.update_many(
+                {"id": {"$in": conversation_ids}},
+                {"$set": {"last_message_at": "2999-01-01T00:00:00"}}
+            )
+        finally:
+            client.close()
+        return True
+
+    def test_inbox_paging(self):
+        """Inbox pages keep every conversation exactly once when last_message_at ties"""
+        print("\n🔍 Testing inbox paging...")
+        tied_ids = [self.start_conversation(f"inbox{i}", [f"inbox message {i}"]) for i in range(5)]
+        tied = self.tie_last_message_at(tied_ids)
+
+        seen = []
+        cursor = None
+        while True:
+            params = {"limit": 2}
+            if cursor:
+                params["cursor"] = cursor
+            response = requests.get(f"{self.base_url}/chat/inbox", params=params, headers=self.admin_headers())
+            if response.status_code != 200:
+                self.log_result("Inbox Page", False, f"Status {response.status_code}: {response.text}")
+                return
+            data = response.json()
+            seen.extend(c["id"] for c in data["conversations"])
+            cursor = data["nextCursor"]
+            if not cursor:
+                break
+
+        duplicates = {i for i in seen if seen.count(i) > 1}
+        self.log_result("Inbox Pages Do Not Repeat", not duplicates, f"Repeated: {duplicates}")
+        missing = [i for i in tied_ids if i not in seen]
+        self.log_result("Inbox Pages Do Not Skip", not missing, f"Missing: {missing}")
+        if tied:
+            # Ties are broken by id, newest id first
+            expected = sorted(tied_ids, reverse=True)
+            self.log_result(
+                "Tied Rows Ordered By Id",
+                seen[:len(expected)] == expected,
+                f"Got {seen[:len(expected)]}, expected {expected}"
+            )
+
+    def cleanup_test_data(self):
+        """Delete the conversations created by this test"""
+        print("\n🧹 Deleting test data...")
+        for conversation_id in self.conversation_ids:
+            if conversation_id:
+                requests.delete(f"{self.base_url}/chat/conversations/{conversation_id}", headers=self.admin_headers())
+
+    def run_all_tests(self):
+        print("🚀 Starting Chat Tests")
+        print("=" * 70)
+
+        if not self.test_admin_login():
+            return False
+
+        try:
+            self.test_mark_read()
+            self.test_messages_after()
+            self.test_inbox_paging()
+        finally:
+            self.cleanup_test_data()
+
+        print("\n" + "=" * 70)
+        print("📊 CHAT TEST SUMMARY")
+        print("=" * 70)
+        print(f"Total Tests: {self.tests_run}")
+        print(f"Passed: {self.tests_passed}")
+        print(f"Failed: {len(self.failed_tests)}")
+
+        if self.failed_tests:
+            print("\n❌ FAILED TESTS:")
+            for test in self.failed_tests:
+                print(f"   • {test['test']}: {test['error']}")
+
+        return len(self.failed_tests) == 0
+
+def main():
+    """Main test execution"""
+    tester = ChatTester()
+    success = tester.run_all_tests()
+
+    results = {
+        "timestamp": datetime.now().isoformat(),
+        "total_tests": tester.tests_run,
+        "passed_tests": tester.tests_passed,
+        "failed_tests": len(tester.failed_tests),
+        "failed_test_details": tester.failed_tests
+    }
+    print(json.dumps(results, indent=2))
+
+    return 0 if success else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Concurrent Intake Test
+Fires N parallel first chat messages, newsletter sign-ups and client creations
+for one email each and checks that exactly one record is created every time
+"""
+
+import requests
+import sys
+import json
+import time
+import uuid
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+class ConcurrentIntakeTester:
+    def __init__(self, base_url="http://localhost:8001/api", parallel_requests=100):
+        self.base_url = base_url
+        self.parallel_requests = parallel_requests
+        self.admin_token = None
+        self.tests_run = 0
+        self.tests_passed = 0
+        self.failed_tests = []
+        self.run_id = str(uuid.uuid4())[:8]
+        self.conversation_ids = []
+        self.subscriber_ids = []
+        self.client_ids = []
+
+    def log_result(self, test_name, success, error=None):
+        """Log test results"""
+        self.tests_run += 1
+        if success:
+            self.tests_passed += 1
+            print(f"✅ {test_name} - PASSED")
+        else:
+            self.failed_tests.append({"test": test_name, "error": error})
+            print(f"❌ {test_name} - FAILED: {error}")
+
+    def admin_headers(self):
+        return {"Authorization": f"Bearer {self.admin_token}"}
+
+    def test_admin_login(self):
+        """Admin login, needed to inspect and clean up the created records"""
+        response = requests.post(f"{self.base_url}/admins/login", json={
+            "username": "admin",
+            "password": "admin123"
+        })
+        success = response.status_code == 200 and "token" in response.json()
+        if success:
+            self.admin_token = response.json()["token"]
+        self.log_result("Admin Login", success, None if success else f"Status {response.status_code}")
+        return success
+
+    def in_parallel(self, request):
+        """Run request(i) for every i at once and return (status, body) pairs"""
+        def call(i):
+            response = request(i)
+            # Password hashing sheds load with 429 beyond its queue limit
+            while response.status_code == 429:
+                time.sleep(0.2)
+                response = request(i)
+            return response.status_code, response.json() if response.content else {}
+
+        with ThreadPoolExecutor(max_workers=self.parallel_requests) as executor:
+            return list(executor.map(call, range(self.parallel_requests)))
+
+    def test_parallel_chat_messages(self):
+        """N parallel messages from a new email: one conversation holding all N"""
+        email = f"intake-chat-{self.run_id}@example.com"
+        print(f"\n🔍 Sending {self.parallel_requests} parallel chat messages...")
+        results = self.in_parallel(lambda i: requests.post(f"{self.base_url}/chat/messages", json={
+            "customer_name": "Intake Test",
+            "customer_email": email,
+            "message": f"concurrent intake message {i}"
+        }))
+
+        failures = [(status, body) for status, body in results if status != 200]
+        self.log_result("All Messages Accepted", not failures, f"{len(failures)} failed: {failures[:3]}")
+
+        ids = {body.get("id") for status, body in results if status == 200}
+        started = [body for status, body in results if body.get("message") == "Conversation started successfully"]
+        self.log_result("Same Conversation Returned", len(ids) == 1, f"{len(ids)} conversation ids returned")
+        self.log_result("One Conversation Started", len(started) == 1, f"{len(started)} responses started a conversation")
+
+        response = requests.get(f"{self.base_url}/chat/conversations", headers=self.admin_headers())
+        conversations = [c for c in response.json().get("conversations", []) if c["customerEmail"] == email]
+        self.conversation_ids = [c["id"] for c in conversations]
+        self.log_result("One Conversation Stored", len(conversations) == 1, f"{len(conversations)} conversations for {email}")
+        if len(conversations) == 1:
+            # The list carries only the newest messages; the conversation endpoint takes a limit
+            response = requests.get(
+                f"{self.base_url}/chat/conversations/{conversations[0]['id']}",
+                params={"limit": self.parallel_requests},
+                headers=self.admin_headers()
+            )
+            conversation = response.json()
+            self.log_result(
+                "No Message Lost",
+                len(conversation["messages"]) == self.parallel_requests,
+                f"{len(conversation['messages'])} messages stored, expected {self.parallel_requests}"
+            )
+            self.log_result(
+                "Unread Count Matches",
+                conversation["unreadCount"] == self.parallel_requests,
+                f"Unread count {conversation['unreadCount']}, expected {self.parallel_requests}"
+            )
+
+    def test_parallel_newsletter_subscriptions(self):
+        """N parallel sign-ups for one email: one subscriber, the rest already subscribed"""
+        email = f"intake-newsletter-{self.run_id}@example.com"
+        print(f"\n🔍 Sending {self.parallel_requests} parallel newsletter sign-ups...")
+        results = self.in_parallel(lambda i: requests.post(
+            f"{self.base_url}/newsletter/subscribe", json={"email": email}
+        ))
+
+        statuses = [body.get("status") for status, body in results if status == 200]
+        self.log_result(
+            "All Sign-ups Answered",
+            len(statuses) == self.parallel_requests,
+            f"{self.parallel_requests - len(statuses)} sign-ups failed"
+        )
+        self.log_result(
+            "One Subscription Created",
+            statuses.count("subscribed") == 1 and statuses.count("already_subscribed") == self.parallel_requests - 1,
+            f"subscribed={statuses.count('subscribed')}, already_subscribed={statuses.count('already_subscribed')}"
+        )
+
+        response = requests.get(f"{self.base_url}/newsletter/admin/all", headers=self.admin_headers())
+        subscribers = [s for s in response.json() if s["email"] == email]
+        self.subscriber_ids = [s["id"] for s in subscribers]
+        self.log_result("One Subscriber Stored", len(subscribers) == 1, f"{len(subscribers)} subscribers for {email}")
+
+    def test_parallel_client_creation(self):
+        """N parallel creations of one client: one 200, the rest 'Email already registered'"""
+        email = f"intake-client-{self.run_id}@example.com"
+        print(f"\n🔍 Creating the same client {self.parallel_requests} times in parallel...")
+        results = self.in_parallel(lambda i: requests.post(f"{self.base_url}/admin/clients/", json={
+            "name": "Intake Test Client",
+            "email": email,
+            "password": "intake-test-password"
+        }, headers=self.admin_headers()))
+
+        created = [body for status, body in results if status == 200]
+        rejected = [body for status, body in results if status == 400]
+        print(f"   Created: {len(created)}, rejected: {len(rejected)}")
+        self.log_result("One Client Created", len(created) == 1, f"{len(created)} clients created")
+        self.log_result(
+            "Duplicates Rejected",
+            len(rejected) == self.parallel_requests - 1
+            and all(body.get("detail") == "Email already registered" for body in rejected),
+            f"{len(rejected)} rejected, unexpected bodies: {[b for b in rejected if b.get('detail') != 'Email already registered'][:3]}"
+        )
+
+        response = requests.get(f"{self.base_url}/admin/clients/", headers=self.admin_headers())
+        clients = [c for c in response.json() if c["email"] == email]
+        self.client_ids = [c["id"] for c in clients]
+        self.log_result("One Client Stored", len(clients) == 1, f"{len(clients)} clients for {email}")
+
+    def cleanup_test_data(self):
+        """Delete the conversation, subscriber and client created by this test"""
+        print("\n🧹 Deleting test data...")
+        for conversation_id in self.conversation_ids:
+            requests.delete(f"{self.base_url}/chat/conversations/{conversation_id}", headers=self.admin_headers())
+        for subscriber_id in self.subscriber_ids:
+            requests.delete(f"{self.base_url}/newsletter/admin/{subscriber_id}", headers=self.admin_headers())
+        for client_id in self.client_ids:
+            requests.delete(f"{self.base_url}/admin/clients/{client_id}", headers=self.admin_headers())
+
+    def run_all_tests(self):
+        print("🚀 Starting Concurrent Intake Tests")
+        print("=" * 70)
+
+        if not self.test_admin_login():
+            return False
+
+        try:
+            self.test_parallel_chat_messages()
+            self.test_parallel_newsletter_subscriptions()
+            self.test_parallel_client_creation()
+        finally:
+            self.cleanup_test_data()
+
+        print("\n" + "=" * 70)
+        print("📊 CONCURRENT INTAKE TEST SUMMARY")
+        print("=" * 70)
+        print(f"Total Tests: {self.tests_run}")
+        print(f"Passed: {self.tests_passed}")
+        print(f"Failed: {len(self.failed_tests)}")
+
+        if self.failed_tests:
+            print("\n❌ FAILED TESTS:")
+            for test in self.failed_tests:
+                print(f"   • {test['test']}: {test['error']}")
+
+        return len(self.failed_tests) == 0
+
+def main():
+    """Main test execution"""
+    parallel_requests = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    tester = ConcurrentIntakeTester(parallel_requests=parallel_requests)
+    success = tester.run_all_tests()
+
+    results = {
+        "timestamp": datetime.now().isoformat(),
+        "parallel_requests": parallel_requests,
+        "total_tests": tester.tests_run,
+        "passed_tests": tester.tests_passed,
+        "failed_tests": len(tester.failed_tests),
+        "failed_test_details": tester.failed_tests
+    }
+    print(json.dumps(results, indent=2))
+
+    return 0 if success else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
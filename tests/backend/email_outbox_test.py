@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Email Outbox Backend Testing
+Checks that bookings only enqueue email and that the outbox worker delivers,
+retries and gives up as expected, using the fake Brevo server.
+
+Start the fake server and the backend first:
+    python tests/backend/fake_brevo_server.py 8025
+    BREVO_API_KEY=test BREVO_API_URL=http://localhost:8025/v3/smtp/email \\
+    EMAIL_RETRY_BASE_SECONDS=1 EMAIL_MAX_ATTEMPTS=3 EMAIL_OUTBOX_POLL_SECONDS=1 \\
+    uvicorn server:app --port 8001
+"""
+
+import requests
+import sys
+import time
+import uuid
+from datetime import date, timedelta
+
+class EmailOutboxTester:
+    def __init__(self, base_url="http://localhost:8001/api", brevo_url="http://localhost:8025"):
+        self.base_url = base_url
+        self.brevo_url = brevo_url
+        self.admin_token = None
+        self.tests_run = 0
+        self.tests_passed = 0
+        self.failed_tests = []
+        self.created_booking_ids = []
+
+    def log_result(self, test_name, success, error=None):
+        """Log test results"""
+        self.tests_run += 1
+        if success:
+            self.tests_passed += 1
+            print(f"✅ {test_name} - PASSED")
+        else:
+            self.failed_tests.append({"test": test_name, "error": error})
+            print(f"❌ {test_name} - FAILED: {error}")
+
+    def admin_headers(self):
+        return {"Authorization": f"Bearer {self.admin_token}"}
+
+    def test_admin_login(self):
+        response = requests.post(f"{self.base_url}/admins/login", json={"username": "admin", "password": "admin123"})
+        success = response.status_code == 200 and "token" in response.json()
+        if success:
+            self.admin_token = response.json()["token"]
+        self.log_result("Admin Login", success, None if success else f"Status {response.status_code}")
+        return success
+
+    def create_booking(self):
+        """Book the first open slot; returns (status, seconds taken)"""
+        start = (date.today() + timedelta(days=1)).isoformat()
+        slots = requests.get(f"{self.base_url}/bookings/available-slots", params={"start_date": start, "days": 30}).json()
+        slot = next((s for s in slots if s["is_available"]), None)
+        if not slot:
+            return None, 0
+
+        unique_id = str(uuid.uuid4())[:8]
+        started = time.perf_counter()
+        response = requests.post(f"{self.base_url}/bookings/", json={
+            "name": f"Outbox Test {unique_id}",
+            "email": f"outbox{unique_id}@example.com",
+            "phone": "+1234567890",
+            "preferred_date": slot["date"],
+            "preferred_time_slot": slot["time_slot"],
+        })
+        elapsed = time.perf_counter() - started
+        if response.status_code == 200:
+            self.created_booking_ids.append(response.json()["id"])
+        return response.status_code, elapsed
+
+    def wait_for_emails(self, count, timeout=20):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            received = requests.get(f"{self.brevo_url}/received").json()
+            if len(received["received"]) >= count:
+                return received
+            time.sleep(0.5)
+        return requests.get(f"{self.brevo_url}/received").json()
+
+    def test_enqueue_is_fast_even_when_brevo_is_slow(self):
+        """The booking request must not wait for the email provider"""
+        requests.post(f"{self.brevo_url}/reset")
+        requests.post(f"{self.brevo_url}/configure", json={"delay_seconds": 3})
+
+        status, elapsed = self.create_booking()
+        self.log_result("Booking Created", status == 200, f"Status {status}")
+        self.log_result("Booking Does Not Wait For Email", elapsed < 1.5, f"Took {elapsed:.2f}s with a 3s provider")
+
+        received = self.wait_for_emails(1)
+        self.log_result("Email Delivered By Worker", len(received["received"]) == 1, f"Received {received}")
+
+    def test_retry_after_failures(self):
+        """Two 500s, then success: the email arrives once"""
+        requests.post(f"{self.brevo_url}/reset")
+        requests.post(f"{self.brevo_url}/configure", json={"fail_next": 2, "fail_status": 500})
+
+        status, _ = self.create_booking()
+        received = self.wait_for_emails(1, timeout=30)
+        self.log_result(
+            "Email Delivered After Retries",
+            len(received["received"]) == 1 and received["attempts"] >= 3,
+            f"{received['attempts']} attempts, {len(received['received'])} delivered"
+        )
+
+    def test_dead_letter(self):
+        """A 400 from the provider is not retried and ends up dead"""
+        requests.post(f"{self.brevo_url}/reset")
+        requests.post(f"{self.brevo_url}/configure", json={"fail_next": 1, "fail_status": 400})
+        before = requests.get(f"{self.base_url}/admins/email-outbox/stats", headers=self.admin_headers()).json()
+
+        self.create_booking()
+        time.sleep(5)
+        after = requests.get(f"{self.base_url}/admins/email-outbox/stats", headers=self.admin_headers()).json()
+        received = requests.get(f"{self.brevo_url}/received").json()
+
+        self.log_result(
+            "Rejected Email Marked Dead",
+            after["by_status"]["dead"] == before["by_status"]["dead"] + 1 and received["attempts"] == 1,
+            f"dead {before['by_status']['dead']} -> {after['by_status']['dead']}, {received['attempts']} attempts"
+        )
+
+    def cleanup_test_data(self):
+        for booking_id in self.created_booking_ids:
+            requests.delete(f"{self.base_url}/bookings/admin/{booking_id}", headers=self.admin_headers())
+        requests.post(f"{self.brevo_url}/reset")
+
+    def run_all_tests(self):
+        print("🚀 Starting Email Outbox Tests")
+        print("=" * 70)
+
+        try:
+            requests.get(f"{self.brevo_url}/received", timeout=2)
+        except requests.exceptions.RequestException:
+            print(f"❌ Fake Brevo server not reachable at {self.brevo_url}")
+            return False
+
+        if not self.test_admin_login():
+            return False
+
+        self.test_enqueue_is_fast_even_when_brevo_is_slow()
+        self.test_retry_after_failures()
+        self.test_dead_letter()
+        self.cleanup_test_data()
+
+        print("\n" + "=" * 70)
+        print("📊 EMAIL OUTBOX TEST SUMMARY")
+        print("=" * 70)
+        print(f"Total Tests: {self.tests_run}")
+        print(f"Passed: {self.tests_passed}")
+        print(f"Failed: {len(self.failed_tests)}")
+
+        if self.failed_tests:
+            print("\n❌ FAILED TESTS:")
+            for test in self.failed_tests:
+                print(f"   • {test['test']}: {test['error']}")
+
+        return len(self.failed_tests) == 0
+
+def main():
+    tester = EmailOutboxTester()
+    return 0 if tester.run_all_tests() else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Fake Brevo transactional email API for local testing
+
+Accepts POST /v3/smtp/email like Brevo and records the payloads instead of
+sending anything. Start the backend with
+    BREVO_API_KEY=test BREVO_API_URL=http://localhost:8025/v3/smtp/email
+to route the email outbox here.
+
+Control endpoints:
+    GET  /received          -> list of recorded payloads
+    POST /reset             -> clear recorded payloads and failure settings
+    POST /configure         -> {"fail_next": 2, "fail_status": 500, "delay_seconds": 0}
+
+Usage:
+    python tests/backend/fake_brevo_server.py [port]
+"""
+
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class FakeBrevoState:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.received = []
+        self.attempts = 0
+        self.fail_next = 0
+        self.fail_status = 500
+        self.delay_seconds = 0.0
+
+state = FakeBrevoState()
+
+class FakeBrevoHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def read_json(self):
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def do_GET(self):
+        if self.path == "/received":
+            with state.lock:
+                self.send_json(200, {"attempts": state.attempts, "received": state.received})
+        else:
+            self.send_json(404, {"message": "Not found"})
+
+    def do_POST(self):
+        body = self.read_json()
+
+        if self.path == "/reset":
+            with state.lock:
+                state.reset()
+            return self.send_json(200, {"status": "reset"})
+
+        if self.path == "/configure":
+            with state.lock:
+                state.fail_next = int(body.get("fail_next", state.fail_next))
+                state.fail_status = int(body.get("fail_status", state.fail_status))
+                state.delay_seconds = float(body.get("delay_seconds", state.delay_seconds))
+            return self.send_json(200, {"status": "configured"})
+
+        if self.path != "/v3/smtp/email":
+            return self.send_json(404, {"message": "Not found"})
+
+        if not self.headers.get("api-key"):
+            return self.send_json(401, {"code": "unauthorized", "message": "Key not found"})
+
+        with state.lock:
+            state.attempts += 1
+            delay = state.delay_seconds
+            fail = state.fail_next > 0
+            if fail:
+                state.fail_next -= 1
+            fail_status = state.fail_status
+
+        if delay:
+            time.sleep(delay)
+        if fail:
+            return self.send_json(fail_status, {"code": "fake_failure", "message": "Injected failure"})
+
+        with state.lock:
+            state.received.append(body)
+            message_id = f"<fake-{len(state.received)}@brevo.local>"
+        self.send_json(201, {"messageId": message_id})
+
+def start_fake_brevo(port=8025):
+    """Start the fake server in a background thread; returns the server"""
+    server = ThreadingHTTPServer(("0.0.0.0", port), FakeBrevoHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8025
+    print(f"📮 Fake Brevo listening on http://localhost:{port}/v3/smtp/email")
+    server = ThreadingHTTPServer(("0.0.0.0", port), FakeBrevoHandler)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
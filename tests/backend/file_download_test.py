@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+File Download Test
+Checks ETag revalidation and Range requests on /uploads, and that identical
+uploads share one content-addressed blob (same strong ETag)
+"""
+
+import requests
+import sys
+import json
+import hashlib
+import os
+from datetime import datetime
+
+class FileDownloadTester:
+    def __init__(self, base_url="http://localhost:8001"):
+        self.base_url = base_url
+        self.api_url = f"{base_url}/api"
+        self.admin_token = None
+        self.tests_run = 0
+        self.tests_passed = 0
+        self.failed_tests = []
+        self.content = os.urandom(64 * 1024)
+
+    def log_result(self, test_name, success, error=None):
+        """Log test results"""
+        self.tests_run += 1
+        if success:
+            self.tests_passed += 1
+            print(f"✅ {test_name} - PASSED")
+        else:
+            self.failed_tests.append({"test": test_name, "error": error})
+            print(f"❌ {test_name} - FAILED: {error}")
+
+    def test_admin_login(self):
+        """Admin login, needed to upload"""
+        response = requests.post(f"{self.api_url}/admins/login", json={
+            "username": "admin",
+            "password": "admin123"
+        })
+        success = response.status_code == 200 and "token" in response.json()
+        if success:
+            self.admin_token = response.json()["token"]
+        self.log_result("Admin Login", success, None if success else f"Status {response.status_code}")
+        return success
+
+    def upload(self, name):
+        response = requests.post(
+            f"{self.api_url}/storage/upload",
+            files={"file": (name, self.content, "application/octet-stream")},
+            headers={"Authorization": f"Bearer {self.admin_token}"}
+        )
+        if response.status_code != 200:
+            self.log_result(f"Upload {name}", False, f"Status {response.status_code}")
+            return None
+        return f"{self.base_url}{response.json()['url']}"
+
+    def test_full_download(self, url):
+        """Full download carries a strong ETag equal to the SHA-256"""
+        response = requests.get(url)
+        expected = f'"{hashlib.sha256(self.content).hexdigest()}"'
+        success = (response.status_code == 200 and response.content == self.content
+                   and response.headers.get("ETag") == expected
+                   and response.headers.get("Accept-Ranges") == "bytes")
+        self.log_result("Full Download", success, None if success else f"Status {response.status_code}, ETag {response.headers.get('ETag')}")
+        return response.headers.get("ETag")
+
+    def test_not_modified(self, url, etag):
+        """If-None-Match with the current ETag gets 304 and no body"""
+        response = requests.get(url, headers={"If-None-Match": etag})
+        success = response.status_code == 304 and response.content == b""
+        self.log_result("Conditional GET", success, None if success else f"Status {response.status_code}")
+
+    def test_ranges(self, url):
+        """Single ranges get 206, out-of-bounds ranges get 416"""
+        response = requests.get(url, headers={"Range": "bytes=1000-1999"})
+        success = (response.status_code == 206 and response.content == self.content[1000:2000]
+                   and response.headers.get("Content-Range") == f"bytes 1000-1999/{len(self.content)}")
+        self.log_result("Range Request", success, None if success else f"Status {response.status_code}")
+
+        response = requests.get(url, headers={"Range": "bytes=-100"})
+        success = response.status_code == 206 and response.content == self.content[-100:]
+        self.log_result("Suffix Range Request", success, None if success else f"Status {response.status_code}")
+
+        response = requests.get(url, headers={"Range": f"bytes={len(self.content)}-"})
+        success = response.status_code == 416
+        self.log_result("Unsatisfiable Range", success, None if success else f"Status {response.status_code}")
+
+    def test_duplicate_upload(self, etag):
+        """Uploading the same bytes again yields a new URL served from the same blob"""
+        url = self.upload("copy.bin")
+        if not url:
+            return
+        response = requests.get(url, headers={"If-None-Match": etag})
+        success = response.status_code == 304
+        self.log_result("Duplicate Upload Shares Blob", success, None if success else f"Status {response.status_code}")
+
+    def run_all_tests(self):
+        print("🚀 Starting File Download Tests")
+        print("=" * 70)
+
+        if not self.test_admin_login():
+            return False
+
+        url = self.upload("original.bin")
+        if url:
+            etag = self.test_full_download(url)
+            if etag:
+                self.test_not_modified(url, etag)
+                self.test_ranges(url)
+                self.test_duplicate_upload(etag)
+
+        print("\n" + "=" * 70)
+        print("📊 FILE DOWNLOAD TEST SUMMARY")
+        print("=" * 70)
+        print(f"Total Tests: {self.tests_run}")
+        print(f"Passed: {self.tests_passed}")
+        print(f"Failed: {len(self.failed_tests)}")
+
+        if self.failed_tests:
+            print("\n❌ FAILED TESTS:")
+            for test in self.failed_tests:
+                print(f"   • {test['test']}: {test['error']}")
+
+        return len(self.failed_tests) == 0
+
+def main():
+    """Main test execution"""
+    tester = FileDownloadTester()
+    success = tester.run_all_tests()
+
+    results = {
+        "timestamp": datetime.now().isoformat(),
+        "total_tests": tester.tests_run,
+        "passed_tests": tester.tests_passed,
+        "failed_tests": len(tester.failed_tests),
+        "failed_test_details": tester.failed_tests
+    }
+    print(json.dumps(results, indent=2))
+
+    return 0 if success else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
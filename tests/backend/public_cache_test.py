@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Public Cache Test
+Checks ETag revalidation and Cache-Control on public read endpoints, and that
+an admin edit changes the ETag
+"""
+
+import requests
+import sys
+import json
+from datetime import datetime
+
+class PublicCacheTester:
+    def __init__(self, base_url="http://localhost:8001"):
+        self.base_url = base_url
+        self.api_url = f"{base_url}/api"
+        self.admin_token = None
+        self.tests_run = 0
+        self.tests_passed = 0
+        self.failed_tests = []
+
+    def log_result(self, test_name, success, error=None):
+        """Log test results"""
+        self.tests_run += 1
+        if success:
+            self.tests_passed += 1
+            print(f"✅ {test_name} - PASSED")
+        else:
+            self.failed_tests.append({"test": test_name, "error": error})
+            print(f"❌ {test_name} - FAILED: {error}")
+
+    def test_admin_login(self):
+        """Admin login, needed to edit content"""
+        response = requests.post(f"{self.api_url}/admins/login", json={
+            "username": "admin",
+            "password": "admin123"
+        })
+        success = response.status_code == 200 and "token" in response.json()
+        if success:
+            self.admin_token = response.json()["token"]
+        self.log_result("Admin Login", success, None if success else f"Status {response.status_code}")
+        return success
+
+    def test_validators(self, path):
+        """Public listings carry an ETag and a public Cache-Control policy"""
+        response = requests.get(f"{self.api_url}{path}")
+        etag = response.headers.get("ETag")
+        cache_control = response.headers.get("Cache-Control", "")
+        success = response.status_code == 200 and etag is not None and cache_control.startswith("public")
+        self.log_result(f"Validators {path}", success, None if success else f"Status {response.status_code}, ETag {etag}, Cache-Control {cache_control}")
+        return etag
+
+    def test_not_modified(self, path, etag):
+        """If-None-Match with the current ETag gets 304 and no body"""
+        response = requests.get(f"{self.api_url}{path}", headers={"If-None-Match": etag})
+        success = response.status_code == 304 and response.content == b""
+        self.log_result(f"Conditional GET {path}", success, None if success else f"Status {response.status_code}")
+
+    def test_edit_changes_etag(self, etag):
+        """Editing a service invalidates the listing's ETag"""
+        services = requests.get(f"{self.api_url}/services/").json()
+        if not services:
+            self.log_result("Edit Changes ETag", False, "No services to edit")
+            return
+        service = services[0]
+        headers = {"Authorization": f"Bearer {self.admin_token}"}
+        requests.put(f"{self.api_url}/services/{service['id']}", json={"title": service["title"]}, headers=headers)
+
+        response = requests.get(f"{self.api_url}/services/", headers={"If-None-Match": etag})
+        success = response.status_code == 200 and response.headers.get("ETag") != etag
+        self.log_result("Edit Changes ETag", success, None if success else f"Status {response.status_code}")
+
+    def run_all_tests(self):
+        print("🚀 Starting Public Cache Tests")
+        print("=" * 70)
+
+        if not self.test_admin_login():
+            return False
+
+        for path in ["/services/", "/blogs/", "/pricing/"]:
+            etag = self.test_validators(path)
+            if etag:
+                self.test_not_modified(path, etag)
+
+        etag = self.test_validators("/services/")
+        if etag:
+            self.test_edit_changes_etag(etag)
+
+        print("\n" + "=" * 70)
+        print("📊 PUBLIC CACHE TEST SUMMARY")
+        print("=" * 70)
+        print(f"Total Tests: {self.tests_run}")
+        print(f"Passed: {self.tests_passed}")
+        print(f"Failed: {len(self.failed_tests)}")
+
+        if self.failed_tests:
+            print("\n❌ FAILED TESTS:")
+            for test in self.failed_tests:
+                print(f"   • {test['test']}: {test['error']}")
+
+        return len(self.failed_tests) == 0
+
+def main():
+    """Main test execution"""
+    tester = PublicCacheTester()
+    success = tester.run_all_tests()
+
+    results = {
+        "timestamp": datetime.now().isoformat(),
+        "total_tests": tester.tests_run,
+        "passed_tests": tester.tests_passed,
+        "failed_tests": len(tester.failed_tests),
+        "failed_test_details": tester.failed_tests
+    }
+    print(json.dumps(results, indent=2))
+
+    return 0 if success else 1
+
+if __name__ == "__main__":
+    sys.exit(main())